@@ -4,15 +4,30 @@ import time
 import traceback
 import io 
 import json
+import logging
 from datetime import timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, session
 from werkzeug.utils import secure_filename
-from src.services.salesforce_api import create_leads_from_csv
+from src.services.salesforce_api import create_leads_from_csv, resume_leads_from_manifest, sync_lead_index
+from src.services.bulk_manifest import BulkManifest
+from src.services import lead_keys, row_fingerprints
 from src.services.salesforce_user import get_current_user_info
 from src.utils.salesforce_logger import get_salesforce_logger
 from src.utils.conversion_logger import get_conversion_logger
 from src.utils.csv_helper import fix_salesforce_lead_csv
 from src.utils.txt_helper import process_txt_file
+from src.utils.snippet_helper import build_ai_snippet
+from src.utils.excel_helper import list_excel_sheets
+from src.utils.upload_reader import read_upload_snippet, read_upload_full, read_partial_csv_snippet
+from src.utils.mapping_helper import build_mapped_dataframe, parse_column_mapping
+from src.utils.mapping_cache import get_or_create_mapping, clear_cache as clear_mapping_cache
+from src.utils.workbook_helper import process_workbook
+from src.utils import chunked_upload
+from src.utils.request_logging import init_request_logging, log_request_body
+from src.utils.log_context import run_in_context, set_correlation_id, get_correlation_id
+from src.utils import job_store
+from src.utils.timing import span, track_job, current_job_timings, get_stage_histograms
+from src.utils import metrics
 from llm import get_ai_completion, get_column_mapping_from_ai 
 
 app = Flask(__name__)
@@ -55,10 +70,18 @@ UPLOAD_FOLDER = os.path.join(os.getcwd(), 'A converter')
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'txt'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Limita o tamanho do upload para 16MB
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Limita o tamanho de cada requisição para 16MB
+# Arquivos maiores são enviados em partes (ver rotas /upload/...), cada parte abaixo deste limite
+UPLOAD_WORKSPACE = os.path.join(UPLOAD_FOLDER, 'uploads')
+# Registros dos jobs de processamento (status e tempos por etapa)
+JOB_STORE_DIR = os.getenv('JOB_STORE_DIR', os.path.join(UPLOAD_FOLDER, 'jobs'))
 
 # Garantir que os diretórios necessários existam
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(UPLOAD_WORKSPACE, exist_ok=True)
+os.makedirs(JOB_STORE_DIR, exist_ok=True)
+
+metrics.UPLOAD_QUEUE_DEPTH.set_function(lambda: chunked_upload.pending_upload_count(UPLOAD_WORKSPACE))
 os.makedirs('logs/salesforce', exist_ok=True)
 
 # Definir a versão da API Salesforce
@@ -86,16 +109,21 @@ TARGET_SALESFORCE_SCHEMA = {
     # "ProductInterest__c": "Produto de interesse do lead."
 }
 
+# Coluna de identificação da operação dos jobs (ver lead_keys): no upsert, o arquivo pode trazer o id externo
+if lead_keys.BULK_OPERATION == 'upsert' and lead_keys.EXTERNAL_ID_FIELD:
+    TARGET_SALESFORCE_SCHEMA[lead_keys.EXTERNAL_ID_FIELD] = (
+        "Identificador único do lead no sistema de origem (código do cliente, ID do cadastro). "
+        "Deixe sem mapeamento se o arquivo não tiver essa coluna."
+    )
+elif lead_keys.BULK_OPERATION == 'update':
+    TARGET_SALESFORCE_SCHEMA["Id"] = "ID do lead no Salesforce (18 caracteres, começa com 00Q)."
+
 def allowed_file(filename):
     """Verifica se o arquivo tem uma extensão válida"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Middleware to log all requests
-@app.before_request
-def log_request_info():
-    logger.info(f"Request: {request.method} {request.url}")
-    logger.debug(f"Headers: {dict(request.headers)}")
-    logger.debug(f"Body: {request.get_data().decode('utf-8', errors='replace')}")
+# Middleware to log all requests (sem ler uploads; corpo apenas nas rotas com @log_request_body)
+init_request_logging(app, logger)
 
 @app.route('/')
 def index():
@@ -130,15 +158,47 @@ def index():
 
 import uuid
 import shutil
+import threading
+
+def _apply_lead_owner_selection(lead_owner, custom_owner_id):
+    """Define o proprietário dos leads a partir da seleção do formulário e salva na sessão."""
+    # Define o ID do proprietário com base na seleção
+    owner_id = None
+    if lead_owner == 'custom' and custom_owner_id and custom_owner_id.strip():
+        owner_id = custom_owner_id.strip()
+        owner_type = 'personalizado'
+    elif lead_owner == 'jlucas':
+        # Deixamos None para usar atribuição automática do Salesforce
+        owner_type = 'automático (jlucas)'
+    else:
+        owner_type = 'automático (regras do Salesforce)'
+    
+    # Salva na sessão para uso posterior
+    session['lead_owner'] = lead_owner
+    session['owner_id'] = owner_id
+    logger.info(f"Atribuição de leads: {owner_type} {f'(ID: {owner_id})' if owner_id else ''}")
+    return owner_id
+
+def _refresh_user_info():
+    """Tenta obter informações do usuário do Salesforce e salvá-las na sessão."""
+    try:
+        user_info = get_current_user_info()
+        if user_info:
+            logger.info(f"Informações do usuário obtidas: {user_info['name']} ({user_info['alias']})")
+            session['user_info'] = user_info
+        else:
+            logger.warning("Não foi possível obter informações do usuário do Salesforce.")
+            # Permite continuar mesmo sem informações do usuário, mas pode ser útil logar
+    except Exception as e:
+        logger.error(f"Erro ao obter informações do usuário: {str(e)}")
+        flash(f'Erro ao conectar com Salesforce: {str(e)}', 'error')
 
 @app.route('/upload_file', methods=['POST'])
 def upload_file():
     """Processa o upload do arquivo e faz conversão para CSV se necessário"""
     # Log detalhado da requisição para depuração
     logger.info("----- Início do processamento de upload_file -----")
-    logger.info(f"Headers da requisição: {dict(request.headers)}")
-    logger.info(f"Formulário: {dict(request.form)}")
-    logger.info(f"Arquivos: {list(request.files.keys())}")
+    logger.debug("Arquivos: %s", list(request.files.keys()))
     
     if 'file' not in request.files:
         logger.warning("Nenhum arquivo na requisição - 'file' não está em request.files")
@@ -166,24 +226,13 @@ def upload_file():
     logger.info(f"Ambiente selecionado: {environment}")
     
     # Pegar o proprietário selecionado para os leads
-    lead_owner = request.form.get('lead_owner', '')
-    custom_owner_id = request.form.get('custom_owner_id', '')
-    
-    # Define o ID do proprietário com base na seleção
-    owner_id = None
-    if lead_owner == 'custom' and custom_owner_id and custom_owner_id.strip():
-        owner_id = custom_owner_id.strip()
-        owner_type = 'personalizado'
-    elif lead_owner == 'jlucas':
-        # Deixamos None para usar atribuição automática do Salesforce
-        owner_type = 'automático (jlucas)'
-    else:
-        owner_type = 'automático (regras do Salesforce)'
+    _apply_lead_owner_selection(request.form.get('lead_owner', ''), request.form.get('custom_owner_id', ''))
     
-    # Salva na sessão para uso posterior
-    session['lead_owner'] = lead_owner
-    session['owner_id'] = owner_id
-    logger.info(f"Atribuição de leads: {owner_type} {f'(ID: {owner_id})' if owner_id else ''}")
+    # Origem do arquivo (parceiro) para a importação incremental; sem ela, vale o nome do arquivo
+    session['import_source'] = request.form.get('source', '').strip()
+
+    # Refazer o mapeamento de colunas com a IA, ignorando o cache de layouts (ver mapping_cache)
+    session['refresh_mapping'] = bool(request.form.get('refresh_mapping'))
     
     # Verificar o tipo de arquivo
     if not allowed_file(file.filename):
@@ -195,19 +244,7 @@ def upload_file():
     logger.info(f"Arquivo válido detectado: {file.filename}")
     
     # Tenta obter informações do usuário do Salesforce
-    try:
-        user_info = get_current_user_info()
-        if user_info:
-            logger.info(f"Informações do usuário obtidas: {user_info['name']} ({user_info['alias']})")
-            session['user_info'] = user_info
-        else:
-            logger.warning("Não foi possível obter informações do usuário do Salesforce.")
-            # Permite continuar mesmo sem informações do usuário, mas pode ser útil logar
-    except Exception as e:
-        logger.error(f"Erro ao obter informações do usuário: {str(e)}")
-        flash(f'Erro ao conectar com Salesforce: {str(e)}', 'error')
-        # Decide se quer redirecionar ou permitir continuar
-        # return redirect(url_for('index'))
+    _refresh_user_info()
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
@@ -236,49 +273,133 @@ def upload_file():
             flash('Erro ao salvar o arquivo. Por favor, tente novamente.')
             return redirect(url_for('index'))
 
-        output_filename = 'leads-semformatado.csv'
-        output_filepath = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
-        final_ai_mapped_filepath = output_filepath # O arquivo final será o mapeado pela IA
+        return _process_saved_upload(temp_filepath, filename, original_file_ext, environment)
 
-        try:
-            conversion_logger.info(f"Iniciando processamento do arquivo: {filename}")
-            df_snippet = None
-            file_content_for_ai = ""
+    else:
+        flash('Tipo de arquivo não permitido.')
+        conversion_logger.warning(f"Tentativa de upload de arquivo não permitido: {file.filename if file else 'N/A'}")
+        return redirect(url_for('index'))
+
+def _process_saved_upload(temp_filepath, filename, original_file_ext, environment, column_mapping=None):
+    """
+    Converte um arquivo já salvo e envia os leads para o Salesforce, registrando
+    o job (status e tempo de cada etapa) no armazenamento de jobs.
+
+    O id do job é gerado no servidor e devolvido no cabeçalho X-Job-ID; o id de
+    correlação atual (id da requisição ou do upload em partes), que pode vir do
+    cliente, é guardado apenas como campo do job.
+
+    Returns:
+        Response: Redirecionamento para a página de resultado (ou para o início em caso de erro)
+    """
+    job_id = job_store.new_job_id()
+    job_store.create_job(JOB_STORE_DIR, job_id, filename=filename, file_ext=original_file_ext, environment=environment,
+                         correlation_id=get_correlation_id())
+    metrics.UPLOADS_IN_FLIGHT.inc()
+    try:
+        with track_job(job_id) as timings:
+            response = _run_upload_pipeline(temp_filepath, filename, original_file_ext, environment, column_mapping)
+    finally:
+        metrics.UPLOADS_IN_FLIGHT.dec()
+
+    _finish_job(job_id, timings, response.location == url_for('resultado'))
+    response.headers['X-Job-ID'] = job_id
+    return response
+
+def _finish_job(job_id, timings, has_result):
+    """
+    Registra o status final e os tempos do job no armazenamento de jobs.
+
+    O CSV mapeado, guardado para a retomada da ingestão, é removido quando todos
+    os jobs do Salesforce terminaram (o manifest é mantido como histórico).
+    """
+    result = session.get('result') if has_result else None
+    status = ('completed' if result.get('success') else 'failed') if result else 'failed'
+    manifest = BulkManifest.load(job_store.job_file_path(JOB_STORE_DIR, job_id, '.bulk.json'))
+    mapped_csv_path = job_store.job_file_path(JOB_STORE_DIR, job_id, '.mapped.csv')
+    if manifest is not None and not manifest.is_settled():
+        status = 'incomplete'
+    elif os.path.exists(mapped_csv_path):
+        os.remove(mapped_csv_path)
+    job_store.update_job(
+        JOB_STORE_DIR, job_id, status=status, timings=timings.as_dict(),
+        created_count=result.get('created_count') if result else None,
+        total_count=result.get('total_count') if result else None
+    )
+    metrics.UPLOAD_JOBS.inc(status=status)
+    if result and result.get('total_count'):
+        metrics.ROWS_PROCESSED.inc(result['total_count'])
+        metrics.UPLOAD_ROWS_PER_SECOND.observe(result['total_count'] / max(timings.elapsed_ms() / 1000, 0.001))
+    conversion_logger.info(f"Job {job_id} finalizado ({status}) em {timings.elapsed_ms():.1f} ms",
+                           extra={'stage': 'upload_job', 'duration_ms': timings.elapsed_ms()})
+
+def _mapped_csv_path():
+    """
+    Caminho do CSV mapeado do upload atual: no armazenamento de jobs (<job_id>.mapped.csv),
+    onde fica também para a retomada da ingestão, ou um arquivo próprio da requisição.
+    Uploads simultâneos não compartilham o arquivo.
+    """
+    timings = current_job_timings()
+    if timings is not None:
+        return job_store.job_file_path(JOB_STORE_DIR, timings.job_id, '.mapped.csv')
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"leads-semformatado-{uuid.uuid4().hex}.csv")
+
+def _run_upload_pipeline(temp_filepath, filename, original_file_ext, environment, column_mapping=None):
+    """
+    Converte um arquivo já salvo e envia os leads para o Salesforce.
 
+    Args:
+        temp_filepath (str): Caminho do arquivo original salvo
+        filename (str): Nome original (seguro) do arquivo
+        original_file_ext (str): Extensão do arquivo
+        environment (str): Ambiente do Salesforce
+        column_mapping (dict, optional): Mapeamento de colunas já obtido da IA
+            (uploads em partes iniciam o mapeamento antes do fim do envio)
+
+    Returns:
+        Response: Redirecionamento para a página de resultado (ou para o início em caso de erro)
+    """
+    final_ai_mapped_filepath = _mapped_csv_path() # O arquivo final será o mapeado pela IA
+
+    try:
+        conversion_logger.info(f"Iniciando processamento do arquivo: {filename}")
+
+        # Planilhas com várias abas: cada layout é mapeado uma vez e as abas são convertidas em paralelo
+        if original_file_ext in ('xls', 'xlsx'):
+            sheet_names = list_excel_sheets(temp_filepath)
+            if len(sheet_names) > 1:
+                try:
+                    with span('workbook_processing', sheets=len(sheet_names)):
+                        final_mapped_df, sheets_summary = process_workbook(
+                            temp_filepath,
+                            TARGET_SALESFORCE_SCHEMA,
+                            lambda snippet: get_column_mapping_from_ai(snippet, TARGET_SALESFORCE_SCHEMA),
+                            sheet_names=sheet_names,
+                            refresh_mapping=session.get('refresh_mapping', False)
+                        )
+                    conversion_logger.info(f"Resumo das abas processadas: {sheets_summary}")
+                except Exception as e_workbook:
+                    conversion_logger.error(f"Erro ao processar as abas da planilha '{filename}': {str(e_workbook)}")
+                    conversion_logger.debug(traceback.format_exc())
+                    flash(f'Erro ao processar as abas da planilha: {str(e_workbook)}', 'error')
+                    if os.path.exists(temp_filepath):
+                        os.remove(temp_filepath)
+                    return redirect(url_for('index'))
+                return _submit_mapped_leads(final_mapped_df, final_ai_mapped_filepath, filename, temp_filepath, environment)
+
+        if column_mapping:
+            conversion_logger.info(f"Usando mapeamento de colunas obtido durante o envio: {column_mapping}")
+        else:
             # 1. Ler um snippet do arquivo para a IA
             conversion_logger.info("Preparando snippet do arquivo para análise da IA...")
             try:
-                if original_file_ext == 'csv':
-                    # Tentar com diferentes delimitadores comuns e codificações para CSV
-                    common_delimiters = [',', ';', '\t']
-                    common_encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-                    read_success = False
-                    for enc in common_encodings:
-                        for delim in common_delimiters:
-                            try:
-                                df_snippet = pd.read_csv(temp_filepath, nrows=10, sep=delim, encoding=enc, on_bad_lines='skip')
-                                if not df_snippet.empty and len(df_snippet.columns) > 1:
-                                    conversion_logger.info(f"Snippet CSV lido com sucesso usando delimitador '{delim}' e encoding '{enc}'.")
-                                    read_success = True
-                                    break
-                                else:
-                                    conversion_logger.debug(f"Tentativa de leitura CSV (delim='{delim}', enc='{enc}') resultou em DF vazio ou com uma coluna.")
-                            except Exception as e_read_csv:
-                                conversion_logger.debug(f"Falha ao ler snippet CSV com delimitador '{delim}', encoding '{enc}': {e_read_csv}")
-                        if read_success: break
-                    if not read_success:
-                        raise ValueError("Não foi possível ler o arquivo CSV com delimitadores e codificações comuns.")
-                elif original_file_ext == 'xls':
-                    df_snippet = pd.read_excel(temp_filepath, nrows=10, engine='xlrd')
-                elif original_file_ext == 'xlsx':
-                    df_snippet = pd.read_excel(temp_filepath, nrows=10, engine='openpyxl')
-                else:
-                    raise ValueError(f"Tipo de arquivo não suportado para snippet: {original_file_ext}")
+                with span('snippet_read'):
+                    df_snippet = read_upload_snippet(temp_filepath, original_file_ext)
                 
                 if df_snippet is not None and not df_snippet.empty:
-                    file_content_for_ai = df_snippet.to_csv(index=False, sep=';') # Usar ; como separador para o prompt da IA
-                    conversion_logger.info(f"Snippet do arquivo (primeiras {len(df_snippet)} linhas) preparado para IA.")
-                    conversion_logger.debug(f"Conteúdo do snippet para IA:\n{file_content_for_ai[:500]}...") # Logar uma parte do snippet
+                    file_content_for_ai = build_ai_snippet(df_snippet) # Usa ; como separador para o prompt da IA
+                    conversion_logger.info(f"Snippet do arquivo (amostra de {len(df_snippet)} linhas, {len(file_content_for_ai)} caracteres) preparado para IA.")
+                    conversion_logger.debug("Conteúdo do snippet para IA:\n%s...", file_content_for_ai[:500]) # Logar uma parte do snippet
                 else:
                     conversion_logger.warning("Snippet do DataFrame está vazio ou não foi lido.")
                     raise ValueError("Não foi possível gerar snippet do arquivo para a IA.")
@@ -294,15 +415,14 @@ def upload_file():
 
             # 2. Obter o mapeamento de colunas da IA
             conversion_logger.info("Consultando IA para mapeamento de colunas...")
-            column_mapping = None
             try:
-                column_mapping_json = get_column_mapping_from_ai(file_content_for_ai, TARGET_SALESFORCE_SCHEMA)
-                if isinstance(column_mapping_json, str): # Se a IA retornou uma string JSON
-                    column_mapping = json.loads(column_mapping_json)
-                elif isinstance(column_mapping_json, dict): # Se já retornou um dict
-                    column_mapping = column_mapping_json
-                else:
-                    raise TypeError("O mapeamento da IA não é um JSON válido ou dicionário.")
+                # Arquivos com o mesmo cabeçalho reaproveitam o mapeamento (ver mapping_cache)
+                with span('ai_mapping'):
+                    column_mapping = get_or_create_mapping(
+                        df_snippet.columns, TARGET_SALESFORCE_SCHEMA,
+                        lambda: parse_column_mapping(get_column_mapping_from_ai(file_content_for_ai, TARGET_SALESFORCE_SCHEMA)),
+                        refresh=session.get('refresh_mapping', False)
+                    )
                 conversion_logger.info(f"Mapeamento de colunas recebido da IA: {column_mapping}")
             except Exception as e_ai:
                 conversion_logger.error(f"Erro ao obter mapeamento da IA: {str(e_ai)}")
@@ -312,253 +432,473 @@ def upload_file():
                     os.remove(temp_filepath)
                 return redirect(url_for('index'))
 
-            if not column_mapping:
-                conversion_logger.error("Mapeamento de colunas da IA está vazio.")
-                flash('Falha ao obter o mapeamento de colunas da IA.', 'error')
-                if os.path.exists(temp_filepath):
-                    os.remove(temp_filepath)
-                return redirect(url_for('index'))
+        if not column_mapping:
+            conversion_logger.error("Mapeamento de colunas da IA está vazio.")
+            flash('Falha ao obter o mapeamento de colunas da IA.', 'error')
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            return redirect(url_for('index'))
 
-            # 3. Ler o arquivo completo e aplicar o mapeamento da IA
-            conversion_logger.info("Lendo arquivo completo e aplicando mapeamento da IA...")
-            df_full = None
-            try:
-                if original_file_ext == 'csv':
-                    # Reutilizar delimitador e encoding que funcionaram para o snippet
-                    read_success_full = False
-                    # Tentar com o delimitador e encoding que funcionaram no snippet primeiro
-                    # (Assumindo que df_snippet foi lido com sucesso e 'delim', 'enc' foram definidos)
-                    try:
-                        delim_found = next(d for d in [',', ';', '\t'] if pd.read_csv(temp_filepath, nrows=1, sep=d, encoding='utf-8', on_bad_lines='skip').shape[1] > 1)
-                        enc_found = 'utf-8' # Simplificar, pode precisar de lógica mais robusta para encoding
-                        df_full = pd.read_csv(temp_filepath, sep=delim_found, encoding=enc_found, on_bad_lines='warn', dtype=str, skipinitialspace=True)
-                        conversion_logger.info(f"Arquivo CSV completo lido com sucesso usando delimitador '{delim_found}' e encoding '{enc_found}'.")
-                        read_success_full = True
-                    except StopIteration:
-                         conversion_logger.warning("Não foi possível determinar delimitador para o CSV completo automaticamente, tentando combinações.")
-                    except Exception as e_read_csv_full_first_try:
-                        conversion_logger.warning(f"Falha ao ler CSV completo com delimitador/encoding do snippet: {e_read_csv_full_first_try}") 
-
-                    if not read_success_full:
-                        for enc_full in common_encodings:
-                            for delim_full in common_delimiters:
-                                try:
-                                    df_full = pd.read_csv(temp_filepath, sep=delim_full, encoding=enc_full, on_bad_lines='warn', dtype=str, skipinitialspace=True)
-                                    if not df_full.empty and len(df_full.columns) > 0:
-                                        conversion_logger.info(f"Arquivo CSV completo lido com sucesso usando delimitador '{delim_full}' e encoding '{enc_full}'.")
-                                        read_success_full = True
-                                        break
-                                except Exception as e_read_csv_full:
-                                    conversion_logger.debug(f"Falha ao ler CSV completo com delimitador '{delim_full}', encoding '{enc_full}': {e_read_csv_full}")
-                            if read_success_full: break
-                    if not read_success_full:
-                        raise ValueError("Não foi possível ler o arquivo CSV completo.")
-
-                elif original_file_ext == 'xls':
-                    df_full = pd.read_excel(temp_filepath, engine='xlrd', dtype=str, keep_default_na=False)
-                elif original_file_ext == 'xlsx':
-                    df_full = pd.read_excel(temp_filepath, engine='openpyxl', dtype=str, keep_default_na=False)
-                else:
-                    # Esta condição não deve ser alcançada devido à verificação allowed_file
-                    raise ValueError(f"Tipo de arquivo não suportado para processamento completo: {original_file_ext}")
-                
-                conversion_logger.info(f"Arquivo completo lido. Total de linhas: {len(df_full)}")
-            except Exception as e_read_full:
-                conversion_logger.error(f"Erro ao ler o arquivo completo '{filename}': {str(e_read_full)}")
-                conversion_logger.debug(traceback.format_exc())
-                flash(f'Erro ao processar o arquivo completo: {str(e_read_full)}', 'error')
-                if os.path.exists(temp_filepath):
-                    os.remove(temp_filepath)
-                return redirect(url_for('index'))
+        # 3. Ler o arquivo completo e aplicar o mapeamento da IA
+        conversion_logger.info("Lendo arquivo completo e aplicando mapeamento da IA...")
+        try:
+            with span('full_read') as span_fields:
+                df_full = read_upload_full(temp_filepath, original_file_ext)
+                span_fields['rows'] = len(df_full)
+            conversion_logger.info(f"Arquivo completo lido. Total de linhas: {len(df_full)}")
+        except Exception as e_read_full:
+            conversion_logger.error(f"Erro ao ler o arquivo completo '{filename}': {str(e_read_full)}")
+            conversion_logger.debug(traceback.format_exc())
+            flash(f'Erro ao processar o arquivo completo: {str(e_read_full)}', 'error')
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            return redirect(url_for('index'))
 
-            # 4. Criar o DataFrame final mapeado
-            conversion_logger.info("Criando DataFrame final com base no mapeamento da IA...")
-            final_mapped_df = pd.DataFrame()
-            
-            # Inverter o mapeamento para {nome_no_arquivo: nome_no_salesforce}
-            # Isso ajuda a encontrar a coluna correta no df_full
-            source_to_salesforce_map = {v: k for k, v in column_mapping.items() if v is not None and v in df_full.columns}
-            
-            # Adicionar colunas ao DataFrame final com base no TARGET_SALESFORCE_SCHEMA
-            for sf_field, description in TARGET_SALESFORCE_SCHEMA.items():
-                source_column_name = column_mapping.get(sf_field)
-                
-                if source_column_name and source_column_name in df_full.columns:
-                    final_mapped_df[sf_field] = df_full[source_column_name].astype(str).fillna('')
-                    conversion_logger.debug(f"Mapeado: Salesforce '{sf_field}' <- Arquivo '{source_column_name}'")
-                else:
-                    # Se a IA não mapeou ou a coluna não existe no arquivo, cria coluna vazia
-                    final_mapped_df[sf_field] = ""
-                    if source_column_name:
-                        conversion_logger.warning(f"Coluna '{source_column_name}' (para Salesforce '{sf_field}') não encontrada no arquivo original. Será criada vazia.")
-                    else:
-                        conversion_logger.info(f"Salesforce '{sf_field}' não foi mapeado pela IA ou não especificado. Será criada vazia.")
-
-            # Garantir que campos obrigatórios (LastName, Company) não estejam completamente vazios se foram mapeados
-            # Se não foram mapeados, já terão sido criados como colunas vazias
-            for required_field in ["LastName", "Company"]:
-                if required_field in final_mapped_df:
-                    # Se a coluna existe mas está cheia de NaNs ou strings vazias após o mapeamento, preenche com string vazia
-                    # Isso é para evitar problemas com o Salesforce se a coluna original tinha apenas vazios
-                    if final_mapped_df[required_field].isnull().all() or (final_mapped_df[required_field] == '').all():
-                         final_mapped_df[required_field] = ''
-                         conversion_logger.debug(f"Campo obrigatório '{required_field}' estava vazio ou nulo após mapeamento, garantindo strings vazias.")
-                else:
-                    # Se por algum motivo extremo o campo obrigatório não está no DF final, adiciona como vazio.
-                    # Isso deve ser coberto pela lógica anterior, mas é uma segurança.
-                    final_mapped_df[required_field] = ""
-                    conversion_logger.warning(f"Campo obrigatório '{required_field}' não estava no DataFrame final. Adicionado como coluna vazia.")
+        # 4. Criar o DataFrame final mapeado
+        conversion_logger.info("Criando DataFrame final com base no mapeamento da IA...")
+        with span('mapping_materialization'):
+            final_mapped_df = build_mapped_dataframe(df_full, column_mapping, TARGET_SALESFORCE_SCHEMA)
 
-            if final_mapped_df.empty:
-                conversion_logger.warning("O DataFrame final mapeado está vazio. Verifique o mapeamento e o arquivo original.")
-                flash('Ocorreu um problema: o arquivo processado resultou vazio após o mapeamento da IA.', 'warning')
-            else:
-                conversion_logger.info(f"DataFrame final mapeado criado com {len(final_mapped_df)} linhas e {len(final_mapped_df.columns)} colunas.")
-                conversion_logger.debug(f"Primeiras linhas do DataFrame final mapeado:\n{final_mapped_df.head().to_string()}")
+        return _submit_mapped_leads(final_mapped_df, final_ai_mapped_filepath, filename, temp_filepath, environment)
 
-            # 5. Salvar o DataFrame mapeado como CSV
+    except Exception as e_main_process:
+        conversion_logger.error(f"Erro inesperado durante o processamento do arquivo '{filename}': {str(e_main_process)}")
+        conversion_logger.debug(traceback.format_exc())
+        flash(f'Erro inesperado no processamento: {str(e_main_process)}', 'error')
+        # Limpeza em caso de erro no bloco principal try
+        if os.path.exists(temp_filepath) and not temp_filepath == final_ai_mapped_filepath: # Não remover se for o mesmo arquivo de output
             try:
-                final_mapped_df.to_csv(final_ai_mapped_filepath, index=False, sep=',', encoding='utf-8')
-                conversion_logger.info(f"Arquivo mapeado pela IA salvo como '{final_ai_mapped_filepath}'")
-                session['converted_file'] = final_ai_mapped_filepath
-                session['original_filename'] = filename # Salvar o nome original para exibição
-            except Exception as e_save_csv:
-                conversion_logger.error(f"Erro ao salvar o arquivo CSV mapeado pela IA: {str(e_save_csv)}")
-                conversion_logger.debug(traceback.format_exc())
-                flash(f'Erro ao salvar o arquivo processado: {str(e_save_csv)}', 'error')
+                os.remove(temp_filepath)
+                conversion_logger.info(f"Arquivo temporário '{temp_filepath}' removido após erro.")
+            except Exception as e_remove_temp_error:
+                conversion_logger.warning(f"Não foi possível remover o arquivo temporário '{temp_filepath}' após erro: {str(e_remove_temp_error)}")
+        return redirect(url_for('index'))
+
+def _submit_mapped_leads(final_mapped_df, final_ai_mapped_filepath, filename, temp_filepath, environment):
+    """
+    Salva o DataFrame mapeado, corrige o CSV e envia os leads para o Salesforce,
+    gravando o resultado na sessão.
+
+    Returns:
+        Response: Redirecionamento para a página de resultado (ou para o início em caso de erro)
+    """
+    if final_mapped_df.empty:
+        conversion_logger.warning("O DataFrame final mapeado está vazio. Verifique o mapeamento e o arquivo original.")
+        flash('Ocorreu um problema: o arquivo processado resultou vazio após o mapeamento da IA.', 'warning')
+    else:
+        conversion_logger.info(f"DataFrame final mapeado criado com {len(final_mapped_df)} linhas e {len(final_mapped_df.columns)} colunas.")
+        if conversion_logger.is_enabled_for(logging.DEBUG):
+            conversion_logger.debug("Primeiras linhas do DataFrame final mapeado:\n%s", final_mapped_df.head().to_string())
+
+    # Importação incremental: linhas já importadas da mesma origem, sem alteração, não são reenviadas
+    source = row_fingerprints.source_key(session.get('import_source') or filename)
+    fingerprints = None
+    if row_fingerprints.enabled() and not final_mapped_df.empty:
+        with span('row_fingerprints', rows=len(final_mapped_df)):
+            unchanged, fingerprints = row_fingerprints.diff(source, final_mapped_df)
+        if unchanged.any():
+            conversion_logger.info(f"{int(unchanged.sum())} linhas já importadas de '{source}' sem alteração serão ignoradas")
+            final_mapped_df, fingerprints = final_mapped_df.loc[~unchanged], fingerprints.loc[~unchanged]
+            if final_mapped_df.empty:
+                flash(f"Nenhuma linha nova ou alterada em relação às importações anteriores de '{source}'.", 'info')
                 if os.path.exists(temp_filepath):
                     os.remove(temp_filepath)
                 return redirect(url_for('index'))
 
-            # 6. Corrigir o CSV antes de enviar para o Salesforce (garantir campos obrigatórios)
-            conversion_logger.info("Corrigindo o arquivo CSV para garantir campos obrigatórios...")
-            fixed_csv_path = fix_salesforce_lead_csv(final_ai_mapped_filepath)
-            
-            if not fixed_csv_path:
-                conversion_logger.error("Falha ao corrigir o arquivo CSV antes de enviar para o Salesforce")
-                flash('Erro ao processar o arquivo para o Salesforce', 'error')
-                return redirect(url_for('index'))
-                
-            # 7. Chamar a função para criar leads no Salesforce
-            conversion_logger.info(f"Iniciando criação de leads no Salesforce a partir de: {fixed_csv_path}")
-            # Passar o ID do proprietário para a API do Salesforce (se fornecido)
-            owner_id = session.get('owner_id')
-            if owner_id:
-                logger.info(f"Usando OwnerId personalizado para leads: {owner_id}")
-            else:
-                logger.info("Usando atribuição automática do Salesforce para leads")
-            success, message_or_results = create_leads_from_csv(fixed_csv_path, environment, owner_id=owner_id)
-            
-            # Adiciona log detalhado dos resultados para diagnóstico
-            logger.info(f"Resultado do processamento - Success: {success}")
-            if isinstance(message_or_results, list):
-                logger.info(f"Tipo de resultado: Lista com {len(message_or_results)} itens")
-                success_count = sum(1 for r in message_or_results if r.get('success', False))
-                logger.info(f"Leads com success=True: {success_count}")
-                logger.info(f"Leads com success=False: {len(message_or_results) - success_count}")
-                # Mostra os primeiros 3 resultados para debug
-                for i, r in enumerate(message_or_results[:3]):
-                    logger.info(f"Exemplo de resultado #{i+1}: {r}")
-            else:
-                logger.info(f"Tipo de resultado: {type(message_or_results)} - {message_or_results}")
+    # 5. Salvar o DataFrame mapeado como CSV
+    try:
+        with span('mapped_csv_write', rows=len(final_mapped_df)):
+            final_mapped_df.to_csv(final_ai_mapped_filepath, index=False, sep=',', encoding='utf-8')
+        conversion_logger.info(f"Arquivo mapeado pela IA salvo como '{final_ai_mapped_filepath}'")
+        session['converted_file'] = final_ai_mapped_filepath
+        session['original_filename'] = filename # Salvar o nome original para exibição
+    except Exception as e_save_csv:
+        conversion_logger.error(f"Erro ao salvar o arquivo CSV mapeado pela IA: {str(e_save_csv)}")
+        conversion_logger.debug(traceback.format_exc())
+        flash(f'Erro ao salvar o arquivo processado: {str(e_save_csv)}', 'error')
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        return redirect(url_for('index'))
 
-            if success:
-                num_success = sum(1 for r in message_or_results if r.get('success', False))
-                num_errors = len(message_or_results) - num_success
-                conversion_logger.info(f"Processamento Salesforce concluído. Sucessos: {num_success}, Erros: {num_errors}")
-                
-                # Aplica mensagem específica em caso de resultados inconsistentes
-                if num_success == 0 and success:
-                    logger.warning("Inconsistência: success=True mas num_success=0, ajustando valores...")
-                    # Forçar pelo menos 1 sucesso para manter congruência com success=True
-                    num_success = 1
-                    # Forçar pelo menos 1 sucesso para manter congruência com success=True
-                    num_success = 1
-                    
-                flash(f'{num_success} leads processados com sucesso. {num_errors} erros.', 
-                      'info' if num_errors == 0 else 'warning')
-                
-                # Salva os resultados do Salesforce na sessão para uso posterior
-                session['salesforce_results'] = message_or_results
-                
-                # Cria uma lista de leads que falharam para exibir no resultado
-                failed_leads = []
-                for r in message_or_results:
-                    if not r.get('success', False):
-                        lead_name = r.get('name', 'Lead sem nome')
-                        error_msg = '; '.join(r.get('errors', ['Erro desconhecido']))
-                        failed_leads.append(f"{lead_name}: {error_msg}")
-                
-                # Adiciona dados de resultado para a página
-                result_data = {
-                    'success': True,  # Sempre consideramos sucesso se chegou até aqui
-                    'message': f'{num_success} leads foram importados com sucesso para o Salesforce.',
-                    'created_count': num_success,
-                    'total_count': len(message_or_results),
-                    'failed_leads': failed_leads
-                }
-                
-                # Salva na sessão e registra no log
-                session['result'] = result_data
-                logger.info(f"Dados de resultado salvos na sessão: {result_data}")
-                
-                # Forçar a sessão a persistir
-                session.modified = True
-            else:
-                conversion_logger.error(f"Falha ao criar leads no Salesforce: {message_or_results}")
-                flash(f'Erro ao criar leads no Salesforce: {message_or_results}', 'error')
-                
-                # Garante que o objeto message_or_results seja uma lista, mesmo se for uma string de erro
-                if isinstance(message_or_results, str):
-                    session['salesforce_results'] = [{'success': False, 'id': None, 'name': 'Erro', 'errors': [str(message_or_results)]}]
-                else:
-                    session['salesforce_results'] = message_or_results
-                
-                # Adiciona dados de resultado para a página - mesmo com erro, temos uma página de resultado
-                result_data = {
-                    'success': False,
-                    'message': f'Ocorreu um erro ao importar leads para o Salesforce: {str(message_or_results)}',
-                    'created_count': 0,
-                    'total_count': 0,
-                    'error': str(message_or_results),
-                    'failed_leads': ['Falha no processamento: ' + str(message_or_results)]
-                }
-                
-                # Salva na sessão e registra no log
-                session['result'] = result_data
-                logger.info(f"Dados de resultado (erro) salvos na sessão: {result_data}")
-                
-                # Forçar a sessão a persistir
-                session.modified = True
+    # 6. Corrigir o CSV antes de enviar para o Salesforce (garantir campos obrigatórios)
+    conversion_logger.info("Corrigindo o arquivo CSV para garantir campos obrigatórios...")
+    with span('fix_csv'):
+        fixed_csv_path = fix_salesforce_lead_csv(final_ai_mapped_filepath)
 
-            # Limpeza do arquivo temporário original após o processamento bem-sucedido
-            if os.path.exists(temp_filepath):
-                try:
-                    os.remove(temp_filepath)
-                    conversion_logger.info(f"Arquivo temporário '{temp_filepath}' removido.")
-                except Exception as e_remove_temp:
-                    conversion_logger.warning(f"Não foi possível remover o arquivo temporário '{temp_filepath}': {str(e_remove_temp)}")
-            
-            # Redirecionar para a página de resultado com os dados de sessão
-            return redirect(url_for('resultado'))
+    if not fixed_csv_path:
+        conversion_logger.error("Falha ao corrigir o arquivo CSV antes de enviar para o Salesforce")
+        flash('Erro ao processar o arquivo para o Salesforce', 'error')
+        return redirect(url_for('index'))
 
-        except Exception as e_main_process:
-            conversion_logger.error(f"Erro inesperado durante o processamento do arquivo '{filename}': {str(e_main_process)}")
-            conversion_logger.debug(traceback.format_exc())
-            flash(f'Erro inesperado no processamento: {str(e_main_process)}', 'error')
-            # Limpeza em caso de erro no bloco principal try
-            if os.path.exists(temp_filepath) and not temp_filepath == final_ai_mapped_filepath: # Não remover se for o mesmo arquivo de output
-                try:
-                    os.remove(temp_filepath)
-                    conversion_logger.info(f"Arquivo temporário '{temp_filepath}' removido após erro.")
-                except Exception as e_remove_temp_error:
-                    conversion_logger.warning(f"Não foi possível remover o arquivo temporário '{temp_filepath}' após erro: {str(e_remove_temp_error)}")
-            return redirect(url_for('index'))
+    # 7. Chamar a função para criar leads no Salesforce
+    conversion_logger.info(f"Iniciando criação de leads no Salesforce a partir de: {fixed_csv_path}")
+    # Passar o ID do proprietário para a API do Salesforce (se fornecido)
+    owner_id = session.get('owner_id')
+    if owner_id:
+        logger.info(f"Usando OwnerId personalizado para leads: {owner_id}")
+    else:
+        logger.info("Usando atribuição automática do Salesforce para leads")
+
+    # Manifest da ingestão no armazenamento de jobs, ao lado do CSV mapeado, para retomar
+    # o envio (POST /jobs/<id>/resume) se o processo for interrompido
+    manifest_path = None
+    timings = current_job_timings()
+    if timings is not None:
+        manifest_path = job_store.job_file_path(JOB_STORE_DIR, timings.job_id, '.bulk.json')
+        job_store.update_job(JOB_STORE_DIR, timings.job_id, owner_id=owner_id, manifest=os.path.basename(manifest_path))
 
+    with span('salesforce_submission'):
+        success, message_or_results = create_leads_from_csv(
+            fixed_csv_path, environment, owner_id=owner_id, manifest_path=manifest_path
+        )
+
+    _record_salesforce_results(success, message_or_results)
+    if fingerprints is not None:
+        _record_fingerprints(source, final_mapped_df, fingerprints, success, message_or_results)
+
+    # Limpeza do arquivo temporário original após o processamento bem-sucedido
+    if os.path.exists(temp_filepath):
+        try:
+            os.remove(temp_filepath)
+            conversion_logger.info(f"Arquivo temporário '{temp_filepath}' removido.")
+        except Exception as e_remove_temp:
+            conversion_logger.warning(f"Não foi possível remover o arquivo temporário '{temp_filepath}': {str(e_remove_temp)}")
+
+    # Redirecionar para a página de resultado com os dados de sessão
+    return redirect(url_for('resultado'))
+
+def _record_fingerprints(source, final_mapped_df, fingerprints, success, message_or_results):
+    """
+    Grava as impressões digitais das linhas enviadas com sucesso (ver row_fingerprints).
+
+    As linhas com falha são identificadas pelo email (ou pelo sobrenome, sem email) e
+    ficam de fora, para serem reenviadas no próximo upload. Se as falhas não estão
+    todas detalhadas (modo streaming) ou o envio não terminou, nada é gravado.
+    """
+    if not success:
+        return
+    timings = current_job_timings()
+    manifest_path = job_store.job_file_path(JOB_STORE_DIR, timings.job_id, '.bulk.json') if timings is not None else None
+    manifest = BulkManifest.load(manifest_path) if manifest_path else None
+    if manifest is not None and not manifest.is_settled():
+        conversion_logger.info("Envio incompleto: impressões digitais das linhas não gravadas")
+        return
+    failed = message_or_results
+    if isinstance(message_or_results, dict):
+        failed = message_or_results['failed_records']
+        if message_or_results['failed_count'] > len(failed):
+            conversion_logger.info("Falhas sem detalhe no modo streaming: impressões digitais das linhas não gravadas")
+            return
+    failed = [result for result in failed if not result.get('success')] if isinstance(failed, list) else []
+
+    emails = {str(result.get('email') or '').strip().lower() for result in failed} - {''}
+    names = {str(result.get('name') or '').strip().lower() for result in failed if not result.get('email')}
+    empty = pd.Series('', index=final_mapped_df.index)
+    email = final_mapped_df.get('Email', empty).fillna('').astype(str).str.strip().str.lower()
+    last_name = final_mapped_df.get('LastName', empty).fillna('').astype(str).str.strip().str.lower()
+    succeeded = ~(email.isin(emails) | (email.eq('') & last_name.isin(names)))
+    count = row_fingerprints.record(source, fingerprints.loc[succeeded])
+    conversion_logger.info(f"{count} impressões digitais gravadas para a origem '{source}'")
+
+def _record_salesforce_results(success, message_or_results):
+    """Grava na sessão os resultados do envio ao Salesforce para a página de resultado."""
+    # Adiciona log detalhado dos resultados para diagnóstico
+    logger.info(f"Resultado do processamento - Success: {success}")
+    streaming_summary = None
+    if isinstance(message_or_results, dict):
+        # Modo streaming: apenas contagens e as primeiras falhas detalhadas
+        streaming_summary = message_or_results
+        message_or_results = streaming_summary['failed_records']
+        logger.info(f"Resumo do modo streaming: {streaming_summary['success_count']} sucessos, "
+                    f"{streaming_summary['failed_count']} falhas em {len(streaming_summary['jobs'])} job(s)")
+    elif isinstance(message_or_results, list):
+        logger.info(f"Tipo de resultado: Lista com {len(message_or_results)} itens")
+        success_count = sum(1 for r in message_or_results if r.get('success', False))
+        logger.info(f"Leads com success=True: {success_count}")
+        logger.info(f"Leads com success=False: {len(message_or_results) - success_count}")
+        # Mostra os primeiros 3 resultados para debug
+        for i, r in enumerate(message_or_results[:3]):
+            logger.info(f"Exemplo de resultado #{i+1}: {r}")
     else:
-        flash('Tipo de arquivo não permitido.')
-        conversion_logger.warning(f"Tentativa de upload de arquivo não permitido: {file.filename if file else 'N/A'}")
-        return redirect(url_for('index'))
+        logger.info(f"Tipo de resultado: {type(message_or_results)} - {message_or_results}")
+
+    if success:
+        if streaming_summary:
+            num_success = streaming_summary['success_count']
+            num_errors = streaming_summary['failed_count']
+        else:
+            num_success = sum(1 for r in message_or_results if r.get('success', False))
+            num_errors = len(message_or_results) - num_success
+        conversion_logger.info(f"Processamento Salesforce concluído. Sucessos: {num_success}, Erros: {num_errors}")
+        metrics.RECORDS.inc(num_success, result='success')
+        metrics.RECORDS.inc(num_errors, result='failed')
+
+        # Aplica mensagem específica em caso de resultados inconsistentes
+        if num_success == 0 and success:
+            logger.warning("Inconsistência: success=True mas num_success=0, ajustando valores...")
+            # Forçar pelo menos 1 sucesso para manter congruência com success=True
+            num_success = 1
+            # Forçar pelo menos 1 sucesso para manter congruência com success=True
+            num_success = 1
+
+        flash(f'{num_success} leads processados com sucesso. {num_errors} erros.', 
+              'info' if num_errors == 0 else 'warning')
+
+        # Salva os resultados do Salesforce na sessão para uso posterior
+        session['salesforce_results'] = message_or_results
+
+        # Cria uma lista de leads que falharam para exibir no resultado
+        failed_leads = []
+        for r in message_or_results:
+            if not r.get('success', False):
+                lead_name = r.get('name', 'Lead sem nome')
+                error_msg = '; '.join(r.get('errors', ['Erro desconhecido']))
+                if r.get('sheet'):
+                    lead_name = f"[{r['sheet']}] {lead_name}"
+                failed_leads.append(f"{lead_name}: {error_msg}")
+
+        # Adiciona dados de resultado para a página
+        result_data = {
+            'success': True,  # Sempre consideramos sucesso se chegou até aqui
+            'message': f'{num_success} leads foram importados com sucesso para o Salesforce.',
+            'created_count': num_success,
+            'total_count': streaming_summary['total_count'] if streaming_summary else len(message_or_results),
+            'failed_leads': failed_leads
+        }
+        _attach_timings(result_data)
+
+        # Salva na sessão e registra no log
+        session['result'] = result_data
+        logger.info(f"Dados de resultado salvos na sessão: {result_data}")
+
+        # Forçar a sessão a persistir
+        session.modified = True
+    else:
+        conversion_logger.error(f"Falha ao criar leads no Salesforce: {message_or_results}")
+        flash(f'Erro ao criar leads no Salesforce: {message_or_results}', 'error')
+
+        # Garante que o objeto message_or_results seja uma lista, mesmo se for uma string de erro
+        if isinstance(message_or_results, str):
+            session['salesforce_results'] = [{'success': False, 'id': None, 'name': 'Erro', 'errors': [str(message_or_results)]}]
+        else:
+            session['salesforce_results'] = message_or_results
+
+        # Adiciona dados de resultado para a página - mesmo com erro, temos uma página de resultado
+        result_data = {
+            'success': False,
+            'message': f'Ocorreu um erro ao importar leads para o Salesforce: {str(message_or_results)}',
+            'created_count': 0,
+            'total_count': 0,
+            'error': str(message_or_results),
+            'failed_leads': ['Falha no processamento: ' + str(message_or_results)]
+        }
+        _attach_timings(result_data)
+
+        # Salva na sessão e registra no log
+        session['result'] = result_data
+        logger.info(f"Dados de resultado (erro) salvos na sessão: {result_data}")
+
+        # Forçar a sessão a persistir
+        session.modified = True
+
+
+def _attach_timings(result_data):
+    """Inclui o id do job e os tempos por etapa (até o momento) nos dados de resultado."""
+    timings = current_job_timings()
+    if timings is not None:
+        result_data['job_id'] = timings.job_id
+        result_data['timings'] = timings.stage_totals()
+        result_data['elapsed_ms'] = timings.elapsed_ms()
+
+# Mapeamentos da IA iniciados durante o envio em partes, por upload_id
+_early_mapping_threads = {}
+
+def _compute_early_mapping(upload_id):
+    """Obtém o mapeamento da IA a partir das partes de um CSV já recebidas."""
+    set_correlation_id(upload_id)
+    try:
+        partial_path = chunked_upload.data_path(UPLOAD_WORKSPACE, upload_id)
+        df_snippet = read_partial_csv_snippet(partial_path)
+        manifest = chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id)
+        column_mapping = get_or_create_mapping(
+            df_snippet.columns, TARGET_SALESFORCE_SCHEMA,
+            lambda: parse_column_mapping(get_column_mapping_from_ai(build_ai_snippet(df_snippet), TARGET_SALESFORCE_SCHEMA)),
+            refresh=bool(manifest and manifest['options'].get('refresh_mapping'))
+        )
+        chunked_upload.update_manifest(
+            UPLOAD_WORKSPACE, upload_id,
+            column_mapping=column_mapping, mapping_state='done' if column_mapping else 'failed'
+        )
+        conversion_logger.info(f"Mapeamento antecipado do upload {upload_id} concluído: {column_mapping}")
+    except Exception as e:
+        conversion_logger.warning(f"Falha no mapeamento antecipado do upload {upload_id}: {str(e)}")
+        try:
+            chunked_upload.update_manifest(UPLOAD_WORKSPACE, upload_id, mapping_state='failed')
+        except Exception:
+            pass
+
+def _expire_chunked_uploads():
+    """
+    Remove os uploads em partes abandonados (ver chunked_upload.expire_uploads) e os
+    mapeamentos antecipados sem upload, inclusive os de uploads removidos por outro processo.
+    """
+    for upload_id in chunked_upload.expire_uploads(UPLOAD_WORKSPACE):
+        conversion_logger.info(f"Upload em partes {upload_id} expirado e removido")
+        _early_mapping_threads.pop(upload_id, None)
+    for upload_id, thread in list(_early_mapping_threads.items()):
+        if not thread.is_alive() and chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id) is None:
+            _early_mapping_threads.pop(upload_id, None)
+
+def _wait_for_early_mapping(upload_id, timeout=120):
+    """Aguarda o mapeamento antecipado terminar (neste ou em outro processo) e retorna o manifest."""
+    thread = _early_mapping_threads.pop(upload_id, None)
+    if thread:
+        thread.join(timeout)
+    deadline = time.time() + timeout
+    manifest = chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id)
+    while manifest and manifest.get('mapping_state') == 'running' and time.time() < deadline:
+        time.sleep(0.5)
+        manifest = chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id)
+    return manifest
+
+@app.route('/upload/init', methods=['POST'])
+@log_request_body
+def upload_init():
+    """Inicia (ou retoma) um upload em partes"""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename', ''))
+    if not filename or not allowed_file(filename):
+        return jsonify({'success': False, 'error': 'Tipo de arquivo não permitido. Use apenas CSV, XLSX ou XLS.'}), 400
+    try:
+        total_size = int(data.get('total_size', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Tamanho de arquivo inválido'}), 400
+
+    environment = data.get('environment', 'sandbox')
+    session['environment'] = environment
+    owner_id = _apply_lead_owner_selection(data.get('lead_owner', ''), data.get('custom_owner_id', ''))
+    session['import_source'] = (data.get('source') or '').strip()
+    session['refresh_mapping'] = bool(data.get('refresh_mapping'))
+    _refresh_user_info()
+
+    _expire_chunked_uploads()
+
+    # Retoma um upload interrompido do mesmo arquivo, se ainda existir
+    resume_id = data.get('upload_id')
+    if resume_id:
+        try:
+            manifest = chunked_upload.load_manifest(UPLOAD_WORKSPACE, resume_id)
+        except ValueError:
+            manifest = None
+        if manifest and manifest['state'] == 'receiving' and manifest['filename'] == filename \
+                and manifest['total_size'] == total_size:
+            logger.info(f"Retomando upload {resume_id} a partir do byte {manifest['received_bytes']}")
+            return jsonify({
+                'success': True,
+                'upload_id': resume_id,
+                'chunk_size': manifest['chunk_size'],
+                'received_bytes': manifest['received_bytes']
+            })
+
+    try:
+        manifest = chunked_upload.create_upload(
+            UPLOAD_WORKSPACE, filename, filename.rsplit('.', 1)[1].lower(), total_size,
+            options={'environment': environment, 'owner_id': owner_id,
+                     'refresh_mapping': session['refresh_mapping']}
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    logger.info(f"Upload em partes iniciado: {manifest['upload_id']} ({filename}, {total_size} bytes)")
+    return jsonify({
+        'success': True,
+        'upload_id': manifest['upload_id'],
+        'chunk_size': manifest['chunk_size'],
+        'received_bytes': 0
+    })
+
+@app.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Retorna o progresso de um upload em partes (usado para retomar envios)"""
+    try:
+        manifest = chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id)
+    except ValueError:
+        manifest = None
+    if not manifest:
+        return jsonify({'success': False, 'error': 'Upload não encontrado'}), 404
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'state': manifest['state'],
+        'received_bytes': manifest['received_bytes'],
+        'total_size': manifest['total_size'],
+        'mapping_state': manifest.get('mapping_state')
+    })
+
+@app.route('/upload/<upload_id>/chunk', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Recebe uma parte do arquivo no offset informado"""
+    offset = request.args.get('offset', type=int)
+    checksum = request.headers.get('X-Chunk-Checksum')
+    try:
+        manifest = chunked_upload.append_chunk(UPLOAD_WORKSPACE, upload_id, offset, request.stream, checksum)
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        logger.warning(f"Parte rejeitada no upload {upload_id}: {str(e)}")
+        try:
+            current = chunked_upload.load_manifest(UPLOAD_WORKSPACE, upload_id)
+        except ValueError:
+            current = None
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'received_bytes': current['received_bytes'] if current else 0
+        }), 409
+
+    # Com o início do CSV disponível, o mapeamento da IA começa enquanto o resto chega
+    early_threshold = min(manifest['total_size'], chunked_upload.EARLY_MAPPING_MIN_BYTES)
+    if manifest['file_ext'] == 'csv' and not manifest.get('mapping_state') \
+            and manifest['received_bytes'] >= early_threshold:
+        chunked_upload.update_manifest(UPLOAD_WORKSPACE, upload_id, mapping_state='running')
+        thread = threading.Thread(target=run_in_context(_compute_early_mapping), args=(upload_id,), daemon=True)
+        _early_mapping_threads[upload_id] = thread
+        thread.start()
+
+    return jsonify({
+        'success': True,
+        'received_bytes': manifest['received_bytes'],
+        'total_size': manifest['total_size']
+    })
+
+@app.route('/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    """Finaliza um upload em partes e processa o arquivo montado"""
+    # Os logs do processamento usam o id do upload como id de correlação
+    set_correlation_id(upload_id)
+    try:
+        manifest = _wait_for_early_mapping(upload_id)
+        if not manifest:
+            return jsonify({'success': False, 'error': 'Upload não encontrado'}), 404
+        if manifest['state'] == 'completed':
+            # Finalização repetida (ex.: o cliente não recebeu a resposta): o mesmo resultado
+            return jsonify(manifest['result'])
+        temp_filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_{upload_id}.{manifest['file_ext']}")
+        manifest = chunked_upload.finalize_upload(UPLOAD_WORKSPACE, upload_id, temp_filepath)
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+
+    conversion_logger.info(f"Upload em partes {upload_id} concluído: '{manifest['filename']}' ({manifest['total_size']} bytes)")
+    environment = manifest['options'].get('environment') or session.get('environment', 'sandbox')
+    response = _process_saved_upload(
+        temp_filepath, manifest['filename'], manifest['file_ext'], environment,
+        column_mapping=manifest.get('column_mapping')
+    )
+    result = {'success': True, 'redirect_url': response.location, 'job_id': response.headers.get('X-Job-ID')}
+    chunked_upload.complete_upload(UPLOAD_WORKSPACE, upload_id, result)
+    return jsonify(result)
 
 @app.route('/check_conversion')
 def check_conversion():
@@ -615,6 +955,78 @@ def resultado():
     user_info = session.get('user_info', None)
     return render_template('resultado.html', result=result, user_info=user_info)
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Retorna o registro de um job de processamento (status e tempos por etapa)"""
+    try:
+        job = job_store.load_job(JOB_STORE_DIR, job_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not job:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/jobs')
+def list_jobs_route():
+    """Lista os jobs de processamento mais recentes"""
+    return jsonify({'success': True, 'jobs': job_store.list_jobs(JOB_STORE_DIR)})
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """
+    Retoma a ingestão de um job interrompido a partir do manifest da Bulk API.
+
+    Os jobs do Salesforce já fechados são acompanhados até o fim; apenas os
+    blocos que não chegaram ao Salesforce são reenviados.
+    """
+    try:
+        job = job_store.load_job(JOB_STORE_DIR, job_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not job:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    manifest_path = job_store.job_file_path(JOB_STORE_DIR, job_id, '.bulk.json')
+    if not os.path.exists(manifest_path):
+        return jsonify({'success': False, 'error': 'Job sem manifest de ingestão para retomar'}), 409
+
+    set_correlation_id(job_id)
+    job_store.update_job(JOB_STORE_DIR, job_id, status='processing')
+    conversion_logger.info(f"Retomando a ingestão do job {job_id}")
+    metrics.UPLOADS_IN_FLIGHT.inc()
+    try:
+        with track_job(job_id) as timings:
+            with span('salesforce_submission'):
+                success, message_or_results = resume_leads_from_manifest(manifest_path)
+            _record_salesforce_results(success, message_or_results)
+    finally:
+        metrics.UPLOADS_IN_FLIGHT.dec()
+
+    _finish_job(job_id, timings, True)
+    return jsonify({'success': True, 'redirect_url': url_for('resultado')})
+
+@app.route('/lead_index/sync', methods=['POST'])
+def lead_index_sync():
+    """Sincroniza o índice local de leads existentes com o Salesforce"""
+    success, count_or_message = sync_lead_index()
+    if not success:
+        return jsonify({'success': False, 'error': count_or_message}), 502
+    return jsonify({'success': True, 'synced': count_or_message})
+
+@app.route('/mapping_cache/clear', methods=['POST'])
+def mapping_cache_clear():
+    """Apaga os mapeamentos de colunas em cache (a próxima importação consulta a IA)"""
+    return jsonify({'success': True, 'removed': clear_mapping_cache()})
+
+@app.route('/stats/timings')
+def timing_stats():
+    """Retorna os histogramas de duração por etapa desde o início do processo"""
+    return jsonify({'success': True, 'stages': get_stage_histograms()})
+
+@app.route('/metrics')
+def metrics_route():
+    """Exporta as métricas da aplicação no formato do Prometheus"""
+    return Response(metrics.generate_latest(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/user_info')
 def user_info():
     """Retorna as informações do usuário como JSON"""
@@ -654,9 +1066,9 @@ def clear_session():
 
 # New route for AI interaction
 @app.route('/ask_ai', methods=['POST', 'GET'])
+@log_request_body
 def ask_ai_route():
     logger.info(f"ask_ai endpoint accessed with method: {request.method}")
-    logger.info(f"Request headers: {dict(request.headers)}")
     
     if request.method == 'GET':
         logger.warning(f"GET request to /ask_ai from {request.remote_addr}, referrer: {request.referrer}")
@@ -695,6 +1107,7 @@ def cleanup_temp_files_route():
     try:
         cleanup_old_temp_files(temp_dir, max_age_hours=1) # Limpeza mais agressiva se manual
         cleanup_old_temp_files(work_dir, max_age_hours=1)
+        _expire_chunked_uploads()
         flash('Limpeza de arquivos temporários executada.', 'info')
     except Exception as e:
         flash(f'Erro durante a limpeza: {str(e)}', 'error')
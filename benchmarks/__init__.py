@@ -0,0 +1,24 @@
+"""
+Benchmarks do caminho de conversão (leitura, normalização, correção do CSV,
+montagem dos leads e serialização), no estilo do ASV: classes com `params`,
+`setup` e métodos `time_*`.
+
+Uso (a partir da raiz do projeto):
+
+    python -m benchmarks.datagen --rows 10000 --format csv --out leads.csv
+    python -m benchmarks.run                      # compara com benchmarks/baselines.json
+    python -m benchmarks.run --sizes 1000,100000 --filter Normalization
+    python -m benchmarks.run --save               # grava os tempos como nova linha de base
+
+As linhas de base dependem da máquina; grave-as na mesma máquina usada nas comparações.
+
+Para medir o pipeline de ponta a ponta sem uma org real, benchmarks.fake_salesforce
+simula o OAuth, a Bulk API 2.0, /limits e o usuário atual (ver o módulo):
+
+    python -m benchmarks.fake_salesforce --port 8787 --latency 0.05 --record-failure-rate 0.01
+
+e benchmarks.loadtest mede uploads concorrentes de ponta a ponta (servidor de
+desenvolvimento ou gunicorn) contra ele e o backend local da IA (LLM_BACKEND=fake):
+
+    python -m benchmarks.loadtest --modes dev,gunicorn-gthread --workers 1,2 --concurrency 1,4,8
+"""
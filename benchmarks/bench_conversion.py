@@ -0,0 +1,129 @@
+"""
+Benchmarks do caminho de conversão, da leitura do arquivo enviado até o CSV
+serializado para a Bulk API. Os métodos `time_*` são cronometrados pelo
+benchmarks.run; `setup` prepara os dados fora da medição.
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from src.services.salesforce_api import (
+    LEAD_FIELDS, clean_phone_number, convert_money_to_numeric, format_email, format_name, _build_lead_dicts,
+    _normalize_leads_chunk,
+)
+from src.utils.csv_helper import fix_salesforce_lead_csv
+from src.utils.mapping_helper import build_mapped_dataframe
+from src.utils.upload_reader import read_upload_full, read_upload_snippet
+from . import datagen
+
+# Tamanhos padrão (linhas); --sizes no benchmarks.run mede outros (ex.: até 1000000)
+SIZES = [1000, 10000]
+
+
+class ReadUpload:
+    """Leitura do arquivo enviado: amostra para a IA e leitura completa."""
+    params = (SIZES, ['csv', 'xlsx'])
+    param_names = ['rows', 'format']
+
+    def setup(self, rows, file_format):
+        self.path = datagen.dataset_path(rows, file_format)
+
+    def time_snippet_read(self, rows, file_format):
+        read_upload_snippet(self.path, file_format)
+
+    def time_full_read(self, rows, file_format):
+        read_upload_full(self.path, file_format)
+
+
+class Normalization:
+    """Funções de formatação aplicadas linha a linha no modo em lotes."""
+    params = (SIZES,)
+    param_names = ['rows']
+
+    def setup(self, rows):
+        df = datagen.generate_leads(rows)
+        self.names = df[datagen.HEADERS['LastName']]
+        self.phones = df[datagen.HEADERS['Phone']]
+        self.emails = df[datagen.HEADERS['Email']]
+        self.money = df[datagen.REVENUE_HEADER]
+
+    def time_format_name(self, rows):
+        self.names.apply(format_name)
+
+    def time_clean_phone_number(self, rows):
+        self.phones.apply(clean_phone_number)
+
+    def time_format_email(self, rows):
+        self.emails.apply(format_email)
+
+    def time_convert_money_to_numeric(self, rows):
+        self.money.apply(convert_money_to_numeric)
+
+
+class FixCsv:
+    """
+    Correção do CSV mapeado antes do envio (fix_salesforce_lead_csv, reescreve o arquivo).
+
+    Cada execução corrige uma cópia nova do arquivo original: corrigir o arquivo já
+    corrigido mediria outro caminho. A cópia entra no tempo medido (ver time_copy_mapped_csv).
+    """
+    params = (SIZES,)
+    param_names = ['rows']
+
+    def setup(self, rows):
+        self.directory = tempfile.mkdtemp(prefix='bench_fix_csv_')
+        self.original = os.path.join(self.directory, 'mapped.original.csv')
+        self.path = os.path.join(self.directory, 'mapped.csv')
+        mapped = build_mapped_dataframe(datagen.generate_leads(rows), datagen.COLUMN_MAPPING, LEAD_FIELDS)
+        mapped.to_csv(self.original, index=False, encoding='utf-8')
+
+    def teardown(self, rows):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_copy_mapped_csv(self, rows):
+        # Referência: custo da cópia incluída em time_fix_salesforce_lead_csv
+        shutil.copyfile(self.original, self.path)
+
+    def time_fix_salesforce_lead_csv(self, rows):
+        shutil.copyfile(self.original, self.path)
+        fix_salesforce_lead_csv(self.path)
+
+
+class LeadBuilding:
+    """Mapeamento das colunas, normalização vetorizada dos leads e serialização do CSV da Bulk API."""
+    params = (SIZES,)
+    param_names = ['rows']
+
+    def setup(self, rows):
+        self.df = datagen.generate_leads(rows)
+        self.mapped = build_mapped_dataframe(self.df, datagen.COLUMN_MAPPING, LEAD_FIELDS)
+        self.leads, _, _ = _normalize_leads_chunk(self.mapped.copy())
+        self.fields = [field for field in LEAD_FIELDS if field in self.leads.columns]
+        self.existing_ids = pd.Series(None, index=self.leads.index, dtype=object)
+
+    def time_build_mapped_dataframe(self, rows):
+        build_mapped_dataframe(self.df, datagen.COLUMN_MAPPING, LEAD_FIELDS)
+
+    def time_normalize_leads(self, rows):
+        _normalize_leads_chunk(self.mapped.copy())
+
+    def time_build_lead_dicts(self, rows):
+        # Montagem dos dicionários de leads do modo em lotes (create_leads_from_csv)
+        _build_lead_dicts(self.leads, self.fields, self.existing_ids, None, 'insert')
+
+    def time_csv_serialization(self, rows):
+        self.leads.to_csv(index=False, encoding='utf-8', lineterminator='\n')
+
+
+class DatasetGeneration:
+    """Custo do próprio gerador (referência para os tempos de setup)."""
+    params = (SIZES,)
+    param_names = ['rows']
+
+    def time_generate_leads(self, rows):
+        datagen.generate_leads(rows)
+
+    def time_write_txt(self, rows):
+        with tempfile.TemporaryDirectory() as directory:
+            datagen.write_dataset(os.path.join(directory, 'leads.txt'), rows, 'txt')
@@ -0,0 +1,231 @@
+"""
+Gerador de arquivos sintéticos de leads brasileiros, reprodutível por semente.
+
+Os dados imitam as planilhas recebidas: cabeçalhos bagunçados (espaços,
+caixa e acentos), nomes acentuados em caixas variadas, telefones em vários
+formatos (com DDD entre parênteses, +55, zero de tronco, valor numérico com
+'.0'), emails em maiúsculas ou inválidos, valores em reais como texto e
+células vazias. Formatos: csv, xlsx e txt (blocos de texto livre por lead).
+"""
+
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = [
+    'João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Luís', 'Márcia', 'Gonçalo', 'Conceição',
+    'Ângela', 'Inês', 'Sérgio', 'Cecília', 'Vitória', 'Raimundo', 'Luíza', 'Thaís', 'André', 'Fábio',
+    'Otávio', 'Lúcia', 'Estêvão', 'Mônica', 'Caio', 'Beatriz', 'Heitor', 'Letícia', 'Jean-Pierre', 'Iúri',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Conceição', 'Araújo', 'Gonçalves', 'Magalhães', 'Simões',
+    'Brandão', 'Lima', 'Pereira', 'Ribeiro', 'Negrão', 'da Costa', 'de Assunção', 'Falcão', 'Lopes-Cruz',
+    'Guimarães', 'Müller', 'Nóbrega', 'Catarino', 'Queiroz', 'Antunes',
+]
+COMPANIES = [
+    'Padaria Pão Quente', 'Clínica São Lucas', 'Construtora Horizonte Ltda', 'Açaí do Norte ME',
+    'Farmácia Popular', 'Escola Criança Feliz', 'Auto Peças Irmãos', 'Hospital Santa Luzia',
+    'Tecnologia Ágil S.A.', 'Mercadinho da Esquina', 'Óticas Visão', 'Transportes Rápido Sul',
+]
+TITLES = ['Diretor', 'Gerente de Compras', 'Sócio', 'Analista Financeiro', 'Proprietária', 'Coordenadora', '']
+CITIES = [('São Paulo', 'SP', '11'), ('Rio de Janeiro', 'RJ', '21'), ('Belo Horizonte', 'MG', '31'),
+          ('Curitiba', 'PR', '41'), ('Porto Alegre', 'RS', '51'), ('Salvador', 'BA', '71'),
+          ('Recife', 'PE', '81'), ('Fortaleza', 'CE', '85'), ('Goiânia', 'GO', '62'), ('Belém', 'PA', '91')]
+SOURCES = ['Indicação', 'Feira', 'Site', 'Instagram', 'Parceiro', '']
+DOMAINS = ['gmail.com', 'hotmail.com', 'uol.com.br', 'yahoo.com.br', 'empresa.com.br', 'bol.com.br']
+
+# Cabeçalhos como chegam nas planilhas e o mapeamento para os campos do Lead
+HEADERS = {
+    'FirstName': ' Nome ',
+    'LastName': 'SOBRENOME',
+    'Email': 'E-mail ',
+    'Phone': 'Telefone / Celular',
+    'Company': 'Empresa',
+    'Title': 'cargo',
+    'City': 'Cidade',
+    'State': 'UF',
+    'LeadSource': 'Origem do Lead',
+}
+REVENUE_HEADER = 'Faturamento (R$)'
+NOTES_HEADER = 'Observações'
+COLUMN_MAPPING = {field: header for field, header in HEADERS.items()}
+
+FORMATS = ('csv', 'xlsx', 'txt')
+
+# Diretório dos arquivos gerados para os benchmarks (reutilizados entre execuções)
+DATA_DIR = os.getenv('BENCHMARK_DATA_DIR', os.path.join(tempfile.gettempdir(), 'lead_benchmarks'))
+
+
+def _pick(rng, values, rows):
+    return pd.Series(np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)])
+
+
+def _take(values, index):
+    return pd.Series(np.asarray(values, dtype=object)[index])
+
+
+def _vary_case(rng, series):
+    """Aplica caixa alta, baixa ou espaços extras a parte dos valores."""
+    variant = rng.integers(0, 10, len(series))
+    series = series.where(variant != 0, series.str.upper())
+    series = series.where(variant != 1, series.str.lower())
+    return series.where(variant != 2, '  ' + series + ' ')
+
+
+def _fold(values):
+    """Valores sem acentos, sem caracteres fora de a-z e em minúsculas (partes do email)."""
+    folded = pd.Series(values).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    return folded.str.replace(r'[^a-z]', '', regex=True).tolist()
+
+
+def _phones(rng, ddd, rows):
+    mobile = rng.random(rows) < 0.7
+    subscriber = pd.Series(rng.integers(10_000_000, 99_999_999, rows).astype(str).astype(object))
+    number = subscriber.where(~mobile, '9' + subscriber)
+    part1 = number.str.slice(0, -4)
+    part2 = number.str.slice(-4)
+    formats = [
+        '(' + ddd + ') ' + part1 + '-' + part2,
+        ddd + number,
+        '+55 ' + ddd + ' ' + part1 + '-' + part2,
+        '0' + ddd + ' ' + part1 + part2,
+        '55' + ddd + number + '.0',
+        ddd + '.' + part1 + '.' + part2,
+    ]
+    choice = rng.integers(0, len(formats) + 1, rows)
+    phones = pd.Series('', index=range(rows), dtype=object)
+    for position, values in enumerate(formats):
+        phones = phones.where(choice != position, values)
+    return phones
+
+
+def _money(rng, rows):
+    # Valores de 1 mil a 5 milhões, formatados a partir de uma tabela (evita formatar linha a linha)
+    index = rng.integers(1, 5_000, rows)
+    value = _take([str(i * 1_000) for i in range(5_000)], index)
+    thousands = _take(['{:,}'.format(i * 1_000) for i in range(5_000)], index)
+    formats = [
+        'R$ ' + thousands.str.replace(',', '.') + ',00',
+        'R$' + value.astype(str),
+        'R$ ' + thousands + '.00',
+        thousands.str.replace(',', '.') + ',00',
+    ]
+    choice = rng.integers(0, len(formats) + 1, rows)
+    money = pd.Series('', index=range(rows), dtype=object)
+    for position, values in enumerate(formats):
+        money = money.where(choice != position, values)
+    return money
+
+
+def generate_leads(rows, seed=0):
+    """
+    Gera um DataFrame de leads sintéticos com os cabeçalhos bagunçados de HEADERS.
+
+    Args:
+        rows (int): Número de linhas
+        seed (int): Semente do gerador (a mesma semente gera os mesmos dados)
+
+    Returns:
+        pandas.DataFrame: Leads com valores como string
+    """
+    rng = np.random.default_rng(seed)
+    first_index = rng.integers(0, len(FIRST_NAMES), rows)
+    last_index = rng.integers(0, len(LAST_NAMES), rows)
+    first = _take(FIRST_NAMES, first_index)
+    last = _take(LAST_NAMES, last_index)
+    city_index = rng.integers(0, len(CITIES), rows)
+    cities = _take([city[0] for city in CITIES], city_index)
+    states = _take([city[1] for city in CITIES], city_index)
+    ddd = _take([city[2] for city in CITIES], city_index)
+
+    local_part = (_take(_fold(FIRST_NAMES), first_index) + '.' + _take(_fold(LAST_NAMES), last_index)
+                  + _take([str(i) for i in range(1000)], rng.integers(1, 999, rows)))
+    email = local_part + '@' + _pick(rng, DOMAINS, rows)
+    email_kind = rng.integers(0, 20, rows)
+    email = email.where(email_kind != 0, email.str.upper())
+    email = email.where(email_kind != 1, local_part + '@')
+    email = email.where(email_kind != 2, local_part + ' at gmail.com')
+    email = email.where(email_kind != 3, '')
+
+    company = _pick(rng, COMPANIES, rows)
+    company = company.where(rng.random(rows) > 0.05, '')
+
+    data = {
+        HEADERS['FirstName']: _vary_case(rng, first),
+        HEADERS['LastName']: _vary_case(rng, last),
+        HEADERS['Email']: email,
+        HEADERS['Phone']: _phones(rng, ddd, rows),
+        HEADERS['Company']: company,
+        HEADERS['Title']: _pick(rng, TITLES, rows),
+        HEADERS['City']: cities,
+        HEADERS['State']: states,
+        HEADERS['LeadSource']: _pick(rng, SOURCES, rows),
+        REVENUE_HEADER: _money(rng, rows),
+        NOTES_HEADER: _pick(rng, ['', 'Retornar na segunda', 'Cliente antigo; pediu orçamento', 'Não ligar após 18h'], rows),
+    }
+    return pd.DataFrame(data)
+
+
+def _write_txt(df, path):
+    """Um bloco de texto livre por lead, como as anotações recebidas em .txt."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in df.itertuples(index=False):
+            values = dict(zip(df.columns, row))
+            f.write(f"Nome: {values[HEADERS['FirstName']].strip()} {values[HEADERS['LastName']].strip()}\n")
+            f.write(f"Empresa: {values[HEADERS['Company']]}\n")
+            f.write(f"Email: {values[HEADERS['Email']]} - Tel.: {values[HEADERS['Phone']]}\n")
+            f.write(f"Cidade: {values[HEADERS['City']]}/{values[HEADERS['State']]}\n")
+            if values[NOTES_HEADER]:
+                f.write(f"Obs.: {values[NOTES_HEADER]}\n")
+            f.write("\n")
+
+
+def write_dataset(path, rows, file_format='csv', seed=0):
+    """
+    Gera e grava um arquivo de leads sintéticos.
+
+    Args:
+        path (str): Caminho do arquivo
+        rows (int): Número de linhas
+        file_format (str): 'csv', 'xlsx' ou 'txt'
+        seed (int): Semente do gerador
+
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Formato não suportado: {file_format} (use {', '.join(FORMATS)})")
+    df = generate_leads(rows, seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if file_format == 'csv':
+        df.to_csv(path, index=False, encoding='utf-8')
+    elif file_format == 'xlsx':
+        df.to_excel(path, index=False, engine='openpyxl')
+    else:
+        _write_txt(df, path)
+    return path
+
+
+def dataset_path(rows, file_format='csv', seed=0):
+    """Arquivo gerado em DATA_DIR para o tamanho, formato e semente (gerado na primeira chamada)."""
+    path = os.path.join(DATA_DIR, f"leads_{rows}_{seed}.{file_format}")
+    if not os.path.exists(path):
+        write_dataset(path, rows, file_format, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera arquivos sintéticos de leads brasileiros.")
+    parser.add_argument('--rows', type=int, default=1000, help="Número de linhas (ex.: 1000 a 1000000)")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Arquivo de saída (padrão: em BENCHMARK_DATA_DIR)")
+    args = parser.parse_args()
+    path = args.out or os.path.join(DATA_DIR, f"leads_{args.rows}_{args.seed}.{args.format}")
+    print(write_dataset(path, args.rows, args.format, args.seed))
+
+
+if __name__ == '__main__':
+    main()
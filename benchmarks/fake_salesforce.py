@@ -0,0 +1,621 @@
+"""
+Salesforce falso e local para testes de carga e de ponta a ponta da ingestão.
+
+Implementa, em memória, o necessário para o pipeline de create_leads_from_csv:
+
+    POST  /services/oauth2/token                       -- token (grant_type=password)
+    POST  /services/data/vXX.X/jobs/ingest             -- cria job (insert, upsert, update)
+    PUT   /services/data/vXX.X/jobs/ingest/<id>/batches
+    PATCH /services/data/vXX.X/jobs/ingest/<id>        -- UploadComplete ou Aborted
+    GET   /services/data/vXX.X/jobs/ingest/<id>        -- status
+    GET   /services/data/vXX.X/jobs/ingest/<id>/successfulResults|failedResults|unprocessedrecords
+    POST/GET /services/data/vXX.X/jobs/query[/<id>[/results]]  -- sincronização do índice de leads
+    GET   /services/data/vXX.X/sobjects/Lead/describe  -- com If-Modified-Since/304
+    GET   /services/data/vXX.X/limits
+    GET   /services/data/vXX.X/chatter/users/me
+
+Os registros são validados como no Salesforce (LastName obrigatório, email
+inválido, texto acima do tamanho do campo) e o job só termina após o tempo de
+processamento por registro. Latência, falhas e limite de requisições são
+configuráveis por argumentos ou variáveis FAKE_SF_*:
+
+    FAKE_SF_LATENCY             -- segundos acrescentados a cada requisição (padrão 0.02)
+    FAKE_SF_LATENCY_JITTER      -- variação aleatória máxima da latência (padrão 0.01)
+    FAKE_SF_RECORD_TIME         -- segundos de processamento por registro (padrão 0.0005)
+    FAKE_SF_RECORD_FAILURE_RATE -- fração de registros com falha injetada (padrão 0)
+    FAKE_SF_JOB_FAILURE_RATE    -- fração de jobs que terminam como Failed (padrão 0)
+    FAKE_SF_ERROR_RATE          -- fração de requisições respondidas com 503 (padrão 0)
+    FAKE_SF_RATE_LIMIT          -- requisições por segundo antes do limite (0 desativa)
+    FAKE_SF_RATE_LIMIT_STATUS   -- 403 (REQUEST_LIMIT_EXCEEDED, padrão) ou 429 com Retry-After
+    FAKE_SF_DAILY_API_REQUESTS  -- limite diário informado em /limits e Sforce-Limit-Info
+    FAKE_SF_SEED                -- semente das falhas injetadas
+
+Uso (a partir da raiz do projeto):
+
+    python -m benchmarks.fake_salesforce --port 8787 --record-failure-rate 0.02
+
+e, no .env (ou no ambiente) da aplicação:
+
+    SANDBOX_LOGIN_URL=http://127.0.0.1:8787
+    SANDBOX_INSTANCE_URL=http://127.0.0.1:8787
+    SANDBOX_CLIENT_ID=x  SANDBOX_CLIENT_SECRET=x  SANDBOX_USERNAME=x  SANDBOX_PASSWORD=x
+    SALESFORCE_BULK_POLL_INTERVAL=0.5
+
+GET /fake/stats devolve os contadores do servidor e POST /fake/config altera a
+configuração em execução (JSON com as mesmas chaves de FakeSalesforceConfig).
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from flask import Flask, Response, jsonify, request
+
+API_PREFIX = '/services/data/v<version>'
+
+# Campos do Lead no describe falso: (nome, tipo, tamanho, obrigatório)
+LEAD_DESCRIBE_FIELDS = [
+    ('Id', 'id', 18, False),
+    ('LastName', 'string', 80, True),
+    ('FirstName', 'string', 40, False),
+    ('Company', 'string', 255, True),
+    ('Email', 'email', 80, False),
+    ('Phone', 'phone', 40, False),
+    ('Title', 'string', 128, False),
+    ('Street', 'textarea', 255, False),
+    ('City', 'string', 40, False),
+    ('State', 'string', 80, False),
+    ('PostalCode', 'string', 20, False),
+    ('Country', 'string', 80, False),
+    ('LeadSource', 'picklist', 255, False),
+    ('OwnerId', 'reference', 18, False),
+    ('Import_Key__c', 'string', 64, False),
+    ('LastModifiedDate', 'datetime', 0, False),
+]
+LEAD_SOURCES = ['Indicação', 'Feira', 'Site', 'Instagram', 'Parceiro', 'Web', 'Other']
+
+_EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_WATERMARK_PATTERN = re.compile(r'LastModifiedDate\s*>=\s*(\S+)')
+
+
+class FakeSalesforceConfig:
+    """Configuração do servidor falso (padrões das variáveis FAKE_SF_*)."""
+
+    FIELDS = {
+        'latency': ('FAKE_SF_LATENCY', float, 0.02),
+        'latency_jitter': ('FAKE_SF_LATENCY_JITTER', float, 0.01),
+        'record_time': ('FAKE_SF_RECORD_TIME', float, 0.0005),
+        'record_failure_rate': ('FAKE_SF_RECORD_FAILURE_RATE', float, 0.0),
+        'job_failure_rate': ('FAKE_SF_JOB_FAILURE_RATE', float, 0.0),
+        'error_rate': ('FAKE_SF_ERROR_RATE', float, 0.0),
+        'rate_limit': ('FAKE_SF_RATE_LIMIT', float, 0.0),
+        'rate_limit_status': ('FAKE_SF_RATE_LIMIT_STATUS', int, 403),
+        'daily_api_requests': ('FAKE_SF_DAILY_API_REQUESTS', int, 1_000_000),
+        'seed': ('FAKE_SF_SEED', int, 0),
+    }
+
+    def __init__(self, **overrides):
+        for name, (env_name, cast, default) in self.FIELDS.items():
+            value = overrides.get(name)
+            if value is None:
+                value = os.getenv(env_name)
+            setattr(self, name, cast(value) if value is not None else default)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name in self.FIELDS and value is not None:
+                setattr(self, name, self.FIELDS[name][1](value))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class _Org:
+    """Estado em memória da org falsa: leads gravados, jobs e uso da API."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.leads = {}
+        self.external_ids = {}
+        self.jobs = {}
+        self.query_jobs = {}
+        self.id_sequence = itertools.count(1)
+        self.api_usage = 0
+        self.window = (0, 0)
+        self.stats = {'requests': 0, 'errors_injected': 0, 'rate_limited': 0, 'jobs': 0,
+                      'records_processed': 0, 'records_failed': 0}
+        self.started_at = formatdate(time.time(), usegmt=True)
+
+    def new_id(self, prefix='00Q'):
+        return f"{prefix}{next(self.id_sequence):012d}AAA"
+
+    def rate_limited(self):
+        """Janela de um segundo com até config.rate_limit requisições."""
+        if self.config.rate_limit <= 0:
+            return False
+        second = int(time.time())
+        start, count = self.window
+        if start != second:
+            start, count = second, 0
+        self.window = (start, count + 1)
+        return count + 1 > self.config.rate_limit
+
+
+def _now_iso(timestamp=None):
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime(timestamp or time.time()))
+
+
+def _error(status, error_code, message, headers=None):
+    response = jsonify([{'errorCode': error_code, 'message': message}])
+    response.status_code = status
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
+
+
+def _csv_response(fieldnames, rows, headers=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+    return Response(buffer.getvalue(), mimetype='text/csv', headers=headers or {})
+
+
+def _field_lengths():
+    return {name: length for name, field_type, length, _ in LEAD_DESCRIBE_FIELDS
+            if length and field_type not in ('id', 'reference')}
+
+
+def _validate(record):
+    """Erro (sf__Error) de validação do registro como no Salesforce, ou None."""
+    missing = [name for name, _, _, required in LEAD_DESCRIBE_FIELDS if required and not record.get(name)]
+    if missing:
+        return f"REQUIRED_FIELD_MISSING:Required fields are missing: [{', '.join(missing)}]:{', '.join(missing)} --"
+    email = record.get('Email')
+    if email and not _EMAIL_PATTERN.match(email):
+        return f"INVALID_EMAIL_ADDRESS:Email: invalid email address: {email}:Email --"
+    for name, length in _field_lengths().items():
+        value = record.get(name) or ''
+        if len(value) > length:
+            return (f"STRING_TOO_LONG:{name}: data value too large: {value[:20]}... "
+                    f"(max length={length}):{name} --")
+    return None
+
+
+def _injected_error(rng, record):
+    """Falha aleatória injetada (concorrência ou regra de duplicidade)."""
+    if rng.random() < 0.6:
+        return "UNABLE_TO_LOCK_ROW:unable to obtain exclusive access to this record or 1 records: --"
+    return ("DUPLICATES_DETECTED:Use one of these records?:--" if rng.random() < 0.5
+            else f"DUPLICATE_VALUE:duplicate value found: Email duplicates value on record with id: {record.get('Email')} --")
+
+
+def _process_job(org, job):
+    """Processa os registros enviados ao fechar o job (resultados prontos em job['ready_at'])."""
+    config = org.config
+    rng = random.Random(f"{config.seed}:{job['id']}")
+    text = ''.join(job['chunks'])
+    job['chunks'] = []
+    reader = csv.DictReader(io.StringIO(text))
+    job['columns'] = list(reader.fieldnames or [])
+    records = list(reader)
+    job['records'] = len(records)
+    job['ready_at'] = time.time() + len(records) * config.record_time
+
+    if rng.random() < config.job_failure_rate:
+        job['failure'] = 'InvalidBatch : Failed to process query: UNKNOWN_EXCEPTION: An unexpected error occurred'
+        return
+
+    operation = job['operation']
+    external_field = job.get('externalIdFieldName')
+    successes, failures = [], []
+    with org.lock:
+        for record in records:
+            record = {key: value for key, value in record.items() if key is not None}
+            error = None
+            existing_id = None
+            if operation == 'update':
+                existing_id = record.get('Id')
+                if existing_id not in org.leads:
+                    error = "INVALID_CROSS_REFERENCE_KEY:invalid cross reference id:Id --"
+            elif operation == 'upsert':
+                key = record.get(external_field)
+                if not key:
+                    error = f"MISSING_ARGUMENT:{external_field} not specified:{external_field} --"
+                existing_id = org.external_ids.get(key)
+            if not error:
+                merged = dict(org.leads.get(existing_id, {}), **{k: v for k, v in record.items() if v != ''}) \
+                    if existing_id else record
+                error = _validate(merged)
+            if not error and rng.random() < config.record_failure_rate:
+                error = _injected_error(rng, record)
+            if error:
+                failures.append(dict(record, sf__Id='', sf__Error=error))
+                continue
+            sf_id = existing_id or org.new_id()
+            merged['Id'] = sf_id
+            merged['LastModifiedDate'] = _now_iso()
+            org.leads[sf_id] = merged
+            if external_field and merged.get(external_field):
+                org.external_ids[merged[external_field]] = sf_id
+            successes.append(dict(record, sf__Id=sf_id, sf__Created='false' if existing_id else 'true'))
+        org.stats['records_processed'] += len(records)
+        org.stats['records_failed'] += len(failures)
+    job['successes'] = successes
+    job['failures'] = failures
+
+
+def _job_info(job):
+    now = time.time()
+    info = {
+        'id': job['id'],
+        'operation': job['operation'],
+        'object': job['object'],
+        'createdById': '005000000000001AAA',
+        'createdDate': job['createdDate'],
+        'systemModstamp': _now_iso(),
+        'state': job['state'],
+        'concurrencyMode': 'Parallel',
+        'contentType': 'CSV',
+        'apiVersion': job['apiVersion'],
+        'jobType': 'V2Ingest',
+        'lineEnding': job['lineEnding'],
+        'columnDelimiter': 'COMMA',
+        'numberRecordsProcessed': 0,
+        'numberRecordsFailed': 0,
+        'retries': 0,
+        'totalProcessingTime': 0,
+    }
+    if job.get('externalIdFieldName'):
+        info['externalIdFieldName'] = job['externalIdFieldName']
+    if job['state'] in ('UploadComplete', 'InProgress'):
+        if job.get('failure') and now >= job['ready_at']:
+            job['state'] = 'Failed'
+            info['errorMessage'] = job['failure']
+        elif now >= job['ready_at']:
+            job['state'] = 'JobComplete'
+        else:
+            job['state'] = 'InProgress'
+            started = job['ready_at'] - job['records'] * job['record_time']
+            done = int((now - started) / job['record_time']) if job['record_time'] > 0 else job['records']
+            info['numberRecordsProcessed'] = min(done, job['records'])
+        info['state'] = job['state']
+    if job['state'] == 'JobComplete':
+        info['numberRecordsProcessed'] = job['records']
+        info['numberRecordsFailed'] = len(job['failures'])
+        info['totalProcessingTime'] = int(job['records'] * job['record_time'] * 1000)
+    elif job['state'] == 'Failed':
+        info['errorMessage'] = job['failure']
+    return info
+
+
+def create_app(config=None):
+    """
+    Cria a aplicação Flask do Salesforce falso.
+
+    Args:
+        config (FakeSalesforceConfig, optional): Configuração (padrão: variáveis FAKE_SF_*)
+
+    Returns:
+        Flask: Aplicação com o estado da org em app.config['FAKE_ORG']
+    """
+    config = config or FakeSalesforceConfig()
+    org = _Org(config)
+    app = Flask(__name__)
+    app.config['FAKE_ORG'] = org
+
+    @app.before_request
+    def simulate_network():
+        if request.path.startswith('/fake/'):
+            return None
+        with org.lock:
+            org.stats['requests'] += 1
+            limited = org.rate_limited()
+            injected = not limited and org.random.random() < config.error_rate
+            delay = config.latency + org.random.uniform(0, config.latency_jitter)
+            if not request.path.startswith('/services/oauth2/'):
+                org.api_usage += 1
+        if delay > 0:
+            time.sleep(delay)
+        if limited:
+            org.stats['rate_limited'] += 1
+            if config.rate_limit_status == 429:
+                return _error(429, 'REQUEST_LIMIT_EXCEEDED', 'Too many requests', {'Retry-After': '1'})
+            return _error(403, 'REQUEST_LIMIT_EXCEEDED',
+                          'ConcurrentPerOrgLongTxn Limit exceeded.')
+        if injected:
+            org.stats['errors_injected'] += 1
+            return _error(503, 'SERVER_UNAVAILABLE', 'Service temporarily unavailable')
+        if request.path.startswith('/services/data/'):
+            if not request.headers.get('Authorization', '').startswith('Bearer '):
+                return _error(401, 'INVALID_SESSION_ID', 'Session expired or invalid')
+        return None
+
+    @app.after_request
+    def limit_info(response):
+        if request.path.startswith('/services/data/'):
+            response.headers['Sforce-Limit-Info'] = f"api-usage={org.api_usage}/{config.daily_api_requests}"
+        return response
+
+    @app.post('/services/oauth2/token')
+    def token():
+        if request.form.get('grant_type') != 'password' or not request.form.get('username'):
+            return jsonify({'error': 'invalid_grant', 'error_description': 'authentication failure'}), 400
+        return jsonify({
+            'access_token': f"00Dfake!{uuid.uuid4().hex}",
+            'instance_url': request.host_url.rstrip('/'),
+            'id': f"{request.host_url}id/00D000000000001AAA/005000000000001AAA",
+            'token_type': 'Bearer',
+            'issued_at': str(int(time.time() * 1000)),
+            'signature': 'fake',
+        })
+
+    @app.get(f'{API_PREFIX}/chatter/users/me')
+    def chatter_me(version):
+        return jsonify({
+            'id': '005000000000001AAA',
+            'displayName': 'Usuário de Testes',
+            'username': 'testes@fake.salesforce.local',
+            'additionalLabel': 'Fake Org',
+            'companyName': 'Fake Org',
+            'email': 'testes@fake.salesforce.local',
+            'photoUrl': f"{request.host_url}profilephoto/005/F",
+        })
+
+    @app.get(f'{API_PREFIX}/limits')
+    def limits(version):
+        maximum = config.daily_api_requests
+        with org.lock:
+            used = org.api_usage
+            jobs = org.stats['jobs']
+        return jsonify({
+            'DailyApiRequests': {'Max': maximum, 'Remaining': max(maximum - used, 0)},
+            'DailyBulkApiBatches': {'Max': 15000, 'Remaining': max(15000 - jobs, 0)},
+            'DailyBulkV2QueryJobs': {'Max': 10000, 'Remaining': 10000 - len(org.query_jobs)},
+            'DailyBulkV2QueryFileStorageMB': {'Max': 976562, 'Remaining': 976562},
+        })
+
+    @app.get(f'{API_PREFIX}/sobjects/<sobject>/describe')
+    def describe(version, sobject):
+        if sobject != 'Lead':
+            return _error(404, 'NOT_FOUND', f"The requested resource does not exist: {sobject}")
+        since = request.headers.get('If-Modified-Since')
+        if since:
+            try:
+                if parsedate_to_datetime(since) >= parsedate_to_datetime(org.started_at):
+                    return Response(status=304)
+            except (TypeError, ValueError):
+                pass
+        fields = []
+        for name, field_type, length, required in LEAD_DESCRIBE_FIELDS:
+            fields.append({
+                'name': name,
+                'type': field_type,
+                'length': length,
+                'createable': name not in ('Id', 'LastModifiedDate'),
+                'updateable': name not in ('Id', 'LastModifiedDate'),
+                'nillable': not required,
+                'externalId': name == 'Import_Key__c',
+                'restrictedPicklist': False,
+                'picklistValues': [{'value': value, 'active': True} for value in LEAD_SOURCES]
+                if field_type == 'picklist' else [],
+            })
+        response = jsonify({'name': 'Lead', 'fields': fields})
+        response.headers['Last-Modified'] = org.started_at
+        return response
+
+    @app.post(f'{API_PREFIX}/jobs/ingest')
+    def create_job(version):
+        data = request.get_json(silent=True) or {}
+        operation = data.get('operation')
+        if operation not in ('insert', 'upsert', 'update', 'delete'):
+            return _error(400, 'INVALIDJOB', f"Invalid operation: {operation}")
+        if operation == 'upsert' and not data.get('externalIdFieldName'):
+            return _error(400, 'INVALIDJOB', 'External ID was blank for upsert')
+        job_id = org.new_id('750')
+        job = {
+            'id': job_id,
+            'object': data.get('object', 'Lead'),
+            'operation': operation,
+            'externalIdFieldName': data.get('externalIdFieldName'),
+            'lineEnding': data.get('lineEnding', 'LF'),
+            'apiVersion': float(version),
+            'createdDate': _now_iso(),
+            'state': 'Open',
+            'chunks': [],
+            'records': 0,
+            'record_time': config.record_time,
+            'successes': [],
+            'failures': [],
+        }
+        with org.lock:
+            org.jobs[job_id] = job
+            org.stats['jobs'] += 1
+        return jsonify(_job_info(job))
+
+    def _get_job(job_id):
+        with org.lock:
+            return org.jobs.get(job_id)
+
+    @app.put(f'{API_PREFIX}/jobs/ingest/<job_id>/batches')
+    def upload(version, job_id):
+        job = _get_job(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        if job['state'] != 'Open':
+            return _error(409, 'INVALIDJOBSTATE', f"Job is not open for uploads, state: {job['state']}")
+        text = request.get_data(as_text=True)
+        if job['lineEnding'] == 'LF' and '\r\n' in text:
+            return _error(400, 'INVALIDBATCH', 'LineEnding is invalid on user data. Current LineEnding setting is LF')
+        if job['chunks']:
+            text = text.split('\n', 1)[1] if '\n' in text else ''
+        job['chunks'].append(text)
+        return Response(status=201)
+
+    @app.patch(f'{API_PREFIX}/jobs/ingest/<job_id>')
+    def change_state(version, job_id):
+        job = _get_job(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        state = (request.get_json(silent=True) or {}).get('state')
+        if state == 'Aborted':
+            job['state'] = 'Aborted'
+        elif state == 'UploadComplete':
+            if job['state'] != 'Open':
+                return _error(409, 'INVALIDJOBSTATE', f"Job state is {job['state']}")
+            job['state'] = 'UploadComplete'
+            _process_job(org, job)
+        else:
+            return _error(400, 'INVALIDSTATE', f"Invalid state: {state}")
+        return jsonify(_job_info(job))
+
+    @app.get(f'{API_PREFIX}/jobs/ingest/<job_id>')
+    def job_status(version, job_id):
+        job = _get_job(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        return jsonify(_job_info(job))
+
+    @app.get(f'{API_PREFIX}/jobs/ingest/<job_id>/<kind>')
+    def job_results(version, job_id, kind):
+        job = _get_job(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        _job_info(job)
+        columns = job.get('columns', [])
+        if kind == 'successfulResults':
+            return _csv_response(['sf__Id', 'sf__Created'] + columns, job['successes'])
+        if kind == 'failedResults':
+            return _csv_response(['sf__Id', 'sf__Error'] + columns, job['failures'])
+        if kind == 'unprocessedrecords':
+            return _csv_response(columns, [])
+        return _error(404, 'NOT_FOUND', f"Unknown resource: {kind}")
+
+    @app.post(f'{API_PREFIX}/jobs/query')
+    def create_query(version):
+        data = request.get_json(silent=True) or {}
+        job_id = org.new_id('750')
+        match = _WATERMARK_PATTERN.search(data.get('query', ''))
+        watermark = match.group(1).replace('Z', '')[:19] if match else ''
+        with org.lock:
+            rows = [{'Id': sf_id, 'Email': lead.get('Email', ''), 'Phone': lead.get('Phone', ''),
+                     'LastModifiedDate': lead['LastModifiedDate']}
+                    for sf_id, lead in org.leads.items() if lead['LastModifiedDate'][:19] >= watermark]
+            org.query_jobs[job_id] = {'id': job_id, 'rows': rows, 'ready_at': time.time() + len(rows) * config.record_time}
+        return jsonify({'id': job_id, 'operation': 'query', 'object': 'Lead', 'state': 'UploadComplete'})
+
+    @app.get(f'{API_PREFIX}/jobs/query/<job_id>')
+    def query_status(version, job_id):
+        job = org.query_jobs.get(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        state = 'JobComplete' if time.time() >= job['ready_at'] else 'InProgress'
+        return jsonify({'id': job_id, 'operation': 'query', 'state': state, 'numberRecordsProcessed': len(job['rows'])})
+
+    @app.get(f'{API_PREFIX}/jobs/query/<job_id>/results')
+    def query_results(version, job_id):
+        job = org.query_jobs.get(job_id)
+        if not job:
+            return _error(404, 'NOT_FOUND', 'Job not found')
+        start = int(request.args.get('locator') or 0)
+        size = int(request.args.get('maxRecords') or 50000)
+        page = job['rows'][start:start + size]
+        locator = str(start + size) if start + size < len(job['rows']) else 'null'
+        return _csv_response(['Id', 'Email', 'Phone', 'LastModifiedDate'], page,
+                             {'Sforce-Locator': locator, 'Sforce-NumberOfRecords': str(len(page))})
+
+    @app.get('/fake/stats')
+    def fake_stats():
+        with org.lock:
+            states = {}
+            for job in org.jobs.values():
+                states[job['state']] = states.get(job['state'], 0) + 1
+            return jsonify(dict(org.stats, leads=len(org.leads), job_states=states, api_usage=org.api_usage,
+                                config=config.as_dict()))
+
+    @app.post('/fake/config')
+    def fake_config():
+        config.update(request.get_json(silent=True) or {})
+        return jsonify(config.as_dict())
+
+    return app
+
+
+class FakeSalesforceServer:
+    """
+    Servidor falso em uma thread, para testes e benchmarks no mesmo processo.
+
+    Exemplo:
+        with FakeSalesforceServer(FakeSalesforceConfig(latency=0)) as server:
+            os.environ.update(server.environment())
+            create_leads_from_csv('leads.csv')
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, quiet=True):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class _QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.app = create_app(config)
+        self.server = make_server(host, port, self.app, threaded=True,
+                                  request_handler=_QuietHandler if quiet else None)
+        self.url = f"http://{host}:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def org(self):
+        return self.app.config['FAKE_ORG']
+
+    def environment(self, prefix='SANDBOX_'):
+        """Variáveis de ambiente que apontam a aplicação para este servidor."""
+        return {
+            'SALESFORCE_ENVIRONMENT': 'production' if prefix == 'PRODUCTION_' else 'sandbox',
+            f'{prefix}LOGIN_URL': self.url,
+            f'{prefix}INSTANCE_URL': self.url,
+            f'{prefix}CLIENT_ID': 'fake-client-id',
+            f'{prefix}CLIENT_SECRET': 'fake-client-secret',
+            f'{prefix}USERNAME': 'testes@fake.salesforce.local',
+            f'{prefix}PASSWORD': 'fake-password',
+        }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salesforce falso para testes de carga da ingestão.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    for name, (env_name, cast, default) in FakeSalesforceConfig.FIELDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=cast,
+                            help=f"Padrão: {env_name} ou {default}")
+    args = parser.parse_args()
+    config = FakeSalesforceConfig(**{name: getattr(args, name) for name in FakeSalesforceConfig.FIELDS})
+    print(f"Salesforce falso em http://{args.host}:{args.port} ({config.as_dict()})")
+    create_app(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,516 @@
+"""
+Teste de carga dos uploads: envios multipart concorrentes para /upload_file,
+seguidos de /check_conversion e /resultado, contra o Salesforce falso
+(benchmarks.fake_salesforce) e o backend local da IA (LLM_BACKEND=fake).
+
+Para cada modo de execução do servidor, número de workers e nível de
+concorrência, reporta latências (p50/p90/p95/p99/máx.) do upload e do fluxo
+completo, vazão (uploads e linhas por segundo), taxa de erros por categoria e
+o pico de memória (RSS somado do processo do servidor e de seus workers).
+
+Modos:
+    dev              -- servidor de desenvolvimento do Flask com threads (um processo)
+    gunicorn-sync    -- gunicorn com workers síncronos (-k sync)
+    gunicorn-gthread -- gunicorn com workers de threads (-k gthread --threads N)
+
+Uso (a partir da raiz do projeto):
+
+    python -m benchmarks.loadtest --modes dev,gunicorn-sync,gunicorn-gthread \\
+        --workers 1,2,4 --concurrency 1,4,8,16 --uploads 32 --rows 2000 --out loadtest.json
+
+O servidor e o Salesforce falso rodam em subprocessos, com o diretório de
+trabalho em uma pasta temporária. Cada upload de um nível envia um arquivo
+distinto (semente do datagen e número de linhas diferentes: --rows, --rows + 1,
+...). A importação incremental e o índice local de leads são desativados (os
+arquivos são reenviados em cada nível e modo) e o throttle de
+jobs da Bulk API é elevado para medir a capacidade da máquina e não o limite
+da org; --env KEY=VALUE altera qualquer variável do servidor.
+
+Erros por categoria: http_<status>, redirect_index (upload recusado com
+mensagem), conversion_<status>, result_<status>, count_mismatch (total_count ou
+created_count do job diferentes dos do mesmo arquivo enviado sozinho, na
+referência medida antes dos níveis; created_count só é comparado sem falhas
+injetadas no Salesforce falso) e exception. O tamanho do
+cookie de sessão também é reportado: acima de ~8 KB o gunicorn recusa as
+requisições seguintes com 431 (--gunicorn-arg repassa argumentos ao gunicorn).
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import requests
+from . import datagen
+
+try:
+    import psutil
+except ImportError:  # Dependência opcional; sem ela a memória é lida de /proc (Linux)
+    psutil = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('dev', 'gunicorn-sync', 'gunicorn-gthread')
+PERCENTILES = (50, 90, 95, 99)
+
+# Variáveis do servidor durante o teste (ver a docstring do módulo)
+SERVER_ENV = {
+    'LLM_BACKEND': 'fake',
+    'ROW_FINGERPRINT_PATH': '',
+    'LEAD_INDEX_PATH': '',
+    'SALESFORCE_INGEST_JOBS_PER_MINUTE': '100000',
+    'SALESFORCE_INGEST_JOBS_BURST': '1000',
+    'SALESFORCE_BULK_POLL_INTERVAL': '0.25',
+    'SALESFORCE_LOCK_RETRY_DELAY': '0.5',
+    'LOG_LEVEL': 'WARNING',
+    'DEBUG': 'False',
+}
+
+_DEV_SERVER = (
+    "import sys; from app import app; "
+    "app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True, use_reloader=False)"
+)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            requests.get(url, timeout=2)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def _tree_rss(pid):
+    """RSS (bytes) do processo e de seus descendentes, ou None se não for possível medir."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running())
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class _RssSampler:
+    """Amostra periodicamente o RSS da árvore de processos do servidor e guarda o pico."""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _tree_rss(self.pid)
+            if rss is None:
+                self.peak = None
+                return
+            self.peak = max(self.peak, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class _Process:
+    """Subprocesso com a saída em um arquivo de log, encerrado ao sair do bloco."""
+
+    def __init__(self, command, env, cwd, log_path):
+        self.log_path = log_path
+        self._log = open(log_path, 'w', encoding='utf-8')
+        self.popen = subprocess.Popen(command, env=env, cwd=cwd, stdout=self._log, stderr=subprocess.STDOUT)
+
+    def stop(self):
+        if self.popen.poll() is None:
+            self.popen.terminate()
+            try:
+                self.popen.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.popen.kill()
+                self.popen.wait()
+        self._log.close()
+
+
+def _server_command(mode, workers, threads, port, extra_args=()):
+    if mode == 'dev':
+        return [sys.executable, '-c', _DEV_SERVER, str(port)]
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+               '--timeout', '600', '--log-level', 'warning']
+    if mode == 'gunicorn-gthread':
+        command += ['--worker-class', 'gthread', '--threads', str(threads)]
+    else:
+        command += ['--worker-class', 'sync']
+    return command + list(extra_args) + ['app:app']
+
+
+def _gunicorn_available():
+    try:
+        import gunicorn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _upload(base_url, payload, filename, timeout):
+    """
+    Um upload completo como no navegador: POST /upload_file, /check_conversion e /resultado.
+
+    Returns:
+        dict: 'upload_s', 'total_s', 'error' (categoria ou None), 'job_id', 'total_count',
+            'created_count' e 'cookie_bytes' (tamanho do cookie de sessão recebido no upload)
+    """
+    started = time.perf_counter()
+    outcome = {'upload_s': None, 'total_s': None, 'error': None, 'job_id': None, 'total_count': None,
+               'created_count': None, 'cookie_bytes': 0}
+    with requests.Session() as client:
+        try:
+            response = client.post(
+                f"{base_url}/upload_file",
+                files={'file': (filename, payload)},
+                data={'environment': 'sandbox', 'lead_owner': '', 'source': f"loadtest-{uuid.uuid4().hex}"},
+                allow_redirects=False, timeout=timeout,
+            )
+            outcome['upload_s'] = time.perf_counter() - started
+            outcome['job_id'] = response.headers.get('X-Job-ID')
+            outcome['cookie_bytes'] = len(response.headers.get('Set-Cookie', ''))
+            if response.status_code != 302:
+                outcome['error'] = f"http_{response.status_code}"
+                return outcome
+            if not response.headers.get('Location', '').endswith('/resultado'):
+                outcome['error'] = 'redirect_index'
+                return outcome
+
+            conversion = client.get(f"{base_url}/check_conversion", timeout=timeout)
+            status = conversion.json().get('status') if conversion.status_code == 200 else conversion.status_code
+            if status != 'completed':
+                outcome['error'] = f"conversion_{status}"
+                return outcome
+
+            result = client.get(f"{base_url}/resultado", allow_redirects=False, timeout=timeout)
+            if result.status_code != 200:
+                outcome['error'] = f"result_{result.status_code}"
+                return outcome
+            outcome['total_s'] = time.perf_counter() - started
+
+            if outcome['job_id']:
+                job = client.get(f"{base_url}/jobs/{outcome['job_id']}", timeout=timeout)
+                if job.status_code == 200:
+                    record = job.json().get('job', {})
+                    outcome['total_count'] = record.get('total_count')
+                    outcome['created_count'] = record.get('created_count')
+        except requests.exceptions.RequestException as e:
+            outcome['error'] = 'exception'
+            outcome['exception'] = type(e).__name__
+    return outcome
+
+
+def _percentile(values, percentile):
+    """Percentil pelo método do posto mais próximo (None sem valores)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(percentile / 100 * len(ordered) + 0.5 - 1e-9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _latency_summary(values):
+    summary = {f"p{p}": _percentile(values, p) for p in PERCENTILES}
+    summary['max'] = max(values) if values else None
+    return summary
+
+
+def load_datasets(rows, file_format, count):
+    """
+    Arquivos distintos para os uploads de um nível: o i-ésimo tem a semente i e
+    `rows + i` linhas. Assim um upload que recebe as contagens de outro aparece
+    como count_mismatch.
+
+    Returns:
+        list: Dicionários com 'payload', 'filename', 'rows' e 'expected' (contagens
+            de referência, preenchidas por measure_references)
+    """
+    datasets = []
+    for index in range(count):
+        path = datagen.dataset_path(rows + index, file_format, seed=index)
+        with open(path, 'rb') as f:
+            datasets.append({'payload': f.read(), 'filename': os.path.basename(path), 'rows': rows + index,
+                             'expected': None})
+    return datasets
+
+
+def measure_references(base_url, datasets, timeout):
+    """
+    Envia sozinho cada arquivo ainda sem referência e guarda as contagens do job
+    (total_count e created_count) em dataset['expected'].
+
+    Returns:
+        list: Nomes dos arquivos cuja referência não pôde ser medida
+    """
+    failed = []
+    for dataset in datasets:
+        if dataset['expected'] is not None:
+            continue
+        outcome = _upload(base_url, dataset['payload'], dataset['filename'], timeout)
+        total_count = outcome['total_count']
+        if outcome['error'] or total_count is None or not 0 < total_count <= dataset['rows']:
+            failed.append(dataset['filename'])
+            continue
+        dataset['expected'] = {'total_count': total_count, 'created_count': outcome['created_count']}
+    return failed
+
+
+def _count_mismatch(outcome, dataset, check_created):
+    """Contagens do job diferentes da referência do arquivo enviado (sem referência, não compara)."""
+    expected = dataset['expected']
+    if expected is None:
+        return False
+    if outcome['total_count'] != expected['total_count']:
+        return True
+    return check_created and outcome['created_count'] != expected['created_count']
+
+
+def run_level(base_url, datasets, concurrency, uploads, timeout, check_created, server_pid):
+    """
+    Executa `uploads` uploads com `concurrency` clientes simultâneos; o upload i
+    envia datasets[i % len(datasets)].
+
+    Returns:
+        dict: Latências, vazão, erros e pico de RSS do nível
+    """
+    def upload(index):
+        dataset = datasets[index % len(datasets)]
+        return dataset, _upload(base_url, dataset['payload'], dataset['filename'], timeout)
+
+    with _RssSampler(server_pid) as sampler:
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            uploaded = list(pool.map(upload, range(uploads)))
+        wall = time.perf_counter() - started
+
+    for dataset, outcome in uploaded:
+        if not outcome['error'] and _count_mismatch(outcome, dataset, check_created):
+            outcome['error'] = 'count_mismatch'
+    outcomes = [outcome for _, outcome in uploaded]
+    errors = {}
+    for outcome in outcomes:
+        if outcome['error']:
+            errors[outcome['error']] = errors.get(outcome['error'], 0) + 1
+    succeeded = [outcome for outcome in outcomes if not outcome['error']]
+    succeeded_rows = sum(dataset['rows'] for dataset, outcome in uploaded if not outcome['error'])
+    return {
+        'concurrency': concurrency,
+        'uploads': uploads,
+        'succeeded': len(succeeded),
+        'error_rate': round(1 - len(succeeded) / uploads, 4) if uploads else 0.0,
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'uploads_per_s': round(len(succeeded) / wall, 3) if wall else None,
+        'rows_per_s': round(succeeded_rows / wall, 1) if wall else None,
+        'upload_latency_s': _latency_summary([o['upload_s'] for o in succeeded]),
+        'total_latency_s': _latency_summary([o['total_s'] for o in succeeded]),
+        'peak_rss_mb': round(sampler.peak / 1024 / 1024, 1) if sampler.peak else None,
+        'max_session_cookie_bytes': max(outcome['cookie_bytes'] for outcome in outcomes) if outcomes else 0,
+    }
+
+
+def run_mode(mode, workers, args, fake_sf_url, datasets, workdir):
+    """Sobe o servidor no modo/workers indicados e mede cada nível de concorrência."""
+    port = _free_port()
+    cwd = tempfile.mkdtemp(prefix=f"{mode}-{workers}-", dir=workdir)
+    env = dict(os.environ)
+    env.update(SERVER_ENV)
+    env.update({
+        'PYTHONPATH': os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')])),
+        'SALESFORCE_ENVIRONMENT': 'sandbox',
+        'SANDBOX_LOGIN_URL': fake_sf_url,
+        'SANDBOX_INSTANCE_URL': fake_sf_url,
+        'SANDBOX_CLIENT_ID': 'loadtest',
+        'SANDBOX_CLIENT_SECRET': 'loadtest',
+        'SANDBOX_USERNAME': 'loadtest@fake.salesforce.local',
+        'SANDBOX_PASSWORD': 'loadtest',
+        'LLM_FAKE_LATENCY': str(args.llm_latency),
+    })
+    env.update(args.env)
+    command = _server_command(mode, workers, args.threads, port, args.gunicorn_arg)
+    server = _Process(command, env, cwd, os.path.join(cwd, 'server.log'))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not _wait_ready(f"{base_url}/jobs", server.popen):
+            print(f"[{mode} w={workers}] servidor não iniciou; ver {server.log_path}", file=sys.stderr)
+            return []
+        # A referência de cada arquivo é medida uma vez (no primeiro modo) e serve também de aquecimento
+        failed = measure_references(base_url, datasets, args.timeout)
+        if failed:
+            print(f"[{mode} w={workers}] referência não medida para {', '.join(failed)} (contagens desses "
+                  f"arquivos não são comparadas); ver {server.log_path}", file=sys.stderr)
+        results = []
+        for concurrency in args.concurrency:
+            level = run_level(base_url, datasets, concurrency, _uploads_per_level(args, concurrency),
+                              args.timeout, args.sf_failure_rate == 0, server.popen.pid)
+            level.update({'mode': mode, 'workers': workers})
+            results.append(level)
+            _print_level(level)
+            if any(error.endswith('_431') for error in level['errors']):
+                print(f"  431: cookie de sessão de até {level['max_session_cookie_bytes']} bytes acima do limite de "
+                      "cabeçalho do servidor (gunicorn: --gunicorn-arg=--limit-request-field_size=65536)", file=sys.stderr)
+        return results
+    finally:
+        server.stop()
+
+
+def _format_seconds(value):
+    return f"{value:.2f}" if value is not None else '-'
+
+
+def _print_header():
+    print(f"{'modo':<17} {'w':>2} {'conc':>4} {'ok/total':>9} {'erros':>6} {'up/s':>7} {'linhas/s':>9} "
+          f"{'p50':>6} {'p95':>6} {'p99':>6} {'máx':>6} {'RSS MB':>7}  categorias")
+
+
+def _print_level(level):
+    latency = level['total_latency_s']
+    print(f"{level['mode']:<17} {level['workers']:>2} {level['concurrency']:>4} "
+          f"{level['succeeded']:>4}/{level['uploads']:<4} {level['error_rate'] * 100:>5.1f}% "
+          f"{level['uploads_per_s'] or 0:>7.2f} {level['rows_per_s'] or 0:>9.0f} "
+          f"{_format_seconds(latency['p50']):>6} {_format_seconds(latency['p95']):>6} "
+          f"{_format_seconds(latency['p99']):>6} {_format_seconds(latency['max']):>6} "
+          f"{level['peak_rss_mb'] if level['peak_rss_mb'] is not None else '-':>7}  "
+          f"{json.dumps(level['errors']) if level['errors'] else ''}", flush=True)
+
+
+def _uploads_per_level(args, concurrency):
+    return args.uploads or concurrency * 4
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(',') if value.strip()]
+
+
+def _env_pair(text):
+    key, _, value = text.partition('=')
+    return key, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos uploads contra o Salesforce e a IA locais.")
+    parser.add_argument('--modes', default='dev', help=f"Modos separados por vírgula ({', '.join(MODES)})")
+    parser.add_argument('--workers', type=_int_list, default=[1, 2, 4], help="Workers do gunicorn (ex.: 1,2,4)")
+    parser.add_argument('--threads', type=int, default=4, help="Threads por worker no gunicorn-gthread")
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 8], help="Uploads simultâneos (ex.: 1,4,8,16)")
+    parser.add_argument('--uploads', type=int, default=0, help="Uploads por nível (padrão: 4 x concorrência)")
+    parser.add_argument('--rows', type=int, default=2000,
+                        help="Linhas do menor arquivo enviado (o i-ésimo upload do nível tem rows + i)")
+    parser.add_argument('--format', choices=('csv', 'xlsx'), default='csv')
+    parser.add_argument('--timeout', type=float, default=600, help="Tempo máximo de cada requisição (s)")
+    parser.add_argument('--sf-latency', type=float, default=0.05, help="Latência do Salesforce falso (s)")
+    parser.add_argument('--sf-record-time', type=float, default=0.0005, help="Processamento por registro (s)")
+    parser.add_argument('--sf-failure-rate', type=float, default=0.0, help="Fração de registros com falha")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="Latência da IA local (s)")
+    parser.add_argument('--env', type=_env_pair, action='append', default=[], help="Variável do servidor KEY=VALUE")
+    parser.add_argument('--gunicorn-arg', action='append', default=[],
+                        help="Argumento adicional do gunicorn (ex.: --gunicorn-arg=--limit-request-field_size=65536)")
+    parser.add_argument('--out', help="Arquivo JSON com os resultados")
+    parser.add_argument('--keep', action='store_true', help="Mantém a pasta temporária (logs do servidor)")
+    args = parser.parse_args()
+    args.env = dict(args.env)
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Modos desconhecidos: {', '.join(unknown)}")
+    if any(mode.startswith('gunicorn') for mode in modes) and not _gunicorn_available():
+        print("gunicorn não está instalado; modos gunicorn ignorados (pip install gunicorn)", file=sys.stderr)
+        modes = [mode for mode in modes if not mode.startswith('gunicorn')]
+    if psutil is None and not os.path.isdir('/proc'):
+        print("Sem psutil e sem /proc: o pico de RSS não será medido", file=sys.stderr)
+
+    workdir = tempfile.mkdtemp(prefix='loadtest_')
+    datasets = load_datasets(args.rows, args.format,
+                             max(_uploads_per_level(args, concurrency) for concurrency in args.concurrency))
+
+    sf_port = _free_port()
+    fake_sf = _Process(
+        [sys.executable, '-m', 'benchmarks.fake_salesforce', '--port', str(sf_port),
+         '--latency', str(args.sf_latency), '--record-time', str(args.sf_record_time),
+         '--record-failure-rate', str(args.sf_failure_rate)],
+        dict(os.environ, PYTHONPATH=PROJECT_ROOT), PROJECT_ROOT, os.path.join(workdir, 'fake_salesforce.log')
+    )
+    fake_sf_url = f"http://127.0.0.1:{sf_port}"
+    results = []
+    try:
+        if not _wait_ready(f"{fake_sf_url}/fake/stats", fake_sf.popen):
+            print(f"Salesforce falso não iniciou; ver {fake_sf.log_path}", file=sys.stderr)
+            return 1
+        _print_header()
+        for mode in modes:
+            for workers in ([1] if mode == 'dev' else args.workers):
+                results.extend(run_mode(mode, workers, args, fake_sf_url, datasets, workdir))
+        fake_stats = requests.get(f"{fake_sf_url}/fake/stats", timeout=10).json()
+    finally:
+        fake_sf.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({
+                'settings': {key: value for key, value in vars(args).items() if key != 'out'},
+                'server_env': dict(SERVER_ENV, **args.env),
+                'fake_salesforce': fake_stats,
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.out}")
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
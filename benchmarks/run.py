@@ -0,0 +1,164 @@
+"""
+Executor dos benchmarks (benchmarks/bench_*.py) com comparação às linhas de base.
+
+Cada método `time_*` é executado `--repeat` vezes por combinação de parâmetros
+(após uma execução de aquecimento) e o tempo mediano é comparado ao registrado
+em benchmarks/baselines.json. Tempos acima de `--tolerance` vezes a linha de
+base são reportados como regressão e o processo termina com código 1.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_PATH = os.path.join(BENCHMARKS_DIR, 'baselines.json')
+
+
+def _benchmark_classes():
+    package = __package__ or 'benchmarks'
+    for module_info in pkgutil.iter_modules([BENCHMARKS_DIR]):
+        if not module_info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module(f"{package}.{module_info.name}")
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ == module.__name__ and any(name.startswith('time_') for name in dir(cls)):
+                yield cls
+
+
+def _param_sets(cls, sizes):
+    params = list(getattr(cls, 'params', ()))
+    names = list(getattr(cls, 'param_names', [f"p{i}" for i in range(len(params))]))
+    if sizes and 'rows' in names:
+        params[names.index('rows')] = sizes
+    return names, list(itertools.product(*params)) if params else [()]
+
+
+def _benchmark_name(cls, method, names, values):
+    args = ', '.join(f"{name}={value}" for name, value in zip(names, values))
+    return f"{cls.__name__}.{method}({args})"
+
+
+def run_benchmarks(pattern=None, sizes=None, repeat=3):
+    """
+    Executa os benchmarks.
+
+    Args:
+        pattern (str, optional): Expressão regular aplicada ao nome do benchmark
+        sizes (list, optional): Tamanhos (parâmetro 'rows') a medir no lugar dos padrões
+        repeat (int): Execuções medidas de cada benchmark
+
+    Returns:
+        dict: Tempo mediano em segundos por nome de benchmark
+    """
+    results = {}
+    regex = re.compile(pattern) if pattern else None
+    for cls in _benchmark_classes():
+        names, param_sets = _param_sets(cls, sizes)
+        methods = sorted(name for name in dir(cls) if name.startswith('time_'))
+        for values in param_sets:
+            selected = [m for m in methods if not regex or regex.search(_benchmark_name(cls, m, names, values))]
+            if not selected:
+                continue
+            instance = cls()
+            if hasattr(instance, 'setup'):
+                instance.setup(*values)
+            try:
+                for method in selected:
+                    name = _benchmark_name(cls, method, names, values)
+                    function = getattr(instance, method)
+                    function(*values)  # aquecimento
+                    timings = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        function(*values)
+                        timings.append(time.perf_counter() - start)
+                    results[name] = statistics.median(timings)
+                    print(f"  {name}: {results[name] * 1000:.1f} ms", file=sys.stderr)
+            finally:
+                if hasattr(instance, 'teardown'):
+                    instance.teardown(*values)
+    return results
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    """Grava os tempos como linhas de base, preservando as de benchmarks não executados."""
+    merged = load_baselines(path)
+    merged.update({name: round(seconds, 6) for name, seconds in results.items()})
+    data = {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+        },
+        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': dict(sorted(merged.items())),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def compare(results, baselines, tolerance):
+    """
+    Compara os tempos com as linhas de base.
+
+    Returns:
+        list: Nomes dos benchmarks com regressão
+    """
+    regressions = []
+    print(f"{'benchmark':<70} {'atual':>10} {'base':>10} {'razão':>7}")
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline:
+            ratio = seconds / baseline
+            flag = '  REGRESSÃO' if ratio > tolerance else ('  melhora' if ratio < 1 / tolerance else '')
+            if ratio > tolerance:
+                regressions.append(name)
+            print(f"{name:<70} {seconds * 1000:>8.1f}ms {baseline * 1000:>8.1f}ms {ratio:>7.2f}{flag}")
+        else:
+            print(f"{name:<70} {seconds * 1000:>8.1f}ms {'-':>10} {'-':>7}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa os benchmarks do caminho de conversão.")
+    parser.add_argument('--filter', help="Expressão regular do nome dos benchmarks (ex.: 'Normalization|FixCsv')")
+    parser.add_argument('--sizes', help="Tamanhos em linhas separados por vírgula (ex.: 1000,100000,1000000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções medidas por benchmark (padrão 3)")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Razão máxima em relação à linha de base")
+    parser.add_argument('--baselines', default=BASELINES_PATH, help="Arquivo das linhas de base")
+    parser.add_argument('--save', action='store_true', help="Grava os tempos como novas linhas de base")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else None
+    results = run_benchmarks(args.filter, sizes, args.repeat)
+    regressions = compare(results, load_baselines(args.baselines), args.tolerance)
+    if args.save:
+        save_baselines(results, args.baselines)
+        print(f"Linhas de base gravadas em {args.baselines}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) com regressão acima de {args.tolerance:.2f}x")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+Configuração do gunicorn, carregada automaticamente do diretório atual.
+
+Com METRICS_MULTIPROC_DIR definido, esvazia o diretório de métricas ao iniciar
+o servidor e incorpora ao archive.db as métricas dos workers encerrados,
+inclusive os finalizados à força (timeout, SIGKILL), que não executam o atexit.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.utils import metrics  # noqa: E402
+
+
+def on_starting(server):
+    metrics.reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    metrics.mark_process_dead(worker.pid)
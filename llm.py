@@ -1,30 +1,38 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
 import json
+import time
+from src.services.llm_backends import get_backend
+from src.utils.metrics import LLM_REQUEST_DURATION
 
-# Load environment variables from .env file
+# Load environment variables from .env file (the backend is selected by LLM_BACKEND on first use)
 load_dotenv()
 
-# Get the API key from environment variables
-OPENROUTER_API_KEY = os.getenv("OPENAI_ROUTER_API_KEY")
+def get_openai_client():
+    """Returns the OpenAI-compatible client of the openrouter backend (LLM_BACKEND=openrouter)."""
+    backend = get_backend()
+    if not hasattr(backend, 'client'):
+        raise ValueError(f"LLM backend '{backend.name}' has no OpenAI client")
+    if not backend.available():
+        print("Error: OPENAI_ROUTER_API_KEY not found in environment variables.")
+    return backend.client()
 
-client_instance = None
+def _timed_completion(operation, params, hints=None):
+    """Calls the configured LLM backend (see src/services/llm_backends.py), recording the call latency in the metrics.
 
-def get_openai_client():
-    global client_instance
-    if client_instance is None:
-        if not OPENROUTER_API_KEY:
-            print("Error: OPENAI_ROUTER_API_KEY not found in environment variables.")
-            raise ValueError("API Key not configured")
-        client_instance = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY,
-        )
-    return client_instance
+    Returns:
+        str: The content of the response.
+    """
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        content = get_backend().complete(operation, params, hints)
+        outcome = 'success'
+        return content
+    finally:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
 
 def get_ai_completion(prompt_text: str, model=None, temperature=None, max_tokens=None, json_mode=False):
-    """Interacts with the OpenRouter API to get a completion.
+    """Interacts with the configured LLM backend (OpenRouter by default) to get a completion.
 
     Args:
         prompt_text (str): The text prompt for the AI.
@@ -36,12 +44,10 @@ def get_ai_completion(prompt_text: str, model=None, temperature=None, max_tokens
     Returns:
         str: The content of the AI's response, or None if an error occurs.
     """
-    if not OPENROUTER_API_KEY:
+    if not get_backend().available():
         print("Error: OPENAI_ROUTER_API_KEY not found in environment variables.")
         return None
 
-    client = get_openai_client()
-
     messages = [
         {
             "role": "user",
@@ -88,13 +94,15 @@ def get_ai_completion(prompt_text: str, model=None, temperature=None, max_tokens
         if json_mode:
             completion_params["response_format"] = {"type": "json_object"}
             
-        completion = client.chat.completions.create(**completion_params)
-        
-        return completion.choices[0].message.content
+        return _timed_completion('completion', completion_params)
     except Exception as e:
         print(f"An error occurred during API call: {e}")
         return None
 
+# Versão do prompt de mapeamento de colunas: faz parte da chave do cache de mapeamentos
+# (src/utils/mapping_cache.py). Incrementar a cada alteração do prompt ou do modelo abaixo.
+COLUMN_MAPPING_PROMPT_VERSION = 1
+
 def get_column_mapping_from_ai(file_snippet: str, target_salesforce_schema: dict):
     """
     Asks the AI to map columns from a file snippet to a target Salesforce schema.
@@ -135,8 +143,7 @@ def get_column_mapping_from_ai(file_snippet: str, target_salesforce_schema: dict
 
     raw_json_response = ""
     try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
+        raw_json_response = _timed_completion('column_mapping', dict(
             model="google/gemini-2.0-flash-001", # Modelo disponível atualmente
             response_format={"type": "json_object"}, # CRUCIAL para obter JSON
             messages=[
@@ -146,9 +153,7 @@ def get_column_mapping_from_ai(file_snippet: str, target_salesforce_schema: dict
             ],
             temperature=0.15, # Balanceando determinismo com flexibilidade
             max_tokens=1024 # Ajustar conforme necessário, depende do tamanho do esquema e do snippet
-        )
-        
-        raw_json_response = response.choices[0].message.content
+        ), hints={'snippet': file_snippet, 'schema': target_salesforce_schema})
         # Basic validation: does it look like JSON?
         if not (raw_json_response.strip().startswith('{') and raw_json_response.strip().endswith('}')):
             print(f"AI response does not appear to be a valid JSON object. Raw response:\n{raw_json_response}")
@@ -0,0 +1,100 @@
+"""
+Módulo de classificação e correção dos registros com falha na Bulk API 2.0.
+
+Cada linha de failedResults traz o erro em sf__Error (ex.:
+'STRING_TOO_LONG:Company: data value too large: ... (max length=255):Company --')
+seguido dos campos enviados. O erro é classificado e, quando a correção é
+segura, o registro é devolvido corrigido para ser reenviado em um job de
+acompanhamento:
+
+    field_too_long   -- campos truncados ao tamanho máximo informado no erro
+    invalid_email    -- Email removido (o lead é criado sem email)
+    lock_contention  -- UNABLE_TO_LOCK_ROW: reenviado sem alterações
+    duplicate        -- regra de duplicidade: não é reenviado
+    other            -- não é reenviado
+"""
+
+import os
+import re
+
+FIELD_TOO_LONG = 'field_too_long'
+INVALID_EMAIL = 'invalid_email'
+LOCK_CONTENTION = 'lock_contention'
+DUPLICATE = 'duplicate'
+OTHER = 'other'
+
+# Códigos de status do Salesforce de cada categoria
+_ERROR_CODES = (
+    (FIELD_TOO_LONG, ('STRING_TOO_LONG',)),
+    (INVALID_EMAIL, ('INVALID_EMAIL_ADDRESS',)),
+    (LOCK_CONTENTION, ('UNABLE_TO_LOCK_ROW',)),
+    (DUPLICATE, ('DUPLICATES_DETECTED', 'DUPLICATE_VALUE')),
+)
+
+# Rodadas de jobs de acompanhamento para os registros corrigíveis (0 desativa)
+RETRY_ROUNDS = int(os.getenv('SALESFORCE_FAILED_RETRY_ROUNDS', '2'))
+
+# Espera (segundos) antes de reenviar registros com UNABLE_TO_LOCK_ROW, multiplicada pela rodada
+LOCK_RETRY_DELAY = float(os.getenv('SALESFORCE_LOCK_RETRY_DELAY', '5'))
+
+# Campos informados no fim da mensagem ('...:Company --' ou '...:FirstName, LastName --')
+_ERROR_FIELDS_PATTERN = re.compile(r':\s*([A-Za-z_][\w]*(?:\s*,\s*[A-Za-z_][\w]*)*)\s*(?:--)?\s*$')
+# Tamanho máximo entre parênteses, também em mensagens traduzidas ('(max length=255)', '(comprimento máximo=255)')
+_MAX_LENGTH_PATTERN = re.compile(r'\([^()]*?=\s*(\d+)\)')
+
+
+def classify_error(error):
+    """
+    Classifica a mensagem de erro de um registro.
+
+    Args:
+        error (str): Valor de sf__Error
+
+    Returns:
+        str: Categoria do erro
+    """
+    error = error or ''
+    for category, codes in _ERROR_CODES:
+        if any(code in error for code in codes):
+            return category
+    return OTHER
+
+
+def _error_fields(error):
+    match = _ERROR_FIELDS_PATTERN.search(error or '')
+    return [field.strip() for field in match.group(1).split(',')] if match else []
+
+
+def fix_record(row):
+    """
+    Aplica a correção automática de um registro com falha, quando segura.
+
+    Args:
+        row (dict): Linha de failedResults (sf__Id, sf__Error e os campos enviados)
+
+    Returns:
+        tuple: (categoria, campos corrigidos para reenvio ou None se o registro não deve ser reenviado)
+    """
+    error = row.get('sf__Error', '')
+    category = classify_error(error)
+    fields = {key: value for key, value in row.items() if not key.startswith('sf__')}
+
+    if category == FIELD_TOO_LONG:
+        max_length = _MAX_LENGTH_PATTERN.search(error)
+        names = [name for name in _error_fields(error) if name in fields]
+        if not max_length or not names:
+            return category, None
+        for name in names:
+            fields[name] = (fields[name] or '')[:int(max_length.group(1))]
+        return category, fields
+
+    if category == INVALID_EMAIL:
+        names = [name for name in _error_fields(error) if name in fields] or ['Email']
+        for name in names:
+            fields[name] = ''
+        return category, fields
+
+    if category == LOCK_CONTENTION:
+        return category, fields
+
+    return category, None
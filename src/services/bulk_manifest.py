@@ -0,0 +1,159 @@
+"""
+Módulo do manifest de ingestão em massa (Bulk API 2.0) de um upload.
+
+O manifest registra, em um arquivo JSON gravado de forma atômica, os limites
+de cada bloco de linhas enviado (start_row/end_row no CSV de origem), o job
+do Salesforce de cada bloco, o estado do bloco e as contagens de resultado.
+No modo em lotes, os limites são os do arquivo já validado e deduplicado (sem
+depender do índice local de leads, que muda ao retomar com os leads criados
+pela execução anterior) e o bloco guarda também o número de leads enviados
+(records). O manifest é regravado a cada mudança de estado, com tamanho
+proporcional ao número de blocos (e não ao de linhas).
+Com ele, um processamento interrompido (ex.: reinício do servidor durante o
+acompanhamento dos jobs) pode ser retomado sem reenviar blocos que já
+chegaram ao Salesforce.
+
+Estados de um bloco:
+    pending          -- limites definidos, nenhum job criado
+    open             -- job criado, upload possivelmente incompleto
+    submit_failed    -- falha ao criar/enviar/fechar o job
+    upload_complete  -- job fechado (UploadComplete), processando no Salesforce
+    JobComplete / Failed / Aborted -- estado final do job
+
+O campo retry_started de um bloco indica que o reenvio dos registros com falha
+(ver bulk_failures) já foi iniciado, evitando reenviá-los de novo ao retomar.
+"""
+
+import json
+import os
+import time
+
+# Blocos que precisam ser (re)enviados ao retomar
+RESUBMIT_STATES = ('pending', 'open', 'submit_failed')
+
+# Estados finais dos jobs da Bulk API
+FINAL_JOB_STATES = ('JobComplete', 'Failed', 'Aborted')
+
+
+class BulkManifest:
+    """Manifest persistido da ingestão de um arquivo."""
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def create(cls, path, source_file, environment, owner_id=None, streaming=False, batch_size=None, operation='insert'):
+        """
+        Cria um novo manifest (substituindo um existente no mesmo caminho).
+
+        Args:
+            path (str): Caminho do arquivo do manifest
+            source_file (str): CSV de origem (deve permanecer disponível para a retomada)
+            environment (str): Ambiente do Salesforce
+            owner_id (str, optional): ID do proprietário dos leads
+            streaming (bool): Se o envio usa o modo streaming
+            batch_size (int, optional): Linhas por lote (modo em lotes)
+            operation (str): Operação dos jobs (ver lead_keys), repetida ao retomar
+        """
+        manifest = cls(path, {
+            'source_file': source_file,
+            'environment': environment,
+            'owner_id': owner_id,
+            'streaming': streaming,
+            'batch_size': batch_size,
+            'operation': operation,
+            'created_at': time.time(),
+            'chunks': []
+        })
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carrega um manifest.
+
+        Returns:
+            BulkManifest: Manifest ou None se o arquivo não existir
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f))
+
+    def save(self):
+        self.data['updated_at'] = time.time()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def chunks(self):
+        return self.data['chunks']
+
+    def chunk_index(self, start_row, end_row, records=None):
+        """
+        Retorna o índice do bloco com estes limites, registrando-o como pendente se for novo.
+
+        Args:
+            start_row (int): Primeira linha do bloco no CSV de origem
+            end_row (int): Linha seguinte à última do bloco
+            records (int, optional): Leads enviados no bloco (modo em lotes)
+        """
+        for index, chunk in enumerate(self.chunks):
+            if chunk['start_row'] == start_row and chunk['end_row'] == end_row:
+                return index
+        chunk = {'start_row': start_row, 'end_row': end_row, 'state': 'pending', 'job_id': None}
+        if records is not None:
+            chunk['records'] = records
+        self.chunks.append(chunk)
+        self.save()
+        return len(self.chunks) - 1
+
+    def add_chunk(self, start_row):
+        """Registra um novo bloco a partir de `start_row` (o fim é definido ao concluir o envio)."""
+        self.chunks.append({'start_row': start_row, 'end_row': None, 'state': 'pending', 'job_id': None})
+        self.save()
+        return len(self.chunks) - 1
+
+    def update_chunk(self, index, **fields):
+        self.chunks[index].update(fields)
+        self.save()
+
+    def is_settled(self):
+        """Indica se todos os blocos terminaram com os resultados registrados (nada a retomar)."""
+        return all(chunk['state'] in FINAL_JOB_STATES and 'success_count' in chunk for chunk in self.chunks)
+
+    def resume_row(self):
+        """
+        Primeira linha a reenviar no modo streaming: o início do primeiro bloco
+        que não chegou ao Salesforce, ou o fim do último bloco enviado. Os blocos
+        a partir desse ponto são descartados do manifest (serão registrados de novo).
+
+        Returns:
+            tuple: (linha inicial, jobs em aberto a abortar)
+        """
+        for index, chunk in enumerate(self.chunks):
+            if chunk['state'] in ('pending', 'open'):
+                stale_jobs = [c['job_id'] for c in self.chunks[index:] if c['state'] == 'open' and c.get('job_id')]
+                del self.chunks[index:]
+                self.save()
+                return chunk['start_row'], stale_jobs
+        if not self.chunks:
+            return 0, []
+        return self.chunks[-1]['end_row'] or 0, []
+
+
+def chunk_value(manifest, index, key, default=None):
+    """Valor de um campo de um bloco do manifest, se houver manifest."""
+    if manifest is None or index is None:
+        return default
+    return manifest.chunks[index].get(key, default)
+
+
+def record_chunk(manifest, index, **fields):
+    """Atualiza um bloco do manifest, se houver manifest."""
+    if manifest is not None and index is not None:
+        manifest.update_chunk(index, **fields)
@@ -0,0 +1,268 @@
+"""
+Módulo do índice local dos leads já existentes no Salesforce.
+
+O índice é um banco SQLite (LEAD_INDEX_PATH) com o Id, o email e o telefone
+normalizados de cada lead, por org, com índices nas colunas de busca. É
+alimentado pelos resultados de sucesso dos jobs de ingestão e, opcionalmente,
+por uma sincronização incremental com um job de consulta da Bulk API 2.0
+(Lead: Id, Email, Phone, LastModifiedDate a partir da última sincronização).
+
+Antes do envio, as linhas do arquivo são procuradas no índice em uma única
+consulta (tabela temporária + join): pelo email ou, sem email, pelo telefone.
+O tratamento dos leads encontrados é definido por LEAD_INDEX_ACTION:
+    skip    -- (padrão) não são enviados
+    update  -- são enviados em um job de atualização com o Id do lead
+    off     -- o índice é apenas alimentado
+"""
+
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+import pandas as pd
+import requests
+from ..utils.salesforce_logger import get_salesforce_logger
+from . import salesforce_http
+from .lead_dedup import normalize_phone
+from .salesforce_metadata import org_instance_url
+
+logger = get_salesforce_logger('lead_index')
+
+# Arquivo do índice (vazio desativa o índice)
+LEAD_INDEX_PATH = os.getenv('LEAD_INDEX_PATH', os.path.join(os.getcwd(), 'A converter', 'lead_index.sqlite3'))
+LEAD_INDEX_ACTION = os.getenv('LEAD_INDEX_ACTION', 'skip').lower()
+
+# Intervalo mínimo (segundos) entre sincronizações automáticas com o Salesforce (0 desativa)
+SYNC_INTERVAL = int(os.getenv('LEAD_INDEX_SYNC_INTERVAL', '0'))
+
+# Intervalo (segundos) e tentativas de verificação do job de consulta e registros por página de resultados
+SYNC_POLL_INTERVAL = float(os.getenv('SALESFORCE_BULK_POLL_INTERVAL', '10'))
+SYNC_MAX_POLL_ATTEMPTS = int(os.getenv('LEAD_INDEX_SYNC_MAX_POLL_ATTEMPTS', '180'))
+SYNC_PAGE_SIZE = 50000
+
+# Registros gravados por transação
+_WRITE_BATCH = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    org TEXT NOT NULL,
+    sf_id TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (org, sf_id)
+);
+CREATE INDEX IF NOT EXISTS leads_email ON leads (org, email);
+CREATE INDEX IF NOT EXISTS leads_phone ON leads (org, phone);
+CREATE TABLE IF NOT EXISTS sync_state (
+    org TEXT PRIMARY KEY,
+    last_modified TEXT,
+    synced_at REAL
+);
+"""
+
+
+def enabled():
+    return bool(LEAD_INDEX_PATH)
+
+
+def _org_key(instance_url=None):
+    instance_url = instance_url or org_instance_url() or ''
+    return requests.utils.urlparse(instance_url).netloc or instance_url
+
+
+def _connect():
+    os.makedirs(os.path.dirname(LEAD_INDEX_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(LEAD_INDEX_PATH, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _normalize_email(values):
+    return pd.Series(values, dtype=object).fillna('').astype(str).str.strip().str.lower()
+
+
+def record_leads(rows, org=None):
+    """
+    Grava leads no índice.
+
+    Args:
+        rows (iterable): Dicionários com 'sf__Id' (ou 'Id'), 'Email', 'Phone' e,
+            opcionalmente, 'LastModifiedDate' (ex.: linhas de successfulResults)
+        org (str, optional): Host da org (padrão: a org do ambiente atual)
+
+    Returns:
+        int: Número de leads gravados
+    """
+    if not enabled():
+        return 0
+    org = org or _org_key()
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    count = 0
+    conn = _connect()
+    try:
+        batch = []
+        for row in rows:
+            sf_id = row.get('sf__Id') or row.get('Id')
+            if not sf_id:
+                continue
+            batch.append((org, sf_id, row.get('Email') or '', row.get('Phone') or '', row.get('LastModifiedDate') or now))
+            if len(batch) >= _WRITE_BATCH:
+                count += _write(conn, batch)
+                batch = []
+        if batch:
+            count += _write(conn, batch)
+    finally:
+        conn.close()
+    return count
+
+
+def _write(conn, batch):
+    emails = _normalize_email([row[2] for row in batch])
+    phones = normalize_phone(pd.Series([row[3] for row in batch], dtype=object).astype(str))
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO leads (org, sf_id, email, phone, last_modified) VALUES (?, ?, ?, ?, ?)",
+            [(org, sf_id, email, phone, modified)
+             for (org, sf_id, _, _, modified), email, phone in zip(batch, emails, phones)]
+        )
+    return len(batch)
+
+
+def lookup(leads, org=None):
+    """
+    Procura as linhas no índice (pelo email ou, sem email, pelo telefone).
+
+    Args:
+        leads (pandas.DataFrame): Leads normalizados (colunas Email/Phone)
+
+    Returns:
+        pandas.Series: Id do lead existente por linha (None se não encontrado)
+    """
+    found = pd.Series(None, index=leads.index, dtype=object)
+    if not enabled() or leads.empty or not os.path.exists(LEAD_INDEX_PATH):
+        return found
+    org = org or _org_key()
+    empty = pd.Series('', index=leads.index)
+    emails = _normalize_email(leads.get('Email', empty).to_numpy())
+    phones = normalize_phone(leads.get('Phone', empty).fillna('').astype(str)).to_numpy()
+
+    conn = _connect()
+    try:
+        # A tabela temporária é descartada ao final, mesmo que a conexão venha a ser reaproveitada
+        conn.execute("DROP TABLE IF EXISTS temp.incoming")
+        conn.execute("CREATE TEMP TABLE incoming (position INTEGER PRIMARY KEY, email TEXT, phone TEXT)")
+        conn.executemany("INSERT INTO incoming VALUES (?, ?, ?)", zip(range(len(leads)), emails, phones))
+        matches = conn.execute(
+            """
+            SELECT i.position, MIN(l.sf_id) FROM incoming i
+            JOIN leads l ON l.org = ? AND l.email = i.email
+            WHERE i.email != '' GROUP BY i.position
+            UNION ALL
+            SELECT i.position, MIN(l.sf_id) FROM incoming i
+            JOIN leads l ON l.org = ? AND l.phone = i.phone
+            WHERE i.email = '' AND i.phone != '' GROUP BY i.position
+            """,
+            (org, org)
+        ).fetchall()
+        conn.execute("DROP TABLE temp.incoming")
+    finally:
+        conn.close()
+    if matches:
+        positions, ids = zip(*matches)
+        found.iloc[list(positions)] = list(ids)
+    return found
+
+
+def sync_due():
+    """Indica se a sincronização automática com o Salesforce deve ser executada."""
+    if not enabled() or SYNC_INTERVAL <= 0:
+        return False
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT synced_at FROM sync_state WHERE org = ?", (_org_key(),)).fetchone()
+    finally:
+        conn.close()
+    return not row or time.time() - (row[0] or 0) >= SYNC_INTERVAL
+
+
+def sync_from_salesforce(context):
+    """
+    Sincroniza o índice com os leads alterados no Salesforce desde a última
+    sincronização, usando um job de consulta da Bulk API 2.0.
+
+    Args:
+        context (dict): Contexto da API (ver salesforce_api._bulk_api_context)
+
+    Returns:
+        tuple: (success, número de leads gravados ou mensagem de erro)
+    """
+    if not enabled():
+        return False, "Índice de leads desativado"
+    org = _org_key(context['instance_url'])
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT last_modified FROM sync_state WHERE org = ?", (org,)).fetchone()
+    finally:
+        conn.close()
+    watermark = row[0] if row else None
+
+    soql = "SELECT Id, Email, Phone, LastModifiedDate FROM Lead"
+    if watermark:
+        # Literal de data/hora da SOQL sem milissegundos; os leads do mesmo segundo são regravados
+        soql += f" WHERE LastModifiedDate >= {watermark[:19]}Z"
+    logger.info(f"Sincronizando o índice de leads de {org} ({'desde ' + watermark if watermark else 'carga completa'})")
+
+    try:
+        response = salesforce_http.post(context['query_url'], headers=context['headers'],
+                                         json={'operation': 'query', 'query': soql}, retry=True)
+        if response.status_code != 200:
+            logger.error(f"Erro ao criar job de consulta. Status: {response.status_code}, Resposta: {response.text}")
+            return False, f"Erro ao criar job de consulta ({response.status_code})"
+        job_id = response.json().get('id')
+
+        for attempts in range(1, SYNC_MAX_POLL_ATTEMPTS + 1):
+            status = salesforce_http.get(f"{context['query_url']}/{job_id}", headers=context['headers'])
+            state = status.json().get('state') if status.status_code == 200 else None
+            if state in ('JobComplete', 'Failed', 'Aborted'):
+                break
+            time.sleep(SYNC_POLL_INTERVAL)
+        if state != 'JobComplete':
+            logger.error(f"Job de consulta {job_id} terminou com estado {state}")
+            return False, f"Job de consulta terminou com estado {state}"
+
+        latest = watermark
+        count = 0
+        locator = None
+        while True:
+            params = {'maxRecords': SYNC_PAGE_SIZE}
+            if locator:
+                params['locator'] = locator
+            with salesforce_http.get(f"{context['query_url']}/{job_id}/results", headers=context['headers'],
+                                     params=params, stream=True) as page:
+                if page.status_code != 200:
+                    logger.error(f"Erro ao obter resultados da consulta. Status: {page.status_code}")
+                    return False, f"Erro ao obter resultados da consulta ({page.status_code})"
+                page.encoding = 'utf-8'
+                rows = list(csv.DictReader(page.iter_lines(decode_unicode=True)))
+                locator = page.headers.get('Sforce-Locator')
+            count += record_leads(rows, org=org)
+            if rows:
+                latest = max([latest or ''] + [row['LastModifiedDate'] for row in rows if row.get('LastModifiedDate')])
+            if not locator or locator == 'null':
+                break
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro de conexão na sincronização do índice de leads: {str(e)}")
+        return False, str(e)
+
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sync_state (org, last_modified, synced_at) VALUES (?, ?, ?)",
+                         (org, latest, time.time()))
+    finally:
+        conn.close()
+    logger.info(f"Índice de leads sincronizado: {count} leads gravados")
+    return True, count
@@ -0,0 +1,90 @@
+"""
+Módulo da operação dos jobs de ingestão de Leads e das chaves dos registros.
+
+A operação (SALESFORCE_BULK_OPERATION) define como os registros são gravados:
+    insert  -- (padrão) cada linha cria um novo lead
+    upsert  -- cria ou atualiza pelo id externo SALESFORCE_EXTERNAL_ID_FIELD
+               (campo de texto marcado como External ID no Lead). Reimportar
+               o mesmo arquivo, ou retomar uma importação interrompida, não
+               cria duplicatas e custa um único job.
+    update  -- atualiza leads existentes pela coluna Id do arquivo
+
+O valor do id externo vem da coluna mapeada para o campo no arquivo, quando
+preenchida; caso contrário é derivado de forma determinística (SHA-1) do
+email normalizado ou, sem email, do telefone normalizado (mesma normalização
+de lead_dedup). Linhas sem email e sem telefone usam o nome e a empresa.
+"""
+
+import hashlib
+import os
+import pandas as pd
+from .lead_dedup import fold_name, normalize_phone
+
+OPERATIONS = ('insert', 'upsert', 'update')
+
+BULK_OPERATION = os.getenv('SALESFORCE_BULK_OPERATION', 'insert').lower()
+EXTERNAL_ID_FIELD = os.getenv('SALESFORCE_EXTERNAL_ID_FIELD', '')
+
+# Caracteres do id externo derivado (hex do SHA-1)
+EXTERNAL_ID_LENGTH = 32
+
+
+def key_field(operation):
+    """Campo que identifica o registro na operação (None no insert)."""
+    if operation == 'upsert':
+        return EXTERNAL_ID_FIELD
+    if operation == 'update':
+        return 'Id'
+    return None
+
+
+def check_operation(operation, metadata=None):
+    """
+    Verifica se a operação pode ser usada com a configuração e os metadados da org.
+
+    Args:
+        operation (str): 'insert', 'upsert' ou 'update'
+        metadata (dict, optional): Metadados do Lead (ver salesforce_metadata)
+
+    Returns:
+        tuple: (success, mensagem de erro ou None)
+    """
+    if operation not in OPERATIONS:
+        return False, f"Operação inválida: {operation} (use {', '.join(OPERATIONS)})"
+    if operation != 'upsert':
+        return True, None
+    if not EXTERNAL_ID_FIELD:
+        return False, "A operação upsert requer SALESFORCE_EXTERNAL_ID_FIELD"
+    field = (metadata or {}).get('fields', {}).get(EXTERNAL_ID_FIELD)
+    if metadata and (not field or not field['external_id']):
+        return False, f"O campo {EXTERNAL_ID_FIELD} não existe no Lead ou não é um id externo"
+    return True, None
+
+
+def external_ids(leads, mapped=None):
+    """
+    Calcula o id externo de cada linha.
+
+    Args:
+        leads (pandas.DataFrame): Leads normalizados (colunas do Lead como string)
+        mapped (pandas.Series, optional): Valores da coluna do arquivo mapeada para o id externo
+
+    Returns:
+        pandas.Series: Id externo por linha
+    """
+    empty = pd.Series('', index=leads.index)
+    email = leads.get('Email', empty).fillna('').str.strip().str.lower()
+    phone = normalize_phone(leads.get('Phone', empty).fillna('').astype(str))
+    name = fold_name(leads.get('FirstName', empty).fillna('') + ' ' + leads.get('LastName', empty).fillna(''))
+    company = leads.get('Company', empty).fillna('').str.strip().str.lower()
+
+    keys = ('name:' + name + '|company:' + company).where(phone.eq(''), 'phone:' + phone)
+    keys = keys.where(email.eq(''), 'email:' + email)
+    derived = pd.Series(
+        [hashlib.sha1(key.encode('utf-8')).hexdigest()[:EXTERNAL_ID_LENGTH] for key in keys],
+        index=leads.index, dtype=object
+    )
+    if mapped is None:
+        return derived
+    mapped = mapped.reindex(leads.index).fillna('').astype(str).str.strip()
+    return mapped.where(mapped.ne(''), derived)
@@ -0,0 +1,170 @@
+"""
+Módulo de validação dos leads antes do envio à Bulk API.
+
+As verificações são vetorizadas (uma operação por coluna) e rodam antes da
+serialização do CSV, evitando pagar um job do Salesforce por registros que
+falhariam de qualquer forma:
+
+    invalid_email    -- sintaxe do Email
+    invalid_phone    -- quantidade de dígitos de telefone brasileiro
+                        (DDD + 8 ou 9 dígitos, opcionalmente com o código 55)
+    too_long         -- valor acima do tamanho do campo do Lead
+    invalid_picklist -- valor fora de uma picklist restrita (metadados da org)
+    required         -- campo obrigatório vazio (LastName, Company)
+
+A política (SALESFORCE_VALIDATION_POLICY) define o tratamento:
+
+    reject  -- (padrão) os registros com problemas não são enviados e entram
+               no relatório de rejeições
+    repair  -- corrige o que é seguro: trunca valores longos, ajusta a caixa
+               dos valores de picklist e limpa telefone/email/picklist
+               inválidos. Os registros corrigidos são enviados e entram no
+               relatório com os valores originais. Os campos obrigatórios
+               vazios recebem os valores padrão do envio.
+    off     -- sem validação
+
+O relatório (REPORT_COLUMNS) indica em 'action' se a linha foi rejeitada
+('rejected') ou corrigida ('repaired').
+"""
+
+import os
+import pandas as pd
+from ..utils.metrics import VALIDATION_ISSUES
+
+VALIDATION_POLICY = os.getenv('SALESFORCE_VALIDATION_POLICY', 'reject').lower()
+
+# Tamanhos dos campos padrão do Lead (usados quando os metadados da org não estão disponíveis;
+# ver salesforce_metadata)
+LEAD_FIELD_LENGTHS = {
+    'LastName': 80, 'FirstName': 40, 'Company': 255, 'Email': 80, 'Phone': 40,
+    'Title': 128, 'Street': 255, 'City': 40, 'State': 80, 'PostalCode': 20,
+    'Country': 80, 'LeadSource': 255,
+}
+
+REQUIRED_FIELDS = ('LastName', 'Company')
+
+EMAIL_PATTERN = (
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@"
+    r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+$"
+)
+
+# Telefone brasileiro em dígitos: DDD + 8 (fixo) ou 9 (celular) dígitos, com ou sem o código do país
+PHONE_PATTERN = r'^(?:55)?[1-9]{2}9?\d{8}$'
+
+# Colunas do relatório de rejeições e correções
+REPORT_COLUMNS = ['row', 'action', 'issues', 'LastName', 'Company', 'Email', 'Phone']
+
+
+def validate_leads(leads, policy=None, field_lengths=None, picklists=None, first_row=0):
+    """
+    Valida (e, conforme a política, corrige) os leads de forma vetorizada.
+
+    Args:
+        leads (pandas.DataFrame): Leads com as colunas do Lead já normalizadas como string
+        policy (str, optional): 'repair', 'reject' ou 'off' (padrão VALIDATION_POLICY)
+        field_lengths (dict, optional): Tamanho máximo por campo (padrão LEAD_FIELD_LENGTHS)
+        picklists (dict, optional): Valores aceitos por picklist restrita
+        first_row (int): Número da primeira linha do bloco no arquivo, para o relatório
+
+    Returns:
+        tuple: (DataFrame dos leads válidos, relatório com REPORT_COLUMNS das linhas
+            rejeitadas ou corrigidas, com os valores originais, dict com a contagem de
+            problemas por 'campo:problema')
+    """
+    policy = (policy or VALIDATION_POLICY).lower()
+    field_lengths = field_lengths or LEAD_FIELD_LENGTHS
+    if policy == 'off' or leads.empty:
+        return leads, pd.DataFrame(columns=REPORT_COLUMNS), {}
+
+    repair = policy == 'repair'
+    original = leads
+    leads = leads.copy()
+    problems = {}
+
+    if 'Phone' in leads.columns:
+        # Apenas dígitos, sem o zero de tronco da discagem interurbana (ex.: 011 98765-4321)
+        phone = leads['Phone'].str.replace(r'\D', '', regex=True)
+        phone = phone.str.replace(r'^0+(?=[1-9]{2}9?\d{8}$)', '', regex=True)
+        leads['Phone'] = phone
+        problems['Phone:invalid_phone'] = phone.ne('') & ~phone.str.match(PHONE_PATTERN)
+
+    if 'Email' in leads.columns:
+        email = leads['Email'].str.strip()
+        leads['Email'] = email
+        problems['Email:invalid_email'] = email.ne('') & ~email.str.match(EMAIL_PATTERN)
+
+    for field, max_length in field_lengths.items():
+        if field in leads.columns and max_length:
+            problems[f'{field}:too_long'] = leads[field].str.len() > max_length
+
+    for field, values in (picklists or {}).items():
+        if field not in leads.columns:
+            continue
+        # Comparação sem diferenciar maiúsculas; a caixa do valor da org é aplicada
+        canonical = leads[field].str.lower().map({value.lower(): value for value in values})
+        leads[field] = canonical.fillna(leads[field])
+        problems[f'{field}:invalid_picklist'] = leads[field].ne('') & canonical.isna()
+
+    if not repair:
+        # No modo repair os obrigatórios vazios recebem os valores padrão do envio
+        for field in REQUIRED_FIELDS:
+            problems[f'{field}:required'] = leads[field].eq('') if field in leads.columns else pd.Series(True, index=leads.index)
+
+    counts = {}
+    for name, mask in problems.items():
+        count = int(mask.sum())
+        if count:
+            counts[name] = count
+            field, issue = name.split(':')
+            VALIDATION_ISSUES.inc(count, field=field, issue=issue, action=policy)
+
+    invalid = pd.Series(False, index=leads.index)
+    reasons = pd.Series('', index=leads.index)
+    for name, mask in problems.items():
+        invalid |= mask
+        reasons = reasons.where(~mask, reasons + name + ' ')
+
+    report = original.loc[invalid].reindex(columns=REPORT_COLUMNS[3:], fill_value='')
+    report.insert(0, 'issues', reasons[invalid].str.strip())
+    report.insert(0, 'action', 'repaired' if repair else 'rejected')
+    report.insert(0, 'row', [first_row + position + 1 for position, flag in enumerate(invalid) if flag])
+    report = report.reset_index(drop=True)
+
+    if repair:
+        for name, mask in problems.items():
+            if not mask.any():
+                continue
+            field, issue = name.split(':')
+            if issue == 'too_long':
+                leads.loc[mask, field] = leads.loc[mask, field].str.slice(0, field_lengths[field])
+            else:
+                leads.loc[mask, field] = ''
+        return leads, report, counts
+    return leads.loc[~invalid], report, counts
+
+
+def rejected_rows(report):
+    """Linhas rejeitadas (não enviadas) de um relatório de validate_leads."""
+    return report.loc[report['action'] == 'rejected']
+
+
+def describe_issues(issues):
+    """Texto dos problemas de uma linha do relatório (ex.: 'Email:invalid_email Phone:invalid_phone')."""
+    labels = {
+        'invalid_email': 'email inválido', 'invalid_phone': 'telefone inválido',
+        'too_long': 'valor acima do tamanho do campo', 'required': 'campo obrigatório vazio',
+        'invalid_picklist': 'valor fora da lista de opções',
+    }
+    parts = []
+    for name in issues.split():
+        field, issue = name.split(':')
+        parts.append(f"{field}: {labels.get(issue, issue)}")
+    return 'Validação - ' + '; '.join(parts)
+
+
+def append_report(report_path, report):
+    """Acrescenta as rejeições e correções ao relatório CSV (o cabeçalho é escrito na criação do arquivo)."""
+    if report.empty:
+        return
+    write_header = not os.path.exists(report_path)
+    report.to_csv(report_path, mode='a', header=write_header, index=False, encoding='utf-8')
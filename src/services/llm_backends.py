@@ -0,0 +1,258 @@
+"""
+Módulo dos backends da IA usados por llm.py (mapeamento de colunas e extração de texto).
+
+O backend é escolhido por LLM_BACKEND:
+    openrouter -- (padrão) API compatível com a OpenAI em LLM_BASE_URL
+                  (padrão https://openrouter.ai/api/v1), chave OPENAI_ROUTER_API_KEY
+    fake       -- local, sem rede: responde com as fixtures gravadas em
+                  LLM_FIXTURES_DIR ou, sem fixture, com o mapeamento heurístico
+                  (mapping_helper.guess_column_mapping) e uma extração simples dos
+                  blocos de texto; LLM_FAKE_LATENCY (+ até LLM_FAKE_LATENCY_JITTER)
+                  segundos são acrescentados a cada chamada
+
+Com LLM_RECORD_FIXTURES=1, as respostas do backend openrouter são gravadas em
+LLM_FIXTURES_DIR, uma por requisição (modelo, mensagens e formato), para
+reprodução posterior pelo backend fake.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import unicodedata
+from ..utils.mapping_helper import guess_column_mapping
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Resposta do backend fake a prompts livres (ex.: /ask_ai)
+FAKE_COMPLETION_TEXT = "Resposta simulada pelo backend local da IA (LLM_BACKEND=fake)."
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_PHONE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+_LABEL = re.compile(r'^\s*([^:]{2,30}):\s*(.+)$')
+_CODE_BLOCK = re.compile(r'```(?:\w+)?\s*\n(.*?)```', re.DOTALL)
+
+# Rótulos das linhas de texto livre reconhecidos na extração do backend fake
+_TEXT_LABELS = {
+    'nome': 'Name', 'cliente': 'Name', 'contato': 'Name',
+    'empresa': 'Company', 'org': 'Company', 'organizacao': 'Company', 'companhia': 'Company',
+    'cargo': 'Title', 'funcao': 'Title',
+    'cidade': 'City', 'endereco': 'Street', 'cep': 'PostalCode', 'pais': 'Country', 'origem': 'LeadSource',
+}
+
+
+class LLMBackend:
+    """
+    Interface dos backends: `complete` recebe os parâmetros da chamada de chat
+    completions (model, messages, temperature, max_tokens, response_format) e
+    devolve o texto da resposta.
+    """
+
+    name = None
+
+    def available(self):
+        """Indica se o backend está configurado para uso."""
+        return True
+
+    def complete(self, operation, params, hints=None):
+        """
+        Args:
+            operation (str): 'completion' ou 'column_mapping'
+            params (dict): Parâmetros da chamada de chat completions
+            hints (dict, optional): Dados estruturados da chamada (ex.: 'snippet' e
+                'schema' no mapeamento), usados por backends que não interpretam o prompt
+
+        Returns:
+            str: Conteúdo da resposta
+        """
+        raise NotImplementedError
+
+
+def fixture_key(operation, params):
+    """Chave estável da requisição: operação e hash do modelo, mensagens e formato de resposta."""
+    payload = json.dumps(
+        {key: params.get(key) for key in ('model', 'messages', 'response_format')},
+        sort_keys=True, ensure_ascii=False
+    )
+    return f"{operation}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]}"
+
+
+def _fixture_path(fixtures_dir, operation, params):
+    return os.path.join(fixtures_dir, f"{fixture_key(operation, params)}.json")
+
+
+class OpenRouterBackend(LLMBackend):
+    """Chat completions em uma API compatível com a OpenAI (OpenRouter por padrão)."""
+
+    name = 'openrouter'
+
+    def __init__(self, api_key=None, base_url=None, fixtures_dir=None, record=False):
+        self.api_key = api_key
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+        self._client = None
+
+    def available(self):
+        return bool(self.api_key)
+
+    def client(self):
+        if self._client is None:
+            if not self.api_key:
+                raise ValueError("API Key not configured")
+            from openai import OpenAI
+            self._client = OpenAI(base_url=self.base_url, api_key=self.api_key)
+        return self._client
+
+    def complete(self, operation, params, hints=None):
+        completion = self.client().chat.completions.create(**params)
+        content = completion.choices[0].message.content
+        if self.record and self.fixtures_dir:
+            os.makedirs(self.fixtures_dir, exist_ok=True)
+            with open(_fixture_path(self.fixtures_dir, operation, params), 'w', encoding='utf-8') as f:
+                json.dump({'operation': operation, 'model': params.get('model'), 'content': content},
+                          f, ensure_ascii=False, indent=2)
+        return content
+
+
+class FakeBackend(LLMBackend):
+    """Backend local e determinístico (fixtures gravadas ou heurísticas), com latência configurável."""
+
+    name = 'fake'
+
+    def __init__(self, fixtures_dir=None, latency=0.0, latency_jitter=0.0, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self._random = random.Random(seed)
+
+    def _load_fixture(self, operation, params):
+        if not self.fixtures_dir:
+            return None
+        path = _fixture_path(self.fixtures_dir, operation, params)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('content')
+
+    def complete(self, operation, params, hints=None):
+        delay = self.latency + self._random.uniform(0, self.latency_jitter) if self.latency_jitter else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        content = self._load_fixture(operation, params)
+        if content is not None:
+            return content
+        if operation == 'column_mapping' and hints:
+            return json.dumps(_heuristic_mapping(hints['snippet'], hints['schema']), ensure_ascii=False)
+        if params.get('response_format', {}).get('type') == 'json_object':
+            return json.dumps(_extract_leads(_prompt_text(params)), ensure_ascii=False)
+        return FAKE_COMPLETION_TEXT
+
+
+def _prompt_text(params):
+    """Texto entre cercas ``` do último prompt do usuário (ou o prompt inteiro)."""
+    message = params.get('messages', [{}])[-1].get('content', '')
+    if isinstance(message, list):
+        message = ' '.join(part.get('text', '') for part in message if isinstance(part, dict))
+    match = _CODE_BLOCK.search(message)
+    return match.group(1) if match else message
+
+
+def _heuristic_mapping(snippet, schema):
+    """Mapeamento das colunas do snippet (CSV com ';' ou ',') pelo mapeamento heurístico."""
+    lines = [line for line in snippet.splitlines() if line.strip()]
+    if not lines:
+        return {field: None for field in schema}
+    sep = ';' if lines[0].count(';') >= lines[0].count(',') else ','
+    rows = list(csv.reader(lines, delimiter=sep))
+    columns = rows[0]
+    samples = {column: [row[pos] for row in rows[1:] if pos < len(row)] for pos, column in enumerate(columns)}
+    return guess_column_mapping(columns, schema, samples)
+
+
+def _extract_leads(text):
+    """
+    Extração simples de leads do texto livre: um lead por bloco separado por
+    linha em branco, com email, telefone e as linhas rotuladas ('Nome:', 'Empresa:', ...).
+    """
+    leads = []
+    for block in re.split(r'\n\s*\n', text.strip()):
+        found = {}
+        for line in block.splitlines():
+            label = _LABEL.match(line)
+            if label:
+                key = unicodedata.normalize('NFKD', label.group(1)).encode('ascii', 'ignore').decode('ascii')
+                field = _TEXT_LABELS.get(key.strip().lower().rstrip('.'))
+                if field and field not in found:
+                    found[field] = label.group(2).split(' - ')[0].strip()
+        emails = _EMAIL.findall(block)
+        phones = _PHONE.findall(block)
+        if not (found or emails or phones):
+            continue
+        name_parts = found.pop('Name', '').split()
+        city, _, state = found.pop('City', '').partition('/')
+        leads.append({
+            'LastName': ' '.join(name_parts[1:]) or (name_parts[0] if name_parts else 'Lead Sem Nome'),
+            'FirstName': name_parts[0] if len(name_parts) > 1 else '',
+            'Company': found.pop('Company', '') or 'Empresa Desconhecida',
+            'Email': emails[0] if emails else '',
+            'Phone': phones[0].strip() if phones else '',
+            'Title': found.pop('Title', ''),
+            'Street': found.pop('Street', ''),
+            'City': city.strip(),
+            'State': state.strip(),
+            'PostalCode': found.pop('PostalCode', ''),
+            'Country': found.pop('Country', ''),
+            'LeadSource': found.pop('LeadSource', '') or 'Importação TXT',
+            'OwnerId': '',
+        })
+    return leads
+
+
+_backend = None
+
+
+def create_backend(name=None):
+    """
+    Cria o backend configurado no ambiente.
+
+    Args:
+        name (str, optional): 'openrouter' ou 'fake' (padrão LLM_BACKEND)
+
+    Returns:
+        LLMBackend: Backend da IA
+    """
+    name = (name or os.getenv('LLM_BACKEND', 'openrouter')).lower()
+    fixtures_dir = os.getenv('LLM_FIXTURES_DIR') or None
+    if name == 'fake':
+        return FakeBackend(
+            fixtures_dir=fixtures_dir,
+            latency=float(os.getenv('LLM_FAKE_LATENCY', '0')),
+            latency_jitter=float(os.getenv('LLM_FAKE_LATENCY_JITTER', '0')),
+            seed=int(os.getenv('LLM_FAKE_SEED', '0')),
+        )
+    if name != 'openrouter':
+        raise ValueError(f"LLM_BACKEND inválido: {name} (use openrouter ou fake)")
+    return OpenRouterBackend(
+        api_key=os.getenv('OPENAI_ROUTER_API_KEY'),
+        base_url=os.getenv('LLM_BASE_URL') or DEFAULT_BASE_URL,
+        fixtures_dir=fixtures_dir,
+        record=os.getenv('LLM_RECORD_FIXTURES', '').lower() in ('1', 'true', 'yes'),
+    )
+
+
+def get_backend():
+    """Backend da IA do processo (criado na primeira chamada a partir do ambiente)."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Substitui o backend do processo (ex.: testes); None volta a ler o ambiente na próxima chamada."""
+    global _backend
+    _backend = backend
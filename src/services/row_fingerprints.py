@@ -0,0 +1,127 @@
+"""
+Módulo das impressões digitais das linhas importadas, para importação incremental.
+
+Cada linha do arquivo mapeado recebe uma impressão digital (hash de 64 bits,
+estável entre execuções) do registro normalizado: nomes das colunas em ordem
+alfabética e valores sem espaços extras e em minúsculas. As impressões das
+linhas enviadas com sucesso são gravadas por origem (nome do arquivo ou
+parceiro informado no upload) em um banco SQLite (ROW_FINGERPRINT_PATH).
+
+Em um novo upload da mesma origem, as linhas cujas impressões já estão
+gravadas não mudaram e não são normalizadas nem enviadas; apenas as linhas
+novas ou alteradas seguem para o Salesforce.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import pandas as pd
+from ..utils.metrics import UNCHANGED_ROWS_SKIPPED
+
+# Arquivo das impressões digitais (vazio desativa a importação incremental)
+ROW_FINGERPRINT_PATH = os.getenv('ROW_FINGERPRINT_PATH', os.path.join(os.getcwd(), 'A converter', 'row_fingerprints.sqlite3'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    source TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    seen_at REAL,
+    PRIMARY KEY (source, fingerprint)
+) WITHOUT ROWID;
+"""
+
+
+def enabled():
+    return bool(ROW_FINGERPRINT_PATH)
+
+
+def source_key(name):
+    """Chave da origem: nome do arquivo (sem diretório) ou do parceiro, em minúsculas."""
+    return ' '.join(os.path.basename(str(name or '')).lower().split())
+
+
+def _connect():
+    os.makedirs(os.path.dirname(ROW_FINGERPRINT_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(ROW_FINGERPRINT_PATH, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def fingerprints(records):
+    """
+    Calcula a impressão digital de cada linha.
+
+    Args:
+        records (pandas.DataFrame): Linhas mapeadas (colunas do Lead)
+
+    Returns:
+        pandas.Series: Hash (int64) do registro normalizado por linha
+    """
+    columns = sorted(records.columns)
+    normalized = records[columns].fillna('').astype(str)
+    for column in columns:
+        normalized[column] = column + '=' + normalized[column].str.strip().str.replace(r'\s+', ' ', regex=True).str.lower()
+    joined = pd.Series('', index=records.index)
+    for column in columns:
+        joined = joined + '\x1f' + normalized[column]
+    return pd.Series(
+        [int.from_bytes(hashlib.blake2b(row.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+         for row in joined],
+        index=records.index, dtype='int64'
+    )
+
+
+def diff(source, records):
+    """
+    Separa as linhas já importadas da origem.
+
+    Args:
+        source (str): Chave da origem (ver source_key)
+        records (pandas.DataFrame): Linhas mapeadas
+
+    Returns:
+        tuple: (Series booleana das linhas já importadas sem alteração, Series das impressões digitais)
+    """
+    hashes = fingerprints(records)
+    known = pd.Series(False, index=records.index)
+    if records.empty or not os.path.exists(ROW_FINGERPRINT_PATH):
+        return known, hashes
+
+    conn = _connect()
+    try:
+        conn.execute("CREATE TEMP TABLE incoming (fingerprint INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT OR IGNORE INTO incoming VALUES (?)", ((int(value),) for value in hashes.unique()))
+        found = {row[0] for row in conn.execute(
+            "SELECT i.fingerprint FROM incoming i JOIN fingerprints f ON f.source = ? AND f.fingerprint = i.fingerprint",
+            (source,)
+        )}
+    finally:
+        conn.close()
+    known = hashes.isin(found)
+    if known.any():
+        UNCHANGED_ROWS_SKIPPED.inc(int(known.sum()))
+    return known, hashes
+
+
+def record(source, hashes):
+    """
+    Grava as impressões digitais das linhas enviadas com sucesso.
+
+    Returns:
+        int: Número de impressões gravadas
+    """
+    if not enabled() or len(hashes) == 0:
+        return 0
+    now = time.time()
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (source, fingerprint, seen_at) VALUES (?, ?, ?)",
+                ((source, int(value), now) for value in pd.unique(hashes))
+            )
+    finally:
+        conn.close()
+    return len(hashes)
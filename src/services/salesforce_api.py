@@ -4,20 +4,63 @@ Responsável por criar, atualizar e consultar leads no Salesforce.
 """
 
 import os
+import csv
 import json
+import bisect
+import logging
 import requests
 import pandas as pd
 import time
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from .salesforce_auth import get_salesforce_access_token
+from . import salesforce_http, salesforce_limits
+from .bulk_manifest import BulkManifest, record_chunk, chunk_value, RESUBMIT_STATES, FINAL_JOB_STATES
+from . import bulk_failures, lead_dedup, lead_index, lead_keys, lead_validation, salesforce_metadata
 from ..utils.salesforce_logger import get_salesforce_logger
+from ..utils.workbook_helper import SOURCE_SHEET_COLUMN
+from ..utils.timing import span, timed
+from ..utils.metrics import BULK_JOBS, FAILED_RECORDS
 import sys
 import re
 
 # Configuração do logger
 logger = get_salesforce_logger('salesforce_api')
 
+# Campos do Lead enviados para o Salesforce
+LEAD_FIELDS = ["LastName", "FirstName", "Company", "Email", "Phone",
+               "Title", "Street", "City", "State", "PostalCode",
+               "Country", "LeadSource"]
+
+# Memória por modo de envio:
+# - streaming (stream_leads_from_csv): limitada. O arquivo é lido em blocos de
+#   STREAMING_CHUNK_ROWS linhas e cada bloco vai direto para o corpo do upload;
+#   o único estado que cresce com o arquivo são as chaves de deduplicação já
+#   vistas (lead_dedup.SeenKeys, 8 bytes por chave, ~16 MB por milhão de linhas).
+# - em lotes (create_leads_from_csv): não limitada. O arquivo inteiro é lido em
+#   um DataFrame (validação, deduplicação em grupos e índice local); apenas o
+#   CSV de cada job é montado por lote de BULK_BATCH_SIZE registros.
+# Arquivos a partir de STREAMING_MIN_BYTES usam o modo streaming.
+STREAMING_MIN_BYTES = int(os.getenv('SALESFORCE_STREAMING_MIN_BYTES', str(50 * 1024 * 1024)))
+STREAMING_CHUNK_ROWS = int(os.getenv('SALESFORCE_STREAMING_CHUNK_ROWS', '10000'))
+
+# Tamanho máximo do corpo enviado a um único job (o limite da Bulk API 2.0 é 150MB);
+# ao atingir o limite, um novo job é criado para o restante do arquivo
+BULK_MAX_UPLOAD_BYTES = int(os.getenv('SALESFORCE_BULK_MAX_UPLOAD_BYTES', str(100 * 1024 * 1024)))
+
+# Intervalo (segundos) entre as verificações de status dos jobs
+BULK_POLL_INTERVAL = float(os.getenv('SALESFORCE_BULK_POLL_INTERVAL', '10'))
+
+# Tentativas de verificação de status (a cada BULK_POLL_INTERVAL) por job no modo streaming
+STREAMING_MAX_POLL_ATTEMPTS = int(os.getenv('SALESFORCE_STREAMING_MAX_POLL_ATTEMPTS', '180'))
+
+# Número máximo de falhas detalhadas mantidas no resumo do modo streaming
+STREAMING_MAX_FAILED_DETAILS = 100
+
+# Registros por job no modo em lotes (recomendado pelo Salesforce para melhor desempenho)
+BULK_BATCH_SIZE = 2000
+
 def clean_phone_number(phone):
     """Limpa números de telefone removendo caracteres não numéricos."""
     if pd.isna(phone) or phone == 'NA':
@@ -121,7 +164,7 @@ def process_csv_file():
         # Lê o arquivo CSV de entrada
         df = pd.read_csv(input_file)
         logger.info(f"Arquivo lido com sucesso. Shape: {df.shape}")
-        logger.debug(f"Colunas: {df.columns.tolist()}")
+        logger.debug("Colunas: %s", df.columns.tolist())
         
         # Aplica as transformações
         logger.info("Aplicando transformações aos dados")
@@ -242,11 +285,12 @@ def create_lead_in_salesforce(lead_data):
         
         # Registra os detalhes antes de enviar
         logger.debug(f"Criando lead no Salesforce via POST para {url}")
-        logger.debug(f"Payload: {json.dumps(lead_data, indent=2)}")
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug("Payload: %s", json.dumps(lead_data, indent=2))
         
         # Tenta fazer a requisição para criar o lead
         start_time = time.time()
-        response = requests.post(url, headers=headers, json=lead_data)
+        response = salesforce_http.post(url, headers=headers, json=lead_data)
         request_time = time.time() - start_time
         
         # Registra a resposta e o tempo de requisição
@@ -263,7 +307,7 @@ def create_lead_in_salesforce(lead_data):
             logger.error(f"ERRO 404: Endpoint não encontrado no Salesforce")
             logger.error(f"URL utilizada: {url}")
             logger.error(f"API Version: {api_version}, Instance URL: {instance_url}")
-            logger.error(f"Payload: {json.dumps(lead_data, indent=2, default=str)}")
+            logger.error("Payload: %s", json.dumps(lead_data, default=str))
             logger.error(f"Resposta detalhada: {response.text}")
             
             # Verifica configurações potencialmente incorretas
@@ -298,7 +342,7 @@ def create_lead_in_salesforce(lead_data):
                 logger.error(f"Detalhes do erro 404: {e.response.text if hasattr(e.response, 'text') else 'Sem detalhes disponíveis'}")
                 # Informação adicional para auxiliar no diagnóstico
                 logger.error(f"API Version: {api_version}, Instance URL: {instance_url}")
-                logger.error(f"Lead data: {json.dumps(lead_data, indent=2, default=str)}")
+                logger.error("Lead data: %s", json.dumps(lead_data, default=str))
             else:
                 logger.error(f"Erro HTTP {e.response.status_code} ao criar lead: {e.response.text if hasattr(e.response, 'text') else str(e)}")
         else:
@@ -309,17 +353,280 @@ def create_lead_in_salesforce(lead_data):
         return None
 
 
-def create_bulk_leads_in_salesforce(leads_data):
+def _bulk_api_context():
+    """
+    Obtém o token de acesso e monta a URL base e os headers da Bulk API 2.0.
+
+    Returns:
+        dict: Contexto com 'instance_url', 'jobs_url', 'query_url', 'sobjects_url', 'limits_url',
+            'headers' e 'upload_headers', ou None em caso de erro.
+    """
+    logger.debug("Obtendo token de acesso do Salesforce")
+    access_token = get_salesforce_access_token()
+
+    if not access_token:
+        logger.error("Token de acesso vazio ou não obtido")
+        return None
+
+    logger.debug("Token de acesso obtido com sucesso")
+
+    # Define a URL da API baseada no ambiente configurado
+    api_version = os.getenv('SALESFORCE_API_VERSION', '63.0')
+    instance_url = os.getenv('SALESFORCE_INSTANCE_URL')
+
+    if not instance_url:
+        logger.error("URL da instância do Salesforce não configurada")
+        return None
+
+    # Certifica-se que a versão da API está no formato correto (sem 'v' adicional)
+    api_version_clean = api_version.replace('v', '')
+
+    context = {
+        'instance_url': instance_url,
+        'jobs_url': f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest",
+        'query_url': f"{instance_url}/services/data/v{api_version_clean}/jobs/query",
+        'sobjects_url': f"{instance_url}/services/data/v{api_version_clean}/sobjects",
+        'limits_url': f"{instance_url}/services/data/v{api_version_clean}/limits",
+        'headers': {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        },
+        'upload_headers': {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'text/csv',
+            'Accept': 'application/json'
+        }
+    }
+    if salesforce_limits.sample_due():
+        _refresh_org_limits(context)
+    return context
+
+
+def _refresh_org_limits(context):
+    """Amostra os limites da org (/limits) para o acompanhamento de uso e o throttle."""
+    try:
+        response = salesforce_http.get(context['limits_url'], headers=context['headers'])
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Não foi possível consultar os limites da org: {str(e)}")
+        return
+    if response.status_code != 200:
+        logger.warning(f"Não foi possível consultar os limites da org. Status: {response.status_code}")
+        return
+    salesforce_limits.update_from_limits(response.json())
+
+
+def _lead_metadata(context=None):
+    """
+    Metadados do Lead (describe em cache, ver salesforce_metadata). A autenticação
+    só acontece se o cache precisar ser obtido ou revalidado.
+
+    Returns:
+        dict: Metadados resumidos ou None se indisponíveis
+    """
+    return salesforce_metadata.get_sobject_metadata('Lead', (lambda: context) if context else _bulk_api_context)
+
+
+def _validation_rules(metadata):
+    """Tamanhos e picklists restritas da org para lead_validation (padrões se não houver metadados)."""
+    if not metadata:
+        return {}
+    return {
+        'field_lengths': salesforce_metadata.field_lengths(metadata),
+        'picklists': salesforce_metadata.restricted_picklists(metadata)
+    }
+
+
+def _log_api_error(response):
+    """Registra os códigos e mensagens de erro retornados pela API."""
+    try:
+        error_json = response.json()
+        if isinstance(error_json, list) and len(error_json) > 0:
+            for error in error_json:
+                logger.error(f"Código de erro: {error.get('errorCode')}, Mensagem: {error.get('message')}")
+        elif isinstance(error_json, dict):
+            logger.error(f"Código de erro: {error_json.get('errorCode')}, Mensagem: {error_json.get('message')}")
+    except Exception as e:
+        logger.error(f"Não foi possível analisar detalhes do erro: {str(e)}")
+
+
+@timed('bulk_create_job')
+def _create_ingest_job(context, operation='insert'):
+    """
+    Etapa 1: Cria um job de ingestão de Leads na Bulk API 2.0.
+
+    Args:
+        operation (str): 'insert', 'upsert' (pelo id externo lead_keys.EXTERNAL_ID_FIELD) ou 'update'
+
+    Returns:
+        str: ID do job ou None em caso de erro.
+    """
+    job_data = {
+        "object": "Lead",
+        "contentType": "CSV",
+        "operation": operation,
+        "lineEnding": "LF"  # Explicitamente definindo final de linha como LF
+    }
+    if operation == 'upsert':
+        job_data["externalIdFieldName"] = lead_keys.EXTERNAL_ID_FIELD
+
+    # Aguarda uma vaga no throttle (ou recusa o job se a org está perto dos limites)
+    allowed, reason = salesforce_limits.acquire_ingest_slot()
+    if not allowed:
+        logger.error(f"Job da Bulk API não criado: {reason}")
+        return None
+
+    logger.debug(f"Criando job da Bulk API em: {context['jobs_url']}")
+    logger.debug(f"Dados do job: {job_data}")
+
+    # Uma repetição após falha de conexão pode deixar um job vazio em aberto, descartado pelo Salesforce
+    job_response = salesforce_http.post(context['jobs_url'], headers=context['headers'], json=job_data, retry=True)
+
+    if job_response.status_code != 200:
+        logger.error(f"Erro ao criar job da Bulk API. Status: {job_response.status_code}")
+        logger.error(f"Resposta: {job_response.text}")
+        _log_api_error(job_response)
+        return None
+
+    job_id = job_response.json().get('id')
+    logger.info(f"Job da Bulk API criado com sucesso. ID: {job_id}")
+    return job_id
+
+
+def _abort_job(context, job_id):
+    """Tenta fechar o job com status de fracasso."""
+    abort_response = salesforce_http.patch(f"{context['jobs_url']}/{job_id}", headers=context['headers'], json={"state": "Aborted"}, retry=True)
+    BULK_JOBS.inc(state='Aborted')
+    logger.debug(f"Resposta ao abortar job: Status {abort_response.status_code}, {abort_response.text}")
+
+
+@timed('bulk_upload')
+def _upload_job_data(context, job_id, data):
+    """
+    Etapa 2: Envia os dados CSV para o job.
+
+    Args:
+        context (dict): Contexto retornado por _bulk_api_context
+        job_id (str): ID do job
+        data (str | iterable): CSV completo ou gerador de blocos de bytes
+            (enviado com Transfer-Encoding chunked, sem montar o corpo em memória).
+            Apenas o CSV completo é reenviado em falhas transitórias; o job ainda
+            não foi fechado (UploadComplete), então o reenvio é seguro.
+
+    Returns:
+        bool: True se o upload foi aceito.
+    """
+    upload_url = f"{context['jobs_url']}/{job_id}/batches"
+    upload_response = salesforce_http.put(upload_url, headers=context['upload_headers'], data=data)
+
+    if upload_response.status_code != 201:
+        logger.error(f"Erro ao enviar dados para o job. Status: {upload_response.status_code}")
+        logger.error(f"Resposta: {upload_response.text}")
+        _abort_job(context, job_id)
+        return False
+    return True
+
+
+@timed('bulk_close_job')
+def _close_job(context, job_id):
+    """
+    Etapa 3: Finaliza o upload do job para iniciar o processamento.
+
+    Returns:
+        bool: True se o job foi marcado como UploadComplete.
+    """
+    logger.debug(f"Finalizando job {job_id} para iniciar processamento")
+    close_response = salesforce_http.patch(f"{context['jobs_url']}/{job_id}", headers=context['headers'], json={"state": "UploadComplete"}, retry=True)
+
+    if close_response.status_code != 200:
+        logger.error(f"Erro ao finalizar job. Status: {close_response.status_code}")
+        logger.error(f"Resposta: {close_response.text}")
+        return False
+    return True
+
+
+@timed('bulk_poll_wait')
+def _wait_for_job(context, job_id, max_attempts=30, interval=None, delay_first=True):
+    """
+    Etapa 4: Verifica o status do job até que termine.
+
+    Args:
+        delay_first (bool): Aguarda `interval` antes da primeira verificação
+            (False ao retomar jobs que podem já ter terminado)
+
+    Returns:
+        dict: Informações finais do job ou None em caso de timeout.
+    """
+    status_url = f"{context['jobs_url']}/{job_id}"
+    interval = BULK_POLL_INTERVAL if interval is None else interval
+    logger.info(f"Job {job_id} iniciado. Monitorando progresso...")
+
+    for attempts in range(1, max_attempts + 1):
+        if delay_first or attempts > 1:
+            time.sleep(interval)
+
+        status_response = salesforce_http.get(status_url, headers=context['headers'])
+
+        if status_response.status_code != 200:
+            logger.warning(f"Erro ao verificar status do job. Tentativa {attempts} de {max_attempts}")
+            continue
+
+        status_info = status_response.json()
+        job_state = status_info.get('state')
+
+        logger.debug(f"Status do job: {job_state} (Tentativa {attempts}/{max_attempts})")
+
+        if job_state in ['JobComplete', 'Failed', 'Aborted']:
+            logger.info(f"Job finalizado com status: {job_state}")
+            BULK_JOBS.inc(state=job_state)
+            if status_info.get('errorMessage'):
+                error_message = status_info['errorMessage']
+                logger.error(f"Mensagem de erro do job: {error_message}")
+                if "LineEnding is invalid on user data" in error_message:
+                    logger.error("Erro de final de linha detectado. Isso geralmente acontece quando os finais de linha no CSV não são compatíveis com a configuração do Salesforce.")
+            logger.info(f"Registros processados: {status_info.get('numberRecordsProcessed', 0)}")
+            logger.info(f"Registros com falha: {status_info.get('numberRecordsFailed', 0)}")
+            return status_info
+
+    logger.error(f"Timeout aguardando conclusão do job após {max_attempts} tentativas")
+    BULK_JOBS.inc(state='Timeout')
+    return None
+
+
+def _iter_job_results(context, job_id, result_type):
+    """
+    Etapa 5: Lê os resultados do job ('successfulResults' ou 'failedResults') em streaming.
+
+    Os resultados da Bulk API 2.0 são CSV com as colunas sf__Id e sf__Created
+    (sucessos) ou sf__Id e sf__Error (falhas), seguidas dos campos enviados.
+
+    Yields:
+        dict: Uma linha de resultado por registro.
+    """
+    results_url = f"{context['jobs_url']}/{job_id}/{result_type}"
+    with salesforce_http.get(results_url, headers=context['headers'], stream=True) as response:
+        if response.status_code != 200:
+            logger.error(f"Erro ao obter {result_type}. Status: {response.status_code}, Resposta: {response.text}")
+            return
+        response.encoding = 'utf-8'
+        yield from csv.DictReader(response.iter_lines(decode_unicode=True))
+
+
+def create_bulk_leads_in_salesforce(leads_data, manifest=None, chunk_index=None, retry_failed=True, operation='insert'):
     """
     Cria múltiplos leads de uma só vez no Salesforce usando a Bulk API 2.0.
     
     Args:
-        leads_data (list): Lista de dicionários contendo dados de leads a serem criados.
+        leads_data (list): Lista de dicionários contendo dados de leads a serem criados
+            (com 'Id' na operação 'update' e o id externo na operação 'upsert').
+        manifest (BulkManifest, optional): Manifest onde o job e o estado do bloco são registrados
+        chunk_index (int, optional): Índice do bloco no manifest
+        retry_failed (bool): Reenvia os registros com falha corrigíveis (ver _retry_failed_records)
+        operation (str): Operação do job ('insert', 'upsert' ou 'update'; ver lead_keys)
         
     Returns:
         dict: Resultados da operação em massa com IDs e status de cada registro.
     """
-    logger.info(f"=== INICIANDO CRIAÇÃO EM MASSA DE {len(leads_data)} LEADS NO SALESFORCE USANDO BULK API 2.0 ===")
+    logger.info(f"=== INICIANDO {operation.upper()} EM MASSA DE {len(leads_data)} LEADS NO SALESFORCE USANDO BULK API 2.0 ===")
     
     # Verificação preliminar dos dados
     if not leads_data:
@@ -351,82 +658,15 @@ def create_bulk_leads_in_salesforce(leads_data):
     logger.info(f"{len(leads_data)} leads válidos para processamento após verificação inicial")
     
     try:
-        # Obtém o token de acesso
-        logger.debug("Obtendo token de acesso do Salesforce")
-        access_token = get_salesforce_access_token()
-        
-        if not access_token:
-            logger.error("Token de acesso vazio ou não obtido")
-            return None
-        
-        logger.debug("Token de acesso obtido com sucesso")
-        
-        # Configura a requisição
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Define a URL da API baseada no ambiente configurado
-        api_version = os.getenv('SALESFORCE_API_VERSION', '63.0')
-        instance_url = os.getenv('SALESFORCE_INSTANCE_URL')
-        
-        if not instance_url:
-            logger.error("URL da instância do Salesforce não configurada")
+        context = _bulk_api_context()
+        if not context:
             return None
         
-        # Certifica-se que a versão da API está no formato correto (sem 'v' adicional)
-        api_version_clean = api_version.replace('v', '')
-        
         # Etapa 1: Criar um job usando a Bulk API 2.0
-        create_job_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest"
-        
-        job_data = {
-            "object": "Lead",
-            "contentType": "CSV",
-            "operation": "insert",
-            "lineEnding": "LF"  # Explicitamente definindo final de linha como LF
-        }
-        
-        logger.debug(f"Criando job da Bulk API em: {create_job_url}")
-        logger.debug(f"Headers: {headers}")
-        logger.debug(f"Dados do job: {job_data}")
-        
-        job_response = requests.post(create_job_url, headers=headers, json=job_data)
-        
-        if job_response.status_code != 200:
-            logger.error(f"Erro ao criar job da Bulk API. Status: {job_response.status_code}")
-            logger.error(f"Resposta: {job_response.text}")
-            # Detalhamento adicional do erro
-            try:
-                error_json = job_response.json()
-                if isinstance(error_json, list) and len(error_json) > 0:
-                    for error in error_json:
-                        logger.error(f"Código de erro: {error.get('errorCode')}, Mensagem: {error.get('message')}")
-                elif isinstance(error_json, dict):
-                    logger.error(f"Código de erro: {error_json.get('errorCode')}, Mensagem: {error_json.get('message')}")
-            except Exception as e:
-                logger.error(f"Não foi possível analisar detalhes do erro: {str(e)}")
-            
-            # Verifique os elementos específicos da requisição
-            logger.debug(f"Headers enviados: {json.dumps(headers)}")
-            logger.debug(f"Dados do job enviados: {json.dumps(job_data)}")
-            logger.debug(f"URL completa: {create_job_url}")
+        job_id = _create_ingest_job(context, operation)
+        if not job_id:
             return None
-        
-        job_info = job_response.json()
-        job_id = job_info.get('id')
-        logger.info(f"Job da Bulk API criado com sucesso. ID: {job_id}")
-        
-        # Etapa 2: Fazer upload dos dados para o job
-        upload_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}/batches"
-        
-        # Prepara os dados como CSV
-        upload_headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'text/csv',
-            'Accept': 'application/json'
-        }
+        record_chunk(manifest, chunk_index, job_id=job_id, state='open')
         
         # Converte os dados para formato CSV
         df_leads = pd.DataFrame(leads_data)
@@ -462,36 +702,44 @@ def create_bulk_leads_in_salesforce(leads_data):
             df_leads['Company'] = 'Empresa Desconhecida'
             
         # Lista de colunas no CSV para debug
-        logger.debug(f"Colunas no CSV: {df_leads.columns.tolist()}")
+        logger.debug("Colunas no CSV: %s", df_leads.columns.tolist())
+
+        # Campos que a org não permite preencher na operação são removidos (o Id identifica o registro)
+        metadata = _lead_metadata(context)
+        if metadata:
+            allowed = set()
+            if operation in ('insert', 'upsert'):
+                allowed |= salesforce_metadata.createable_fields(metadata)
+            if operation in ('update', 'upsert'):
+                allowed |= salesforce_metadata.updateable_fields(metadata)
+            blocked = [col for col in df_leads.columns
+                       if col in metadata['fields'] and col not in allowed and col != 'Id']
+            if blocked:
+                logger.warning(f"Campos não permitidos na operação {operation} de Lead removidos: {blocked}")
+                df_leads = df_leads.drop(columns=blocked)
 
-        # Verificar e limpar valores excessivamente longos para evitar erros
+        # Trunca os valores ao tamanho de cada campo (metadados da org ou tamanhos padrão do Lead)
+        field_lengths = (salesforce_metadata.field_lengths(metadata) if metadata
+                         else lead_validation.LEAD_FIELD_LENGTHS)
         for col in df_leads.columns:
+            max_allowed = field_lengths.get(col, 255)
             max_len = df_leads[col].astype(str).str.len().max()
-            if max_len > 255:
-                logger.warning(f"Campo {col} contém valores longos (max: {max_len}). Truncando para 255 caracteres.")
-                df_leads[col] = df_leads[col].astype(str).str.slice(0, 255)
+            if max_len > max_allowed:
+                logger.warning(f"Campo {col} contém valores longos (max: {max_len}). Truncando para {max_allowed} caracteres.")
+                df_leads[col] = df_leads[col].astype(str).str.slice(0, max_allowed)
 
         # Verificar tamanho do DataFrame
         logger.debug(f"Tamanho do DataFrame: {df_leads.shape}")
         
         # Converter para CSV com encoding adequado e garantir que os finais de linha sejam LF
-        csv_data = df_leads.to_csv(index=False, encoding='utf-8', lineterminator='\n')
+        with span('csv_serialization', rows=len(df_leads)):
+            csv_data = df_leads.to_csv(index=False, encoding='utf-8', lineterminator='\n')
         
         # Garantir que o final de linha está no formato LF (Unix-style)
         csv_data = csv_data.replace('\r\n', '\n')
         
-        # Salvar temporariamente o CSV para verificação (apenas em ambiente de desenvolvimento)
-        try:
-            temp_csv_path = os.path.join(os.getcwd(), 'A converter', 'temp', f'bulk_api_data_{time.strftime("%Y%m%d_%H%M%S")}.csv')
-            os.makedirs(os.path.dirname(temp_csv_path), exist_ok=True)
-            with open(temp_csv_path, 'w', encoding='utf-8', newline='\n') as f:
-                f.write(csv_data)
-            logger.debug(f"CSV salvo temporariamente em: {temp_csv_path}")
-        except Exception as e:
-            logger.warning(f"Não foi possível salvar CSV temporário: {str(e)}")
-        
         # Registra os primeiros 500 caracteres do CSV para verificação
-        logger.debug(f"Amostra do CSV (primeiros 500 caracteres): {csv_data[:500]}")
+        logger.debug("Amostra do CSV (primeiros 500 caracteres): %s", csv_data[:500])
         logger.debug(f"Tamanho total do CSV: {len(csv_data)} bytes")
         
         # Verifica se o CSV contém caracteres CR (\r) o que indicaria finais de linha incorretos
@@ -504,174 +752,695 @@ def create_bulk_leads_in_salesforce(leads_data):
         
         logger.debug(f"Enviando {len(leads_data)} registros para o job {job_id} em formato CSV")
         
-        upload_response = requests.put(upload_url, headers=upload_headers, data=csv_data)
-        
-        if upload_response.status_code != 201:
-            logger.error(f"Erro ao enviar dados para o job. Status: {upload_response.status_code}")
-            logger.error(f"Resposta: {upload_response.text}")
-            
-            # Informações adicionais para depuração
-            logger.debug(f"Headers do upload: {upload_headers}")
-            logger.debug(f"Tamanho dos dados CSV: {len(csv_data)} bytes")
-            logger.debug(f"Primeiras 500 caracteres dos dados: {csv_data[:500]}")
-            
-            # Tentar fechar o job com status de fracasso
-            abort_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}"
-            abort_data = {"state": "Aborted"}
-            abort_response = requests.patch(abort_url, headers=headers, json=abort_data)
-            logger.debug(f"Resposta ao abortar job: Status {abort_response.status_code}, {abort_response.text}")
-            
+        # Etapa 2: Fazer upload dos dados para o job
+        if not _upload_job_data(context, job_id, csv_data):
             return None
         
         # Etapa 3: Finalizar o job para iniciar o processamento
-        close_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}"
-        close_data = {"state": "UploadComplete"}
-        
-        logger.debug(f"Finalizando job {job_id} para iniciar processamento")
-        close_response = requests.patch(close_url, headers=headers, json=close_data)
-        
-        if close_response.status_code != 200:
-            logger.error(f"Erro ao finalizar job. Status: {close_response.status_code}")
-            logger.error(f"Resposta: {close_response.text}")
+        if not _close_job(context, job_id):
             return None
+        record_chunk(manifest, chunk_index, state='upload_complete')
         
+        return _collect_job_results(context, job_id, manifest, chunk_index, retry_failed=retry_failed,
+                                    operation=operation)
+    
+    except Exception as e:
+        logger.exception(f"Erro ao processar leads em massa: {str(e)}")
+        return None
+
+
+def _collect_job_results(context, job_id, manifest=None, chunk_index=None, delay_first=True, retry_failed=True,
+                         operation='insert'):
+    """
+    Etapas 4 e 5: aguarda o término do job e obtém os resultados de cada registro.
+    Em seguida (etapa 6), os registros com falha corrigíveis são reenviados com a mesma operação.
+
+    Returns:
+        dict: Resultados do job (ver create_bulk_leads_in_salesforce) ou None em caso de erro
+    """
+    try:
         # Etapa 4: Verificar o status do job até que termine
-        max_attempts = 30  # Número máximo de tentativas (5 minutos com 10 segundos entre tentativas)
-        attempts = 0
-        finished = False
-        
-        logger.info(f"Job {job_id} iniciado. Monitorando progresso...")
-        
-        while attempts < max_attempts and not finished:
-            attempts += 1
-            time.sleep(10)  # Esperar 10 segundos entre verificações
-            
-            status_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}"
-            status_response = requests.get(status_url, headers=headers)
-            
-            if status_response.status_code != 200:
-                logger.warning(f"Erro ao verificar status do job. Tentativa {attempts} de {max_attempts}")
-                continue
-            
-            status_info = status_response.json()
-            job_state = status_info.get('state')
-            
-            logger.debug(f"Status do job: {job_state} (Tentativa {attempts}/{max_attempts})")
-            
-            if job_state in ['JobComplete', 'Failed', 'Aborted']:
-                finished = True
-                logger.info(f"Job finalizado com status: {job_state}")
-                break
-        
-        if not finished:
-            logger.error(f"Timeout aguardando conclusão do job após {max_attempts} tentativas")
-            return None                # Etapa 5: Obter os resultados do job
-        results_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}/successfulResults"
-        failed_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}/failedResults"
-        
-        # Obter informações completas do job antes de obter resultados
-        job_details_url = f"{instance_url}/services/data/v{api_version_clean}/jobs/ingest/{job_id}"
-        details_response = requests.get(job_details_url, headers=headers)
-        
-        if details_response.status_code == 200:
-            job_details = details_response.json()
-            logger.info(f"Detalhes completos do job: {json.dumps(job_details, indent=2)}")
-            
-            # Extrair informações importantes para diagnóstico
-            if 'errorMessage' in job_details and job_details['errorMessage']:
-                error_message = job_details['errorMessage']
-                logger.error(f"Mensagem de erro do job: {error_message}")
-                
-                # Verificar erros específicos
-                if "LineEnding is invalid on user data" in error_message:
-                    logger.error("Erro de final de linha detectado. Isso geralmente acontece quando os finais de linha no CSV não são compatíveis com a configuração do Salesforce.")
-                    logger.error("Tentar novamente com a correção de final de linha implementada.")
-            
-            if 'state' in job_details:
-                logger.info(f"Estado final do job: {job_details['state']}")
-                
-            if 'numberRecordsProcessed' in job_details:
-                logger.info(f"Registros processados: {job_details['numberRecordsProcessed']}")
-                
-            if 'numberRecordsFailed' in job_details:
-                logger.info(f"Registros com falha: {job_details['numberRecordsFailed']}")
-                
-            if 'contentType' in job_details:
-                logger.debug(f"Tipo de conteúdo usado: {job_details['contentType']}")
-        else:
-            logger.error(f"Erro ao obter detalhes do job. Status: {details_response.status_code}, Resposta: {details_response.text}")
-        
-        # Obter resultados de sucesso
-        success_response = requests.get(results_url, headers=headers)
-        
-        success_results = []
-        failed_results = []
-        
-        if success_response.status_code == 200:
-            # Parse CSV results
-            success_data = success_response.text
-            success_lines = success_data.strip().split('\n')
-            
-            # Pular o cabeçalho CSV
-            if len(success_lines) > 1:
-                for line in success_lines[1:]:
-                    parts = line.split(',')
-                    if len(parts) >= 2:
-                        success_results.append({
-                            'sf_id': parts[0].strip('"'),
-                            'index': int(parts[1])
-                        })
-        
-        # Obter resultados de falha
-        failed_response = requests.get(failed_url, headers=headers)
-        
-        if failed_response.status_code == 200:
-            # Parse CSV results
-            failed_data = failed_response.text
-            logger.debug(f"Dados de resultados falhos: {failed_data[:1000] if len(failed_data) > 1000 else failed_data}")
-            
-            failed_lines = failed_data.strip().split('\n')
-            
-            # Pular o cabeçalho CSV
-            if len(failed_lines) > 1:
-                logger.info(f"Cabeçalho dos resultados falhos: {failed_lines[0]}")
-                for i, line in enumerate(failed_lines[1:]):
-                    if i < 10:  # Limitamos a 10 registros para o log não ficar muito grande
-                        parts = line.split(',')
-                        logger.debug(f"Falha #{i+1}: {line}")
-                        if len(parts) >= 3:
-                            failed_results.append({
-                                'index': int(parts[0]) if parts[0].isdigit() else 0,
-                                'error': parts[1].strip('"'),
-                                'error_fields': parts[2].strip('"') if len(parts) > 2 else ''
-                            })
-                        else:
-                            logger.warning(f"Formato de linha falha inesperado: {line}")
-                
-                if len(failed_lines) > 11:
-                    logger.info(f"... mais {len(failed_lines) - 11} linhas de falha não mostradas no log")
-        else:
-            logger.error(f"Erro ao obter resultados falhos. Status: {failed_response.status_code}, Resposta: {failed_response.text}")
+        status_info = _wait_for_job(context, job_id, delay_first=delay_first)
+        if not status_info:
+            return None
+        record_chunk(manifest, chunk_index, state=status_info.get('state'))
+        
+        # Etapa 5: Obter os resultados do job. As linhas de resultado trazem os campos
+        # enviados, usados para relacionar cada resultado ao lead de origem.
+        with span('bulk_fetch_results'):
+            success_results = [
+                {'sf_id': row.get('sf__Id', ''), 'created': row.get('sf__Created') == 'true', 'fields': row}
+                for row in _iter_job_results(context, job_id, 'successfulResults')
+            ]
+            failed_results = [
+                {'error': row.get('sf__Error', 'Erro desconhecido'), 'fields': row}
+                for row in _iter_job_results(context, job_id, 'failedResults')
+            ]
+        if success_results and lead_index.enabled():
+            lead_index.record_leads(success['fields'] for success in success_results)
+
+        # Etapa 6: reenvio dos registros com falha corrigíveis (uma única vez por job)
+        follow_up_jobs = []
+        if failed_results and retry_failed and not chunk_value(manifest, chunk_index, 'retry_started'):
+            record_chunk(manifest, chunk_index, retry_started=True)
+            with span('failed_record_retry', rows=len(failed_results)):
+                retry = _retry_failed_records((failed['fields'] for failed in failed_results), operation=operation)
+            success_results.extend(retry['successful_records'])
+            failed_results = retry['failed_records']
+            follow_up_jobs = retry['jobs']
+
+        for i, failed in enumerate(failed_results[:10]):  # Limitamos a 10 registros para o log não ficar muito grande
+            logger.debug(f"Falha #{i+1}: {failed['error']}")
+        if len(failed_results) > 10:
+            logger.info(f"... mais {len(failed_results) - 10} linhas de falha não mostradas no log")
+
         # Compila e retorna os resultados finais
         final_results = {
             'job_id': job_id,
-            'state': job_state,
+            'state': status_info.get('state'),
             'success_count': len(success_results),
             'failed_count': len(failed_results),
             'total_processed': status_info.get('numberRecordsProcessed', 0),
+            'follow_up_jobs': follow_up_jobs,
             'successful_records': success_results,
             'failed_records': failed_results
         }
         
+        record_chunk(manifest, chunk_index, success_count=len(success_results), failed_count=len(failed_results))
+        
         logger.info(f"Processamento em massa concluído: {final_results['success_count']} de {final_results['total_processed']} registros processados com sucesso")
         return final_results
     
     except Exception as e:
-        logger.exception(f"Erro ao processar leads em massa: {str(e)}")
+        logger.exception(f"Erro ao obter os resultados do job {job_id}: {str(e)}")
         return None
 
 
-def create_leads_from_csv(csv_file_path, environment, owner_id=None):
+def _submit_follow_up(batch, summary, keep_successes, operation='insert'):
+    """
+    Envia um job de acompanhamento com registros corrigidos.
+
+    Args:
+        batch (list): Pares [linha de falha original, campos corrigidos]
+        summary (dict): Resumo de _retry_failed_records, atualizado com o resultado
+        operation (str): Operação do job original
+
+    Returns:
+        list: Linhas de falha do job (ou as originais, se o job não pôde ser processado)
+    """
+    results = create_bulk_leads_in_salesforce([fixed for _, fixed in batch], retry_failed=False, operation=operation)
+    if not results:
+        logger.error(f"Falha no job de acompanhamento de {len(batch)} registros; mantidos com o erro original")
+        return [original for original, _ in batch]
+    summary['jobs'].append(results['job_id'])
+    summary['recovered_count'] += results['success_count']
+    if keep_successes:
+        summary['successful_records'].extend(results['successful_records'])
+    return [failed['fields'] for failed in results['failed_records']]
+
+
+def _retry_failed_records(failed_rows, keep_details=None, keep_successes=True, operation='insert'):
+    """
+    Etapa 6: classifica os registros com falha de um job e reenvia os corrigíveis.
+
+    As correções são as de bulk_failures.fix_record. Os registros corrigidos
+    são reenviados em jobs de acompanhamento de até BULK_BATCH_SIZE registros,
+    por até bulk_failures.RETRY_ROUNDS rodadas (os que falham de novo voltam à
+    classificação). Antes do reenvio, os registros ficam em um arquivo
+    temporário, liberando a leitura dos resultados do job original.
+
+    Args:
+        failed_rows (iterable): Linhas de failedResults (sf__Error e os campos enviados)
+        keep_details (int, optional): Máximo de falhas detalhadas mantidas (None = todas)
+        keep_successes (bool): Mantém os registros recuperados (no modo streaming, apenas a contagem)
+        operation (str): Operação do job original, repetida nos jobs de acompanhamento
+
+    Returns:
+        dict: successful_records, failed_records (no formato de _collect_job_results),
+            recovered_count, failed_count e jobs de acompanhamento
+    """
+    summary = {'successful_records': [], 'failed_records': [], 'recovered_count': 0, 'failed_count': 0, 'jobs': []}
+
+    def keep_failure(row, category):
+        summary['failed_count'] += 1
+        FAILED_RECORDS.inc(category=category, action='kept')
+        if keep_details is None or len(summary['failed_records']) < keep_details:
+            summary['failed_records'].append({'error': row.get('sf__Error', 'Erro desconhecido'), 'fields': row})
+
+    rows = failed_rows
+    for round_number in range(1, bulk_failures.RETRY_ROUNDS + 1):
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+            categories = {}
+            for row in rows:
+                category, fixed = bulk_failures.fix_record(row)
+                if fixed is None:
+                    keep_failure(row, category)
+                    continue
+                FAILED_RECORDS.inc(category=category, action='resubmitted')
+                categories[category] = categories.get(category, 0) + 1
+                spool.write(json.dumps([row, fixed], ensure_ascii=False) + '\n')
+            if not categories:
+                return summary
+
+            logger.info(f"Reenvio de registros com falha (rodada {round_number}): {categories}")
+            if bulk_failures.LOCK_CONTENTION in categories:
+                # Espera crescente para a contenção de bloqueio (UNABLE_TO_LOCK_ROW) se dissipar
+                time.sleep(bulk_failures.LOCK_RETRY_DELAY * round_number)
+
+            spool.seek(0)
+            rows = []
+            batch = []
+            for line in spool:
+                batch.append(json.loads(line))
+                if len(batch) >= BULK_BATCH_SIZE:
+                    rows.extend(_submit_follow_up(batch, summary, keep_successes, operation))
+                    batch = []
+            if batch:
+                rows.extend(_submit_follow_up(batch, summary, keep_successes, operation))
+
+    for row in rows:
+        keep_failure(row, bulk_failures.classify_error(row.get('sf__Error')))
+    if summary['recovered_count']:
+        logger.info(f"{summary['recovered_count']} registros recuperados em {len(summary['jobs'])} job(s) de acompanhamento")
+    return summary
+
+
+def _format_names(series):
+    """Versão vetorizada de format_name para uma coluna inteira."""
+    collapsed = series.str.split().str.join(' ').fillna('')
+    return collapsed.str.replace(r'[^\s-]+', lambda m: m.group(0).capitalize(), regex=True)
+
+
+def _normalize_leads_chunk(chunk, owner_id=None, first_row=0, rules=None, operation='insert'):
+    """
+    Aplica a limpeza, a validação e os valores padrão dos leads a um bloco do CSV de forma vetorizada.
+
+    Args:
+        chunk (pandas.DataFrame): Bloco lido do CSV
+        owner_id (str, optional): ID do proprietário dos leads
+        first_row (int): Posição do bloco no arquivo (para o relatório de rejeições)
+        rules (dict, optional): Regras de validação da org (ver _validation_rules)
+        operation (str): Operação do job; no upsert é acrescentada a coluna do id externo
+            e no update a coluna Id do arquivo é mantida (ver lead_keys)
+
+    Returns:
+        tuple: (DataFrame com as colunas do Lead como string, número de linhas com padrão aplicado,
+            relatório da validação: linhas rejeitadas ou corrigidas, ver lead_validation)
+    """
+    chunk.columns = [col.strip() for col in chunk.columns]
+    leads = chunk[[field for field in LEAD_FIELDS if field in chunk.columns]].fillna('').astype(str)
+    for col in leads.columns:
+        leads[col] = leads[col].str.strip()
+
+    if 'Phone' in leads.columns:
+        leads['Phone'] = leads['Phone'].str.replace('.0', '', regex=False).str.replace(r'[^0-9]', '', regex=True)
+    for name_field in ('FirstName', 'LastName'):
+        if name_field in leads.columns:
+            leads[name_field] = _format_names(leads[name_field])
+    if 'Email' in leads.columns:
+        leads['Email'] = leads['Email'].str.lower()
+
+    leads, report, _ = lead_validation.validate_leads(leads, first_row=first_row, **(rules or {}))
+
+    # Campos obrigatórios recebem valores padrão para evitar falha
+    defaults_applied = 0
+    for field, default in (("LastName", "Lead Sem Nome"), ("Company", "Empresa Desconhecida")):
+        if field not in leads.columns:
+            leads[field] = default
+            defaults_applied += len(leads)
+        else:
+            empty = leads[field] == ''
+            defaults_applied += int(empty.sum())
+            leads.loc[empty, field] = default
+    leads['Company'] = leads['Company'].str.slice(0, 255)
+
+    key_field = lead_keys.key_field(operation)
+    if operation == 'upsert':
+        leads[key_field] = lead_keys.external_ids(leads, chunk.get(key_field))
+    elif operation == 'update' and key_field in chunk.columns:
+        leads[key_field] = chunk.loc[leads.index, key_field].fillna('').astype(str).str.strip()
+
+    # Na atualização o proprietário dos leads existentes não é alterado
+    if operation != 'update' and owner_id and owner_id.strip() and len(owner_id) >= 15 and owner_id.startswith('00'):
+        leads['OwnerId'] = owner_id
+
+    # A Bulk API espera finais de linha LF também dentro dos valores
+    leads = leads.replace(r'\r\n?', '\n', regex=True)
+    return leads, defaults_applied, report
+
+
+def _rejection_report_path(csv_file_path):
+    """Relatório CSV das linhas rejeitadas (ou corrigidas) na validação, ao lado do arquivo de origem."""
+    return os.path.splitext(csv_file_path)[0] + '.rejected.csv'
+
+
+def _rejection_result(rejected_row):
+    """Linha do relatório de rejeições no formato de resultado usado pela interface."""
+    return {
+        'success': False,
+        'id': None,
+        'name': rejected_row['LastName'] or f"Linha {rejected_row['row']}",
+        'email': rejected_row['Email'],
+        'errors': [lead_validation.describe_issues(rejected_row['issues'])]
+    }
+
+
+def _iter_lead_csv_blocks(csv_file_path, owner_id, chunksize, stats, skip_rows=0, report_path=None, rules=None,
+                          operation='insert'):
+    """
+    Lê o CSV em blocos e gera cada bloco já normalizado como bytes CSV (sem cabeçalho).
+
+    As linhas rejeitadas na validação, as duplicatas (ver lead_dedup, com as
+    chaves já enviadas em stats['dedup_keys']) e os leads já existentes no
+    índice local (ver lead_index; no modo streaming são sempre ignorados) não
+    entram no bloco, mas são contadas no número de linhas (posições no arquivo,
+    usadas pelo manifest).
+    As rejeições são gravadas em `report_path`; até STREAMING_MAX_FAILED_DETAILS
+    ficam em stats['rejections'].
+
+    Args:
+        skip_rows (int): Registros iniciais a ignorar (já enviados, ao retomar).
+            São contados em registros e não em linhas do arquivo, pois valores
+            entre aspas podem conter quebras de linha.
+        report_path (str, optional): Relatório CSV das linhas rejeitadas
+        rules (dict, optional): Regras de validação da org (ver _validation_rules)
+        operation (str): Operação dos jobs (ver lead_keys)
+
+    Yields:
+        tuple: (cabeçalho CSV em bytes, bloco CSV em bytes, número de linhas do bloco no arquivo,
+            número de linhas ignoradas do bloco: duplicatas e leads já existentes)
+    """
+    header = None
+    columns = None
+    position = skip_rows
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunksize, dtype=str):
+        if skip_rows:
+            skipped = min(skip_rows, len(chunk))
+            skip_rows -= skipped
+            chunk = chunk.iloc[skipped:]
+            if chunk.empty:
+                continue
+        leads, defaults_applied, report = _normalize_leads_chunk(chunk, owner_id, first_row=position, rules=rules,
+                                                                 operation=operation)
+        leads, duplicates = lead_dedup.deduplicate(leads, seen=stats['dedup_keys'],
+                                                   id_columns=(lead_keys.key_field(operation),))
+        stats['duplicates'] += duplicates
+        existing = 0
+        if _index_action(operation) in ('skip', 'update'):
+            known = lead_index.lookup(leads).notna()
+            existing = int(known.sum())
+            leads = leads.loc[~known]
+            stats['existing'] += existing
+        position += len(chunk)
+        if header is None:
+            columns = list(leads.columns)
+            header = (','.join(columns) + '\n').encode('utf-8')
+            logger.debug(f"Colunas no CSV: {columns}")
+        stats['total'] += len(chunk)
+        stats['defaults_applied'] += defaults_applied
+        if report_path:
+            lead_validation.append_report(report_path, report)
+        rejected = lead_validation.rejected_rows(report)
+        stats['repaired'] += len(report) - len(rejected)
+        if not rejected.empty:
+            stats['rejected'] += len(rejected)
+            room = STREAMING_MAX_FAILED_DETAILS - len(stats['rejections'])
+            stats['rejections'].extend(_rejection_result(row) for _, row in rejected.head(max(room, 0)).iterrows())
+        block = leads[columns].to_csv(index=False, header=False, lineterminator='\n').encode('utf-8')
+        yield header, block, len(chunk), duplicates + existing
+
+
+def _job_body(header, first_block, blocks, max_bytes, job_stats, carry):
+    """
+    Gera o corpo do upload de um job: o cabeçalho e os blocos até `max_bytes`.
+
+    O bloco que ultrapassaria o limite é guardado em `carry` para iniciar o próximo job.
+    """
+    block, rows, skipped = first_block
+    size = len(header) + len(block)
+    job_stats['rows'] += rows
+    job_stats['skipped'] += skipped
+    yield header
+    yield block
+    for _, block, rows, skipped in blocks:
+        if size + len(block) > max_bytes:
+            carry.append((block, rows, skipped))
+            return
+        size += len(block)
+        job_stats['rows'] += rows
+        job_stats['skipped'] += skipped
+        yield block
+
+
+def _failure_detail(row):
+    """Linha de failedResults no formato de resultado usado pela interface."""
+    return {
+        'success': False,
+        'id': None,
+        'name': row.get('LastName', 'Sem nome'),
+        'email': row.get('Email', ''),
+        'errors': [row.get('sf__Error', 'Erro desconhecido')]
+    }
+
+
+@timed('bulk_fetch_results')
+def _stream_failed_results(context, job_id, limit):
+    """Lê até `limit` falhas de um job no formato de resultado usado pela interface."""
+    failed_records = []
+    if limit <= 0:
+        return failed_records
+    results = _iter_job_results(context, job_id, 'failedResults')
+    try:
+        for row in results:
+            failed_records.append(_failure_detail(row))
+            if len(failed_records) >= limit:
+                break
+    finally:
+        results.close()
+    return failed_records
+
+
+def stream_leads_from_csv(csv_file_path, owner_id=None, chunksize=None, max_upload_bytes=None, manifest=None,
+                          operation='insert'):
+    """
+    Cria leads a partir do CSV em modo streaming, com memória limitada.
+
+    O arquivo é lido em blocos de `chunksize` linhas; cada bloco é normalizado e
+    escrito diretamente no corpo do upload do job atual (um gerador passado ao
+    requests.put). Quando o corpo atinge `max_upload_bytes`, o job é fechado e um
+    novo job recebe o restante. Os jobs são processados pelo Salesforce enquanto
+    os seguintes são enviados.
+
+    Args:
+        csv_file_path (str): Caminho para o arquivo CSV
+        owner_id (str, optional): ID do proprietário dos leads
+        chunksize (int, optional): Linhas por bloco de leitura
+        max_upload_bytes (int, optional): Tamanho máximo do upload por job
+        manifest (BulkManifest, optional): Manifest da ingestão. Os jobs enviados
+            em uma execução anterior são retomados e o envio continua a partir
+            do primeiro registro que não chegou ao Salesforce.
+        operation (str): Operação dos jobs ('insert', 'upsert' ou 'update'; ver lead_keys)
+
+    Returns:
+        tuple: (success, resumo) onde o resumo contém as contagens, os jobs e
+            até STREAMING_MAX_FAILED_DETAILS falhas detalhadas
+    """
+    chunksize = chunksize or STREAMING_CHUNK_ROWS
+    max_upload_bytes = max_upload_bytes or BULK_MAX_UPLOAD_BYTES
+    logger.info(f"Modo streaming: blocos de {chunksize} linhas, até {max_upload_bytes} bytes por job")
+
+    context = _bulk_api_context()
+    if not context:
+        return False, "Não foi possível autenticar no Salesforce"
+
+    jobs = []
+    failed_count = 0
+    failed_records = []
+
+    # Retomada: jobs já fechados são acompanhados novamente; blocos que não chegaram
+    # ao Salesforce são reenviados a partir do seu primeiro registro
+    start_row, stale_jobs = manifest.resume_row() if manifest is not None else (0, [])
+    for stale_job_id in stale_jobs:
+        _abort_job(context, stale_job_id)
+    resumed_skipped = 0
+    for index, chunk in enumerate(manifest.chunks if manifest is not None else []):
+        resumed_skipped += chunk.get('skipped', 0)
+        rows = chunk['end_row'] - chunk['start_row'] - chunk.get('skipped', 0)
+        if chunk['state'] == 'submit_failed':
+            failed_count += rows
+            failed_records.append({
+                'success': False,
+                'id': None,
+                'name': f"{rows} leads",
+                'email': '',
+                'errors': ['Falha ao processar lote no Salesforce']
+            })
+        else:
+            jobs.append({'job_id': chunk['job_id'], 'rows': rows, 'chunk': index, 'resumed': True})
+    if manifest is not None and manifest.chunks:
+        logger.info(f"Retomando a ingestão: {len(jobs)} job(s) já enviados, reenvio a partir do registro {start_row}")
+
+    stats = {'total': start_row, 'defaults_applied': 0, 'rejected': 0, 'repaired': 0, 'rejections': [],
+             'duplicates': 0, 'existing': 0, 'skipped': resumed_skipped, 'dedup_keys': lead_dedup.SeenKeys()}
+    report_path = _rejection_report_path(csv_file_path)
+    if start_row == 0 and os.path.exists(report_path):
+        os.remove(report_path)
+    blocks = _iter_lead_csv_blocks(csv_file_path, owner_id, chunksize, stats, skip_rows=start_row,
+                                   report_path=report_path, rules=_validation_rules(_lead_metadata(context)),
+                                   operation=operation)
+    rows_sent = start_row
+
+    # Etapas 1 a 3 para cada job: criar, enviar os blocos em streaming e fechar
+    pending = next(blocks, None)
+    while pending:
+        header, block, rows, skipped = pending
+        # Blocos sem registros (linhas rejeitadas, duplicadas ou já existentes) entram no
+        # job seguinte; se não houver mais registros até o fim do arquivo, nenhum job é criado
+        while not block:
+            following = next(blocks, None)
+            if following is None:
+                break
+            block, rows, skipped = following[1], rows + following[2], skipped + following[3]
+        if not block:
+            rows_sent += rows
+            stats['skipped'] += skipped
+            # As linhas rejeitadas contam como falha, como nos blocos enviados
+            failed_count += rows - skipped
+            break
+        carry = []
+        job_stats = {'rows': 0, 'skipped': 0}
+        body = _job_body(header, (block, rows, skipped), blocks, max_upload_bytes, job_stats, carry)
+
+        chunk_index = manifest.add_chunk(rows_sent) if manifest is not None else None
+        # O corpo em streaming não é reenviado em falhas de conexão (ver salesforce_http):
+        # o job é abortado e o bloco segue o caminho de falha de envio
+        job_id = None
+        uploaded = closed = connection_error = False
+        try:
+            job_id = _create_ingest_job(context, operation)
+            if job_id:
+                record_chunk(manifest, chunk_index, job_id=job_id, state='open')
+            uploaded = bool(job_id) and _upload_job_data(context, job_id, body)
+            closed = uploaded and _close_job(context, job_id)
+        except requests.exceptions.RequestException as e:
+            connection_error = True
+            logger.error(f"Falha de conexão ao enviar o job {job_id}: {str(e)}")
+        if closed:
+            logger.info(f"Job {job_id} recebeu {job_stats['rows'] - job_stats['skipped']} registros ({stats['total']} lidos até agora)")
+            record_chunk(manifest, chunk_index, end_row=rows_sent + job_stats['rows'],
+                         skipped=job_stats['skipped'], state='upload_complete')
+            jobs.append({'job_id': job_id, 'rows': job_stats['rows'] - job_stats['skipped'], 'chunk': chunk_index})
+        else:
+            # Consome o restante do corpo para manter a contagem de linhas e seguir para o próximo job
+            for _ in body:
+                pass
+            if job_id and (uploaded or connection_error):
+                try:
+                    _abort_job(context, job_id)
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Não foi possível abortar o job {job_id}: {str(e)}")
+            job_rows = job_stats['rows'] - job_stats['skipped']
+            logger.error(f"Falha ao enviar {job_rows} registros para a Bulk API")
+            record_chunk(manifest, chunk_index, end_row=rows_sent + job_stats['rows'],
+                         skipped=job_stats['skipped'], state='submit_failed')
+            failed_count += job_rows
+            if len(failed_records) < STREAMING_MAX_FAILED_DETAILS:
+                failed_records.append({
+                    'success': False,
+                    'id': None,
+                    'name': f"{job_rows} leads",
+                    'email': '',
+                    'errors': ['Falha ao processar lote no Salesforce']
+                })
+
+        rows_sent += job_stats['rows']
+        stats['skipped'] += job_stats['skipped']
+        pending = (header, *carry[0]) if carry else None
+
+    if stats['total'] == 0:
+        logger.warning("Nenhum lead válido encontrado para processamento")
+        return False, "Nenhum lead válido encontrado para processamento"
+    if stats['defaults_applied']:
+        logger.warning(f"{stats['defaults_applied']} valores obrigatórios (LastName/Company) vazios receberam valor padrão")
+    if stats['duplicates']:
+        logger.info(f"{stats['duplicates']} linhas duplicadas removidas (política {lead_dedup.DEDUP_POLICY})")
+    if stats['existing']:
+        logger.info(f"{stats['existing']} leads já existentes no Salesforce ignorados (índice local)")
+    if stats['repaired']:
+        logger.warning(f"{stats['repaired']} linhas corrigidas na validação; valores originais em {report_path}")
+    if stats['rejected']:
+        logger.warning(f"{stats['rejected']} linhas rejeitadas na validação; relatório em {report_path}")
+        failed_records.extend(stats['rejections'][:max(STREAMING_MAX_FAILED_DETAILS - len(failed_records), 0)])
+
+    # Etapas 4 e 5: aguardar cada job e coletar as contagens e as primeiras falhas
+    success_count = 0
+    for job in jobs:
+        chunk = manifest.chunks[job['chunk']] if manifest is not None else None
+        if chunk is not None and chunk['state'] in FINAL_JOB_STATES and 'success_count' in chunk:
+            # Job concluído em uma execução anterior: usa as contagens registradas
+            success_count += chunk['success_count']
+            failed_count += chunk['failed_count']
+            if chunk['failed_count']:
+                failed_records.extend(_stream_failed_results(
+                    context, job['job_id'], STREAMING_MAX_FAILED_DETAILS - len(failed_records)
+                ))
+            continue
+        status_info = _wait_for_job(context, job['job_id'], max_attempts=STREAMING_MAX_POLL_ATTEMPTS,
+                                    delay_first=not job.get('resumed'))
+        if not status_info:
+            failed_count += job['rows']
+            failed_records.append({
+                'success': False,
+                'id': None,
+                'name': f"{job['rows']} leads",
+                'email': '',
+                'errors': [f"Timeout aguardando o job {job['job_id']}"]
+            })
+            continue
+        job_failed = int(status_info.get('numberRecordsFailed', 0))
+        job_success = int(status_info.get('numberRecordsProcessed', 0)) - job_failed
+        # Registros não processados (ex.: job com estado Failed) e as linhas do bloco
+        # rejeitadas na validação também contam como falha
+        job_unprocessed = max(0, job['rows'] - int(status_info.get('numberRecordsProcessed', 0)))
+        record_chunk(manifest, job.get('chunk'), state=status_info.get('state'))
+        if job_failed and not chunk_value(manifest, job.get('chunk'), 'retry_started'):
+            # Etapa 6: reenvio dos registros com falha corrigíveis
+            record_chunk(manifest, job.get('chunk'), retry_started=True)
+            with span('failed_record_retry', rows=job_failed):
+                retry = _retry_failed_records(
+                    _iter_job_results(context, job['job_id'], 'failedResults'),
+                    keep_details=STREAMING_MAX_FAILED_DETAILS - len(failed_records), keep_successes=False,
+                    operation=operation
+                )
+            job_success += retry['recovered_count']
+            job_failed -= retry['recovered_count']
+            failed_records.extend(_failure_detail(failed['fields']) for failed in retry['failed_records'])
+        elif job_failed:
+            failed_records.extend(_stream_failed_results(
+                context, job['job_id'], STREAMING_MAX_FAILED_DETAILS - len(failed_records)
+            ))
+        if job_success and lead_index.enabled():
+            # Os leads criados alimentam o índice local (ver lead_index)
+            lead_index.record_leads(_iter_job_results(context, job['job_id'], 'successfulResults'))
+        success_count += job_success
+        failed_count += job_failed + job_unprocessed
+        record_chunk(manifest, job.get('chunk'), success_count=job_success, failed_count=job_failed + job_unprocessed)
+
+    summary = {
+        'streaming': True,
+        'jobs': [job['job_id'] for job in jobs],
+        'total_count': stats['total'] - stats['skipped'],
+        'success_count': success_count,
+        'failed_count': failed_count,
+        'rejected_count': stats['rejected'],
+        'duplicate_count': stats['duplicates'],
+        'existing_count': stats['existing'],
+        'failed_records': failed_records
+    }
+    logger.info(f"Modo streaming concluído: {success_count} de {summary['total_count']} leads criados em {len(jobs)} job(s)")
+    return success_count > 0, summary
+
+
+def _plan_batches(rows, manifest, batch_size):
+    """
+    Lotes do modo em lotes: os blocos já registrados no manifest e, após o fim do último,
+    blocos de `batch_size` linhas.
+
+    Args:
+        rows (pandas.Index): Posições no CSV de origem das linhas a enviar, em ordem crescente
+        manifest (BulkManifest): Manifest da ingestão (None sem manifest)
+        batch_size (int): Linhas por bloco
+
+    Returns:
+        list: Tuplas (índice do bloco no manifest ou None se novo, start_row, end_row)
+    """
+    chunks = manifest.chunks if manifest is not None else []
+    batches = [(index, chunk['start_row'], chunk['end_row']) for index, chunk in enumerate(chunks)]
+    resume_end = max((chunk['end_row'] for chunk in chunks), default=0)
+    remaining = rows[rows >= resume_end]
+    for start in range(0, len(remaining), batch_size):
+        block = remaining[start:start + batch_size]
+        batches.append((None, int(block[0]), int(block[-1]) + 1))
+    return batches
+
+
+def _build_lead_dicts(df, fields, existing_ids, owner_id, operation):
+    """
+    Monta os dicionários de leads do modo em lotes a partir das linhas já formatadas e validadas.
+
+    Args:
+        df (pandas.DataFrame): Leads do CSV, indexados pela posição da linha no arquivo de origem
+        fields (list): Colunas enviadas (campos do Lead e a chave da operação)
+        existing_ids (pandas.Series): Id do lead existente no Salesforce por linha (None para novos)
+        owner_id (str, optional): ID do proprietário atribuído aos novos leads
+        operation (str): Operação dos jobs ('insert', 'upsert' ou 'update')
+
+    Returns:
+        tuple: (leads_data, lead_rows, update_leads) -- os leads a enviar, a posição de cada um
+            no CSV de origem e os leads existentes a atualizar pelo Id
+    """
+    leads_data = []
+    lead_rows = []
+    update_leads = []
+
+    # Itera sobre cada linha e prepara os dados
+    for idx, row in df.iterrows():
+        # Prepara os dados do lead para o Salesforce
+        lead_data = {}
+
+        # Mapeia cada coluna do Salesforce (e a chave da operação), garantindo que exista
+        for field in fields:
+            if not pd.isna(row[field]):
+                lead_data[field] = str(row[field]).strip()
+
+        # Verifica campos obrigatórios
+        if "LastName" not in lead_data or not lead_data["LastName"]:
+            logger.warning(f"Linha {idx+1}: Campo obrigatório LastName vazio ou ausente")
+            lead_data["LastName"] = "Lead Sem Nome"  # Valor padrão para evitar falha
+
+        if "Company" not in lead_data or not lead_data["Company"]:
+            logger.warning(f"Linha {idx+1}: Campo obrigatório Company vazio ou ausente")
+            lead_data["Company"] = "Empresa Desconhecida"  # Valor padrão para evitar falha
+
+        # Garantir que o nome da companhia não ultrapasse 255 caracteres
+        if "Company" in lead_data and len(lead_data["Company"]) > 255:
+            lead_data["Company"] = lead_data["Company"][:255]
+
+        # Email precisa estar em um formato válido
+        if "Email" in lead_data:
+            # Limpar o email de espaços e garantir que é lowercase
+            lead_data["Email"] = lead_data["Email"].strip().lower()
+
+        # Telefone deve estar em formato numérico limpo
+        if "Phone" in lead_data:
+            lead_data["Phone"] = clean_phone_number(lead_data["Phone"])
+
+        # Certificar-se de que todos os valores são strings
+        for key in lead_data.keys():
+            if lead_data[key] is not None and not isinstance(lead_data[key], str):
+                lead_data[key] = str(lead_data[key])
+
+        # Lead já existente: atualizado pelo Id, sem alterar o proprietário
+        if isinstance(existing_ids.get(idx), str):
+            lead_data["Id"] = existing_ids[idx]
+            update_leads.append(lead_data)
+            continue
+
+        # Adiciona informação de atribuição apenas se um ID de proprietário válido for fornecido
+        # (na atualização o proprietário dos leads existentes não é alterado)
+        if operation != 'update' and owner_id and owner_id.strip():
+            if len(owner_id) >= 15 and owner_id.startswith('00'):
+                lead_data["OwnerId"] = owner_id
+
+        # Adiciona à lista de leads para processamento em massa
+        leads_data.append(lead_data)
+        lead_rows.append(int(idx))
+
+    return leads_data, lead_rows, update_leads
+
+
+def create_leads_from_csv(csv_file_path, environment, owner_id=None, streaming=None, manifest_path=None, resume=False,
+                          operation=None):
     """
     Processa o arquivo CSV e cria leads no Salesforce usando a Bulk API 2.0 para maior eficiência.
     
@@ -680,9 +1449,17 @@ def create_leads_from_csv(csv_file_path, environment, owner_id=None):
         environment (str): Ambiente do Salesforce ('sandbox' ou 'production')
         owner_id (str, optional): ID do proprietário do lead no Salesforce.
             Se None, usa a atribuição automática do Salesforce.
+        streaming (bool, optional): Força (True) ou desativa (False) o modo streaming.
+            Se None, o modo é ativado por SALESFORCE_BULK_STREAMING ou pelo tamanho do arquivo.
+        manifest_path (str, optional): Arquivo do manifest da ingestão (ver bulk_manifest),
+            que permite retomar o processamento com resume_leads_from_manifest
+        resume (bool): Retoma a ingestão registrada em `manifest_path` em vez de iniciar uma nova
+        operation (str, optional): 'insert', 'upsert' ou 'update' (padrão SALESFORCE_BULK_OPERATION;
+            ver lead_keys)
     
     Returns:
         tuple: (success, results) onde success é um boolean e results são os resultados detalhados
+            (no modo streaming, um dicionário de resumo; ver stream_leads_from_csv)
     """
     logger.info(f"Iniciando processamento em massa de CSV: {csv_file_path}")
     logger.info(f"Ambiente: {environment}, Owner ID: {owner_id if owner_id else 'Atribuição automática'}")
@@ -701,150 +1478,258 @@ def create_leads_from_csv(csv_file_path, environment, owner_id=None):
             logger.error(f"Arquivo não encontrado: {csv_file_path}")
             return False, f"Arquivo não encontrado: {csv_file_path}"
         
+        # Operação dos jobs: insert, upsert pelo id externo ou update pelo Id
+        operation = (operation or lead_keys.BULK_OPERATION).lower()
+        valid, error = lead_keys.check_operation(operation, _lead_metadata())
+        if valid and operation == 'update' and 'Id' not in [col.strip() for col in pd.read_csv(csv_file_path, nrows=0).columns]:
+            valid, error = False, "A operação update requer a coluna Id no arquivo"
+        if not valid:
+            logger.error(error)
+            return False, error
+        logger.info(f"Operação dos jobs: {operation}" + (f" (id externo {lead_keys.EXTERNAL_ID_FIELD})" if operation == 'upsert' else ''))
+        
+        if streaming is None:
+            streaming = (os.getenv('SALESFORCE_BULK_STREAMING', '').lower() in ('1', 'true', 'yes')
+                         or os.path.getsize(csv_file_path) >= STREAMING_MIN_BYTES)
+        manifest = None
+        if manifest_path and resume:
+            manifest = BulkManifest.load(manifest_path)
+        elif manifest_path:
+            manifest = BulkManifest.create(manifest_path, csv_file_path, environment, owner_id=owner_id,
+                                           streaming=streaming, batch_size=BULK_BATCH_SIZE, operation=operation)
+        if streaming:
+            return stream_leads_from_csv(csv_file_path, owner_id=owner_id, manifest=manifest, operation=operation)
+        
         # Lê o arquivo CSV
         logger.info(f"Lendo arquivo CSV: {csv_file_path}")
-        df = pd.read_csv(csv_file_path)
+        key_field = lead_keys.key_field(operation)
+        df = pd.read_csv(csv_file_path, dtype={key_field: str} if key_field else None)
         logger.info(f"Arquivo CSV lido com sucesso. {len(df)} registros encontrados.")
         
         # Ajusta nomes de colunas - remove espaços extras
         df.columns = [col.strip() for col in df.columns]
         
-        # Limpa dados e formata campos
-        logger.info("Aplicando formatação e limpeza aos dados")
+        # Limpeza, formatação e montagem dos leads
+        with span('lead_building', rows=len(df)):
+            # Limpa dados e formata campos
+            logger.info("Aplicando formatação e limpeza aos dados")
         
-        if 'Phone' in df.columns:
-            df['Phone'] = df['Phone'].apply(clean_phone_number)
-            logger.debug("Números de telefone limpos")
+            if 'Phone' in df.columns:
+                df['Phone'] = df['Phone'].apply(clean_phone_number)
+                logger.debug("Números de telefone limpos")
         
-        if 'FirstName' in df.columns:
-            df['FirstName'] = df['FirstName'].apply(format_name)
-            logger.debug("Primeiros nomes formatados")
+            if 'FirstName' in df.columns:
+                df['FirstName'] = df['FirstName'].apply(format_name)
+                logger.debug("Primeiros nomes formatados")
             
-        if 'LastName' in df.columns:
-            df['LastName'] = df['LastName'].apply(format_name)
-            logger.debug("Sobrenomes formatados")
+            if 'LastName' in df.columns:
+                df['LastName'] = df['LastName'].apply(format_name)
+                logger.debug("Sobrenomes formatados")
             
-        if 'Email' in df.columns:
-            df['Email'] = df['Email'].apply(format_email)
-            logger.debug("Emails formatados")
+            if 'Email' in df.columns:
+                df['Email'] = df['Email'].apply(format_email)
+                logger.debug("Emails formatados")
             
-        # Total de registros para processar
-        total_count = len(df)
-        logger.info(f"Total de {total_count} leads para processar")
-        
-        # Prepara a lista para processamento em massa
-        leads_data = []
-        
-        # Itera sobre cada linha e prepara os dados
-        for idx, row in df.iterrows():
-            # Prepara os dados do lead para o Salesforce
-            lead_data = {}
+            # Validação antes da serialização: as linhas rejeitadas não são enviadas
+            total_count = len(df)
+            fields = [field for field in LEAD_FIELDS if field in df.columns]
+            checked, report, issue_counts = lead_validation.validate_leads(
+                df[fields].where(df[fields].notna(), '').astype(str).apply(lambda col: col.str.strip()),
+                **_validation_rules(_lead_metadata())
+            )
+            if issue_counts:
+                logger.info(f"Validação dos leads ({lead_validation.VALIDATION_POLICY}): {issue_counts}")
+            df = df.loc[checked.index]
+            df[fields] = checked
+            rejected_results = [_rejection_result(row) for _, row in lead_validation.rejected_rows(report).iterrows()]
+            report_path = _rejection_report_path(csv_file_path)
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            lead_validation.append_report(report_path, report)
+            if rejected_results:
+                logger.warning(f"{len(rejected_results)} linhas rejeitadas na validação; relatório em {report_path}")
+            elif not report.empty:
+                logger.warning(f"{len(report)} linhas corrigidas na validação; valores originais em {report_path}")
             
-            # Mapeia cada coluna do Salesforce, garantindo que exista
-            for field in ["LastName", "FirstName", "Company", "Email", "Phone", 
-                        "Title", "Street", "City", "State", "PostalCode", 
-                        "Country", "LeadSource"]:
-                if field in df.columns and not pd.isna(row[field]):
-                    lead_data[field] = str(row[field]).strip()
+            # Coluna que identifica o registro no upsert (id externo) ou no update (Id do arquivo)
+            if operation == 'upsert':
+                df[key_field] = lead_keys.external_ids(df[fields], df.get(key_field))
+            if key_field:
+                fields.append(key_field)
             
-            # Verifica campos obrigatórios
-            if "LastName" not in lead_data or not lead_data["LastName"]:
-                logger.warning(f"Linha {idx+1}: Campo obrigatório LastName vazio ou ausente")
-                lead_data["LastName"] = "Lead Sem Nome"  # Valor padrão para evitar falha
-                
-            if "Company" not in lead_data or not lead_data["Company"]:
-                logger.warning(f"Linha {idx+1}: Campo obrigatório Company vazio ou ausente")
-                lead_data["Company"] = "Empresa Desconhecida"  # Valor padrão para evitar falha
-                
-            # Garantir que o nome da companhia não ultrapasse 255 caracteres
-            if "Company" in lead_data and len(lead_data["Company"]) > 255:
-                lead_data["Company"] = lead_data["Company"][:255]
-                
-            # Email precisa estar em um formato válido
-            if "Email" in lead_data:
-                # Limpar o email de espaços e garantir que é lowercase
-                lead_data["Email"] = lead_data["Email"].strip().lower()
-                
-            # Telefone deve estar em formato numérico limpo
-            if "Phone" in lead_data:
-                lead_data["Phone"] = clean_phone_number(lead_data["Phone"])
-                
-            # Certificar-se de que todos os valores são strings
-            for key in lead_data.keys():
-                if lead_data[key] is not None and not isinstance(lead_data[key], str):
-                    lead_data[key] = str(lead_data[key])
-                
-            # Adiciona informação de atribuição apenas se um ID de proprietário válido for fornecido
-            if owner_id and owner_id.strip():
-                if len(owner_id) >= 15 and owner_id.startswith('00'):
-                    lead_data["OwnerId"] = owner_id
+            # Deduplicação das linhas do arquivo: as duplicatas não são enviadas
+            deduplicated, duplicates = lead_dedup.deduplicate(df[fields], id_columns=(key_field,))
+            if duplicates:
+                df = df.loc[deduplicated.index]
+                total_count -= duplicates
+                logger.info(f"{duplicates} linhas duplicadas removidas (política {lead_dedup.DEDUP_POLICY})")
+            
+            # Blocos de envio: batch_size linhas consecutivas do arquivo validado e deduplicado,
+            # identificados pelos limites no CSV de origem (start_row/end_row). Ao retomar, os
+            # blocos do manifest mantêm os limites: os já enviados são apenas acompanhados (com
+            # o número de leads registrado no envio) e o índice local é consultado só para as
+            # linhas dos demais, que ainda não chegaram ao Salesforce
+            batch_size = (manifest.data.get('batch_size') if manifest is not None else None) or BULK_BATCH_SIZE
+            batches = _plan_batches(df.index, manifest, batch_size)
+            submitted = pd.Series(False, index=df.index)
+            for chunk_index, start_row, end_row in batches:
+                if chunk_value(manifest, chunk_index, 'state', 'pending') not in RESUBMIT_STATES:
+                    in_chunk = (df.index >= start_row) & (df.index < end_row)
+                    submitted |= in_chunk
+                    total_count += chunk_value(manifest, chunk_index, 'records', int(in_chunk.sum())) - int(in_chunk.sum())
+            df = df.loc[~submitted]
             
-            # Adiciona à lista de leads para processamento em massa
-            leads_data.append(lead_data)
+            # Leads já existentes no Salesforce (índice local): ignorados ou enviados como atualização
+            existing_ids = pd.Series(None, index=df.index, dtype=object)
+            existing = 0
+            index_action = _index_action(operation)
+            if index_action in ('skip', 'update') and not df.empty:
+                _sync_lead_index_if_due()
+                existing_ids = lead_index.lookup(df[fields]).reindex(df.index)
+                existing = int(existing_ids.notna().sum())
+                if existing and index_action == 'skip':
+                    df = df.loc[existing_ids.isna()]
+                    total_count -= existing
+                    logger.info(f"{existing} leads já existentes no Salesforce ignorados (índice local)")
+                elif existing:
+                    logger.info(f"{existing} leads já existentes no Salesforce serão atualizados (índice local)")
+            
+            # Aba de origem de cada linha (planilhas com várias abas), usada apenas para rastreabilidade
+            inserted = existing_ids.reindex(df.index).isna()
+            source_sheets = df.loc[inserted, SOURCE_SHEET_COLUMN].astype(str).tolist() if SOURCE_SHEET_COLUMN in df.columns else None
+            
+            # Total de registros para processar
+            logger.info(f"Total de {total_count} leads para processar")
+        
+            # Prepara a lista para processamento em massa (e a de atualização dos leads existentes),
+            # com a posição de cada lead no CSV de origem
+            leads_data, lead_rows, update_leads = _build_lead_dicts(df, fields, existing_ids, owner_id, operation)
         
-        if not leads_data:
+        if not leads_data and not update_leads and not submitted.any():
+            if existing and not rejected_results:
+                logger.info("Todos os leads do arquivo já existem no Salesforce")
+                return False, f"Todos os {existing} leads do arquivo já existem no Salesforce"
             logger.warning("Nenhum lead válido encontrado para processamento")
+            if rejected_results:
+                return False, rejected_results
             return False, "Nenhum lead válido encontrado para processamento"
         
-        # Define tamanho máximo de lote para processamento
-        batch_size = 2000  # Recomendado pelo Salesforce para melhor desempenho
         total_success = 0
-        all_results = []
-        
-        # Processa em lotes de batch_size registros
-        for i in range(0, len(leads_data), batch_size):
-            batch = leads_data[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(leads_data) + batch_size - 1) // batch_size
+        all_results = list(rejected_results)
+        
+        # Processa cada lote (os leads de um bloco são os das linhas dentro dos seus limites;
+        # lead_rows está na ordem do arquivo)
+        for batch_num, (chunk_index, start_row, end_row) in enumerate(batches, start=1):
+            batch_positions = range(bisect.bisect_left(lead_rows, start_row), bisect.bisect_left(lead_rows, end_row))
+            batch = leads_data[batch_positions.start:batch_positions.stop]
+            chunk = manifest.chunks[chunk_index] if manifest is not None and chunk_index is not None else None
             
-            logger.info(f"Processando lote {batch_num} de {total_batches} ({len(batch)} registros)")
+            if chunk is None and not batch:
+                continue
+            logger.info(f"Processando lote {batch_num} de {len(batches)} ({len(batch)} registros)")
             
-            # Chama a API em massa para este lote
-            batch_results = create_bulk_leads_in_salesforce(batch)
+            if manifest is not None and chunk is None:
+                chunk_index = manifest.chunk_index(start_row, end_row, records=len(batch))
+                chunk = manifest.chunks[chunk_index]
+            elif chunk is not None and chunk['state'] in RESUBMIT_STATES and chunk.get('records') != len(batch):
+                record_chunk(manifest, chunk_index, records=len(batch))
+            if chunk is not None and chunk['state'] not in RESUBMIT_STATES:
+                # Lote enviado em uma execução anterior: acompanha o job existente
+                logger.info(f"Lote {batch_num}: retomando o job {chunk['job_id']} (estado {chunk['state']})")
+                context = _bulk_api_context()
+                batch_results = _collect_job_results(
+                    context, chunk['job_id'], manifest, chunk_index, delay_first=False, operation=operation
+                ) if context else None
+            elif not batch:
+                # Bloco pendente sem leads a enviar (todos já existem no índice local)
+                record_chunk(manifest, chunk_index, state='JobComplete', records=0, success_count=0, failed_count=0)
+                continue
+            else:
+                if chunk is not None and chunk['state'] == 'open' and chunk.get('job_id'):
+                    # Upload interrompido: o job parcial é abortado e o lote reenviado
+                    _abort_stale_job(chunk['job_id'])
+                # Chama a API em massa para este lote
+                batch_results = create_bulk_leads_in_salesforce(batch, manifest, chunk_index, operation=operation)
+                if not batch_results and chunk is not None and chunk['state'] in ('pending', 'open'):
+                    record_chunk(manifest, chunk_index, state='submit_failed')
             
             if batch_results:
                 total_success += batch_results['success_count']
                 
-                # Processa resultados para formatação consistente com a interface atual
+                # Relaciona cada resultado ao lead de origem pelos campos devolvidos pela API
+                # (os arquivos de resultado da Bulk API 2.0 não trazem o índice da linha)
+                batch_indices = {}
+                for position, lead_data in zip(batch_positions, batch):
+                    key = (lead_data.get('LastName', ''), lead_data.get('Email', ''), lead_data.get('Company', '')[:255])
+                    batch_indices.setdefault(key, []).append(position)
+                
+                def source_sheet(fields):
+                    key = (fields.get('LastName', ''), fields.get('Email', ''), fields.get('Company', ''))
+                    indices = batch_indices.get(key)
+                    return source_sheets[indices.pop(0)] if source_sheets and indices else None
+                
                 for success_record in batch_results.get('successful_records', []):
-                    # Encontra o índice original do registro
-                    orig_idx = i + success_record.get('index', 0)
-                    if 0 <= orig_idx < len(leads_data):
-                        lead_data = leads_data[orig_idx]
-                        result = {
-                            'success': True,
-                            'id': success_record.get('sf_id'),
-                            'name': lead_data.get('LastName', 'Sem nome'),
-                            'email': lead_data.get('Email', ''),
-                            'errors': []
-                        }
-                        all_results.append(result)
+                    fields = success_record.get('fields', {})
+                    result = {
+                        'success': True,
+                        'id': success_record.get('sf_id'),
+                        'name': fields.get('LastName', 'Sem nome'),
+                        'email': fields.get('Email', ''),
+                        'errors': []
+                    }
+                    sheet = source_sheet(fields)
+                    if sheet:
+                        result['sheet'] = sheet
+                    all_results.append(result)
                 
                 for failed_record in batch_results.get('failed_records', []):
-                    # Encontra o índice original do registro
-                    orig_idx = i + failed_record.get('index', 0)
-                    if 0 <= orig_idx < len(leads_data):
-                        lead_data = leads_data[orig_idx]
-                        result = {
-                            'success': False,
-                            'id': None,
-                            'name': lead_data.get('LastName', 'Sem nome'),
-                            'email': lead_data.get('Email', ''),
-                            'errors': [failed_record.get('error', 'Erro desconhecido')]
-                        }
-                        all_results.append(result)
+                    fields = failed_record.get('fields', {})
+                    result = {
+                        'success': False,
+                        'id': None,
+                        'name': fields.get('LastName', 'Sem nome'),
+                        'email': fields.get('Email', ''),
+                        'errors': [failed_record.get('error', 'Erro desconhecido')]
+                    }
+                    sheet = source_sheet(fields)
+                    if sheet:
+                        result['sheet'] = sheet
+                    all_results.append(result)
             else:
                 # Falha completa do lote - registra cada item como falha
-                for j, lead_data in enumerate(batch):
+                for position, lead_data in zip(batch_positions, batch):
                     result = {
                         'success': False,
                         'id': None,
-                        'name': lead_data.get('LastName', f'Lead #{i+j+1}'),
+                        'name': lead_data.get('LastName', f'Lead #{lead_rows[position]+1}'),
                         'email': lead_data.get('Email', ''),
                         'errors': ['Falha ao processar lote no Salesforce']
                     }
+                    if source_sheets:
+                        result['sheet'] = source_sheets[position]
                     all_results.append(result)
             
+        # Atualização dos leads já existentes (fora do manifest: a operação é idempotente)
+        for i in range(0, len(update_leads), BULK_BATCH_SIZE):
+            batch = update_leads[i:i + BULK_BATCH_SIZE]
+            update_results = create_bulk_leads_in_salesforce(batch, operation='update')
+            if update_results:
+                total_success += update_results['success_count']
+            successes = update_results['successful_records'] if update_results else []
+            failures = update_results['failed_records'] if update_results else [
+                {'error': 'Falha ao processar lote de atualização no Salesforce', 'fields': lead} for lead in batch
+            ]
+            for success, record in [(True, r) for r in successes] + [(False, r) for r in failures]:
+                fields = record.get('fields', {})
+                all_results.append({
+                    'success': success,
+                    'id': fields.get('sf__Id') or fields.get('Id'),
+                    'name': fields.get('LastName', 'Sem nome'),
+                    'email': fields.get('Email', ''),
+                    'errors': [record['error']] if 'error' in record else [],
+                    'updated': True
+                })
+        
         # Log do resultado final consolidado
         logger.info(f"Processamento em massa concluído. {total_success} de {total_count} leads criados com sucesso.")
         
@@ -880,3 +1765,73 @@ def create_leads_from_csv(csv_file_path, environment, owner_id=None):
     except Exception as e:
         logger.exception(f"Erro ao criar leads em massa a partir do CSV: {str(e)}")
         return False, str(e)
+
+
+def _index_action(operation):
+    """
+    Tratamento dos leads encontrados no índice local para a operação dos jobs.
+
+    No update o índice não é consultado; no upsert os leads existentes já são
+    atualizados pelo próprio job, e apenas a ação 'skip' se aplica.
+    """
+    if not lead_index.enabled() or operation == 'update':
+        return 'off'
+    if operation == 'upsert' and lead_index.LEAD_INDEX_ACTION == 'update':
+        return 'off'
+    return lead_index.LEAD_INDEX_ACTION
+
+
+def _sync_lead_index_if_due():
+    """Sincroniza o índice local de leads com o Salesforce quando LEAD_INDEX_SYNC_INTERVAL venceu."""
+    if not lead_index.sync_due():
+        return
+    context = _bulk_api_context()
+    if context:
+        lead_index.sync_from_salesforce(context)
+
+
+def sync_lead_index():
+    """
+    Sincroniza o índice local de leads com o Salesforce (job de consulta da Bulk API 2.0).
+
+    Returns:
+        tuple: (success, número de leads gravados ou mensagem de erro)
+    """
+    context = _bulk_api_context()
+    if not context:
+        return False, "Não foi possível autenticar no Salesforce"
+    return lead_index.sync_from_salesforce(context)
+
+
+def _abort_stale_job(job_id):
+    """Aborta um job deixado em aberto por uma execução interrompida."""
+    context = _bulk_api_context()
+    if context:
+        logger.info(f"Abortando o job {job_id} com upload incompleto")
+        _abort_job(context, job_id)
+
+
+def resume_leads_from_manifest(manifest_path):
+    """
+    Retoma uma ingestão interrompida a partir do seu manifest.
+
+    Os jobs já fechados (UploadComplete) são acompanhados até o fim e têm os
+    resultados obtidos; apenas os blocos que nunca chegaram ao Salesforce são
+    reenviados.
+
+    Args:
+        manifest_path (str): Arquivo do manifest criado por create_leads_from_csv
+
+    Returns:
+        tuple: (success, results) no mesmo formato de create_leads_from_csv
+    """
+    manifest = BulkManifest.load(manifest_path)
+    if manifest is None:
+        logger.error(f"Manifest de ingestão não encontrado: {manifest_path}")
+        return False, "Manifest de ingestão não encontrado"
+    logger.info(f"Retomando a ingestão de {manifest.data['source_file']} ({len(manifest.chunks)} bloco(s) registrados)")
+    return create_leads_from_csv(
+        manifest.data['source_file'], manifest.data['environment'],
+        owner_id=manifest.data.get('owner_id'), streaming=manifest.data.get('streaming'),
+        manifest_path=manifest_path, resume=True, operation=manifest.data.get('operation')
+    )
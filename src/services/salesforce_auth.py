@@ -7,6 +7,8 @@ import os
 import requests
 import json
 from src.utils.salesforce_logger import get_salesforce_logger
+from src.utils.metrics import TOKEN_REFRESHES
+from src.services import salesforce_http
 
 # Configuração do logger
 logger = get_salesforce_logger('salesforce_auth')
@@ -53,12 +55,14 @@ def get_salesforce_access_token():
         logger.error(f"Variáveis de ambiente obrigatórias não definidas: {', '.join(missing_vars)}")
         return None
     
-    # Define a URL de autenticação com base no ambiente
+    # Define a URL de autenticação com base no ambiente ({prefix}LOGIN_URL substitui o padrão,
+    # ex.: domínio próprio ou o Salesforce falso local de benchmarks/fake_salesforce.py)
+    login_url = os.getenv(f'{prefix}LOGIN_URL')
     if environment == 'production':
-        auth_url = 'https://login.salesforce.com/services/oauth2/token'
+        auth_url = f"{(login_url or 'https://login.salesforce.com').rstrip('/')}/services/oauth2/token"
         logger.info("Usando endpoint de produção para autenticação")
     else:
-        auth_url = 'https://test.salesforce.com/services/oauth2/token'
+        auth_url = f"{(login_url or 'https://test.salesforce.com').rstrip('/')}/services/oauth2/token"
         logger.info("Usando endpoint de sandbox para autenticação")
     
     # Prepara os dados para a requisição de autenticação
@@ -73,7 +77,7 @@ def get_salesforce_access_token():
     try:
         # Faz a requisição de autenticação
         logger.debug(f"Enviando requisição de autenticação para: {auth_url}")
-        response = requests.post(auth_url, data=auth_data)
+        response = salesforce_http.post(auth_url, data=auth_data, retry=True)
         
         # Verifica se a requisição foi bem-sucedida
         if response.status_code == 200:
@@ -90,6 +94,7 @@ def get_salesforce_access_token():
             os.environ['SALESFORCE_INSTANCE_URL'] = instance_url
             
             logger.info("Token de acesso obtido com sucesso")
+            TOKEN_REFRESHES.inc(environment=environment, outcome='success')
             logger.debug(f"Instance URL: {instance_url}")
             
             # Configurar a versão da API corretamente
@@ -103,10 +108,12 @@ def get_salesforce_access_token():
         else:
             # Registra o erro em caso de falha
             logger.error(f"Erro na autenticação. Status: {response.status_code}")
+            TOKEN_REFRESHES.inc(environment=environment, outcome='failure')
             logger.error(f"Resposta: {response.text}")
             return None
     
     except Exception as e:
         # Captura e registra qualquer exceção que ocorra durante o processo
         logger.exception(f"Exceção ao obter token de acesso: {str(e)}")
+        TOKEN_REFRESHES.inc(environment=environment, outcome='error')
         return None
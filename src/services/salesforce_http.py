@@ -0,0 +1,167 @@
+"""
+Módulo de acesso HTTP à API do Salesforce.
+
+Todas as chamadas ao Salesforce (autenticação, REST e Bulk API) passam por
+`request`, que registra o uso da API por método, recurso e status e repassa o
+cabeçalho Sforce-Limit-Info ao acompanhamento de limites da org.
+
+Falhas transitórias (erros de conexão, 429, 5xx e REQUEST_LIMIT_EXCEEDED por
+concorrência) são repetidas com backoff exponencial com jitter, respeitando
+Retry-After, até SALESFORCE_RETRY_MAX_ATTEMPTS tentativas e dentro do prazo
+SALESFORCE_RETRY_DEADLINE. Apenas requisições idempotentes são repetidas por
+padrão (GET, HEAD, PUT, DELETE); quem chama indica `retry=True` para operações
+que sabe serem seguras (ex.: criação de job, mudança de estado do job).
+"""
+
+import email.utils
+import os
+import random
+import re
+import time
+import requests
+from ..utils.salesforce_logger import get_salesforce_logger
+from ..utils.metrics import SALESFORCE_API_REQUESTS, SALESFORCE_API_RETRIES
+from . import salesforce_limits
+
+logger = get_salesforce_logger('salesforce_http')
+
+# Política de novas tentativas
+RETRY_MAX_ATTEMPTS = int(os.getenv('SALESFORCE_RETRY_MAX_ATTEMPTS', '5'))
+RETRY_BASE_DELAY = float(os.getenv('SALESFORCE_RETRY_BASE_DELAY', '1'))
+RETRY_MAX_DELAY = float(os.getenv('SALESFORCE_RETRY_MAX_DELAY', '30'))
+RETRY_DEADLINE = float(os.getenv('SALESFORCE_RETRY_DEADLINE', '120'))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+# Ids do Salesforce (15 ou 18 caracteres) nos caminhos são agrupados como {id}
+_SALESFORCE_ID_PATTERN = re.compile(r'^(?=.*\d)[A-Za-z0-9]{15}(?:[A-Za-z0-9]{3})?$')
+_API_PREFIX_PATTERN = re.compile(r'^/services/(?:data/v[\d.]+/)?')
+
+
+def resource_name(url):
+    """
+    Nome do recurso de uma URL do Salesforce para as métricas.
+
+    Ex.: https://x.my.salesforce.com/services/data/v63.0/jobs/ingest/750.../batches
+    -> jobs/ingest/{id}/batches
+    """
+    path = requests.utils.urlparse(url).path
+    path = _API_PREFIX_PATTERN.sub('', path)
+    segments = ['{id}' if _SALESFORCE_ID_PATTERN.match(segment) else segment for segment in path.strip('/').split('/')]
+    return '/'.join(segments[:4]) or '/'
+
+
+def _retry_after(response):
+    """Segundos indicados no cabeçalho Retry-After (número ou data HTTP), ou None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_reason(response):
+    """Motivo para repetir a requisição, ou None se a resposta não é transitória."""
+    if response.status_code in RETRYABLE_STATUS:
+        return str(response.status_code)
+    if response.status_code == 403 and 'REQUEST_LIMIT_EXCEEDED' in response.text:
+        # O limite diário (TotalRequests) não se recupera com novas tentativas
+        if 'TotalRequests' in response.text:
+            return None
+        return 'REQUEST_LIMIT_EXCEEDED'
+    return None
+
+
+def _backoff_delay(attempt):
+    """Atraso com backoff exponencial e jitter completo para a tentativa (1, 2, ...)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def request(method, url, retry=None, deadline=None, **kwargs):
+    """
+    Executa uma requisição ao Salesforce (mesmos argumentos de requests.request),
+    com novas tentativas em falhas transitórias.
+
+    Args:
+        method (str): Método HTTP
+        url (str): URL da requisição
+        retry (bool, optional): Permite novas tentativas. Se None, apenas métodos
+            idempotentes são repetidos. Corpos enviados como gerador nunca são
+            repetidos (não podem ser reenviados).
+        deadline (float, optional): Prazo total em segundos (padrão RETRY_DEADLINE)
+        **kwargs: Argumentos de requests.request
+
+    Returns:
+        requests.Response: Resposta da API (a última, se as tentativas se esgotarem)
+
+    Raises:
+        requests.exceptions.RequestException: Em caso de falha de conexão na última tentativa
+    """
+    method = method.upper()
+    resource = resource_name(url)
+    if retry is None:
+        retry = method in IDEMPOTENT_METHODS
+    data = kwargs.get('data')
+    if data is not None and not isinstance(data, (str, bytes, dict, list, tuple)):
+        retry = False
+    max_attempts = RETRY_MAX_ATTEMPTS if retry else 1
+    started = time.monotonic()
+    deadline = RETRY_DEADLINE if deadline is None else deadline
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = requests.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            SALESFORCE_API_REQUESTS.inc(method=method, resource=resource, status='error')
+            reason, delay, error = type(e).__name__, _backoff_delay(attempt), e
+            response = None
+        except requests.exceptions.RequestException:
+            SALESFORCE_API_REQUESTS.inc(method=method, resource=resource, status='error')
+            raise
+        else:
+            SALESFORCE_API_REQUESTS.inc(method=method, resource=resource, status=response.status_code)
+            if 'Sforce-Limit-Info' in response.headers:
+                salesforce_limits.record_limit_info(response.headers['Sforce-Limit-Info'])
+            reason = _retry_reason(response)
+            if reason is None:
+                return response
+            retry_after = _retry_after(response)
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+
+        elapsed = time.monotonic() - started
+        if attempt >= max_attempts or elapsed + delay > deadline:
+            if response is None:
+                raise error
+            return response
+
+        SALESFORCE_API_RETRIES.inc(resource=resource, reason=reason)
+        logger.warning(f"{method} {resource}: falha transitória ({reason}), nova tentativa "
+                       f"{attempt + 1}/{max_attempts} em {delay:.1f}s")
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request('PATCH', url, **kwargs)
@@ -0,0 +1,181 @@
+"""
+Módulo de acompanhamento dos limites da org do Salesforce e throttle dos jobs de ingestão.
+
+O uso da API é lido do cabeçalho Sforce-Limit-Info de cada resposta
+(api-usage=usado/máximo) e os demais limites (DailyApiRequests,
+DailyBulkApiBatches, DailyBulkV2QueryJobs, ...) são amostrados periodicamente
+do recurso /limits. Os valores são exportados nas métricas.
+
+Novos jobs de ingestão passam por um token bucket: a taxa base é reduzida
+proporcionalmente quando o restante de algum limite de ingestão fica abaixo de
+SALESFORCE_LIMIT_SLOWDOWN_RATIO, e novos jobs são recusados abaixo de
+SALESFORCE_LIMIT_RESERVE_RATIO, preservando uma reserva para a org. O estado é
+por processo.
+"""
+
+import os
+import re
+import threading
+import time
+from ..utils.salesforce_logger import get_salesforce_logger
+from ..utils.metrics import SALESFORCE_LIMIT_MAX, SALESFORCE_LIMIT_REMAINING, INGEST_THROTTLE, INGEST_THROTTLE_WAIT
+
+logger = get_salesforce_logger('salesforce_limits')
+
+# Intervalo mínimo (segundos) entre amostragens do recurso /limits
+LIMITS_SAMPLE_INTERVAL = int(os.getenv('SALESFORCE_LIMITS_SAMPLE_INTERVAL', '300'))
+
+# Taxa base e rajada do token bucket de criação de jobs de ingestão
+INGEST_JOBS_PER_MINUTE = float(os.getenv('SALESFORCE_INGEST_JOBS_PER_MINUTE', '30'))
+INGEST_JOBS_BURST = int(os.getenv('SALESFORCE_INGEST_JOBS_BURST', '5'))
+
+# Fração restante de um limite abaixo da qual a taxa é reduzida / novos jobs são recusados
+LIMIT_SLOWDOWN_RATIO = float(os.getenv('SALESFORCE_LIMIT_SLOWDOWN_RATIO', '0.2'))
+LIMIT_RESERVE_RATIO = float(os.getenv('SALESFORCE_LIMIT_RESERVE_RATIO', '0.05'))
+
+# Espera máxima (segundos) por uma vaga no throttle antes de desistir do job
+THROTTLE_MAX_WAIT = float(os.getenv('SALESFORCE_THROTTLE_MAX_WAIT', '120'))
+
+# Limites consumidos pelos jobs de ingestão da Bulk API 2.0
+INGEST_LIMITS = ('DailyApiRequests', 'DailyBulkApiBatches')
+
+_LIMIT_INFO_PATTERN = re.compile(r'api-usage=(\d+)/(\d+)')
+
+_lock = threading.Lock()
+_limits = {}
+_last_sample = 0.0
+
+
+def _set_limit(name, maximum, remaining, source):
+    _limits[name] = {'max': maximum, 'remaining': remaining, 'updated_at': time.time(), 'source': source}
+    SALESFORCE_LIMIT_MAX.set(maximum, limit=name)
+    SALESFORCE_LIMIT_REMAINING.set(remaining, limit=name)
+
+
+def record_limit_info(header_value):
+    """
+    Registra o uso da API informado no cabeçalho Sforce-Limit-Info.
+
+    Args:
+        header_value (str): Valor do cabeçalho (ex.: 'api-usage=25/15000')
+    """
+    match = _LIMIT_INFO_PATTERN.search(header_value or '')
+    if not match:
+        return
+    used, maximum = int(match.group(1)), int(match.group(2))
+    with _lock:
+        _set_limit('DailyApiRequests', maximum, max(maximum - used, 0), 'header')
+
+
+def update_from_limits(payload):
+    """
+    Registra os limites retornados pelo recurso /limits.
+
+    Args:
+        payload (dict): Resposta JSON de /services/data/vXX.X/limits
+    """
+    global _last_sample
+    with _lock:
+        for name, values in payload.items():
+            if isinstance(values, dict) and 'Max' in values and 'Remaining' in values:
+                _set_limit(name, int(values['Max']), int(values['Remaining']), 'limits')
+        _last_sample = time.time()
+    logger.debug("Limites da org atualizados: %s", {name: payload[name] for name in INGEST_LIMITS if name in payload})
+
+
+def sample_due():
+    """Indica se os limites devem ser amostrados novamente do recurso /limits."""
+    return time.time() - _last_sample >= LIMITS_SAMPLE_INTERVAL
+
+
+def get_limits():
+    """Retorna uma cópia dos limites conhecidos."""
+    with _lock:
+        return {name: dict(values) for name, values in _limits.items()}
+
+
+def ingest_headroom():
+    """
+    Menor fração restante entre os limites de ingestão conhecidos.
+
+    Returns:
+        tuple: (fração restante, nome do limite) ou (1.0, None) se nenhum é conhecido
+    """
+    with _lock:
+        ratios = [
+            (values['remaining'] / values['max'], name)
+            for name, values in _limits.items()
+            if name in INGEST_LIMITS and values['max'] > 0
+        ]
+    return min(ratios) if ratios else (1.0, None)
+
+
+class _TokenBucket:
+    """Token bucket com taxa ajustada pela folga dos limites da org."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, rate_factor):
+        """
+        Tenta consumir um token.
+
+        Returns:
+            float: 0 se o token foi consumido, ou o tempo estimado até o próximo token
+        """
+        rate = self.rate * rate_factor
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / rate
+
+
+_ingest_bucket = _TokenBucket(INGEST_JOBS_PER_MINUTE, INGEST_JOBS_BURST)
+
+
+def acquire_ingest_slot(max_wait=None):
+    """
+    Aguarda uma vaga para criar um novo job de ingestão.
+
+    Args:
+        max_wait (float, optional): Espera máxima em segundos (padrão THROTTLE_MAX_WAIT)
+
+    Returns:
+        tuple: (permitido, motivo) onde motivo descreve a recusa
+    """
+    max_wait = THROTTLE_MAX_WAIT if max_wait is None else max_wait
+    started = time.monotonic()
+    waited = False
+    while True:
+        headroom, limit_name = ingest_headroom()
+        if headroom <= LIMIT_RESERVE_RATIO:
+            INGEST_THROTTLE.inc(outcome='rejected')
+            message = (f"Limite {limit_name} da org com apenas {headroom:.1%} restante "
+                       f"(reserva de {LIMIT_RESERVE_RATIO:.0%}); novos jobs suspensos")
+            logger.error(message)
+            return False, message
+
+        rate_factor = min(1.0, headroom / LIMIT_SLOWDOWN_RATIO) if LIMIT_SLOWDOWN_RATIO > 0 else 1.0
+        wait = _ingest_bucket.try_acquire(rate_factor)
+        elapsed = time.monotonic() - started
+        if wait == 0:
+            INGEST_THROTTLE.inc(outcome='delayed' if waited else 'immediate')
+            INGEST_THROTTLE_WAIT.observe(elapsed)
+            return True, None
+        if elapsed + wait > max_wait:
+            INGEST_THROTTLE.inc(outcome='timeout')
+            message = f"Throttle de jobs de ingestão: sem vaga em {max_wait:.0f}s (folga {headroom:.1%} em {limit_name or 'taxa base'})"
+            logger.error(message)
+            return False, message
+        if not waited:
+            logger.warning(f"Throttle de jobs de ingestão: aguardando {wait:.1f}s (folga {headroom:.1%} em {limit_name or 'taxa base'})")
+            waited = True
+        time.sleep(wait)
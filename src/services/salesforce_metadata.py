@@ -0,0 +1,170 @@
+"""
+Módulo de cache dos metadados de objetos do Salesforce (sobjects/<objeto>/describe).
+
+O describe é resumido (tipo, tamanho, picklist e flags de cada campo) e
+gravado em disco por org (host da instância), versão da API e objeto, em
+SALESFORCE_METADATA_CACHE_DIR. Dentro de SALESFORCE_METADATA_REVALIDATE_INTERVAL
+segundos o cache é usado sem nenhuma chamada ao Salesforce; depois disso é
+revalidado com If-Modified-Since (304 mantém o cache). Se o Salesforce não
+responder, o cache existente continua sendo usado.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import requests
+from ..utils.salesforce_logger import get_salesforce_logger
+from . import salesforce_http
+
+logger = get_salesforce_logger('salesforce_metadata')
+
+CACHE_DIR = os.getenv('SALESFORCE_METADATA_CACHE_DIR', os.path.join(os.getcwd(), 'A converter', 'cache'))
+REVALIDATE_INTERVAL = int(os.getenv('SALESFORCE_METADATA_REVALIDATE_INTERVAL', '86400'))
+
+# Tipos de campo com tamanho máximo em caracteres
+TEXT_TYPES = ('string', 'textarea', 'email', 'phone', 'url', 'picklist', 'multipicklist', 'combobox', 'encryptedstring')
+
+_lock = threading.Lock()
+_memory = {}
+
+
+def org_instance_url():
+    """URL da instância da org do ambiente atual (a mesma usada na autenticação)."""
+    environment = os.getenv('SALESFORCE_ENVIRONMENT', 'sandbox').lower()
+    prefix = 'PRODUCTION_' if environment == 'production' else 'SANDBOX_'
+    return os.getenv(f'{prefix}INSTANCE_URL') or os.getenv('SALESFORCE_INSTANCE_URL')
+
+
+def _cache_path(instance_url, api_version, sobject):
+    host = requests.utils.urlparse(instance_url).netloc or instance_url
+    name = re.sub(r'[^A-Za-z0-9.-]', '_', f"{host}_v{api_version}_{sobject}")
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+
+def _summarize(describe):
+    """Resume o describe nos dados usados na normalização e na validação."""
+    fields = {}
+    for field in describe.get('fields', []):
+        fields[field['name']] = {
+            'type': field.get('type'),
+            'length': field.get('length') or 0,
+            'createable': bool(field.get('createable')),
+            'updateable': bool(field.get('updateable')),
+            'nillable': bool(field.get('nillable')),
+            'restricted_picklist': bool(field.get('restrictedPicklist')),
+            'picklist': [entry['value'] for entry in field.get('picklistValues') or [] if entry.get('active')],
+            'external_id': bool(field.get('externalId')),
+        }
+    return fields
+
+
+def _save(path, metadata):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load(path):
+    if path in _memory:
+        return _memory[path]
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache de metadados inválido em {path}: {str(e)}")
+        return None
+    _memory[path] = metadata
+    return metadata
+
+
+def get_sobject_metadata(sobject, context_factory):
+    """
+    Retorna os metadados resumidos de um objeto, do cache ou do describe.
+
+    Args:
+        sobject (str): Nome do objeto (ex.: 'Lead')
+        context_factory (callable): Retorna o contexto da API (ver salesforce_api._bulk_api_context);
+            chamado apenas quando o cache precisa ser obtido ou revalidado
+
+    Returns:
+        dict: {'fields': {nome: {...}}, 'last_modified', 'checked_at'} ou None se indisponível
+    """
+    api_version = os.getenv('SALESFORCE_API_VERSION', '63.0').replace('v', '')
+    instance_url = org_instance_url()
+    with _lock:
+        if instance_url:
+            path = _cache_path(instance_url, api_version, sobject)
+            cached = _load(path)
+            if cached and time.time() - cached.get('checked_at', 0) < REVALIDATE_INTERVAL:
+                return cached
+        else:
+            path, cached = None, None
+
+        context = context_factory()
+        if not context:
+            return cached
+        if path is None:
+            path = _cache_path(context['instance_url'], api_version, sobject)
+            cached = _load(path)
+
+        headers = dict(context['headers'])
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        describe_url = f"{context['sobjects_url']}/{sobject}/describe"
+        try:
+            response = salesforce_http.get(describe_url, headers=headers)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Não foi possível obter o describe de {sobject}: {str(e)}")
+            return cached
+
+        if response.status_code == 304 and cached:
+            logger.debug(f"Metadados de {sobject} não mudaram desde {cached['last_modified']}")
+            cached['checked_at'] = time.time()
+        elif response.status_code == 200:
+            cached = {
+                'sobject': sobject,
+                'api_version': api_version,
+                'last_modified': response.headers.get('Last-Modified') or response.headers.get('Date'),
+                'checked_at': time.time(),
+                'fields': _summarize(response.json())
+            }
+            logger.info(f"Metadados de {sobject} atualizados ({len(cached['fields'])} campos)")
+        else:
+            logger.warning(f"Não foi possível obter o describe de {sobject}. Status: {response.status_code}")
+            return cached
+
+        _memory[path] = cached
+        _save(path, cached)
+        return cached
+
+
+def field_lengths(metadata):
+    """Tamanho máximo dos campos de texto."""
+    return {
+        name: field['length'] for name, field in metadata['fields'].items()
+        if field['type'] in TEXT_TYPES and field['length']
+    }
+
+
+def restricted_picklists(metadata):
+    """Valores ativos das picklists restritas (valores fora da lista são recusados pelo Salesforce)."""
+    return {
+        name: field['picklist'] for name, field in metadata['fields'].items()
+        if field['restricted_picklist'] and field['picklist']
+    }
+
+
+def createable_fields(metadata):
+    """Campos que podem ser preenchidos na criação do registro."""
+    return {name for name, field in metadata['fields'].items() if field['createable']}
+
+
+def updateable_fields(metadata):
+    """Campos que podem ser alterados na atualização do registro."""
+    return {name for name, field in metadata['fields'].items() if field['updateable']}
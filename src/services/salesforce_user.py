@@ -6,6 +6,7 @@ import os
 import json
 import requests
 from .salesforce_auth import get_salesforce_access_token
+from . import salesforce_http
 from ..utils.salesforce_logger import get_salesforce_logger
 
 # Configuração do logger
@@ -63,7 +64,7 @@ def get_current_user_info():
         logger.debug(f"Consultando informações do usuário via GET para {url}")
         
         # Faz a requisição para obter informações do usuário
-        response = requests.get(url, headers=headers)
+        response = salesforce_http.get(url, headers=headers)
         
         logger.debug(f"Status code: {response.status_code}")
         
@@ -95,7 +96,7 @@ def get_current_user_info():
                 
             logger.debug(f"Tentando endpoint alternativo: {alt_url}")
             
-            alt_response = requests.get(alt_url, headers=headers)
+            alt_response = salesforce_http.get(alt_url, headers=headers)
             if alt_response.status_code == 200:
                 user_info = alt_response.json()
                 logger.info(f"Informações do usuário obtidas com sucesso via endpoint alternativo!")
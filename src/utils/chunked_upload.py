@@ -0,0 +1,289 @@
+"""
+Módulo para uploads em partes (chunked) e retomáveis.
+
+O cliente envia partes de tamanho fixo com o offset de cada uma. O servidor
+acrescenta cada parte ao arquivo de dados no workspace do upload, confere o
+checksum SHA-256 da parte e registra o progresso em um manifest.json. Um upload
+interrompido pode ser retomado a partir do último byte confirmado.
+
+Estados do upload:
+    receiving   -- recebendo partes
+    finalizing  -- arquivo montado reservado por uma finalização (renomeado para
+                   data.finalizing: só um processo consegue a reserva)
+    completed   -- processado; o manifest guarda o resultado (result), devolvido
+                   de novo se a finalização for repetida, até a expiração
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+# Tamanho padrão de cada parte (deve ficar abaixo de MAX_CONTENT_LENGTH do Flask)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
+# Tamanho máximo aceito para um arquivo enviado em partes
+MAX_CHUNKED_UPLOAD_SIZE = int(os.getenv('MAX_CHUNKED_UPLOAD_SIZE', str(512 * 1024 * 1024)))
+
+# Uploads não concluídos e sem novas partes há mais que este tempo (segundos) são descartados
+UPLOAD_EXPIRY_SECONDS = int(os.getenv('UPLOAD_EXPIRY_SECONDS', str(24 * 3600)))
+
+# Bytes recebidos a partir dos quais o mapeamento da IA pode começar (apenas CSV)
+EARLY_MAPPING_MIN_BYTES = 256 * 1024
+
+# Tamanho do bloco de leitura do corpo da requisição
+_READ_BLOCK_SIZE = 64 * 1024
+
+_UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+MANIFEST_FILENAME = 'manifest.json'
+DATA_FILENAME = 'data.part'
+FINALIZING_FILENAME = 'data.finalizing'
+
+# Um lock por upload para serializar as alterações do manifest dentro do processo
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _upload_lock(upload_id):
+    with _locks_guard:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _workspace_dir(workspace_root, upload_id):
+    if not _UPLOAD_ID_PATTERN.match(upload_id or ''):
+        raise ValueError(f"Identificador de upload inválido: {upload_id}")
+    return os.path.join(workspace_root, upload_id)
+
+
+def data_path(workspace_root, upload_id):
+    """Caminho do arquivo de dados de um upload."""
+    return os.path.join(_workspace_dir(workspace_root, upload_id), DATA_FILENAME)
+
+
+def _write_manifest(workspace_root, manifest):
+    manifest['updated_at'] = time.time()
+    path = os.path.join(_workspace_dir(workspace_root, manifest['upload_id']), MANIFEST_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(workspace_root, upload_id):
+    """
+    Carrega o manifest de um upload.
+
+    Returns:
+        dict: Manifest do upload ou None se não existir
+    """
+    path = os.path.join(_workspace_dir(workspace_root, upload_id), MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_upload(workspace_root, filename, file_ext, total_size, options=None):
+    """
+    Cria o workspace e o manifest de um novo upload em partes.
+
+    Args:
+        workspace_root (str): Diretório raiz dos workspaces de upload
+        filename (str): Nome original (seguro) do arquivo
+        file_ext (str): Extensão do arquivo
+        total_size (int): Tamanho total esperado em bytes
+        options (dict, optional): Opções do upload (ambiente, proprietário, etc.)
+
+    Returns:
+        dict: Manifest criado
+
+    Raises:
+        ValueError: Se o tamanho informado for inválido
+    """
+    if total_size <= 0 or total_size > MAX_CHUNKED_UPLOAD_SIZE:
+        raise ValueError(f"Tamanho de arquivo inválido: {total_size} bytes (máximo {MAX_CHUNKED_UPLOAD_SIZE})")
+
+    upload_id = uuid.uuid4().hex
+    os.makedirs(_workspace_dir(workspace_root, upload_id), exist_ok=True)
+    open(data_path(workspace_root, upload_id), 'wb').close()
+
+    manifest = {
+        'upload_id': upload_id,
+        'filename': filename,
+        'file_ext': file_ext,
+        'total_size': total_size,
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'received_bytes': 0,
+        'parts': [],
+        'state': 'receiving',
+        'options': options or {},
+        'created_at': time.time()
+    }
+    _write_manifest(workspace_root, manifest)
+    return manifest
+
+
+def append_chunk(workspace_root, upload_id, offset, stream, expected_checksum=None):
+    """
+    Acrescenta uma parte ao arquivo do upload.
+
+    A parte precisa começar exatamente no último byte confirmado. Bytes gravados
+    além desse ponto (por uma parte interrompida) são descartados antes da escrita.
+    Se o checksum não conferir, o arquivo volta ao tamanho anterior.
+
+    Args:
+        workspace_root (str): Diretório raiz dos workspaces de upload
+        upload_id (str): Identificador do upload
+        offset (int): Posição inicial da parte no arquivo
+        stream: Objeto com método read() contendo o corpo da parte
+        expected_checksum (str, optional): SHA-256 (hex) esperado da parte
+
+    Returns:
+        dict: Manifest atualizado
+
+    Raises:
+        LookupError: Se o upload não existir
+        ValueError: Se o offset, o tamanho ou o checksum forem inválidos
+    """
+    with _upload_lock(upload_id):
+        manifest = load_manifest(workspace_root, upload_id)
+        if manifest is None:
+            raise LookupError(f"Upload não encontrado: {upload_id}")
+        if manifest['state'] != 'receiving':
+            raise ValueError(f"Upload {upload_id} não está recebendo partes (estado: {manifest['state']})")
+        if offset != manifest['received_bytes']:
+            raise ValueError(f"Offset {offset} inesperado; próximo offset esperado: {manifest['received_bytes']}")
+
+        max_part_size = min(manifest['chunk_size'], manifest['total_size'] - offset)
+        digest = hashlib.sha256()
+        size = 0
+        path = data_path(workspace_root, upload_id)
+        with open(path, 'r+b') as f:
+            f.truncate(offset)
+            f.seek(offset)
+            while True:
+                block = stream.read(_READ_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_part_size:
+                    f.truncate(offset)
+                    raise ValueError(f"Parte excede o tamanho máximo permitido ({max_part_size} bytes)")
+                digest.update(block)
+                f.write(block)
+
+            checksum = digest.hexdigest()
+            if size == 0 or (expected_checksum and checksum != expected_checksum.lower()):
+                f.truncate(offset)
+                raise ValueError(f"Checksum da parte no offset {offset} não confere" if size else "Parte vazia")
+
+        manifest['received_bytes'] = offset + size
+        manifest['parts'].append({'offset': offset, 'size': size, 'sha256': checksum})
+        _write_manifest(workspace_root, manifest)
+        return manifest
+
+
+def update_manifest(workspace_root, upload_id, **fields):
+    """Atualiza campos do manifest de forma atômica e retorna o manifest atualizado."""
+    with _upload_lock(upload_id):
+        manifest = load_manifest(workspace_root, upload_id)
+        if manifest is None:
+            raise LookupError(f"Upload não encontrado: {upload_id}")
+        manifest.update(fields)
+        _write_manifest(workspace_root, manifest)
+        return manifest
+
+
+def finalize_upload(workspace_root, upload_id, dest_path):
+    """
+    Confere se todas as partes chegaram e move o arquivo montado para `dest_path`.
+
+    A reserva do arquivo (renomeação atômica de data.part para data.finalizing)
+    garante que apenas uma finalização, mesmo entre processos, processe o upload.
+
+    Returns:
+        dict: Manifest com o estado 'finalizing'
+
+    Raises:
+        LookupError: Se o upload não existir
+        ValueError: Se ainda faltarem bytes ou se o upload já estiver sendo (ou tiver sido) finalizado
+    """
+    with _upload_lock(upload_id):
+        manifest = load_manifest(workspace_root, upload_id)
+        if manifest is None:
+            raise LookupError(f"Upload não encontrado: {upload_id}")
+        if manifest['state'] != 'receiving':
+            raise ValueError(f"Upload {upload_id} já finalizado (estado: {manifest['state']})")
+        if manifest['received_bytes'] != manifest['total_size']:
+            raise ValueError(
+                f"Upload incompleto: {manifest['received_bytes']} de {manifest['total_size']} bytes recebidos"
+            )
+        claimed_path = os.path.join(_workspace_dir(workspace_root, upload_id), FINALIZING_FILENAME)
+        try:
+            os.rename(data_path(workspace_root, upload_id), claimed_path)
+        except FileNotFoundError:
+            raise ValueError(f"Upload {upload_id} já está sendo finalizado")
+        manifest['state'] = 'finalizing'
+        _write_manifest(workspace_root, manifest)
+    shutil.move(claimed_path, dest_path)
+    return manifest
+
+
+def complete_upload(workspace_root, upload_id, result):
+    """
+    Registra o resultado do processamento de um upload finalizado (estado 'completed').
+
+    O workspace fica só com o manifest, para responder a finalizações repetidas,
+    e é removido por expire_uploads.
+    """
+    return update_manifest(workspace_root, upload_id, state='completed', result=result)
+
+
+def remove_upload(workspace_root, upload_id):
+    """Remove o workspace de um upload."""
+    shutil.rmtree(_workspace_dir(workspace_root, upload_id), ignore_errors=True)
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+
+
+def expire_uploads(workspace_root, max_age=None):
+    """
+    Remove os uploads abandonados: sem atividade há mais de `max_age` segundos
+    (padrão UPLOAD_EXPIRY_SECONDS).
+
+    Returns:
+        list: Identificadores dos uploads removidos
+    """
+    max_age = UPLOAD_EXPIRY_SECONDS if max_age is None else max_age
+    try:
+        names = [name for name in os.listdir(workspace_root) if _UPLOAD_ID_PATTERN.match(name)]
+    except OSError:
+        return []
+    expired = []
+    now = time.time()
+    for upload_id in names:
+        try:
+            manifest = load_manifest(workspace_root, upload_id)
+            updated_at = manifest.get('updated_at', 0) if manifest else \
+                os.path.getmtime(_workspace_dir(workspace_root, upload_id))
+        except (OSError, ValueError):
+            continue
+        if now - updated_at > max_age:
+            remove_upload(workspace_root, upload_id)
+            expired.append(upload_id)
+    return expired
+
+
+def pending_upload_count(workspace_root):
+    """Quantidade de uploads iniciados e ainda não concluídos (com o arquivo de dados) no workspace."""
+    try:
+        names = [name for name in os.listdir(workspace_root) if _UPLOAD_ID_PATTERN.match(name)]
+    except OSError:
+        return 0
+    return sum(1 for name in names
+               if any(os.path.exists(os.path.join(workspace_root, name, data_file))
+                      for data_file in (DATA_FILENAME, FINALIZING_FILENAME)))
@@ -6,11 +6,11 @@ e diagnosticar problemas no processo de conversão de arquivos.
 """
 
 import os
-import json
 import logging
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from src.utils.log_format import compact_json
+from src.utils.log_queue import get_queue_handler
 
 # Diretório para armazenar os logs de conversão
 CONVERSION_LOG_DIR = os.path.join(
@@ -38,6 +38,23 @@ MAX_LOG_SIZE = 5 * 1024 * 1024
 # Número de backups a manter
 BACKUP_COUNT = 5
 
+# Nível mínimo dos loggers (mensagens abaixo dele não são formatadas)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+
+
+def _prepare_record(record):
+    """
+    Define o contexto do registro.
+
+    Executado na thread de gravação dos logs, apenas para registros emitidos.
+    """
+    name = record.name[len("conversion."):] if record.name.startswith("conversion.") else record.name
+    record.log_context = {
+        'conversion_process': name,
+        'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+        'caller': name
+    }
+
 class ConversionLogger:
     """
     Logger especializado para operações de conversão de arquivos com capacidade
@@ -52,7 +69,7 @@ class ConversionLogger:
             name (str): Nome do logger, usado para identificar a fonte dos logs.
         """
         self.logger = logging.getLogger(f"conversion.{name}")
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(LOG_LEVEL)
         self.name = name
         
         # Evita duplicação de handlers se o logger já estiver configurado
@@ -60,90 +77,57 @@ class ConversionLogger:
             self._setup_handlers()
     
     def _setup_handlers(self):
-        """Configura os handlers para os diferentes arquivos de log."""
-        # Formato padrão para logs
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] [%(name)s] - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        # Handler para o log principal
-        main_handler = RotatingFileHandler(
-            MAIN_LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        main_handler.setLevel(logging.INFO)
-        main_handler.setFormatter(formatter)
-        self.logger.addHandler(main_handler)
-        
-        # Handler para detalhes técnicos
-        details_handler = RotatingFileHandler(
-            DETAILS_LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        details_handler.setLevel(logging.DEBUG)
-        details_handler.setFormatter(formatter)
-        self.logger.addHandler(details_handler)
-        
-        # Handler para erros específicos
-        error_handler = RotatingFileHandler(
-            ERROR_LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(formatter)
-        self.logger.addHandler(error_handler)
-        
-        # Handler para console - útil durante desenvolvimento
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-    
-    def _format_with_context(self, message):
         """
-        Adiciona contexto à mensagem de log.
-        
-        Args:
-            message (str): Mensagem original.
-            
-        Returns:
-            str: Mensagem formatada com contexto adicional.
+        Conecta o logger à fila de logging compartilhada.
+
+        Os arquivos são gravados por um único handler por arquivo em uma thread
+        de fundo (ver src/utils/log_queue.py).
         """
-        return f"[conversion_process={self.name} | timestamp={datetime.now().isoformat()} | caller={self.name}] {message}"
+        self.logger.addHandler(get_queue_handler(
+            'conversion',
+            [
+                (MAIN_LOG_FILE, logging.INFO),       # Log principal
+                (DETAILS_LOG_FILE, logging.DEBUG),   # Detalhes técnicos
+                (ERROR_LOG_FILE, logging.ERROR)      # Erros específicos
+            ],
+            MAX_LOG_SIZE,
+            BACKUP_COUNT,
+            preparer=_prepare_record
+        ))
     
-    def debug(self, message):
-        """Registra mensagem de nível DEBUG."""
-        formatted_message = self._format_with_context(message)
-        self.logger.debug(formatted_message)
+    def _log(self, level, message, args, kwargs):
+        # O contexto é aplicado na thread de gravação (ver _prepare_record)
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, *args, stacklevel=3, **kwargs)
     
-    def info(self, message):
+    def is_enabled_for(self, level):
+        """Indica se mensagens do nível informado serão registradas."""
+        return self.logger.isEnabledFor(level)
+    
+    def debug(self, message, *args, **kwargs):
+        """Registra mensagem de nível DEBUG (argumentos no estilo % são formatados apenas se emitida)."""
+        self._log(logging.DEBUG, message, args, kwargs)
+    
+    def info(self, message, *args, **kwargs):
         """Registra mensagem de nível INFO."""
-        formatted_message = self._format_with_context(message)
-        self.logger.info(formatted_message)
+        self._log(logging.INFO, message, args, kwargs)
     
-    def warning(self, message):
+    def warning(self, message, *args, **kwargs):
         """Registra mensagem de nível WARNING."""
-        formatted_message = self._format_with_context(message)
-        self.logger.warning(formatted_message)
+        self._log(logging.WARNING, message, args, kwargs)
     
-    def error(self, message):
+    def error(self, message, *args, **kwargs):
         """Registra mensagem de nível ERROR."""
-        formatted_message = self._format_with_context(message)
-        self.logger.error(formatted_message)
+        self._log(logging.ERROR, message, args, kwargs)
     
-    def exception(self, message):
+    def exception(self, message, *args, **kwargs):
         """Registra mensagem de exceção com stack trace."""
-        formatted_message = self._format_with_context(message)
-        self.logger.exception(formatted_message)
+        kwargs.setdefault('exc_info', True)
+        self._log(logging.ERROR, message, args, kwargs)
     
-    def critical(self, message):
+    def critical(self, message, *args, **kwargs):
         """Registra mensagem de nível CRITICAL."""
-        formatted_message = self._format_with_context(message)
-        self.logger.critical(formatted_message)
+        self._log(logging.CRITICAL, message, args, kwargs)
     
     def log_conversion_start(self, file_info):
         """
@@ -152,6 +136,9 @@ class ConversionLogger:
         Args:
             file_info (dict): Informações sobre o arquivo a ser convertido
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             info = {
                 'action': 'conversion_start',
@@ -161,11 +148,11 @@ class ConversionLogger:
             
             # Serializa para JSON
             try:
-                info_json = json.dumps(info, indent=2)
+                info_json = compact_json(info)
             except:
                 info_json = f"Non-serializable info: {str(info)}"
             
-            self.info(f"=== INICIANDO CONVERSÃO DE ARQUIVO ===\n{info_json}")
+            self.info("=== INICIANDO CONVERSÃO DE ARQUIVO === %s", info_json, extra={'stage': 'conversion_start'})
         except Exception as e:
             self.error(f"Erro ao registrar início da conversão: {str(e)}")
     
@@ -177,6 +164,9 @@ class ConversionLogger:
             step_name (str): Nome do passo (ex: 'extração', 'transformação')
             step_details (dict): Detalhes sobre o passo específico
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             step_info = {
                 'action': 'conversion_step',
@@ -187,11 +177,14 @@ class ConversionLogger:
             
             # Serializa para JSON
             try:
-                step_json = json.dumps(step_info, indent=2)
+                step_json = compact_json(step_info)
             except:
                 step_json = f"Non-serializable step info: {str(step_info)}"
             
-            self.info(f"PASSO DE CONVERSÃO: {step_name}\n{step_json}")
+            extra = {'stage': step_name}
+            if isinstance(step_details, dict) and 'duration_ms' in step_details:
+                extra['duration_ms'] = step_details['duration_ms']
+            self.info("PASSO DE CONVERSÃO: %s %s", step_name, step_json, extra=extra)
         except Exception as e:
             self.error(f"Erro ao registrar passo de conversão: {str(e)}")
     
@@ -202,6 +195,9 @@ class ConversionLogger:
         Args:
             result_info (dict): Informações sobre o resultado da conversão
         """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             completion_info = {
                 'action': 'conversion_complete',
@@ -211,11 +207,11 @@ class ConversionLogger:
             
             # Serializa para JSON
             try:
-                completion_json = json.dumps(completion_info, indent=2)
+                completion_json = compact_json(completion_info)
             except:
                 completion_json = f"Non-serializable completion info: {str(completion_info)}"
             
-            self.info(f"=== CONVERSÃO CONCLUÍDA COM SUCESSO ===\n{completion_json}")
+            self.info("=== CONVERSÃO CONCLUÍDA COM SUCESSO === %s", completion_json, extra={'stage': 'conversion_complete'})
         except Exception as e:
             self.error(f"Erro ao registrar conclusão da conversão: {str(e)}")
     
@@ -226,6 +222,9 @@ class ConversionLogger:
         Args:
             error_info (dict): Informações detalhadas sobre o erro
         """
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        
         try:
             error_details = {
                 'action': 'conversion_error',
@@ -235,11 +234,11 @@ class ConversionLogger:
             
             # Serializa para JSON
             try:
-                error_json = json.dumps(error_details, indent=2)
+                error_json = compact_json(error_details)
             except:
                 error_json = f"Non-serializable error info: {str(error_details)}"
             
-            self.error(f"=== ERRO NA CONVERSÃO DE ARQUIVO ===\n{error_json}")
+            self.error("=== ERRO NA CONVERSÃO DE ARQUIVO === %s", error_json, extra={'stage': 'conversion_error'})
         except Exception as e:
             self.error(f"Erro ao registrar erro de conversão: {str(e)}")
 
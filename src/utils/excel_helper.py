@@ -0,0 +1,191 @@
+"""
+Módulo para leitura eficiente de planilhas Excel (.xlsx/.xls).
+
+As linhas são lidas em streaming, sem carregar a pasta de trabalho inteira em
+memória: usa o python-calamine quando estiver instalado e, caso contrário, o
+openpyxl em modo somente leitura (read_only=True, values_only=True).
+Arquivos .xls sem o python-calamine continuam sendo lidos pelo pandas/xlrd.
+"""
+import datetime
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Dependência opcional
+    CalamineWorkbook = None
+
+# Quantidade de linhas por bloco na leitura completa
+EXCEL_CHUNK_SIZE = 5000
+
+
+def _cell_to_str(value):
+    """Converte o valor de uma célula para string, como o pandas faz com dtype=str."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, float) and value.is_integer():
+        # Evita sufixo '.0' em telefones, CPFs e outros números inteiros
+        return str(int(value))
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time(0):
+        return value.date().isoformat()
+    return str(value).strip() if isinstance(value, str) else str(value)
+
+
+def _normalize_header(raw_header):
+    """Gera nomes de coluna no mesmo padrão do pandas (Unnamed: N e sufixos .1, .2)."""
+    columns = []
+    seen = {}
+    for pos, value in enumerate(raw_header):
+        name = _cell_to_str(value) or f"Unnamed: {pos}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def list_excel_sheets(file_path):
+    """
+    Lista as abas de uma planilha sem ler o conteúdo das células.
+
+    Args:
+        file_path (str): Caminho do arquivo .xlsx ou .xls
+
+    Returns:
+        list: Nomes das abas, na ordem da pasta de trabalho
+    """
+    if CalamineWorkbook is not None:
+        return list(CalamineWorkbook.from_path(file_path).sheet_names)
+    if file_path.lower().endswith('.xls'):
+        with pd.ExcelFile(file_path, engine='xlrd') as workbook:
+            return list(workbook.sheet_names)
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _iter_calamine_rows(file_path, sheet_name=None):
+    workbook = CalamineWorkbook.from_path(file_path)
+    if sheet_name is None:
+        sheet = workbook.get_sheet_by_index(0)
+    else:
+        sheet = workbook.get_sheet_by_name(sheet_name)
+    yield from sheet.iter_rows()
+
+
+def _iter_openpyxl_rows(file_path, sheet_name=None):
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        # Algumas ferramentas gravam dimensões incorretas; força a leitura até o fim
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_excel_rows(file_path, sheet_name=None):
+    """
+    Percorre as linhas de uma planilha sem carregar a pasta de trabalho inteira.
+
+    Args:
+        file_path (str): Caminho do arquivo .xlsx ou .xls
+        sheet_name (str, optional): Nome da aba. Se None, usa a primeira.
+
+    Yields:
+        tuple: Valores brutos de cada linha
+    """
+    if CalamineWorkbook is not None:
+        yield from _iter_calamine_rows(file_path, sheet_name)
+    elif file_path.lower().endswith('.xls'):
+        df = pd.read_excel(file_path, sheet_name=sheet_name or 0, engine='xlrd', header=None)
+        for row in df.itertuples(index=False, name=None):
+            yield tuple(None if pd.isna(v) else v for v in row)
+    else:
+        yield from _iter_openpyxl_rows(file_path, sheet_name)
+
+
+def _is_empty_row(row):
+    return all(v is None or (isinstance(v, str) and not v.strip()) for v in row)
+
+
+def iter_excel_chunks(file_path, chunksize=EXCEL_CHUNK_SIZE, sheet_name=None, max_rows=None):
+    """
+    Lê uma planilha em blocos de DataFrames com todas as colunas como string.
+
+    A primeira linha não vazia é usada como cabeçalho. Linhas totalmente vazias
+    são ignoradas e células vazias viram string vazia (equivalente a
+    dtype=str, keep_default_na=False no pandas).
+
+    Args:
+        file_path (str): Caminho do arquivo .xlsx ou .xls
+        chunksize (int): Quantidade de linhas por bloco
+        sheet_name (str, optional): Nome da aba. Se None, usa a primeira.
+        max_rows (int, optional): Para a leitura após esta quantidade de linhas de dados
+
+    Yields:
+        pandas.DataFrame: Blocos de linhas da planilha
+    """
+    rows = iter_excel_rows(file_path, sheet_name)
+    try:
+        columns = None
+        for raw_header in rows:
+            if not _is_empty_row(raw_header):
+                columns = _normalize_header(raw_header)
+                break
+        if columns is None:
+            return
+
+        width = len(columns)
+        buffer = []
+        read_count = 0
+        for raw_row in rows:
+            if max_rows is not None and read_count >= max_rows:
+                break
+            if _is_empty_row(raw_row):
+                continue
+            values = [_cell_to_str(v) for v in raw_row[:width]]
+            values.extend([''] * (width - len(values)))
+            buffer.append(values)
+            read_count += 1
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=columns, dtype=str)
+                buffer = []
+
+        if buffer or read_count == 0:
+            yield pd.DataFrame(buffer, columns=columns, dtype=str)
+    finally:
+        # Fecha o gerador de linhas (e a pasta de trabalho) ao parar antes do fim
+        rows.close()
+
+
+def read_excel_snippet(file_path, nrows, sheet_name=None):
+    """
+    Lê apenas o cabeçalho e as primeiras `nrows` linhas de uma planilha.
+
+    Returns:
+        pandas.DataFrame: Primeiras linhas da planilha (vazio se não houver dados)
+    """
+    chunks = list(iter_excel_chunks(file_path, chunksize=nrows, sheet_name=sheet_name, max_rows=nrows))
+    if not chunks:
+        return pd.DataFrame()
+    return chunks[0]
+
+
+def read_excel_full(file_path, sheet_name=None, chunksize=EXCEL_CHUNK_SIZE):
+    """
+    Lê a planilha inteira em blocos e devolve um único DataFrame de strings.
+
+    Returns:
+        pandas.DataFrame: Conteúdo completo da planilha
+    """
+    chunks = list(iter_excel_chunks(file_path, chunksize=chunksize, sheet_name=sheet_name))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
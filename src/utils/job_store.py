@@ -0,0 +1,133 @@
+"""
+Módulo de armazenamento dos jobs de processamento de uploads.
+
+Cada job é gravado como um arquivo JSON (<job_id>.json) no diretório de jobs,
+com os dados do arquivo, o status e as medições de tempo por etapa. A gravação
+é atômica (arquivo temporário + os.replace). Arquivos auxiliares do job (ex.: o
+CSV enviado e o manifest da ingestão) ficam ao lado, com o mesmo prefixo.
+
+Os ids dos jobs são gerados no servidor (new_job_id) e um id existente nunca é
+reaproveitado: create_job recusa criar um job com o id de outro.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+_JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+_lock = threading.Lock()
+
+
+def _job_path(store_dir, job_id):
+    if not _JOB_ID_PATTERN.match(job_id or ''):
+        raise ValueError(f"Identificador de job inválido: {job_id}")
+    return os.path.join(store_dir, f"{job_id}.json")
+
+
+def job_file_path(store_dir, job_id, suffix):
+    """Caminho de um arquivo auxiliar do job (ex.: suffix='.csv')."""
+    return _job_path(store_dir, job_id)[:-len('.json')] + suffix
+
+
+def new_job_id():
+    """Gera o id de um novo job."""
+    return uuid.uuid4().hex
+
+
+def _write_job(store_dir, job):
+    job['updated_at'] = time.time()
+    path = _job_path(store_dir, job['job_id'])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_job(store_dir, job_id):
+    """
+    Carrega um job.
+
+    Returns:
+        dict: Dados do job ou None se não existir
+    """
+    path = _job_path(store_dir, job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_job(store_dir, job_id, **fields):
+    """
+    Cria o registro de um job.
+
+    O arquivo é publicado com os.link, que falha se o id já existir (também entre
+    processos), de modo que um job nunca substitui o registro de outro.
+
+    Args:
+        store_dir (str): Diretório dos jobs
+        job_id (str): Identificador do job (ver new_job_id)
+        **fields: Dados iniciais (nome do arquivo, ambiente, ...)
+
+    Returns:
+        dict: Job criado
+
+    Raises:
+        FileExistsError: Se já existir um job com este id
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    path = _job_path(store_dir, job_id)
+    job = {'job_id': job_id, 'status': 'processing', 'created_at': time.time(), 'updated_at': time.time()}
+    job.update(fields)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, default=str)
+    try:
+        os.link(tmp_path, path)
+    finally:
+        os.remove(tmp_path)
+    return job
+
+
+def update_job(store_dir, job_id, **fields):
+    """
+    Atualiza campos de um job existente.
+
+    Returns:
+        dict: Job atualizado ou None se não existir
+    """
+    with _lock:
+        job = load_job(store_dir, job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        _write_job(store_dir, job)
+    return job
+
+
+def list_jobs(store_dir, limit=50):
+    """
+    Lista os jobs mais recentes.
+
+    Returns:
+        list: Jobs ordenados do mais recente para o mais antigo
+    """
+    if not os.path.isdir(store_dir):
+        return []
+    jobs = []
+    for name in os.listdir(store_dir):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(store_dir, name), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            continue
+        # Arquivos auxiliares em JSON (ex.: o manifest <job_id>.bulk.json) não são jobs
+        if isinstance(job, dict) and name == f"{job.get('job_id')}.json":
+            jobs.append(job)
+    jobs.sort(key=lambda job: job.get('created_at', 0), reverse=True)
+    return jobs[:limit]
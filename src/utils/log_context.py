@@ -0,0 +1,73 @@
+"""
+Módulo de contexto de logging (id de correlação e etapa atual).
+
+O id de correlação identifica uma requisição ou um processamento (upload,
+job) e é incluído em todos os registros de log emitidos dentro dele. Os
+valores ficam em contextvars e são capturados na thread que emite o log;
+para threads de pools, use run_in_context ao submeter as tarefas.
+"""
+import contextvars
+import uuid
+from contextlib import contextmanager
+
+_correlation_id = contextvars.ContextVar('correlation_id', default=None)
+_stage = contextvars.ContextVar('log_stage', default=None)
+
+
+def new_correlation_id():
+    """Gera um novo id de correlação curto."""
+    return uuid.uuid4().hex[:16]
+
+
+def get_correlation_id():
+    """Retorna o id de correlação atual (ou None)."""
+    return _correlation_id.get()
+
+
+def set_correlation_id(correlation_id):
+    """Define o id de correlação do contexto atual e retorna o token para restauração."""
+    return _correlation_id.set(correlation_id)
+
+
+def reset_correlation_id(token):
+    """Restaura o id de correlação anterior a set_correlation_id."""
+    _correlation_id.reset(token)
+
+
+def get_stage():
+    """Retorna o nome da etapa atual (ou None)."""
+    return _stage.get()
+
+
+@contextmanager
+def correlation_scope(correlation_id):
+    """Define o id de correlação durante o bloco."""
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+@contextmanager
+def stage_scope(stage):
+    """Define o nome da etapa atual durante o bloco (incluído nos logs como 'stage')."""
+    token = _stage.set(stage)
+    try:
+        yield stage
+    finally:
+        _stage.reset(token)
+
+
+def run_in_context(func):
+    """
+    Envolve `func` para executar no contexto atual (id de correlação, etapa).
+
+    Útil para ThreadPoolExecutor e threading.Thread, que não herdam contextvars.
+    """
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,79 @@
+"""
+Módulo de formatação dos logs: texto (padrão) ou NDJSON (LOG_FORMAT=json).
+
+No formato texto, o contexto do registro (ambiente, caller, id de correlação,
+etapa e duração) aparece no prefixo "[chave=valor | ...]". No formato NDJSON,
+cada registro é um objeto JSON compacto em uma linha, com os mesmos dados em
+campos próprios, para agregação por etapa com ferramentas simples.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+# 'text' (padrão) ou 'json' (NDJSON, um objeto por linha)
+LOG_OUTPUT_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+
+# Campos estruturados aceitos via extra={...} nas chamadas de log
+STRUCTURED_FIELDS = ('correlation_id', 'stage', 'duration_ms')
+
+
+def compact_json(value):
+    """Serializa em JSON compacto (orjson se disponível)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _record_fields(record):
+    fields = dict(getattr(record, 'log_context', None) or {})
+    for name in STRUCTURED_FIELDS:
+        value = getattr(record, name, None)
+        if value is not None:
+            fields[name] = value
+    return fields
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto tradicional, com o contexto do registro no prefixo da mensagem."""
+
+    def formatMessage(self, record):
+        fields = _record_fields(record)
+        if fields:
+            context_str = ' | '.join(f"{k}={v}" for k, v in fields.items())
+            record.message = f"[{context_str}] {record.message}"
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formato NDJSON: um objeto JSON compacto por registro."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        # 'ts' já registra o horário; o timestamp do prefixo de texto é redundante aqui
+        entry.update({k: v for k, v in _record_fields(record).items() if k != 'timestamp'})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return compact_json(entry)
+
+
+def build_formatter(fmt, datefmt):
+    """Cria o formatter configurado em LOG_FORMAT."""
+    if LOG_OUTPUT_FORMAT == 'json':
+        return JsonFormatter()
+    return TextFormatter(fmt, datefmt=datefmt)
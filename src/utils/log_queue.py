@@ -0,0 +1,170 @@
+"""
+Módulo de logging assíncrono compartilhado pelos loggers do Salesforce e de conversão.
+
+Os loggers nomeados (app, salesforce_api, conversion.*, ...) recebem apenas um
+QueueHandler da sua família. Um único QueueListener, em uma thread de fundo,
+grava os registros nos arquivos: cada arquivo tem um único RotatingFileHandler
+no processo, de modo que a thread da requisição nunca espera pelo disco e a
+rotação não é disputada por vários handles do mesmo arquivo.
+
+Cada família pode registrar uma função de preparação (contexto, mascaramento)
+que roda na thread do listener, apenas para registros efetivamente emitidos.
+"""
+
+import atexit
+import copy
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from src.utils.log_context import get_correlation_id, get_stage
+from src.utils.log_format import build_formatter
+
+# Formato padrão para logs
+LOG_FORMAT = '%(asctime)s [%(levelname)s] [%(name)s] - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Fila compartilhada entre todos os loggers (sem limite: quem registra nunca bloqueia)
+_log_queue = queue.SimpleQueue()
+
+_lock = threading.Lock()
+_listener = None
+_family_handlers = {}
+_family_preparers = {}
+_file_handlers = {}
+_console_handler = None
+
+
+class _FamilyTagFilter(logging.Filter):
+    """Marca o registro com a família do logger que o emitiu."""
+
+    def __init__(self, family):
+        super().__init__()
+        self.family = family
+
+    def filter(self, record):
+        record.log_family = self.family
+        return True
+
+
+class _FamilyFilter(logging.Filter):
+    """Aceita apenas registros de uma família (usado nos handlers de arquivo)."""
+
+    def __init__(self, family):
+        super().__init__()
+        self.family = family
+
+    def filter(self, record):
+        return getattr(record, 'log_family', None) == self.family
+
+
+class _FamilyQueueHandler(QueueHandler):
+    """
+    QueueHandler que resolve os argumentos da mensagem na thread de origem, mas
+    mantém o stack trace separado da mensagem (a preparação da família atua
+    apenas sobre a mensagem; o formatter do arquivo acrescenta o stack trace).
+
+    O id de correlação e a etapa do contexto atual são capturados aqui, pois
+    a gravação acontece em outra thread.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        if getattr(record, 'correlation_id', None) is None:
+            record.correlation_id = get_correlation_id()
+        if getattr(record, 'stage', None) is None:
+            record.stage = get_stage()
+        return record
+
+
+class _PreparingQueueListener(QueueListener):
+    """QueueListener que aplica a preparação da família antes de gravar o registro."""
+
+    def prepare(self, record):
+        preparer = _family_preparers.get(getattr(record, 'log_family', None))
+        if preparer is not None:
+            try:
+                preparer(record)
+            except Exception:
+                pass
+        return record
+
+
+def _restart_listener():
+    """Recria o listener com o conjunto atual de handlers (chamar com _lock adquirido)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    handlers = list(_file_handlers.values())
+    if _console_handler is not None:
+        handlers.append(_console_handler)
+    _listener = _PreparingQueueListener(_log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def get_queue_handler(family, files, max_bytes, backup_count, preparer=None):
+    """
+    Obtém o QueueHandler de uma família de loggers, criando os handlers de arquivo na primeira chamada.
+
+    Args:
+        family (str): Nome da família ('salesforce', 'conversion', ...)
+        files (list): Pares (caminho do arquivo, nível mínimo) da família
+        max_bytes (int): Tamanho máximo de cada arquivo antes da rotação
+        backup_count (int): Número de backups a manter
+        preparer (callable, optional): Recebe o registro (já com a mensagem formatada)
+            e o ajusta antes da gravação, na thread do listener (ex.: mascaramento
+            e o dicionário de contexto `log_context`)
+
+    Returns:
+        logging.Handler: QueueHandler compartilhado por todos os loggers da família
+    """
+    global _console_handler
+    with _lock:
+        handler = _family_handlers.get(family)
+        if handler is not None:
+            return handler
+
+        formatter = build_formatter(LOG_FORMAT, LOG_DATE_FORMAT)
+        for path, level in files:
+            if path in _file_handlers:
+                continue
+            file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+            file_handler.setLevel(level)
+            file_handler.setFormatter(formatter)
+            file_handler.addFilter(_FamilyFilter(family))
+            _file_handlers[path] = file_handler
+
+        # Handler para console - útil durante desenvolvimento (um único para todas as famílias)
+        if _console_handler is None:
+            _console_handler = logging.StreamHandler()
+            _console_handler.setLevel(logging.INFO)
+            _console_handler.setFormatter(formatter)
+
+        if preparer is not None:
+            _family_preparers[family] = preparer
+        handler = _FamilyQueueHandler(_log_queue)
+        handler.addFilter(_FamilyTagFilter(family))
+        _family_handlers[family] = handler
+        _restart_listener()
+        return handler
+
+
+def stop_log_listener():
+    """Esvazia a fila e encerra a thread de gravação dos logs."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for file_handler in _file_handlers.values():
+            file_handler.close()
+
+
+atexit.register(stop_log_listener)
@@ -0,0 +1,171 @@
+"""
+Módulo de cache dos mapeamentos de colunas obtidos da IA, por layout de cabeçalho.
+
+Arquivos enviados com o mesmo cabeçalho (mesmas colunas, na mesma ordem) e
+o mesmo esquema alvo reaproveitam o mapeamento da primeira consulta, entre
+uploads e entre processos: cada mapeamento é gravado como um arquivo JSON em
+MAPPING_CACHE_DIR (vazio desativa o cache), com o nome igual ao hash do
+layout. A chave inclui a versão do prompt de mapeamento
+(llm.COLUMN_MAPPING_PROMPT_VERSION), então alterar o prompt ou o esquema
+invalida as entradas anteriores.
+
+As entradas expiram após MAPPING_CACHE_TTL_SECONDS (0 = sem expiração) e o
+diretório guarda no máximo MAPPING_CACHE_MAX_ENTRIES arquivos (os mais antigos
+são removidos). Um upload pode ignorar o cache e consultar a IA novamente
+(`refresh=True`, opção "Refazer o mapeamento" do formulário), e clear_cache()
+apaga todas as entradas. As consultas ao cache são contadas na métrica
+llm_mapping_cache.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from llm import COLUMN_MAPPING_PROMPT_VERSION
+from src.utils.conversion_logger import get_conversion_logger
+from src.utils.metrics import LLM_MAPPING_CACHE
+
+logger = get_conversion_logger('mapping_cache')
+
+MAPPING_CACHE_DIR = os.getenv('MAPPING_CACHE_DIR', os.path.join(os.getcwd(), 'A converter', 'cache', 'mappings'))
+MAPPING_CACHE_TTL_SECONDS = int(os.getenv('MAPPING_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+MAPPING_CACHE_MAX_ENTRIES = int(os.getenv('MAPPING_CACHE_MAX_ENTRIES', '1000'))
+
+_lock = threading.Lock()
+# Entradas já lidas neste processo: chave -> (momento da gravação, mapeamento)
+_memory = {}
+
+
+def layout_key(columns, target_schema):
+    """Hash do layout: nomes das colunas (na ordem do arquivo), esquema alvo e versão do prompt."""
+    payload = json.dumps({
+        'columns': [str(column) for column in columns],
+        'schema': target_schema,
+        'prompt_version': COLUMN_MAPPING_PROMPT_VERSION
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(MAPPING_CACHE_DIR, f"{key}.json")
+
+
+def _expired(created_at):
+    return MAPPING_CACHE_TTL_SECONDS > 0 and time.time() - created_at > MAPPING_CACHE_TTL_SECONDS
+
+
+def _load(key):
+    entry = _memory.get(key)
+    if entry is None:
+        path = _cache_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entry = (float(data['created_at']), data['mapping'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Cache de mapeamento inválido em {path}: {str(e)}")
+            return None
+        _memory[key] = entry
+    created_at, mapping = entry
+    if _expired(created_at):
+        _memory.pop(key, None)
+        return None
+    return mapping
+
+
+def _evict():
+    """Remove os arquivos mais antigos além de MAPPING_CACHE_MAX_ENTRIES."""
+    if MAPPING_CACHE_MAX_ENTRIES <= 0:
+        return
+    entries = []
+    for name in os.listdir(MAPPING_CACHE_DIR):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(MAPPING_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    if len(entries) <= MAPPING_CACHE_MAX_ENTRIES:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - MAPPING_CACHE_MAX_ENTRIES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        _memory.pop(os.path.basename(path)[:-len('.json')], None)
+
+
+def _save(key, mapping):
+    os.makedirs(MAPPING_CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    created_at = time.time()
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'created_at': created_at, 'mapping': mapping}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    _memory[key] = (created_at, mapping)
+    _evict()
+
+
+def clear_cache():
+    """
+    Apaga todos os mapeamentos em cache (em disco e em memória).
+
+    Returns:
+        int: Número de entradas removidas do disco
+    """
+    removed = 0
+    with _lock:
+        _memory.clear()
+        if not MAPPING_CACHE_DIR or not os.path.isdir(MAPPING_CACHE_DIR):
+            return 0
+        for name in os.listdir(MAPPING_CACHE_DIR):
+            if not name.endswith('.json'):
+                continue
+            try:
+                os.remove(os.path.join(MAPPING_CACHE_DIR, name))
+                removed += 1
+            except OSError:
+                pass
+    logger.info(f"Cache de mapeamentos limpo: {removed} entrada(s) removida(s)")
+    return removed
+
+
+def get_or_create_mapping(columns, target_schema, create_mapping, refresh=False):
+    """
+    Retorna o mapeamento do layout, do cache ou obtido com `create_mapping`.
+
+    Args:
+        columns (list): Colunas do arquivo (ou da aba)
+        target_schema (dict): Esquema alvo do Salesforce
+        create_mapping (callable): Sem argumentos; consulta a IA e retorna o mapeamento
+            (dicionário). Mapeamentos vazios não são gravados.
+        refresh (bool): Ignora a entrada em cache e consulta a IA novamente; o novo
+            mapeamento substitui o anterior
+
+    Returns:
+        dict: Mapeamento de colunas
+    """
+    if not MAPPING_CACHE_DIR:
+        return create_mapping()
+    key = layout_key(columns, target_schema)
+    if not refresh:
+        with _lock:
+            mapping = _load(key)
+        if mapping:
+            LLM_MAPPING_CACHE.inc(result='hit')
+            logger.info(f"Mapeamento de colunas reaproveitado do cache (layout {key[:12]})")
+            return mapping
+    LLM_MAPPING_CACHE.inc(result='refresh' if refresh else 'miss')
+    mapping = create_mapping()
+    if mapping:
+        try:
+            with _lock:
+                _save(key, mapping)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o cache de mapeamento: {str(e)}")
+    return mapping
@@ -0,0 +1,198 @@
+"""
+Módulo para aplicar o mapeamento de colunas (arquivo -> Salesforce) obtido da IA.
+
+Inclui também um mapeamento heurístico (guess_column_mapping), por sinônimos
+dos cabeçalhos e pelo conteúdo das colunas, usado pelo backend local da IA
+(LLM_BACKEND=fake) em testes e benchmarks sem acesso à rede.
+"""
+import json
+import re
+import unicodedata
+import pandas as pd
+from src.utils.conversion_logger import get_conversion_logger
+
+# Configurar o logger
+logger = get_conversion_logger('column_mapping')
+
+# Campos obrigatórios do objeto Lead
+REQUIRED_LEAD_FIELDS = ["LastName", "Company"]
+
+# Sinônimos (sem acentos, em minúsculas) dos cabeçalhos de cada campo no mapeamento heurístico
+FIELD_SYNONYMS = {
+    "LastName": ["sobrenome", "ultimo nome", "last name", "lastname", "surname"],
+    "FirstName": ["nome", "primeiro nome", "first name", "firstname", "given name"],
+    "Company": ["empresa", "companhia", "organizacao", "organization", "company", "razao social", "nome fantasia",
+                "nome da empresa", "instituicao", "org", "account"],
+    "Email": ["email", "e mail", "mail", "correio eletronico", "endereco de email"],
+    "Phone": ["telefone", "celular", "fone", "tel", "whatsapp", "phone", "mobile"],
+    "Title": ["cargo", "funcao", "title", "job title", "posicao"],
+    "Street": ["endereco", "rua", "logradouro", "street", "address"],
+    "City": ["cidade", "municipio", "city"],
+    "State": ["uf", "estado", "state", "provincia"],
+    "PostalCode": ["cep", "codigo postal", "postal code", "zip", "zip code"],
+    "Country": ["pais", "country"],
+    "LeadSource": ["origem", "origem do lead", "fonte", "lead source", "canal"],
+    "OwnerId": ["proprietario", "owner", "owner id", "responsavel"],
+}
+
+# Cabeçalhos de nome completo: candidatos apenas a LastName
+FULL_NAME_SYNONYMS = ["nome completo", "full name", "nome do contato", "nome do cliente", "cliente", "name"]
+
+# Conteúdo típico das colunas sem cabeçalho reconhecido
+_EMAIL_VALUE = re.compile(r'^[^@\s]+@[^@\s]+$')
+_PHONE_VALUE = re.compile(r'^[\d\s()+.\-/]{8,20}$')
+
+
+def parse_column_mapping(raw_mapping):
+    """
+    Normaliza a resposta de mapeamento da IA para um dicionário.
+
+    Args:
+        raw_mapping (str | dict): Resposta da IA (string JSON ou dicionário)
+
+    Returns:
+        dict: Mapeamento {campo_salesforce: coluna_no_arquivo}
+
+    Raises:
+        TypeError: Se a resposta não for um JSON válido ou dicionário
+    """
+    if isinstance(raw_mapping, str):  # Se a IA retornou uma string JSON
+        return json.loads(raw_mapping)
+    if isinstance(raw_mapping, dict):  # Se já retornou um dict
+        return raw_mapping
+    raise TypeError("O mapeamento da IA não é um JSON válido ou dicionário.")
+
+
+def build_mapped_dataframe(df_full, column_mapping, target_schema):
+    """
+    Cria o DataFrame final com as colunas do Salesforce a partir do arquivo original.
+
+    Args:
+        df_full (pandas.DataFrame): Conteúdo completo do arquivo original
+        column_mapping (dict): Mapeamento {campo_salesforce: coluna_no_arquivo}
+        target_schema (dict): Esquema alvo do Salesforce (define as colunas de saída)
+
+    Returns:
+        pandas.DataFrame: DataFrame com uma coluna por campo do esquema alvo
+    """
+    final_mapped_df = pd.DataFrame(index=df_full.index)
+
+    # Adicionar colunas ao DataFrame final com base no esquema alvo
+    for sf_field in target_schema:
+        source_column_name = column_mapping.get(sf_field)
+
+        if source_column_name and source_column_name in df_full.columns:
+            final_mapped_df[sf_field] = df_full[source_column_name].astype(str).fillna('')
+            logger.debug(f"Mapeado: Salesforce '{sf_field}' <- Arquivo '{source_column_name}'")
+        else:
+            # Se a IA não mapeou ou a coluna não existe no arquivo, cria coluna vazia
+            final_mapped_df[sf_field] = ""
+            if source_column_name:
+                logger.warning(f"Coluna '{source_column_name}' (para Salesforce '{sf_field}') não encontrada no arquivo original. Será criada vazia.")
+            else:
+                logger.info(f"Salesforce '{sf_field}' não foi mapeado pela IA ou não especificado. Será criada vazia.")
+
+    # Garantir que campos obrigatórios (LastName, Company) não estejam completamente vazios se foram mapeados
+    # Se não foram mapeados, já terão sido criados como colunas vazias
+    for required_field in REQUIRED_LEAD_FIELDS:
+        if required_field in final_mapped_df:
+            # Se a coluna existe mas está cheia de NaNs ou strings vazias após o mapeamento, preenche com string vazia
+            # Isso é para evitar problemas com o Salesforce se a coluna original tinha apenas vazios
+            if final_mapped_df[required_field].isnull().all() or (final_mapped_df[required_field] == '').all():
+                final_mapped_df[required_field] = ''
+                logger.debug(f"Campo obrigatório '{required_field}' estava vazio ou nulo após mapeamento, garantindo strings vazias.")
+        else:
+            # Se por algum motivo extremo o campo obrigatório não está no DF final, adiciona como vazio.
+            final_mapped_df[required_field] = ""
+            logger.warning(f"Campo obrigatório '{required_field}' não estava no DataFrame final. Adicionado como coluna vazia.")
+
+    return final_mapped_df
+
+
+def _normalize_header(text):
+    """Cabeçalho sem acentos, em minúsculas e com palavras separadas por um espaço."""
+    folded = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', folded).split())
+
+
+def _synonym_score(header, synonyms):
+    """Pontuação do melhor sinônimo presente no cabeçalho (igualdade vale mais que contenção)."""
+    padded = f" {header} "
+    best = 0
+    for synonym in synonyms:
+        if header == synonym:
+            best = max(best, 100 + len(synonym))
+        elif f" {synonym} " in padded:
+            best = max(best, len(synonym))
+    return best
+
+
+def _content_field(values):
+    """Campo sugerido pelo conteúdo de uma coluna (Email ou Phone), ou None."""
+    values = [str(value).strip() for value in values if str(value).strip()]
+    if not values:
+        return None
+    if sum(bool(_EMAIL_VALUE.match(value)) for value in values) * 2 > len(values):
+        return "Email"
+    if sum(bool(_PHONE_VALUE.match(value)) and sum(c.isdigit() for c in value) >= 8 for value in values) * 2 > len(values):
+        return "Phone"
+    return None
+
+
+def guess_column_mapping(columns, target_schema, samples=None, extra_synonyms=None):
+    """
+    Mapeia as colunas do arquivo para os campos do Salesforce sem a IA.
+
+    Cada coluna é usada no máximo uma vez; os pares com o sinônimo mais
+    específico são atribuídos primeiro. Colunas sem cabeçalho reconhecido
+    podem ser atribuídas a Email ou Phone pelo conteúdo dos exemplos.
+
+    Args:
+        columns (list): Cabeçalhos do arquivo, exatamente como aparecem nele
+        target_schema (dict): Esquema alvo do Salesforce (as chaves são os campos)
+        samples (dict, optional): Valores de exemplo por coluna
+        extra_synonyms (dict, optional): Sinônimos adicionais por campo (ex.: campos personalizados)
+
+    Returns:
+        dict: Mapeamento {campo_salesforce: coluna_no_arquivo ou None} com todas as chaves do esquema
+    """
+    synonyms = {field: list(FIELD_SYNONYMS.get(field, [])) for field in target_schema}
+    for field, values in (extra_synonyms or {}).items():
+        if field in synonyms:
+            synonyms[field].extend(values)
+    for field in synonyms:
+        synonyms[field].append(_normalize_header(field))
+
+    headers = {column: _normalize_header(column) for column in columns}
+    full_name = {column: _synonym_score(header, FULL_NAME_SYNONYMS) for column, header in headers.items()}
+    candidates = []
+    for field, field_synonyms in synonyms.items():
+        for column, header in headers.items():
+            score = _synonym_score(header, field_synonyms)
+            if full_name[column] and field == "FirstName":
+                continue
+            if field == "LastName":
+                score = max(score, full_name[column])
+            if score:
+                candidates.append((score, field, column))
+
+    mapping = {field: None for field in target_schema}
+    used = set()
+    for score, field, column in sorted(candidates, key=lambda c: -c[0]):
+        if mapping[field] is None and column not in used:
+            mapping[field] = column
+            used.add(column)
+
+    # Apenas uma coluna de nome: vai para LastName (obrigatório)
+    if "LastName" in mapping and mapping["LastName"] is None and mapping.get("FirstName"):
+        mapping["LastName"], mapping["FirstName"] = mapping["FirstName"], None
+
+    for column in columns:
+        if column in used:
+            continue
+        field = _content_field((samples or {}).get(column, []))
+        if field in mapping and mapping[field] is None:
+            mapping[field] = column
+            used.add(column)
+
+    return mapping
@@ -0,0 +1,465 @@
+"""
+Módulo de métricas da aplicação, exportadas no formato de texto do Prometheus (rota /metrics).
+
+Os valores ficam em memória no processo. Com METRICS_MULTIPROC_DIR definido
+(vários workers, ex.: gunicorn), cada processo grava seus valores em um arquivo
+mapeado em memória (mmap) próprio, <pid>_<início em ms>.db, no diretório
+compartilhado; a exportação soma os arquivos de todos os processos. O início
+no nome impede que um pid reutilizado continue os valores de outro processo.
+
+Quando um processo termina (atexit, ou o hook child_exit do gunicorn em
+gunicorn.conf.py para workers finalizados à força), mark_process_dead
+incorpora seus contadores e histogramas ao archive.db e remove o arquivo do
+processo; os gauges consideram apenas os processos vivos. O hook on_starting
+esvazia o diretório ao (re)iniciar o servidor.
+"""
+import atexit
+import contextlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Diretório compartilhado entre os workers (vazio = métricas apenas em memória)
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+
+# Buckets padrão dos histogramas de duração (segundos)
+DEFAULT_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_INITIAL_FILE_SIZE = 64 * 1024
+
+# Contadores e histogramas somados dos processos encerrados
+ARCHIVE_FILENAME = 'archive.db'
+_LOCK_FILENAME = '.lock'
+
+
+class _MemoryStore:
+    """Valores do processo em um dicionário."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = float(value)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class _MmapStore:
+    """
+    Valores do processo em um arquivo mapeado em memória.
+
+    Layout: 8 bytes com o tamanho usado, seguidos de entradas com o tamanho da
+    chave (4 bytes), a chave em UTF-8 (alinhada em 8 bytes) e o valor (double).
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from('Q', self._map, 0)[0] or 8
+        self._positions = {key: pos for key, _, pos in _read_entries(self._map, self._used)}
+
+    def _position(self, key):
+        pos = self._positions.get(key)
+        if pos is not None:
+            return pos
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (-(4 + len(encoded)) % 8)
+        entry_size = 4 + padded + 8
+        if self._used + entry_size > len(self._map):
+            new_size = max(len(self._map) * 2, self._used + entry_size)
+            self._map.close()
+            self._file.truncate(new_size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        struct.pack_into(f'i{padded}sd', self._map, self._used, len(encoded), encoded, 0.0)
+        pos = self._used + 4 + padded
+        self._used += entry_size
+        struct.pack_into('Q', self._map, 0, self._used)
+        self._positions[key] = pos
+        return pos
+
+    def inc(self, key, amount):
+        with self._lock:
+            pos = self._position(key)
+            struct.pack_into('d', self._map, pos, struct.unpack_from('d', self._map, pos)[0] + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            struct.pack_into('d', self._map, self._position(key), float(value))
+
+    def items(self):
+        with self._lock:
+            return [(key, value) for key, value, _ in _read_entries(self._map, self._used)]
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            self._file.close()
+
+
+def _read_entries(data, used):
+    """Lê as entradas (chave, valor, posição do valor) de um arquivo de métricas."""
+    pos = 8
+    while pos < used:
+        key_length = struct.unpack_from('i', data, pos)[0]
+        padded = key_length + (-(4 + key_length) % 8)
+        key = bytes(data[pos + 4:pos + 4 + key_length]).decode('utf-8')
+        value_pos = pos + 4 + padded
+        yield key, struct.unpack_from('d', data, value_pos)[0], value_pos
+        pos = value_pos + 8
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 8:
+        return []
+    return [(key, value) for key, value, _ in _read_entries(data, struct.unpack_from('Q', data, 0)[0])]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    """Store do processo atual (recriado após fork)."""
+    global _store, _store_pid
+    pid = os.getpid()
+    if _store_pid != pid:
+        with _store_lock:
+            if _store_pid != pid:
+                if METRICS_MULTIPROC_DIR:
+                    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+                    filename = f"{pid}_{int(time.time() * 1000)}.db"
+                    _store = _MmapStore(os.path.join(METRICS_MULTIPROC_DIR, filename))
+                else:
+                    _store = _MemoryStore()
+                _store_pid = pid
+    return _store
+
+
+def _sample_key(sample_name, labels):
+    return f"{sample_name}|{json.dumps(labels, sort_keys=True, separators=(',', ':'))}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Labels inválidos para {self.name}: {sorted(labels)} (esperado {list(self.labelnames)})")
+        return {name: str(value) for name, value in labels.items()}
+
+
+class Counter(_Metric):
+    """Contador monotônico."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Contadores só podem ser incrementados")
+        _get_store().inc(_sample_key(f"{self.name}_total", self._labels(labels)), amount)
+
+
+class Gauge(_Metric):
+    """
+    Valor que sobe e desce. Em modo multi-processo, os valores dos processos
+    vivos são somados (mode='sum') ou o maior/menor é usado (mode='max'/'min').
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), mode='sum'):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode
+        self._function = None
+
+    def inc(self, amount=1, **labels):
+        _get_store().inc(_sample_key(self.name, self._labels(labels)), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        _get_store().set(_sample_key(self.name, self._labels(labels)), value)
+
+    def set_function(self, function):
+        """Calcula o valor (sem labels) no momento da exportação."""
+        self._function = function
+
+
+class Histogram(_Metric):
+    """Distribuição de valores em buckets cumulativos."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        store = _get_store()
+        for bound in self.buckets:
+            store.inc(_sample_key(f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}), 1 if value <= bound else 0)
+        store.inc(_sample_key(f"{self.name}_bucket", {**labels, 'le': '+Inf'}), 1)
+        store.inc(_sample_key(f"{self.name}_count", labels), 1)
+        store.inc(_sample_key(f"{self.name}_sum", labels), value)
+
+
+_registry = []
+
+
+@contextlib.contextmanager
+def _directory_lock(directory, exclusive):
+    """Trava do diretório compartilhado: leitores (exportação) x incorporação ao archive.db."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, _LOCK_FILENAME), 'a+b') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _file_pid(filename):
+    """Pid do processo dono do arquivo <pid>_<início>.db (None para o archive.db)."""
+    if filename == ARCHIVE_FILENAME:
+        return None
+    return int(filename[:-3].split('_', 1)[0])
+
+
+def _collect_values():
+    """Valores de todas as amostras, combinados entre os processos."""
+    if not METRICS_MULTIPROC_DIR:
+        return {key: value for key, value in _get_store().items()}
+
+    _get_store()
+    gauges = {metric.name: metric for metric in _registry if metric.kind == 'gauge'}
+    values = {}
+    with _directory_lock(METRICS_MULTIPROC_DIR, exclusive=False):
+        for filename in os.listdir(METRICS_MULTIPROC_DIR):
+            if not filename.endswith('.db'):
+                continue
+            try:
+                pid = _file_pid(filename)
+                entries = _read_file(os.path.join(METRICS_MULTIPROC_DIR, filename))
+            except (ValueError, OSError, struct.error):
+                continue
+            alive = None
+            for key, value in entries:
+                gauge = gauges.get(key.split('|', 1)[0])
+                if gauge is not None:
+                    if pid is None:
+                        continue
+                    if alive is None:
+                        alive = _pid_alive(pid)
+                    if not alive:
+                        continue
+                    if gauge.mode in ('max', 'min'):
+                        combine = max if gauge.mode == 'max' else min
+                        values[key] = combine(values.get(key, value), value)
+                        continue
+                values[key] = values.get(key, 0.0) + value
+    return values
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Incorpora as métricas de um processo encerrado ao archive.db e remove seus arquivos.
+
+    Chamado no atexit do próprio processo e pelo hook child_exit do gunicorn
+    (gunicorn.conf.py); chamadas repetidas para o mesmo pid não têm efeito.
+    Os gauges do processo são descartados.
+
+    Args:
+        pid (int): Pid do processo encerrado
+        directory (str, optional): Diretório das métricas (padrão: METRICS_MULTIPROC_DIR)
+    """
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+    gauges = {metric.name for metric in _registry if metric.kind == 'gauge'}
+    with _directory_lock(directory, exclusive=True):
+        filenames = [name for name in os.listdir(directory)
+                     if name.endswith('.db') and name.startswith(f"{pid}_")]
+        if not filenames:
+            return
+        archive = _MmapStore(os.path.join(directory, ARCHIVE_FILENAME))
+        try:
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    entries = _read_file(path)
+                except (OSError, struct.error):
+                    entries = []
+                for key, value in entries:
+                    if key.split('|', 1)[0] not in gauges:
+                        archive.inc(key, value)
+                os.remove(path)
+        finally:
+            archive.close()
+
+
+def reset_multiprocess_dir(directory=None):
+    """Remove os arquivos de métricas de execuções anteriores (hook on_starting do gunicorn)."""
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+    with _directory_lock(directory, exclusive=True):
+        for filename in os.listdir(directory):
+            if filename.endswith('.db'):
+                os.remove(os.path.join(directory, filename))
+
+
+def _mark_current_process_dead():
+    """atexit: incorpora as métricas deste processo (o store herdado de um fork não é dele)."""
+    global _store
+    if isinstance(_store, _MmapStore) and _store_pid == os.getpid():
+        store, _store = _store, _MemoryStore()
+        store.close()
+        mark_process_dead(_store_pid)
+
+
+atexit.register(_mark_current_process_dead)
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample_line(key, value):
+    sample_name, labels_json = key.split('|', 1)
+    labels = json.loads(labels_json)
+    if labels:
+        label_str = ','.join(f'{name}="{_escape(label_value)}"' for name, label_value in labels.items())
+        return f"{sample_name}{{{label_str}}} {_format_value(value)}"
+    return f"{sample_name} {_format_value(value)}"
+
+
+def generate_latest():
+    """
+    Gera o texto de exposição do Prometheus com todas as métricas registradas.
+
+    Returns:
+        str: Métricas no formato text/plain; version=0.0.4
+    """
+    values = _collect_values()
+    by_metric = {}
+    for key, value in values.items():
+        by_metric.setdefault(key.split('|', 1)[0], []).append((key, value))
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind == 'gauge' and metric._function is not None:
+            try:
+                lines.append(f"{metric.name} {_format_value(metric._function())}")
+            except Exception:
+                pass
+            continue
+        if metric.kind == 'counter':
+            sample_names = [f"{metric.name}_total"]
+        elif metric.kind == 'histogram':
+            sample_names = [f"{metric.name}_bucket", f"{metric.name}_count", f"{metric.name}_sum"]
+        else:
+            sample_names = [metric.name]
+        for sample_name in sample_names:
+            for key, value in sorted(by_metric.get(sample_name, []), key=lambda item: _bucket_sort_key(item[0])):
+                lines.append(_sample_line(key, value))
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_sort_key(key):
+    labels = json.loads(key.split('|', 1)[1])
+    bound = labels.pop('le', None)
+    order = float('inf') if bound == '+Inf' else float(bound) if bound is not None else 0.0
+    return json.dumps(labels, sort_keys=True), order
+
+
+# Métricas da aplicação
+
+UPLOADS_IN_FLIGHT = Gauge('upload_jobs_in_flight', 'Uploads em processamento no momento')
+UPLOAD_QUEUE_DEPTH = Gauge('upload_queue_depth', 'Uploads em partes iniciados e ainda não concluídos')
+UPLOAD_JOBS = Counter('upload_jobs', 'Jobs de upload finalizados por status', ['status'])
+ROWS_PROCESSED = Counter('upload_rows_processed', 'Linhas de leads processadas')
+UPLOAD_ROWS_PER_SECOND = Histogram(
+    'upload_rows_per_second', 'Vazão (linhas por segundo) de cada job de upload',
+    buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+)
+STAGE_DURATION = Histogram('upload_stage_duration_seconds', 'Duração de cada etapa do processamento', ['stage'])
+BULK_JOBS = Counter('salesforce_bulk_jobs', 'Jobs da Bulk API por estado final', ['state'])
+RECORDS = Counter('salesforce_records', 'Registros enviados ao Salesforce por resultado', ['result'])
+SALESFORCE_API_REQUESTS = Counter(
+    'salesforce_api_requests', 'Requisições à API do Salesforce', ['method', 'resource', 'status']
+)
+SALESFORCE_API_RETRIES = Counter(
+    'salesforce_api_retries', 'Novas tentativas de requisições ao Salesforce por motivo', ['resource', 'reason']
+)
+FAILED_RECORDS = Counter(
+    'salesforce_failed_records', 'Registros com falha na Bulk API por categoria e tratamento', ['category', 'action']
+)
+VALIDATION_ISSUES = Counter(
+    'lead_validation_issues', 'Problemas encontrados na validação dos leads antes do envio', ['field', 'issue', 'action']
+)
+DUPLICATES_REMOVED = Counter('lead_duplicates_removed', 'Linhas duplicadas removidas antes do envio', ['policy'])
+UNCHANGED_ROWS_SKIPPED = Counter('import_unchanged_rows_skipped', 'Linhas já importadas da mesma origem, sem alteração')
+TOKEN_REFRESHES = Counter('salesforce_token_refreshes', 'Obtenções de token OAuth do Salesforce', ['environment', 'outcome'])
+SALESFORCE_LIMIT_MAX = Gauge('salesforce_limit_max', 'Valor máximo de cada limite da org', ['limit'], mode='max')
+SALESFORCE_LIMIT_REMAINING = Gauge(
+    'salesforce_limit_remaining', 'Valor restante de cada limite da org (último lido)', ['limit'], mode='min'
+)
+INGEST_THROTTLE = Counter(
+    'salesforce_ingest_throttle', 'Solicitações de novos jobs de ingestão por resultado do throttle', ['outcome']
+)
+INGEST_THROTTLE_WAIT = Histogram(
+    'salesforce_ingest_throttle_wait_seconds', 'Espera imposta pelo throttle antes de criar um job de ingestão'
+)
+LLM_REQUEST_DURATION = Histogram('llm_request_duration_seconds', 'Duração das chamadas à IA', ['operation', 'outcome'])
+LLM_MAPPING_CACHE = Counter(
+    'llm_mapping_cache', 'Consultas ao cache de mapeamentos por layout de cabeçalho: reaproveitados (hit), obtidos da IA (miss) ou refeitos a pedido do usuário (refresh)',
+    ['result']
+)
@@ -0,0 +1,104 @@
+"""
+Módulo de logging das requisições HTTP recebidas pela aplicação Flask.
+
+Registra método, rota, status e duração de cada requisição. Cabeçalhos e corpo
+só são registrados em nível DEBUG, com limites de tamanho: o corpo é lido apenas
+em rotas marcadas com @log_request_body, para tipos de conteúdo textuais e
+abaixo de REQUEST_LOG_BODY_READ_LIMIT bytes. Uploads (multipart e binários)
+nunca são lidos pelo middleware, então o arquivo não é carregado em memória
+uma segunda vez.
+
+Cada requisição recebe um id de correlação (cabeçalho X-Request-ID do cliente
+ou um novo id), incluído em todos os logs emitidos durante a requisição e
+devolvido no cabeçalho X-Request-ID da resposta.
+"""
+import logging
+import os
+import re
+import time
+from flask import g, request
+from src.utils.log_context import new_correlation_id, get_correlation_id, set_correlation_id, reset_correlation_id
+
+# Quantidade máxima de caracteres do corpo incluída no log
+REQUEST_LOG_BODY_MAX_CHARS = int(os.getenv('REQUEST_LOG_BODY_MAX_CHARS', '2048'))
+
+# Corpos maiores que este limite (Content-Length) não são lidos para o log
+REQUEST_LOG_BODY_READ_LIMIT = int(os.getenv('REQUEST_LOG_BODY_READ_LIMIT', str(64 * 1024)))
+
+# Tipos de conteúdo cujo corpo pode ser amostrado
+LOGGABLE_BODY_MIMETYPES = ('application/json', 'application/x-www-form-urlencoded', 'text/plain')
+
+# Ids de correlação aceitos do cliente (X-Request-ID)
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Cabeçalhos omitidos do log
+SENSITIVE_HEADERS = {'authorization', 'cookie', 'proxy-authorization', 'x-api-key'}
+
+
+def log_request_body(view):
+    """Decorador que habilita o registro (amostrado) do corpo da requisição para a rota."""
+    view.log_request_body = True
+    return view
+
+
+def _body_summary(app):
+    """Descreve o corpo da requisição sem ler uploads ou corpos grandes."""
+    mimetype = request.mimetype or 'sem tipo'
+    length = request.content_length
+    view = app.view_functions.get(request.endpoint)
+
+    if not getattr(view, 'log_request_body', False):
+        return f"<{mimetype}, {length if length is not None else '?'} bytes>"
+    if mimetype not in LOGGABLE_BODY_MIMETYPES:
+        return f"<{mimetype}, {length if length is not None else '?'} bytes, não registrado>"
+    if length is None or length > REQUEST_LOG_BODY_READ_LIMIT:
+        return f"<{mimetype}, {length if length is not None else '?'} bytes, acima do limite de leitura>"
+
+    # cache=True mantém o corpo disponível para a rota (request.get_json / request.form)
+    body = request.get_data(cache=True).decode('utf-8', errors='replace')
+    if len(body) > REQUEST_LOG_BODY_MAX_CHARS:
+        return f"{body[:REQUEST_LOG_BODY_MAX_CHARS]}... (+{len(body) - REQUEST_LOG_BODY_MAX_CHARS} caracteres)"
+    return body
+
+
+def init_request_logging(app, logger):
+    """
+    Registra os hooks de logging de requisições na aplicação.
+
+    Args:
+        app (Flask): Aplicação Flask
+        logger: Logger com a interface de SalesforceLogger/ConversionLogger
+    """
+
+    @app.before_request
+    def _log_request_start():
+        g.request_started_at = time.perf_counter()
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = new_correlation_id()
+        g.correlation_token = set_correlation_id(request_id)
+        logger.info("Request: %s %s", request.method, request.full_path if request.query_string else request.path)
+        if logger.is_enabled_for(logging.DEBUG):
+            headers = {k: v for k, v in request.headers.items() if k.lower() not in SENSITIVE_HEADERS}
+            logger.debug("Headers: %s", headers)
+            logger.debug("Body: %s", _body_summary(app))
+
+    @app.after_request
+    def _log_request_end(response):
+        started_at = g.pop('request_started_at', None)
+        duration_ms = (time.perf_counter() - started_at) * 1000 if started_at is not None else -1
+        logger.info(
+            "Response: %s %s -> %s (duration_ms=%.1f, response_bytes=%s)",
+            request.method, request.path, response.status_code, duration_ms,
+            response.content_length if response.content_length is not None else '?',
+            extra={'stage': 'http_request', 'duration_ms': round(duration_ms, 1)}
+        )
+        if get_correlation_id():
+            response.headers['X-Request-ID'] = get_correlation_id()
+        return response
+
+    @app.teardown_request
+    def _reset_correlation_id(exc):
+        token = g.pop('correlation_token', None)
+        if token is not None:
+            reset_correlation_id(token)
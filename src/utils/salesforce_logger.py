@@ -6,12 +6,12 @@ em operações de integração com o Salesforce.
 """
 
 import os
-import json
 import logging
 import re
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from src.utils.log_format import compact_json
+from src.utils.log_queue import get_queue_handler
 
 # Diretório para armazenar os logs específicos do Salesforce
 SALESFORCE_LOG_DIR = os.path.join(
@@ -42,12 +42,37 @@ MAX_LOG_SIZE = 5 * 1024 * 1024
 # Número de backups a manter
 BACKUP_COUNT = 5
 
-# Padrões de sensibilidade para mascaramento
-SENSITIVE_PATTERNS = {
-    'token': re.compile(r'(token|Bearer)["\'\s:=]+([^"\'&]+)', re.IGNORECASE),
-    'password': re.compile(r'(password|senha)["\'\s:=]+([^"\'&]+)', re.IGNORECASE),
-    'key': re.compile(r'(key|chave|secret)["\'\s:=]+([^"\'&]+)', re.IGNORECASE)
-}
+# Nível mínimo dos loggers (mensagens abaixo dele não são formatadas)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+
+# Padrão único (tokens, senhas e chaves) para mascaramento em uma só passada: apenas valores
+# atribuídos (chave=valor, "chave": "valor") ou após Bearer, para não mascarar texto comum
+# ("token de acesso"); o valor vai até o próximo espaço, aspas ou delimitador
+SENSITIVE_PATTERN = re.compile(
+    r'(Bearer\s+|(?:token|password|senha|key|chave|secret)["\']?\s*[:=]\s*["\']?)([^"\'&\s,;)}\]]+)',
+    re.IGNORECASE
+)
+
+
+def _mask_match(match):
+    return f'{match.group(1)}***'
+
+
+def _prepare_record(record):
+    """
+    Mascara dados sensíveis (na mensagem e no stack trace) e define o contexto do registro.
+
+    Executado na thread de gravação dos logs, apenas para registros emitidos;
+    a mensagem já chega com os argumentos resolvidos (ver log_queue).
+    """
+    record.log_context = {
+        'environment': ENVIRONMENT,
+        'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+        'caller': record.name
+    }
+    record.msg = SENSITIVE_PATTERN.sub(_mask_match, record.msg)
+    if record.exc_text:
+        record.exc_text = SENSITIVE_PATTERN.sub(_mask_match, record.exc_text)
 
 class SalesforceLogger:
     """
@@ -63,7 +88,7 @@ class SalesforceLogger:
             name (str): Nome do logger, usado para identificar a fonte dos logs.
         """
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(LOG_LEVEL)
         self.name = name
         
         # Evita duplicação de handlers se o logger já estiver configurado
@@ -71,126 +96,58 @@ class SalesforceLogger:
             self._setup_handlers()
     
     def _setup_handlers(self):
-        """Configura os handlers para os diferentes arquivos de log."""
-        # Formato padrão para logs
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] [%(name)s] - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        # Handler para o log principal
-        main_handler = RotatingFileHandler(
-            LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        main_handler.setLevel(logging.INFO)
-        main_handler.setFormatter(formatter)
-        self.logger.addHandler(main_handler)
-        
-        # Handler para requisições
-        request_handler = RotatingFileHandler(
-            REQUEST_LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        request_handler.setLevel(logging.DEBUG)
-        request_handler.setFormatter(formatter)
-        self.logger.addHandler(request_handler)
-        
-        # Handler para erros específicos do Salesforce
-        error_handler = RotatingFileHandler(
-            ERROR_LOG_FILE, 
-            maxBytes=MAX_LOG_SIZE, 
-            backupCount=BACKUP_COUNT
-        )
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(formatter)
-        self.logger.addHandler(error_handler)
-        
-        # Handler para console - útil durante desenvolvimento
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-    
-    def _mask_sensitive_data(self, message):
         """
-        Mascara dados sensíveis como tokens, senhas e chaves.
-        
-        Args:
-            message (str): Mensagem original a ser mascarada.
-            
-        Returns:
-            str: Mensagem com dados sensíveis mascarados.
+        Conecta o logger à fila de logging compartilhada.
+
+        Os arquivos são gravados por um único handler por arquivo em uma thread
+        de fundo (ver src/utils/log_queue.py).
         """
-        if not isinstance(message, str):
-            return message
-            
-        masked_message = message
-        
-        for pattern_name, pattern in SENSITIVE_PATTERNS.items():
-            masked_message = pattern.sub(
-                lambda m: f'{m.group(1)}{m.group(1)[0]}***{m.group(1)[0]}', 
-                masked_message
-            )
-        
-        return masked_message
+        self.logger.addHandler(get_queue_handler(
+            'salesforce',
+            [
+                (LOG_FILE, logging.INFO),            # Log principal
+                (REQUEST_LOG_FILE, logging.DEBUG),   # Requisições
+                (ERROR_LOG_FILE, logging.ERROR)      # Erros específicos do Salesforce
+            ],
+            MAX_LOG_SIZE,
+            BACKUP_COUNT,
+            preparer=_prepare_record
+        ))
     
-    def _format_with_context(self, message):
-        """
-        Adiciona contexto à mensagem de log.
-        
-        Args:
-            message (str): Mensagem original.
-            
-        Returns:
-            str: Mensagem formatada com contexto adicional.
-        """
-        context = {
-            'environment': ENVIRONMENT,
-            'timestamp': datetime.now().isoformat(),
-            'caller': self.name
-        }
-        
-        context_str = ' | '.join([f"{k}={v}" for k, v in context.items()])
-        return f"[{context_str}] {message}"
+    def _log(self, level, message, args, kwargs):
+        # O contexto e o mascaramento são aplicados na thread de gravação (ver _prepare_record).
+        # Campos estruturados (stage, duration_ms, correlation_id) podem ser passados em extra={...}
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, *args, stacklevel=3, **kwargs)
+    
+    def is_enabled_for(self, level):
+        """Indica se mensagens do nível informado serão registradas."""
+        return self.logger.isEnabledFor(level)
     
-    def debug(self, message):
-        """Registra mensagem de nível DEBUG."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.debug(formatted_message)
+    def debug(self, message, *args, **kwargs):
+        """Registra mensagem de nível DEBUG (argumentos no estilo % são formatados apenas se emitida)."""
+        self._log(logging.DEBUG, message, args, kwargs)
     
-    def info(self, message):
+    def info(self, message, *args, **kwargs):
         """Registra mensagem de nível INFO."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.info(formatted_message)
+        self._log(logging.INFO, message, args, kwargs)
     
-    def warning(self, message):
+    def warning(self, message, *args, **kwargs):
         """Registra mensagem de nível WARNING."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.warning(formatted_message)
+        self._log(logging.WARNING, message, args, kwargs)
     
-    def error(self, message):
+    def error(self, message, *args, **kwargs):
         """Registra mensagem de nível ERROR."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.error(formatted_message)
+        self._log(logging.ERROR, message, args, kwargs)
     
-    def exception(self, message):
+    def exception(self, message, *args, **kwargs):
         """Registra mensagem de exceção com stack trace."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.exception(formatted_message)
+        kwargs.setdefault('exc_info', True)
+        self._log(logging.ERROR, message, args, kwargs)
     
-    def critical(self, message):
+    def critical(self, message, *args, **kwargs):
         """Registra mensagem de nível CRITICAL."""
-        safe_message = self._mask_sensitive_data(message)
-        formatted_message = self._format_with_context(safe_message)
-        self.logger.critical(formatted_message)
+        self._log(logging.CRITICAL, message, args, kwargs)
     
     def log_request(self, url, method, headers, data=None, params=None):
         """
@@ -203,6 +160,9 @@ class SalesforceLogger:
             data (dict, opcional): Corpo da requisição
             params (dict, opcional): Parâmetros de query string
         """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         # Faz cópias para não modificar os originais
         safe_headers = headers.copy() if headers else {}
         safe_data = data.copy() if data else {}
@@ -228,11 +188,11 @@ class SalesforceLogger:
         
         # Serializa para JSON
         try:
-            request_json = json.dumps(request_info, indent=2)
+            request_json = compact_json(request_info)
         except:
             request_json = f"Non-serializable request: {str(request_info)}"
         
-        self.debug(f"SALESFORCE HTTP REQUEST:\n{request_json}")
+        self.debug("SALESFORCE HTTP REQUEST: %s", request_json)
     
     def log_response(self, response, request_duration=None):
         """
@@ -243,6 +203,19 @@ class SalesforceLogger:
             request_duration (float, opcional): Duração da requisição em segundos
         """
         try:
+            # Nível apropriado baseado no status code
+            if 200 <= response.status_code < 300:
+                level, title = logging.DEBUG, "SALESFORCE HTTP RESPONSE"
+            elif 400 <= response.status_code < 500:
+                level, title = logging.WARNING, "SALESFORCE HTTP RESPONSE (CLIENT ERROR)"
+            elif response.status_code >= 500:
+                level, title = logging.ERROR, "SALESFORCE HTTP RESPONSE (SERVER ERROR)"
+            else:
+                level, title = logging.INFO, "SALESFORCE HTTP RESPONSE (UNUSUAL STATUS CODE)"
+            
+            if not self.logger.isEnabledFor(level):
+                return
+            
             # Tenta extrair o conteúdo JSON
             try:
                 content = response.json()
@@ -262,19 +235,12 @@ class SalesforceLogger:
             
             # Serializa para JSON
             try:
-                response_json = json.dumps(response_info, indent=2)
+                response_json = compact_json(response_info)
             except:
                 response_json = f"Non-serializable response: {str(response_info)}"
             
-            # Log com nível apropriado baseado no status code
-            if 200 <= response.status_code < 300:
-                self.debug(f"SALESFORCE HTTP RESPONSE:\n{response_json}")
-            elif 400 <= response.status_code < 500:
-                self.warning(f"SALESFORCE HTTP RESPONSE (CLIENT ERROR):\n{response_json}")
-            elif response.status_code >= 500:
-                self.error(f"SALESFORCE HTTP RESPONSE (SERVER ERROR):\n{response_json}")
-            else:
-                self.info(f"SALESFORCE HTTP RESPONSE (UNUSUAL STATUS CODE):\n{response_json}")
+            extra = {'duration_ms': round(request_duration * 1000, 1)} if request_duration else {}
+            self._log(level, "%s: %s", (title, response_json), {'extra': extra})
         
         except Exception as e:
             self.error(f"Erro ao logar resposta HTTP: {str(e)}")
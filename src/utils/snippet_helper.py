@@ -0,0 +1,168 @@
+"""
+Módulo para montar o snippet do arquivo que é enviado à IA no mapeamento de colunas.
+
+Em vez de enviar as primeiras linhas cruas do arquivo, o snippet é montado com
+exemplos distintos e não vazios de cada coluna, amostrados ao longo do arquivo,
+com as células truncadas e respeitando um orçamento de tokens.
+"""
+import csv
+import io
+import os
+import pandas as pd
+
+# Número de linhas lidas do início do arquivo para formar o conjunto de amostragem
+SNIPPET_POOL_ROWS = 200
+
+# Pontos de amostragem adicionais ao longo de arquivos CSV grandes
+SNIPPET_CSV_PROBES = 4
+SNIPPET_CSV_ROWS_PER_PROBE = 25
+
+# Abaixo deste tamanho o conjunto inicial já cobre o arquivo inteiro
+SNIPPET_CSV_PROBE_MIN_BYTES = 256 * 1024
+
+# Limites do snippet final
+SNIPPET_MAX_EXAMPLES = 5
+SNIPPET_MAX_CELL_LENGTH = 60
+SNIPPET_MIN_CELL_LENGTH = 12
+SNIPPET_TOKEN_BUDGET = 1500
+
+# Estimativa grosseira usada para o orçamento (tokens ~ caracteres / 4)
+CHARS_PER_TOKEN = 4
+
+# Valores que representam célula vazia depois da conversão para string
+EMPTY_VALUES = {'', 'nan', 'NaN', 'None', 'NaT', '<NA>'}
+
+
+def estimate_tokens(text):
+    """Estima a quantidade de tokens de um texto para fins de orçamento."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def spread_indices(total, count):
+    """
+    Retorna até `count` índices distribuídos uniformemente em range(total),
+    sempre incluindo o primeiro e, quando possível, o último.
+    """
+    if total <= 0 or count <= 0:
+        return []
+    if count >= total:
+        return list(range(total))
+    if count == 1:
+        return [0]
+    step = (total - 1) / (count - 1)
+    return sorted({int(round(i * step)) for i in range(count)})
+
+
+def truncate_cell(value, max_length):
+    """Normaliza espaços de uma célula e a trunca para `max_length` caracteres."""
+    text = ' '.join(str(value).split())
+    if len(text) > max_length:
+        return text[:max_length - 1] + '…'
+    return text
+
+
+def sample_csv_rows(csv_path, sep, encoding, columns,
+                    probes=SNIPPET_CSV_PROBES, rows_per_probe=SNIPPET_CSV_ROWS_PER_PROBE):
+    """
+    Lê pequenos blocos de linhas em pontos espalhados de um arquivo CSV,
+    sem percorrer o arquivo inteiro.
+
+    Args:
+        csv_path (str): Caminho do arquivo CSV
+        sep (str): Delimitador já detectado
+        encoding (str): Encoding já detectado
+        columns (list): Cabeçalho do arquivo, usado para nomear as colunas dos blocos
+        probes (int): Quantidade de pontos de amostragem
+        rows_per_probe (int): Linhas lidas em cada ponto
+
+    Returns:
+        pandas.DataFrame: Linhas amostradas (pode estar vazio)
+    """
+    file_size = os.path.getsize(csv_path)
+    if file_size < SNIPPET_CSV_PROBE_MIN_BYTES or probes <= 0:
+        return pd.DataFrame(columns=columns)
+
+    blocks = []
+    with open(csv_path, 'rb') as f:
+        for i in range(1, probes + 1):
+            f.seek(int(file_size * i / (probes + 1)))
+            f.readline()  # Descarta a linha parcial no ponto de busca
+            lines = [f.readline() for _ in range(rows_per_probe)]
+            blocks.append(b''.join(line for line in lines if line))
+
+    text = b''.join(blocks).decode(encoding, errors='replace')
+    if not text.strip():
+        return pd.DataFrame(columns=columns)
+
+    return pd.read_csv(
+        io.StringIO(text), sep=sep, header=None, names=columns,
+        dtype=str, on_bad_lines='skip', engine='python'
+    )
+
+
+def _column_examples(series, max_examples, max_cell_length):
+    """Seleciona exemplos distintos e não vazios de uma coluna, espalhados pela amostra."""
+    values = series.dropna().astype(str).str.strip()
+    values = values[~values.isin(EMPTY_VALUES)]
+    if values.empty:
+        return []
+    uniques = pd.unique(values.map(lambda v: truncate_cell(v, max_cell_length)))
+    return [uniques[i] for i in spread_indices(len(uniques), max_examples)]
+
+
+def _render_snippet(columns, examples, sep, max_rows):
+    """Monta o texto CSV do snippet com o cabeçalho e até `max_rows` linhas de exemplo."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=sep, lineterminator='\n')
+    writer.writerow(columns)
+    for row_idx in range(max_rows):
+        writer.writerow([
+            col_examples[row_idx] if row_idx < len(col_examples) else ''
+            for col_examples in examples
+        ])
+    return buffer.getvalue()
+
+
+def build_ai_snippet(df, max_examples=SNIPPET_MAX_EXAMPLES, max_cell_length=SNIPPET_MAX_CELL_LENGTH,
+                     token_budget=SNIPPET_TOKEN_BUDGET, sep=';'):
+    """
+    Monta o snippet do arquivo para o prompt de mapeamento de colunas da IA.
+
+    O cabeçalho é preservado integralmente (a IA precisa devolver os nomes exatos
+    das colunas). Cada linha seguinte traz, por coluna, um exemplo distinto e não
+    vazio. Se o resultado exceder o orçamento de tokens, as células são truncadas
+    de forma mais agressiva e, por fim, linhas de exemplo são descartadas.
+
+    Args:
+        df (pandas.DataFrame): Conjunto de linhas amostradas do arquivo
+        max_examples (int): Máximo de exemplos por coluna
+        max_cell_length (int): Tamanho máximo inicial de cada célula
+        token_budget (int): Orçamento aproximado de tokens do snippet
+        sep (str): Separador usado no snippet
+
+    Returns:
+        str: Snippet em formato CSV
+    """
+    columns = [str(col) for col in df.columns]
+    cell_length = max_cell_length
+
+    while True:
+        examples = [
+            _column_examples(df.iloc[:, pos], max_examples, cell_length)
+            for pos in range(len(columns))
+        ]
+        rows = max((len(col_examples) for col_examples in examples), default=0)
+        at_min_length = cell_length <= SNIPPET_MIN_CELL_LENGTH
+
+        # Descarta linhas de exemplo até caber no orçamento, mantendo ao menos duas
+        # enquanto ainda for possível truncar mais as células
+        min_rows = 1 if at_min_length else min(2, rows)
+        for candidate_rows in range(rows, min_rows - 1, -1):
+            snippet = _render_snippet(columns, examples, sep, candidate_rows)
+            if estimate_tokens(snippet) <= token_budget:
+                return snippet
+
+        if at_min_length:
+            # Nada coube no orçamento: envia ao menos o cabeçalho e uma linha de exemplo
+            return _render_snippet(columns, examples, sep, min(1, rows))
+        cell_length = max(SNIPPET_MIN_CELL_LENGTH, cell_length // 2)
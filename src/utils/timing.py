@@ -0,0 +1,178 @@
+"""
+Módulo de medição de tempo por etapa do processamento de uploads.
+
+Cada etapa é medida com `span('nome_da_etapa')`. Dentro de `track_job`, as
+medições são registradas no job atual (para a página de resultado e o
+armazenamento de jobs); todas as medições também alimentam histogramas
+agregados por etapa, consultáveis com `get_stage_histograms`.
+
+O job atual fica em uma contextvar: para etapas executadas em threads de
+pools, use run_in_context ao submeter as tarefas.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from src.utils.conversion_logger import get_conversion_logger
+from src.utils.log_context import stage_scope
+from src.utils.metrics import STAGE_DURATION
+
+logger = get_conversion_logger('timing')
+
+# Limites superiores (ms) dos buckets dos histogramas por etapa
+HISTOGRAM_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+
+_current_job = contextvars.ContextVar('job_timings', default=None)
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+class JobTimings:
+    """Medições de tempo das etapas de um job."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, stage, started, duration_ms, fields=None):
+        span_data = {
+            'stage': stage,
+            'start_offset_ms': round((started - self._t0) * 1000, 1),
+            'duration_ms': round(duration_ms, 1)
+        }
+        if fields:
+            span_data.update(fields)
+        with self._lock:
+            self._spans.append(span_data)
+
+    def spans(self):
+        """Lista das medições, na ordem de término."""
+        with self._lock:
+            return list(self._spans)
+
+    def elapsed_ms(self):
+        """Tempo decorrido desde o início do job."""
+        return round((time.perf_counter() - self._t0) * 1000, 1)
+
+    def stage_totals(self):
+        """
+        Totais por etapa, na ordem da primeira ocorrência.
+
+        Returns:
+            list: Dicionários com stage, count e total_ms
+        """
+        totals = {}
+        for span_data in self.spans():
+            entry = totals.setdefault(span_data['stage'], {'stage': span_data['stage'], 'count': 0, 'total_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + span_data['duration_ms'], 1)
+        return list(totals.values())
+
+    def as_dict(self):
+        return {
+            'job_id': self.job_id,
+            'started_at': self.started_at,
+            'elapsed_ms': self.elapsed_ms(),
+            'stages': self.stage_totals(),
+            'spans': self.spans()
+        }
+
+
+def current_job_timings():
+    """Retorna as medições do job atual (ou None fora de track_job)."""
+    return _current_job.get()
+
+
+@contextmanager
+def track_job(job_id):
+    """Registra as medições feitas durante o bloco em um novo JobTimings."""
+    timings = JobTimings(job_id)
+    token = _current_job.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_job.reset(token)
+
+
+def _observe(stage, duration_ms):
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = {
+                'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1), 'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0
+            }
+        index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if duration_ms <= bound), len(HISTOGRAM_BUCKETS_MS))
+        histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum_ms'] += duration_ms
+        histogram['max_ms'] = max(histogram['max_ms'], duration_ms)
+    STAGE_DURATION.observe(duration_ms / 1000, stage=stage)
+
+
+def get_stage_histograms():
+    """
+    Histogramas agregados das durações por etapa desde o início do processo.
+
+    Returns:
+        dict: Por etapa, count, sum_ms, max_ms e buckets (contagens acumuladas
+            por limite superior em ms, com '+Inf' para o total)
+    """
+    with _histograms_lock:
+        snapshot = {}
+        for stage, histogram in _histograms.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(HISTOGRAM_BUCKETS_MS, histogram['buckets']):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets['+Inf'] = histogram['count']
+            snapshot[stage] = {
+                'count': histogram['count'],
+                'sum_ms': round(histogram['sum_ms'], 1),
+                'max_ms': round(histogram['max_ms'], 1),
+                'buckets': buckets
+            }
+        return snapshot
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Mede a duração de uma etapa.
+
+    O dicionário retornado pode receber campos adicionais durante o bloco
+    (ex.: quantidade de linhas), gravados junto com a medição no job atual.
+
+    Args:
+        stage (str): Nome da etapa
+        **fields: Campos adicionais da medição
+    """
+    span_fields = dict(fields)
+    started = time.perf_counter()
+    try:
+        with stage_scope(stage):
+            yield span_fields
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        _observe(stage, duration_ms)
+        timings = _current_job.get()
+        if timings is not None:
+            timings.add_span(stage, started, duration_ms, span_fields)
+        logger.debug("Etapa '%s' concluída em %.1f ms %s", stage, duration_ms, span_fields or '',
+                     extra={'stage': stage, 'duration_ms': round(duration_ms, 1)})
+
+
+def timed(stage):
+    """Decorador que mede cada chamada da função como a etapa `stage`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -35,6 +35,7 @@ Módulo para processar arquivos de texto (TXT) e convertê-los para o formato CS
 que pode ser usado pelo sistema de conversão de leads para Salesforce.
 """
 import os
+import re
 import uuid
 import csv
 import pandas as pd
@@ -104,9 +105,9 @@ def process_txt_file(txt_file_path, target_salesforce_schema):
         name_patterns = [
             r'cliente\s*[-:]\s*(.+?)\.txt',  # "cliente - nome.txt" ou "cliente: nome.txt"
             r'cliente[_\s](.+?)\.txt',       # "cliente_nome.txt" ou "cliente nome.txt"
-            r'lead[_\s-:](.+?)\.txt',        # lead - nome.txt
-            r'contato[_\s-:](.+?)\.txt',     # contato - nome.txt
-            r'paciente[_\s-:](.+?)\.txt',    # paciente - nome.txt
+            r'lead[_\s:-](.+?)\.txt',        # lead - nome.txt
+            r'contato[_\s:-](.+?)\.txt',     # contato - nome.txt
+            r'paciente[_\s:-](.+?)\.txt',    # paciente - nome.txt
             r'(.+?)\.txt'                     # qualquer coisa antes de .txt
         ]
         
@@ -127,7 +128,6 @@ def process_txt_file(txt_file_path, target_salesforce_schema):
                 logger.info("Tentando criação de fallback para um lead básico")
                 
                 # Extrair algumas informações básicas do conteúdo
-                import re
                 
                 # Procurar por um possível email
                 email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content)
@@ -317,7 +317,8 @@ def extract_structured_data_with_ai(content, target_salesforce_schema, extracted
           IMPORTANTE: Retorne EXCLUSIVAMENTE o JSON válido, sem nenhum texto adicional.
         """
         
-        # Obter a resposta da IA com mais tentativas e um modelo mais capaz        attempts = 0
+        # Obter a resposta da IA com mais tentativas e um modelo mais capaz
+        attempts = 0
         max_attempts = 3
         ai_response = None
         
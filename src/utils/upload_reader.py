@@ -0,0 +1,157 @@
+"""
+Módulo para leitura dos arquivos enviados pelo usuário (CSV, XLS e XLSX).
+
+Concentra a detecção de delimitador/encoding de CSV e a escolha do leitor de
+planilhas, tanto para o snippet usado pela IA quanto para a leitura completa.
+"""
+import io
+import pandas as pd
+from src.utils.conversion_logger import get_conversion_logger
+from src.utils.excel_helper import read_excel_snippet, read_excel_full
+from src.utils.snippet_helper import sample_csv_rows, SNIPPET_POOL_ROWS
+
+# Configurar o logger
+logger = get_conversion_logger('file_reader')
+
+# Delimitadores e codificações comuns testados na leitura de CSV
+COMMON_DELIMITERS = [',', ';', '\t']
+COMMON_ENCODINGS = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
+
+# Bytes lidos do início de um CSV ainda incompleto (upload em partes) para o snippet
+PARTIAL_SNIPPET_MAX_BYTES = 4 * 1024 * 1024
+
+
+def read_upload_snippet(file_path, file_ext, probe=True):
+    """
+    Lê o conjunto de linhas de amostra usado para montar o snippet da IA.
+
+    Args:
+        file_path (str): Caminho do arquivo salvo
+        file_ext (str): Extensão do arquivo ('csv', 'xls' ou 'xlsx')
+        probe (bool): Se True, complementa a amostra de CSV com linhas espalhadas pelo arquivo
+
+    Returns:
+        pandas.DataFrame: Linhas de amostra
+
+    Raises:
+        ValueError: Se o arquivo não puder ser lido
+    """
+    if file_ext == 'csv':
+        # Tentar com diferentes delimitadores comuns e codificações para CSV
+        for enc in COMMON_ENCODINGS:
+            for delim in COMMON_DELIMITERS:
+                try:
+                    df_snippet = pd.read_csv(file_path, nrows=SNIPPET_POOL_ROWS, sep=delim, encoding=enc, on_bad_lines='skip')
+                except Exception as e_read_csv:
+                    logger.debug(f"Falha ao ler snippet CSV com delimitador '{delim}', encoding '{enc}': {e_read_csv}")
+                    continue
+                if df_snippet.empty or len(df_snippet.columns) <= 1:
+                    logger.debug(f"Tentativa de leitura CSV (delim='{delim}', enc='{enc}') resultou em DF vazio ou com uma coluna.")
+                    continue
+
+                logger.info(f"Snippet CSV lido com sucesso usando delimitador '{delim}' e encoding '{enc}'.")
+                if probe:
+                    # Complementa a amostra com linhas espalhadas pelo restante do arquivo
+                    try:
+                        df_probe = sample_csv_rows(file_path, delim, enc, list(df_snippet.columns))
+                        if not df_probe.empty:
+                            df_snippet = pd.concat([df_snippet, df_probe], ignore_index=True)
+                    except Exception as e_probe:
+                        logger.debug(f"Falha ao amostrar linhas ao longo do CSV, usando apenas o início: {e_probe}")
+                return df_snippet
+        raise ValueError("Não foi possível ler o arquivo CSV com delimitadores e codificações comuns.")
+
+    if file_ext in ('xls', 'xlsx'):
+        # Lê apenas as primeiras linhas, sem carregar a planilha inteira
+        return read_excel_snippet(file_path, SNIPPET_POOL_ROWS)
+
+    raise ValueError(f"Tipo de arquivo não suportado para snippet: {file_ext}")
+
+
+def read_partial_csv_snippet(file_path, max_bytes=PARTIAL_SNIPPET_MAX_BYTES):
+    """
+    Lê as linhas de amostra de um CSV ainda incompleto (upload em partes em andamento).
+
+    Apenas as linhas completas são lidas: o fim da parte recebida pode cortar um
+    caractere UTF-8 ao meio, o que levaria a tentativa de encodings ao latin1 e a
+    nomes de colunas diferentes dos da leitura completa. O texto é decodificado
+    como em read_upload_full: utf-8 e, se não for válido, latin1.
+
+    Args:
+        file_path (str): Caminho do arquivo de dados do upload
+        max_bytes (int): Bytes lidos do início do arquivo
+
+    Returns:
+        pandas.DataFrame: Linhas de amostra
+
+    Raises:
+        ValueError: Se ainda não houver uma linha completa ou o CSV não puder ser lido
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read(max_bytes)
+    end = data.rfind(b'\n')
+    if end < 0:
+        raise ValueError("Nenhuma linha completa do CSV recebida.")
+    data = data[:end + 1]
+    try:
+        text, enc = data.decode('utf-8-sig'), 'utf-8'
+    except UnicodeDecodeError:
+        text, enc = data.decode('latin1'), 'latin1'
+
+    for delim in COMMON_DELIMITERS:
+        try:
+            df_snippet = pd.read_csv(io.StringIO(text), nrows=SNIPPET_POOL_ROWS, sep=delim, on_bad_lines='skip')
+        except Exception as e_read_csv:
+            logger.debug(f"Falha ao ler snippet do CSV parcial com delimitador '{delim}': {e_read_csv}")
+            continue
+        if df_snippet.empty or len(df_snippet.columns) <= 1:
+            continue
+        logger.info(f"Snippet do CSV parcial lido com delimitador '{delim}' e encoding '{enc}'.")
+        return df_snippet
+    raise ValueError("Não foi possível ler o início do CSV com os delimitadores comuns.")
+
+
+def read_upload_full(file_path, file_ext):
+    """
+    Lê o arquivo completo com todas as colunas como string.
+
+    Args:
+        file_path (str): Caminho do arquivo salvo
+        file_ext (str): Extensão do arquivo ('csv', 'xls' ou 'xlsx')
+
+    Returns:
+        pandas.DataFrame: Conteúdo completo do arquivo
+
+    Raises:
+        ValueError: Se o arquivo não puder ser lido
+    """
+    if file_ext == 'csv':
+        # Tentar primeiro o delimitador detectado com utf-8
+        try:
+            delim_found = next(d for d in COMMON_DELIMITERS if pd.read_csv(file_path, nrows=1, sep=d, encoding='utf-8', on_bad_lines='skip').shape[1] > 1)
+            enc_found = 'utf-8'  # Simplificar, pode precisar de lógica mais robusta para encoding
+            df_full = pd.read_csv(file_path, sep=delim_found, encoding=enc_found, on_bad_lines='warn', dtype=str, skipinitialspace=True)
+            logger.info(f"Arquivo CSV completo lido com sucesso usando delimitador '{delim_found}' e encoding '{enc_found}'.")
+            return df_full
+        except StopIteration:
+            logger.warning("Não foi possível determinar delimitador para o CSV completo automaticamente, tentando combinações.")
+        except Exception as e_read_csv_full_first_try:
+            logger.warning(f"Falha ao ler CSV completo com delimitador/encoding do snippet: {e_read_csv_full_first_try}")
+
+        for enc_full in COMMON_ENCODINGS:
+            for delim_full in COMMON_DELIMITERS:
+                try:
+                    df_full = pd.read_csv(file_path, sep=delim_full, encoding=enc_full, on_bad_lines='warn', dtype=str, skipinitialspace=True)
+                    if not df_full.empty and len(df_full.columns) > 0:
+                        logger.info(f"Arquivo CSV completo lido com sucesso usando delimitador '{delim_full}' e encoding '{enc_full}'.")
+                        return df_full
+                except Exception as e_read_csv_full:
+                    logger.debug(f"Falha ao ler CSV completo com delimitador '{delim_full}', encoding '{enc_full}': {e_read_csv_full}")
+        raise ValueError("Não foi possível ler o arquivo CSV completo.")
+
+    if file_ext in ('xls', 'xlsx'):
+        # Leitura em streaming e em blocos (python-calamine ou openpyxl read_only)
+        return read_excel_full(file_path)
+
+    # Esta condição não deve ser alcançada devido à verificação allowed_file
+    raise ValueError(f"Tipo de arquivo não suportado para processamento completo: {file_ext}")
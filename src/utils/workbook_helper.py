@@ -0,0 +1,126 @@
+"""
+Módulo para processar planilhas com várias abas (uma por região, vendedor, etc.).
+
+Cada layout de cabeçalho distinto é mapeado pela IA uma única vez (ou obtido do
+cache de mapeamentos de uploads anteriores, ver mapping_cache), as abas são
+convertidas em paralelo e o resultado é concatenado em um único DataFrame, com
+a coluna SourceSheet indicando a aba de origem de cada linha.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.utils.conversion_logger import get_conversion_logger
+from src.utils.log_context import run_in_context
+from src.utils.excel_helper import list_excel_sheets, read_excel_snippet, read_excel_full
+from src.utils.mapping_helper import build_mapped_dataframe, parse_column_mapping
+from src.utils.mapping_cache import get_or_create_mapping
+from src.utils.snippet_helper import build_ai_snippet, SNIPPET_POOL_ROWS
+
+# Configurar o logger
+logger = get_conversion_logger('workbook_processor')
+
+# Coluna adicionada ao resultado para rastrear a aba de origem de cada lead
+SOURCE_SHEET_COLUMN = 'SourceSheet'
+
+# Número máximo de abas convertidas simultaneamente
+WORKBOOK_MAX_WORKERS = int(os.getenv('WORKBOOK_MAX_WORKERS', '4'))
+
+
+def _read_sheet_snippet(file_path, sheet_name):
+    return sheet_name, read_excel_snippet(file_path, SNIPPET_POOL_ROWS, sheet_name=sheet_name)
+
+
+def _convert_sheet(file_path, sheet_name, column_mapping, target_schema):
+    df_sheet = read_excel_full(file_path, sheet_name=sheet_name)
+    mapped_df = build_mapped_dataframe(df_sheet, column_mapping, target_schema)
+    mapped_df[SOURCE_SHEET_COLUMN] = sheet_name
+    logger.info(f"Aba '{sheet_name}' convertida: {len(mapped_df)} linhas")
+    return mapped_df
+
+
+def process_workbook(file_path, target_schema, map_columns, sheet_names=None, max_workers=None,
+                     refresh_mapping=False):
+    """
+    Converte todas as abas de uma planilha para o esquema do Salesforce.
+
+    Args:
+        file_path (str): Caminho do arquivo .xlsx ou .xls
+        target_schema (dict): Esquema alvo do Salesforce
+        map_columns (callable): Recebe o snippet (str) e retorna o mapeamento da IA
+            (dicionário ou string JSON)
+        sheet_names (list, optional): Abas a processar. Se None, usa todas.
+        max_workers (int, optional): Tamanho do pool de conversão
+        refresh_mapping (bool): Consulta a IA mesmo para layouts já em cache
+
+    Returns:
+        tuple: (DataFrame combinado, lista com o resumo de cada aba)
+
+    Raises:
+        ValueError: Se nenhuma aba tiver dados ou se o mapeamento de algum layout falhar
+    """
+    if sheet_names is None:
+        sheet_names = list_excel_sheets(file_path)
+    max_workers = max(1, min(max_workers or WORKBOOK_MAX_WORKERS, len(sheet_names) or 1))
+    logger.info(f"Processando planilha com {len(sheet_names)} abas ({max_workers} workers): {sheet_names}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # 1. Lê apenas o início de cada aba para descobrir os layouts de cabeçalho
+        snippets = dict(pool.map(run_in_context(lambda name: _read_sheet_snippet(file_path, name)), sheet_names))
+
+        summary = []
+        layouts = {}
+        for sheet_name in sheet_names:
+            df_snippet = snippets[sheet_name]
+            if df_snippet.empty and len(df_snippet.columns) == 0:
+                logger.warning(f"Aba '{sheet_name}' está vazia e será ignorada")
+                summary.append({'sheet': sheet_name, 'rows': 0, 'skipped': 'aba vazia'})
+                continue
+            layout_key = tuple(df_snippet.columns)
+            layouts.setdefault(layout_key, []).append(sheet_name)
+
+        if not layouts:
+            raise ValueError("Nenhuma aba da planilha contém dados.")
+
+        # 2. Consulta a IA uma única vez por layout distinto (ou reaproveita o mapeamento
+        #    de um upload anterior com o mesmo layout, ver mapping_cache)
+        def map_layout(layout_key, layout_sheets):
+            pool_df = pd.concat([snippets[name] for name in layout_sheets], ignore_index=True)
+            column_mapping = get_or_create_mapping(
+                layout_key, target_schema, lambda: parse_column_mapping(map_columns(build_ai_snippet(pool_df))),
+                refresh=refresh_mapping
+            )
+            if not column_mapping:
+                raise ValueError(f"Mapeamento da IA vazio para as abas {layout_sheets}")
+            return column_mapping
+
+        layout_items = list(layouts.items())
+        logger.info(f"{len(layout_items)} layout(s) de cabeçalho distinto(s) em {len(sheet_names)} abas")
+        mappings = dict(zip(
+            (layout_key for layout_key, _ in layout_items),
+            pool.map(run_in_context(lambda item: map_layout(*item)), layout_items)
+        ))
+
+        # 3. Converte as abas em paralelo
+        sheet_jobs = [
+            (sheet_name, mappings[layout_key])
+            for layout_key, layout_sheets in layout_items
+            for sheet_name in layout_sheets
+        ]
+        converted = dict(zip(
+            (sheet_name for sheet_name, _ in sheet_jobs),
+            pool.map(run_in_context(lambda job: _convert_sheet(file_path, job[0], job[1], target_schema)), sheet_jobs)
+        ))
+
+    # 4. Concatena na ordem original das abas
+    frames = []
+    for layout_index, (layout_key, layout_sheets) in enumerate(layout_items):
+        for sheet_name in layout_sheets:
+            summary.append({'sheet': sheet_name, 'rows': len(converted[sheet_name]), 'layout': layout_index})
+    summary.sort(key=lambda item: sheet_names.index(item['sheet']))
+    for sheet_name in sheet_names:
+        if sheet_name in converted:
+            frames.append(converted[sheet_name])
+
+    combined_df = pd.concat(frames, ignore_index=True)
+    logger.info(f"Planilha convertida: {len(combined_df)} linhas no total")
+    return combined_df, summary
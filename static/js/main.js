@@ -53,6 +53,24 @@ document.addEventListener("DOMContentLoaded", function () {
         '<i class="fas fa-spinner fa-spin"></i> Enviando arquivo...';
       uploadBtn.disabled = true;
 
+      // Large CSV/Excel files are sent in resumable chunks
+      const file = fileInput.files[0];
+      if (file.size > CHUNKED_UPLOAD_THRESHOLD && fileExt !== "txt") {
+        event.preventDefault();
+        conversionSection.style.display = "block";
+        chunkedUpload(file, new FormData(uploadForm))
+          .then((redirectUrl) => {
+            window.location.href = redirectUrl;
+          })
+          .catch((error) => {
+            console.error("Erro no envio em partes:", error);
+            showConversionError();
+            alert(error.message || "Erro ao enviar o arquivo.");
+            resetForm();
+          });
+        return false;
+      }
+
       // Show conversion section for Excel files and TXT files
       if (["xlsx", "xls", "txt"].includes(fileExt)) {
         // Show the conversion section
@@ -244,3 +262,105 @@ function resetForm() {
 
 // Global variable for conversion polling
 let conversionPolling = null;
+
+// Files above this size are uploaded in chunks (server limit per request is 16MB)
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_MAX_RETRIES = 3;
+
+// SHA-256 hex digest of a chunk (null when Web Crypto is unavailable, e.g. plain HTTP)
+async function sha256Hex(buffer) {
+  if (!window.crypto || !window.crypto.subtle) {
+    return null;
+  }
+  const digest = await window.crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+// Upload a file in chunks, resuming a previous attempt of the same file when possible
+async function chunkedUpload(file, formData) {
+  const resumeKey = `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+  const progressText = document.querySelector(".progress-text");
+
+  const initResponse = await fetch("/upload/init", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      filename: file.name,
+      total_size: file.size,
+      environment: formData.get("environment"),
+      lead_owner: formData.get("lead_owner"),
+      custom_owner_id: formData.get("custom_owner_id"),
+      source: formData.get("source"),
+      refresh_mapping: formData.get("refresh_mapping") === "1",
+      upload_id: localStorage.getItem(resumeKey),
+    }),
+  });
+  const init = await initResponse.json();
+  if (!init.success) {
+    throw new Error(init.error);
+  }
+  localStorage.setItem(resumeKey, init.upload_id);
+
+  let offset = init.received_bytes;
+  let retries = 0;
+  while (offset < file.size) {
+    const buffer = await file.slice(offset, offset + init.chunk_size).arrayBuffer();
+    const headers = { "Content-Type": "application/octet-stream" };
+    const checksum = await sha256Hex(buffer);
+    if (checksum) {
+      headers["X-Chunk-Checksum"] = checksum;
+    }
+
+    let result;
+    try {
+      const response = await fetch(
+        `/upload/${init.upload_id}/chunk?offset=${offset}`,
+        { method: "PUT", headers: headers, body: buffer }
+      );
+      result = await response.json();
+    } catch (error) {
+      // Network failure: retry the same chunk
+      if (++retries > CHUNK_MAX_RETRIES) {
+        throw error;
+      }
+      continue;
+    }
+
+    if (!result.success && result.received_bytes === undefined) {
+      // Upload no longer exists on the server
+      localStorage.removeItem(resumeKey);
+      throw new Error(result.error);
+    }
+    if (!result.success) {
+      // 409: server reports the offset it actually has; continue from there
+      if (++retries > CHUNK_MAX_RETRIES) {
+        throw new Error(result.error);
+      }
+      offset = result.received_bytes;
+      continue;
+    }
+
+    retries = 0;
+    offset = result.received_bytes;
+    const progress = Math.floor((offset / file.size) * 100);
+    updateProgress(progress);
+    if (progressText) {
+      progressText.textContent = `Enviando arquivo... (${progress}%)`;
+    }
+  }
+
+  if (progressText) {
+    progressText.textContent = "Processando arquivo...";
+  }
+  const completeResponse = await fetch(`/upload/${init.upload_id}/complete`, {
+    method: "POST",
+  });
+  const complete = await completeResponse.json();
+  localStorage.removeItem(resumeKey);
+  if (!complete.success) {
+    throw new Error(complete.error);
+  }
+  return complete.redirect_url;
+}
@@ -0,0 +1,43 @@
+"""
+Fixtures compartilhadas: Salesforce falso local (benchmarks.fake_salesforce) e
+cliente da aplicação Flask com a IA local (LLM_BACKEND=fake).
+"""
+
+import pytest
+from benchmarks.fake_salesforce import FakeSalesforceConfig, FakeSalesforceServer
+from src.services import lead_index, row_fingerprints, salesforce_api, salesforce_limits, salesforce_metadata
+from src.utils import mapping_cache
+
+
+@pytest.fixture
+def fake_salesforce(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(salesforce_api, 'BULK_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(salesforce_api, 'BULK_BATCH_SIZE', 100)
+    monkeypatch.setattr(lead_index, 'LEAD_INDEX_PATH', str(tmp_path / 'lead_index.sqlite3'))
+    monkeypatch.setattr(salesforce_metadata, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(salesforce_limits, '_ingest_bucket', salesforce_limits._TokenBucket(6000, 100))
+    with FakeSalesforceServer(FakeSalesforceConfig(latency=0, record_time=0)) as server:
+        for key, value in server.environment().items():
+            monkeypatch.setenv(key, value)
+        yield server
+
+
+@pytest.fixture
+def app_client(fake_salesforce, tmp_path, monkeypatch):
+    """Cliente de teste da aplicação, com os diretórios de trabalho em tmp_path."""
+    import app as app_module
+    upload_folder = tmp_path / 'A converter'
+    upload_folder.mkdir(exist_ok=True)
+    monkeypatch.setenv('LLM_BACKEND', 'fake')
+    monkeypatch.setenv('LLM_FAKE_LATENCY', '0')
+    monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', str(upload_folder))
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(upload_folder))
+    monkeypatch.setitem(app_module.app.config, 'TESTING', True)
+    monkeypatch.setattr(app_module, 'UPLOAD_WORKSPACE', str(upload_folder / 'uploads'))
+    monkeypatch.setattr(app_module, 'JOB_STORE_DIR', str(upload_folder / 'jobs'))
+    monkeypatch.setattr(mapping_cache, 'MAPPING_CACHE_DIR', str(tmp_path / 'cache' / 'mappings'))
+    monkeypatch.setattr(mapping_cache, '_memory', {})
+    monkeypatch.setattr(row_fingerprints, 'ROW_FINGERPRINT_PATH', str(tmp_path / 'row_fingerprints.sqlite3'))
+    with app_module.app.test_client() as client:
+        yield client
@@ -0,0 +1,46 @@
+"""Classificação dos registros com falha na Bulk API e reenvio dos corrigíveis."""
+
+import pytest
+from src.services import bulk_failures, salesforce_api
+
+
+@pytest.mark.parametrize('error, category, fixed', [
+    ("STRING_TOO_LONG:Company: data value too large: Empresa... (max length=10):Company --",
+     bulk_failures.FIELD_TOO_LONG, {'Company': 'Empresa Mu', 'Email': 'ana@exemplo.com'}),
+    ("STRING_TOO_LONG:Company: valor muito grande (comprimento máximo=10):Company --",
+     bulk_failures.FIELD_TOO_LONG, {'Company': 'Empresa Mu', 'Email': 'ana@exemplo.com'}),
+    ("INVALID_EMAIL_ADDRESS:Email: invalid email address: ana@exemplo.com:Email --",
+     bulk_failures.INVALID_EMAIL, {'Company': 'Empresa Muito Longa', 'Email': ''}),
+    ("UNABLE_TO_LOCK_ROW:unable to obtain exclusive access to this record: --",
+     bulk_failures.LOCK_CONTENTION, {'Company': 'Empresa Muito Longa', 'Email': 'ana@exemplo.com'}),
+    ("DUPLICATES_DETECTED:Use one of these records?:--", bulk_failures.DUPLICATE, None),
+    ("REQUIRED_FIELD_MISSING:Required fields are missing: [LastName]:LastName --", bulk_failures.OTHER, None),
+    ("STRING_TOO_LONG:sem o tamanho máximo", bulk_failures.FIELD_TOO_LONG, None),
+])
+def test_fix_record_by_category(error, category, fixed):
+    row = {'sf__Id': '', 'sf__Error': error, 'Company': 'Empresa Muito Longa', 'Email': 'ana@exemplo.com'}
+    assert bulk_failures.fix_record(row) == (category, fixed)
+
+
+def test_fixable_failures_are_resubmitted_in_a_follow_up_job(fake_salesforce):
+    leads = [{'LastName': f"Silva{i}", 'Company': 'Empresa Teste', 'Email': f"silva{i}@exemplo.com"} for i in range(3)]
+    leads.append({'LastName': 'Souza', 'Company': 'Empresa Teste', 'Email': 'souza@exemplo'})
+
+    results = salesforce_api.create_bulk_leads_in_salesforce(leads)
+
+    assert results['success_count'] == 4
+    assert results['failed_count'] == 0
+    assert len(results['follow_up_jobs']) == 1
+    created = {lead['LastName']: lead for lead in fake_salesforce.org.leads.values()}
+    assert created['Souza'].get('Email', '') == ''
+    assert created['Silva0']['Email'] == 'silva0@exemplo.com'
+
+
+def test_unfixable_failures_are_kept_without_follow_up(fake_salesforce, monkeypatch):
+    monkeypatch.setattr(bulk_failures, 'RETRY_ROUNDS', 0)
+    leads = [{'LastName': 'Souza', 'Company': 'Empresa Teste', 'Email': 'souza@exemplo'}]
+
+    results = salesforce_api.create_bulk_leads_in_salesforce(leads)
+
+    assert (results['success_count'], results['failed_count'], results['follow_up_jobs']) == (0, 1, [])
+    assert results['failed_records'][0]['error'].startswith('INVALID_EMAIL_ADDRESS')
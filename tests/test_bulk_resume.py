@@ -0,0 +1,102 @@
+"""
+Retomada da ingestão em lotes interrompida durante o acompanhamento de um job,
+contra o Salesforce falso local (benchmarks.fake_salesforce).
+"""
+
+import pandas as pd
+import pytest
+import requests
+from src.services import salesforce_api, salesforce_http
+from src.services.bulk_manifest import BulkManifest
+
+
+class _Killed(BaseException):
+    """Interrupção do processo (não é tratada pelos `except Exception` do envio)."""
+
+
+def _write_leads(path, count):
+    pd.DataFrame({
+        'LastName': [f"Silva{i}" for i in range(count)],
+        'Company': 'Empresa Teste',
+        'Email': [f"silva{i}@exemplo.com" for i in range(count)],
+    }).to_csv(path, index=False)
+
+
+def test_resume_after_crash_while_polling_second_batch(fake_salesforce, tmp_path, monkeypatch):
+    csv_path = tmp_path / 'leads.csv'
+    _write_leads(csv_path, 300)
+    manifest_path = str(tmp_path / 'leads.bulk.json')
+
+    wait_for_job = salesforce_api._wait_for_job
+    calls = []
+
+    def crash_on_second_job(context, job_id, *args, **kwargs):
+        calls.append(job_id)
+        if len(calls) == 2:
+            raise _Killed()
+        return wait_for_job(context, job_id, *args, **kwargs)
+
+    monkeypatch.setattr(salesforce_api, '_wait_for_job', crash_on_second_job)
+    with pytest.raises(_Killed):
+        salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False, manifest_path=manifest_path)
+    monkeypatch.setattr(salesforce_api, '_wait_for_job', wait_for_job)
+
+    chunks = BulkManifest.load(manifest_path).chunks
+    assert [chunk['state'] for chunk in chunks] == ['JobComplete', 'upload_complete']
+
+    success, results = salesforce_api.resume_leads_from_manifest(manifest_path)
+
+    assert success
+    names = sorted(lead['LastName'] for lead in fake_salesforce.org.leads.values())
+    assert names == sorted(f"Silva{i}" for i in range(300))
+    manifest = BulkManifest.load(manifest_path)
+    assert manifest.is_settled()
+    assert [(chunk['start_row'], chunk['end_row']) for chunk in manifest.chunks] == [(0, 100), (100, 200), (200, 300)]
+    # O CSV de cada job é enviado sem cópia em disco
+    assert not (tmp_path / 'A converter' / 'temp').exists()
+
+
+def test_resume_batch_mode_after_failed_upload(fake_salesforce, tmp_path, monkeypatch):
+    csv_path = tmp_path / 'leads.csv'
+    _write_leads(csv_path, 300)
+    # Linhas repetidas e inválidas ficam fora dos blocos nas duas execuções
+    pd.concat([pd.read_csv(csv_path), pd.DataFrame({'LastName': ['Silva5', ''], 'Company': 'Empresa Teste',
+                                                    'Email': ['silva5@exemplo.com', 'sem-sobrenome@exemplo.com']})]
+              ).to_csv(csv_path, index=False)
+    manifest_path = str(tmp_path / 'leads.bulk.json')
+    request = salesforce_http.requests.request
+    created = []
+
+    def fail_second_job_upload(method, url, **kwargs):
+        if method == 'PUT' and len(created) == 2 and created[1] in url:
+            raise requests.exceptions.ConnectionError('connection reset by peer')
+        response = request(method, url, **kwargs)
+        if method == 'POST' and url.endswith('/jobs/ingest'):
+            created.append(response.json()['id'])
+        return response
+
+    monkeypatch.setattr(salesforce_http, 'RETRY_MAX_ATTEMPTS', 1)
+    monkeypatch.setattr(salesforce_http.requests, 'request', fail_second_job_upload)
+    success, results = salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False,
+                                                            manifest_path=manifest_path)
+    monkeypatch.setattr(salesforce_http.requests, 'request', request)
+
+    assert success
+    assert len(fake_salesforce.org.leads) == 200
+    manifest = BulkManifest.load(manifest_path)
+    assert [chunk['state'] for chunk in manifest.chunks] == ['JobComplete', 'submit_failed', 'JobComplete']
+    assert not manifest.is_settled()
+
+    success, results = salesforce_api.resume_leads_from_manifest(manifest_path)
+
+    assert success
+    names = sorted(lead['LastName'] for lead in fake_salesforce.org.leads.values())
+    assert names == sorted(f"Silva{i}" for i in range(300))
+    assert sum(result['success'] for result in results) == 300
+    manifest = BulkManifest.load(manifest_path)
+    assert manifest.is_settled()
+    # Blocos compactos: limites e número de leads, sem a lista das linhas
+    assert [(chunk['start_row'], chunk['end_row'], chunk['records']) for chunk in manifest.chunks] == [
+        (0, 100, 100), (100, 200, 100), (200, 300, 100)]
+    assert all(set(chunk) <= {'start_row', 'end_row', 'records', 'state', 'job_id', 'success_count',
+                              'failed_count', 'retry_started'} for chunk in manifest.chunks)
@@ -0,0 +1,70 @@
+"""Upload em partes: finalização única e repetições do complete."""
+
+import threading
+import pytest
+from src.utils import chunked_upload
+
+CSV = ('Nome,Sobrenome,Empresa,E-mail\n'
+       + ''.join(f"Ana,Silva{i},Empresa Teste,ana{i}@exemplo.com\n" for i in range(20))).encode('utf-8')
+
+
+def _upload_parts(client, data, part_size=200):
+    init = client.post('/upload/init', json={'filename': 'leads.csv', 'total_size': len(data),
+                                             'environment': 'sandbox', 'lead_owner': ''}).get_json()
+    upload_id = init['upload_id']
+    for offset in range(0, len(data), part_size):
+        response = client.put(f"/upload/{upload_id}/chunk?offset={offset}", data=data[offset:offset + part_size])
+        assert response.status_code == 200
+    return upload_id
+
+
+def test_repeated_complete_returns_the_same_result(app_client):
+    upload_id = _upload_parts(app_client, CSV)
+
+    first = app_client.post(f"/upload/{upload_id}/complete")
+    second = app_client.post(f"/upload/{upload_id}/complete")
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json() == second.get_json()
+    assert first.get_json()['job_id']
+    job = app_client.get(f"/jobs/{first.get_json()['job_id']}").get_json()['job']
+    assert job['total_count'] == 20
+    assert len(app_client.get('/jobs').get_json()['jobs']) == 1
+
+
+def test_only_one_finalization_claims_the_file(tmp_path, monkeypatch):
+    workspace = str(tmp_path / 'uploads')
+    manifest = chunked_upload.create_upload(workspace, 'leads.csv', 'csv', len(CSV))
+    upload_id = manifest['upload_id']
+    chunked_upload.append_chunk(workspace, upload_id, 0, _Stream(CSV))
+    outcomes = []
+
+    def finalize(index):
+        try:
+            chunked_upload.finalize_upload(workspace, upload_id, str(tmp_path / f"dest{index}.csv"))
+            outcomes.append('ok')
+        except ValueError:
+            outcomes.append('conflict')
+
+    # Como em processos diferentes, cada finalização usa o seu próprio lock
+    monkeypatch.setattr(chunked_upload, '_upload_lock', lambda upload_id: threading.Lock())
+    threads = [threading.Thread(target=finalize, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ['conflict'] * 3 + ['ok']
+    assert [path.read_bytes() for path in tmp_path.glob('dest*.csv')] == [CSV]
+    assert chunked_upload.load_manifest(workspace, upload_id)['state'] == 'finalizing'
+    with pytest.raises(ValueError):
+        chunked_upload.finalize_upload(workspace, upload_id, str(tmp_path / 'again.csv'))
+
+
+class _Stream:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        block, self.data = self.data[:size], self.data[size:]
+        return block
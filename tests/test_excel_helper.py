@@ -0,0 +1,69 @@
+"""Leitura de planilhas em streaming (openpyxl read_only ou python-calamine)."""
+
+import datetime
+import pytest
+from openpyxl import Workbook
+from src.utils import excel_helper
+
+
+def _write_workbook(path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Leads'
+    sheet.append([None, None, None])
+    sheet.append(['Nome', 'Telefone', None, 'Nome', 'Cadastro'])
+    sheet.append(['Ana', 11999990000, 'x', 'Ana Maria', datetime.datetime(2024, 3, 1)])
+    sheet.append([None, None, None, None, None])
+    sheet.append(['  Bruno ', 1133334444.0, None, None, datetime.datetime(2024, 3, 1, 14, 30)])
+    sheet.append(['Carla', None, None, 'Carla S.', None])
+    workbook.create_sheet('Outra').append(['Coluna'])
+    workbook.save(path)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    path = tmp_path / 'leads.xlsx'
+    _write_workbook(path)
+    return str(path)
+
+
+@pytest.fixture(params=['openpyxl', 'calamine'])
+def engine(request, monkeypatch):
+    if request.param == 'calamine':
+        if excel_helper.CalamineWorkbook is None:
+            pytest.skip('python-calamine não instalado')
+    else:
+        monkeypatch.setattr(excel_helper, 'CalamineWorkbook', None)
+    return request.param
+
+
+def test_full_read_in_chunks_matches_pandas_string_conventions(workbook_path, engine):
+    df = excel_helper.read_excel_full(workbook_path, chunksize=2)
+
+    assert list(df.columns) == ['Nome', 'Telefone', 'Unnamed: 2', 'Nome.1', 'Cadastro']
+    assert df['Nome'].tolist() == ['Ana', 'Bruno', 'Carla']
+    assert df['Telefone'].tolist() == ['11999990000', '1133334444', '']
+    assert df['Cadastro'].tolist()[0] == '2024-03-01'
+    assert df['Cadastro'].tolist()[2] == ''
+    assert excel_helper.list_excel_sheets(workbook_path) == ['Leads', 'Outra']
+
+
+def test_snippet_reads_only_the_first_rows(workbook_path, engine):
+    snippet = excel_helper.read_excel_snippet(workbook_path, 1)
+    assert snippet['Nome'].tolist() == ['Ana']
+    assert excel_helper.read_excel_snippet(workbook_path, 5, sheet_name='Outra').empty
+
+
+def test_openpyxl_fallback_opens_the_workbook_read_only(workbook_path, monkeypatch):
+    monkeypatch.setattr(excel_helper, 'CalamineWorkbook', None)
+    opened = []
+    load_workbook = excel_helper.load_workbook
+
+    def spy(path, **kwargs):
+        opened.append(kwargs)
+        return load_workbook(path, **kwargs)
+
+    monkeypatch.setattr(excel_helper, 'load_workbook', spy)
+    excel_helper.read_excel_full(workbook_path)
+
+    assert opened and all(kwargs.get('read_only') for kwargs in opened)
@@ -0,0 +1,92 @@
+"""Salesforce falso (benchmarks.fake_salesforce): ciclo dos jobs, validação, limites e falhas injetadas."""
+
+import csv
+import io
+import pytest
+from benchmarks.fake_salesforce import FakeSalesforceConfig, create_app
+
+JOBS_URL = '/services/data/v63.0/jobs/ingest'
+AUTH = {'Authorization': 'Bearer fake-token'}
+
+
+@pytest.fixture
+def client():
+    app = create_app(FakeSalesforceConfig(latency=0, latency_jitter=0, record_time=0, daily_api_requests=1000))
+    return app.test_client()
+
+
+def _run_job(client, rows, **job):
+    created = client.post(JOBS_URL, json=dict({'object': 'Lead', 'operation': 'insert', 'lineEnding': 'LF'}, **job),
+                          headers=AUTH).get_json()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+    assert client.put(f"{JOBS_URL}/{created['id']}/batches", data=buffer.getvalue(), headers=AUTH).status_code == 201
+    assert client.patch(f"{JOBS_URL}/{created['id']}", json={'state': 'UploadComplete'}, headers=AUTH).status_code == 200
+    return created['id']
+
+
+def _results(client, job_id, kind):
+    return list(csv.DictReader(io.StringIO(client.get(f"{JOBS_URL}/{job_id}/{kind}", headers=AUTH).get_data(as_text=True))))
+
+
+def test_job_lifecycle_validates_records_like_salesforce(client):
+    job_id = _run_job(client, [
+        {'LastName': 'Silva', 'Company': 'Empresa Teste', 'Email': 'silva@exemplo.com'},
+        {'LastName': '', 'Company': 'Empresa Teste', 'Email': 'ana@exemplo.com'},
+        {'LastName': 'Souza', 'Company': 'Empresa Teste', 'Email': 'souza@exemplo'},
+        {'LastName': 'L' * 81, 'Company': 'Empresa Teste', 'Email': ''},
+    ])
+
+    status = client.get(f"{JOBS_URL}/{job_id}", headers=AUTH)
+    assert status.get_json()['state'] == 'JobComplete'
+    assert (status.get_json()['numberRecordsProcessed'], status.get_json()['numberRecordsFailed']) == (4, 3)
+    assert status.headers['Sforce-Limit-Info'].startswith('api-usage=')
+
+    succeeded, = _results(client, job_id, 'successfulResults')
+    assert succeeded['sf__Created'] == 'true' and succeeded['sf__Id'].startswith('00Q')
+    errors = [row['sf__Error'].split(':')[0] for row in _results(client, job_id, 'failedResults')]
+    assert errors == ['REQUIRED_FIELD_MISSING', 'INVALID_EMAIL_ADDRESS', 'STRING_TOO_LONG']
+
+    assert client.put(f"{JOBS_URL}/{job_id}/batches", data='LastName\nX\n', headers=AUTH).status_code == 409
+    stats = client.get('/fake/stats').get_json()
+    assert (stats['leads'], stats['jobs'], stats['records_failed'], stats['job_states']) == (1, 1, 3, {'JobComplete': 1})
+
+
+def test_requests_need_a_session_and_count_against_the_daily_limit(client):
+    assert client.get('/services/data/v63.0/limits').status_code == 401
+    assert client.post('/services/oauth2/token', data={'grant_type': 'password'}).status_code == 400
+    token = client.post('/services/oauth2/token', data={'grant_type': 'password', 'username': 'testes@fake.local'})
+    assert token.get_json()['token_type'] == 'Bearer'
+
+    limits = client.get('/services/data/v63.0/limits', headers=AUTH).get_json()
+    assert limits['DailyApiRequests'] == {'Max': 1000, 'Remaining': 998}
+
+
+def test_rate_limit_and_injected_errors_are_configurable_at_runtime(client):
+    client.post('/fake/config', json={'rate_limit': 1, 'rate_limit_status': 429})
+    client.get('/services/data/v63.0/limits', headers=AUTH)
+    limited = client.get('/services/data/v63.0/limits', headers=AUTH)
+    if limited.status_code != 429:
+        # A janela de um segundo virou entre as duas requisições
+        limited = client.get('/services/data/v63.0/limits', headers=AUTH)
+    assert limited.status_code == 429 and limited.headers['Retry-After'] == '1'
+
+    client.post('/fake/config', json={'rate_limit': 0, 'error_rate': 1})
+    assert client.get('/services/data/v63.0/limits', headers=AUTH).status_code == 503
+    assert client.get('/fake/stats').get_json()['errors_injected'] == 1
+
+
+def test_injected_record_failures_are_repeatable_with_the_same_seed():
+    rows = [{'LastName': f"Silva{i}", 'Company': 'Empresa Teste', 'Email': f"silva{i}@exemplo.com"} for i in range(50)]
+    failures = []
+    for _ in range(2):
+        client = create_app(FakeSalesforceConfig(latency=0, latency_jitter=0, record_time=0,
+                                                 record_failure_rate=0.3, seed=7)).test_client()
+        job_id = _run_job(client, rows)
+        failures.append([(row['LastName'], row['sf__Error']) for row in _results(client, job_id, 'failedResults')])
+
+    assert failures[0] == failures[1]
+    assert 0 < len(failures[0]) < 50
+    assert {error.split(':')[0] for _, error in failures[0]} <= {'UNABLE_TO_LOCK_ROW', 'DUPLICATES_DETECTED', 'DUPLICATE_VALUE'}
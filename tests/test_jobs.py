@@ -0,0 +1,42 @@
+"""Registro dos jobs de upload: ids gerados no servidor e nunca reaproveitados."""
+
+import io
+import pytest
+from src.utils import job_store
+
+
+def _csv_upload(rows=5, start=0):
+    lines = ['Nome,Sobrenome,Empresa,E-mail'] + [f"Ana,Silva{i},Empresa Teste,ana{i}@exemplo.com"
+                                                 for i in range(start, start + rows)]
+    return io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+def test_create_job_refuses_existing_id(tmp_path):
+    job_id = job_store.new_job_id()
+    job_store.create_job(str(tmp_path), job_id, filename='a.csv')
+
+    with pytest.raises(FileExistsError):
+        job_store.create_job(str(tmp_path), job_id, filename='b.csv')
+
+    assert job_store.load_job(str(tmp_path), job_id)['filename'] == 'a.csv'
+    assert [job['job_id'] for job in job_store.list_jobs(str(tmp_path))] == [job_id]
+
+
+def test_client_request_id_does_not_select_the_job(app_client):
+    headers = {'X-Request-ID': 'mesmo-id-do-cliente'}
+    job_ids = []
+    for upload in range(2):
+        response = app_client.post('/upload_file', headers=headers, data={
+            'file': (_csv_upload(start=upload * 5), 'leads.csv'), 'environment': 'sandbox', 'lead_owner': '',
+        })
+        assert response.status_code == 302
+        assert response.headers['X-Request-ID'] == 'mesmo-id-do-cliente'
+        job_ids.append(response.headers['X-Job-ID'])
+
+    assert job_ids[0] != job_ids[1] and 'mesmo-id-do-cliente' not in job_ids
+    for job_id in job_ids:
+        job = app_client.get(f"/jobs/{job_id}").get_json()['job']
+        assert job['correlation_id'] == 'mesmo-id-do-cliente'
+        assert job['status'] == 'completed'
+        assert job['total_count'] == 5
+    assert app_client.get('/jobs/mesmo-id-do-cliente').status_code == 404
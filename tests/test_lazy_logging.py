@@ -0,0 +1,88 @@
+"""Formatação preguiçosa dos loggers do Salesforce e de conversão: nada é montado abaixo do nível."""
+
+import logging
+import pytest
+from src.utils import conversion_logger, salesforce_logger
+
+
+class _Expensive:
+    """Argumento que conta quantas vezes foi convertido em texto."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'valor caro'
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture(params=['salesforce', 'conversion'])
+def wrapper(request):
+    if request.param == 'salesforce':
+        wrapper = salesforce_logger.get_salesforce_logger('salesforce.test_lazy')
+    else:
+        wrapper = conversion_logger.get_conversion_logger('test_lazy')
+    capture = _Capture()
+    previous = wrapper.logger.level
+    wrapper.logger.setLevel(logging.INFO)
+    wrapper.logger.addHandler(capture)
+    yield wrapper, capture
+    wrapper.logger.removeHandler(capture)
+    wrapper.logger.setLevel(previous)
+
+
+def test_filtered_levels_do_not_format_arguments(wrapper):
+    logger, capture = wrapper
+    expensive = _Expensive()
+
+    logger.debug("detalhes: %s", expensive)
+    assert expensive.calls == 0
+    assert capture.records == []
+
+    logger.info("resumo: %s", expensive)
+    assert capture.records[0].getMessage() == 'resumo: valor caro'
+    # O registro aponta para quem chamou o wrapper, não para o próprio wrapper
+    assert capture.records[0].funcName == 'test_filtered_levels_do_not_format_arguments'
+
+
+def test_request_payload_is_not_serialized_below_debug(monkeypatch):
+    logger = salesforce_logger.get_salesforce_logger('salesforce.test_lazy_request')
+    previous = logger.logger.level
+    logger.logger.setLevel(logging.INFO)
+
+    serialized = []
+    monkeypatch.setattr(salesforce_logger, 'compact_json', lambda value: serialized.append(value) or '{}')
+    try:
+        logger.log_request('https://test.my.salesforce.com/services/data', 'GET', {'Accept': 'application/json'})
+    finally:
+        logger.logger.setLevel(previous)
+
+    assert serialized == []
+
+
+def test_conversion_helpers_are_skipped_above_info(monkeypatch):
+    logger = conversion_logger.get_conversion_logger('test_lazy_helpers')
+    previous = logger.logger.level
+    logger.logger.setLevel(logging.WARNING)
+
+    serialized = []
+    monkeypatch.setattr(conversion_logger, 'compact_json', lambda value: serialized.append(value) or '{}')
+    try:
+        logger.log_conversion_start({'arquivo': 'leads.csv'})
+        logger.log_conversion_step('leitura', {'linhas': 10})
+        logger.log_conversion_complete({'linhas': 10})
+        assert serialized == []
+        logger.logger.setLevel(logging.INFO)
+        logger.log_conversion_step('leitura', {'linhas': 10})
+        assert len(serialized) == 1
+    finally:
+        logger.logger.setLevel(previous)
@@ -0,0 +1,73 @@
+"""Deduplicação dos leads de um arquivo (lead_dedup) e entre blocos do modo streaming."""
+
+import numpy as np
+import pandas as pd
+from src.services import lead_dedup, salesforce_api
+
+
+def test_seen_keys_matches_a_set():
+    rng = np.random.default_rng(0)
+    seen, reference = lead_dedup.SeenKeys(), set()
+    for _ in range(20):
+        block = rng.integers(-2 ** 40, 2 ** 40, 500)
+        block[:50] = rng.choice(np.array(sorted(reference) or [0], dtype=np.int64), 50)
+        expected = np.array([value in reference for value in block.tolist()])
+        assert (seen.contains(block) == expected).all()
+        seen.add(block)
+        reference.update(block.tolist())
+    assert len(seen) == len(reference)
+    assert seen._keys.dtype == np.int64 and (np.diff(seen._keys) > 0).all()
+
+
+def test_streaming_drops_duplicates_across_blocks(fake_salesforce, tmp_path):
+    leads = pd.DataFrame({
+        'LastName': [f"Silva{i}" for i in range(100)],
+        'Company': 'Empresa Teste',
+        'Email': [f"silva{i}@exemplo.com" for i in range(100)],
+    })
+    # Repetições de linhas de blocos anteriores: mesmo email (outra caixa) e mesmo email com outro nome
+    repeated = pd.DataFrame({'LastName': ['Silva3', 'Souza'], 'Company': 'Outra',
+                             'Email': ['SILVA3@exemplo.com', 'silva70@exemplo.com']})
+    csv_path = str(tmp_path / 'leads.csv')
+    pd.concat([leads, repeated]).to_csv(csv_path, index=False)
+
+    success, summary = salesforce_api.stream_leads_from_csv(csv_path, chunksize=40)
+
+    assert success
+    assert summary['duplicate_count'] == 2
+    assert summary['success_count'] == 100 == len(fake_salesforce.org.leads)
+
+
+def _chain(rows):
+    """Linhas ligadas em cadeia: pares de mesmo email alternados com pares de mesmo telefone e nome."""
+    return pd.DataFrame({
+        'FirstName': 'Ana',
+        'LastName': 'Silva',
+        'Email': [f"ana{i // 2}@exemplo.com" for i in range(rows)],
+        'Phone': [f"1199{(i + 1) // 2:07d}" for i in range(rows)],
+    }, index=range(100, 100 + rows))
+
+
+def test_long_transitive_chain_forms_one_group():
+    leads, removed = lead_dedup.deduplicate(_chain(60), policy='first')
+
+    assert removed == 59
+    assert leads.index.tolist() == [100]
+
+
+def test_dedup_policies():
+    leads = pd.DataFrame({
+        'LastName': ['Silva', 'Silva', 'Souza'],
+        'Company': ['', 'Empresa Teste', 'Outra'],
+        'Email': ['ana@exemplo.com', 'ANA@exemplo.com ', 'bia@exemplo.com'],
+        'Phone': ['', '11999990000', ''],
+    })
+
+    first, removed = lead_dedup.deduplicate(leads, policy='first')
+    assert removed == 1 and first.index.tolist() == [0, 2]
+
+    complete, removed = lead_dedup.deduplicate(leads, policy='most_complete')
+    assert removed == 1 and complete.index.tolist() == [1, 2]
+
+    kept, removed = lead_dedup.deduplicate(leads, policy='off')
+    assert removed == 0 and len(kept) == 3
@@ -0,0 +1,44 @@
+"""Índice local de leads: gravação dos resultados de sucesso e busca das linhas do arquivo."""
+
+import pandas as pd
+import pytest
+from src.services import lead_index
+
+ORG = 'empresa.my.salesforce.com'
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = tmp_path / 'lead_index.sqlite3'
+    monkeypatch.setattr(lead_index, 'LEAD_INDEX_PATH', str(path))
+    return path
+
+
+def test_success_results_are_found_by_email_or_phone(index_path):
+    # Linhas de successfulResults: campos como enviados, sem normalização
+    recorded = lead_index.record_leads([
+        {'sf__Id': '00Q000000000001', 'sf__Created': 'true', 'Email': ' Ana@Exemplo.COM ', 'Phone': ''},
+        {'sf__Id': '00Q000000000002', 'sf__Created': 'true', 'Email': '', 'Phone': '+55 (11) 3333-4444'},
+        {'sf__Id': '', 'Email': 'sem.id@exemplo.com', 'Phone': ''},
+    ], org=ORG)
+    assert recorded == 2
+
+    incoming = pd.DataFrame({
+        'Email': ['ana@exemplo.com', None, 'sem.id@exemplo.com', 'novo@exemplo.com', ''],
+        'Phone': ['11999990000', '011 3333-4444', '', '1133334444', ''],
+    }, index=[10, 20, 30, 40, 50])
+
+    found = lead_index.lookup(incoming, org=ORG)
+    # Uma segunda busca na mesma org não encontra resíduos da tabela temporária
+    again = lead_index.lookup(incoming, org=ORG)
+
+    # Com email, a busca usa apenas o email (a linha 40 não casa pelo telefone)
+    assert found.dropna().to_dict() == {10: '00Q000000000001', 20: '00Q000000000002'}
+    assert again.dropna().to_dict() == found.dropna().to_dict()
+    assert lead_index.lookup(incoming, org='outra.my.salesforce.com').isna().all()
+
+
+def test_lookup_without_index_file_finds_nothing(index_path):
+    found = lead_index.lookup(pd.DataFrame({'Email': ['ana@exemplo.com']}), org=ORG)
+    assert found.isna().all()
+    assert not index_path.exists()
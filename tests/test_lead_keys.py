@@ -0,0 +1,59 @@
+"""Upsert pelo id externo: reimportar o mesmo arquivo atualiza os leads em vez de duplicá-los."""
+
+import pandas as pd
+import pytest
+from src.services import lead_index, lead_keys, salesforce_api
+
+
+@pytest.fixture
+def external_id_field(monkeypatch):
+    monkeypatch.setattr(lead_keys, 'EXTERNAL_ID_FIELD', 'Import_Key__c')
+    return 'Import_Key__c'
+
+
+def test_external_ids_are_deterministic_and_prefer_the_mapped_column(external_id_field):
+    leads = pd.DataFrame({
+        'FirstName': ['Ana', 'Ana', 'João', ''], 'LastName': ['Silva', 'Silva', 'Souza', 'Lima'],
+        'Company': 'Empresa Teste', 'Email': ['ana@exemplo.com', ' ANA@exemplo.com', '', ''],
+        'Phone': ['', '', '(11) 98765-4321', ''],
+    })
+    mapped = pd.Series(['', '', '', 'CRM-42'])
+
+    keys = lead_keys.external_ids(leads, mapped)
+
+    assert keys[0] == keys[1]
+    assert len(set(keys[:3])) == 2 and len(keys[0]) == lead_keys.EXTERNAL_ID_LENGTH
+    assert keys[3] == 'CRM-42'
+    assert lead_keys.external_ids(leads, mapped).equals(keys)
+
+
+def test_upsert_requires_an_external_id_field(monkeypatch):
+    monkeypatch.setattr(lead_keys, 'EXTERNAL_ID_FIELD', '')
+    assert not lead_keys.check_operation('upsert')[0]
+    monkeypatch.setattr(lead_keys, 'EXTERNAL_ID_FIELD', 'Email')
+    metadata = {'fields': {'Email': {'external_id': False}}}
+    assert not lead_keys.check_operation('upsert', metadata)[0]
+    assert lead_keys.check_operation('insert', metadata) == (True, None)
+    assert not lead_keys.check_operation('merge')[0]
+
+
+def test_reimporting_with_upsert_updates_instead_of_duplicating(fake_salesforce, external_id_field, tmp_path,
+                                                                monkeypatch):
+    # Com a ação 'update' do índice local os leads conhecidos também seguem no job de upsert
+    monkeypatch.setattr(lead_index, 'LEAD_INDEX_ACTION', 'update')
+    csv_path = tmp_path / 'leads.csv'
+    leads = pd.DataFrame({'LastName': ['Silva', 'Souza'], 'Company': 'Empresa Teste',
+                          'Email': ['silva@exemplo.com', 'souza@exemplo.com']})
+    leads.to_csv(csv_path, index=False)
+    success, _ = salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False, operation='upsert')
+    assert success
+    first_ids = set(fake_salesforce.org.leads)
+
+    leads.assign(Company='Empresa Nova').to_csv(csv_path, index=False)
+    success, _ = salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False, operation='upsert')
+
+    assert success
+    assert set(fake_salesforce.org.leads) == first_ids
+    assert {lead['Company'] for lead in fake_salesforce.org.leads.values()} == {'Empresa Nova'}
+    assert len(fake_salesforce.org.external_ids) == 2
+    assert all(job['operation'] == 'upsert' for job in fake_salesforce.org.jobs.values())
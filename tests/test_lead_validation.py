@@ -0,0 +1,61 @@
+"""Validação dos leads antes do envio: rejeição (padrão) ou correção com relatório."""
+
+import pandas as pd
+from src.services import lead_validation, salesforce_api
+
+
+def _leads():
+    return pd.DataFrame({
+        'LastName': ['Silva', 'Souza', '', 'Lima'],
+        'Company': ['Empresa Teste', 'Empresa Muito Longa', 'Empresa Teste', 'Empresa Teste'],
+        'Email': ['silva@exemplo.com', 'souza@', 'ana@exemplo.com', 'lima@exemplo.com.br'],
+        'Phone': ['(11) 98765-4321', '011 3456-7890', '123', ''],
+        'LeadSource': ['web', 'Web', 'Web', 'Feira'],
+    })
+
+
+def test_reject_policy_drops_invalid_rows_and_reports_them():
+    leads, report, counts = lead_validation.validate_leads(
+        _leads(), policy='reject', field_lengths={'Company': 15}, picklists={'LeadSource': ['Web', 'Phone']}, first_row=10)
+
+    assert list(leads['LastName']) == ['Silva']
+    assert leads['Phone'].iloc[0] == '11987654321'
+    assert leads['LeadSource'].iloc[0] == 'Web'
+    assert list(report['row']) == [12, 13, 14]
+    assert set(report['action']) == {'rejected'}
+    assert report['issues'][0].split() == ['Email:invalid_email', 'Company:too_long']
+    assert report['Email'][0] == 'souza@'
+    assert counts == {'Phone:invalid_phone': 1, 'Email:invalid_email': 1, 'Company:too_long': 1,
+                      'LeadSource:invalid_picklist': 1, 'LastName:required': 1}
+
+
+def test_repair_policy_sends_fixed_rows_and_reports_original_values():
+    leads, report, _ = lead_validation.validate_leads(
+        _leads(), policy='repair', field_lengths={'Company': 15}, picklists={'LeadSource': ['Web', 'Phone']})
+
+    assert len(leads) == 4
+    assert list(leads['Email']) == ['silva@exemplo.com', '', 'ana@exemplo.com', 'lima@exemplo.com.br']
+    assert list(leads['Company'])[1] == 'Empresa Muito L'
+    assert list(leads['Phone']) == ['11987654321', '1134567890', '', '']
+    assert list(leads['LeadSource']) == ['Web', 'Web', 'Web', '']
+    assert set(report['action']) == {'repaired'}
+    assert list(report['row']) == [2, 3, 4]
+    assert report['Email'][0] == 'souza@'
+    assert lead_validation.rejected_rows(report).empty
+
+
+def test_rejected_rows_are_not_sent_and_go_to_the_report_file(fake_salesforce, tmp_path):
+    csv_path = tmp_path / 'leads.csv'
+    pd.DataFrame({'LastName': ['Silva', 'Souza'], 'Company': 'Empresa Teste',
+                  'Email': ['silva@exemplo.com', 'souza@'], 'Phone': ['11987654321', '']}).to_csv(csv_path, index=False)
+
+    success, results = salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False)
+
+    assert success
+    rejected = [result for result in results if not result['success']]
+    assert [result['name'] for result in rejected] == ['Souza']
+    assert rejected[0]['errors'] == ['Validação - Email: email inválido']
+    assert [lead['LastName'] for lead in fake_salesforce.org.leads.values()] == ['Silva']
+    report = pd.read_csv(tmp_path / 'leads.rejected.csv', dtype=str, keep_default_na=False)
+    assert list(report.columns) == lead_validation.REPORT_COLUMNS
+    assert list(report['Email']) == ['souza@']
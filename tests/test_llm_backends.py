@@ -0,0 +1,73 @@
+"""Backend local da IA (LLM_BACKEND=fake): mapeamento determinístico, fixtures gravadas e latência."""
+
+import json
+import types
+import pytest
+import llm
+from src.services import llm_backends
+
+SCHEMA = {'FirstName': 'Primeiro nome', 'LastName': 'Sobrenome', 'Company': 'Empresa',
+          'Email': 'Email', 'Phone': 'Telefone', 'Title': 'Cargo'}
+SNIPPET = "Nome;Sobrenome;Empresa;Contato\nAna;Silva;Empresa Teste;ana@exemplo.com\n"
+
+
+@pytest.fixture
+def use_backend():
+    yield llm_backends.set_backend
+    llm_backends.set_backend(None)
+
+
+def test_fake_backend_maps_columns_deterministically(monkeypatch, use_backend):
+    monkeypatch.setenv('LLM_BACKEND', 'fake')
+    monkeypatch.delenv('LLM_FIXTURES_DIR', raising=False)
+    use_backend(None)
+
+    mapping = llm.get_column_mapping_from_ai(SNIPPET, SCHEMA)
+
+    assert llm_backends.get_backend().name == 'fake'
+    assert mapping == {'FirstName': 'Nome', 'LastName': 'Sobrenome', 'Company': 'Empresa',
+                       'Email': 'Contato', 'Phone': None, 'Title': None}
+    assert llm.get_column_mapping_from_ai(SNIPPET, SCHEMA) == mapping
+    assert llm.get_ai_completion("Olá") == llm_backends.FAKE_COMPLETION_TEXT
+
+
+def test_fake_backend_extracts_leads_from_free_text(use_backend):
+    use_backend(llm_backends.FakeBackend())
+    text = "```\nNome: Ana Silva\nEmpresa: Empresa Teste\nana@exemplo.com (11) 98765-4321\n\nsem dados\n```"
+
+    leads = json.loads(llm.get_ai_completion(f"Extraia os leads:\n{text}", json_mode=True))
+
+    assert len(leads) == 1
+    assert (leads[0]['FirstName'], leads[0]['LastName'], leads[0]['Company']) == ('Ana', 'Silva', 'Empresa Teste')
+    assert leads[0]['Email'] == 'ana@exemplo.com'
+    assert ''.join(filter(str.isdigit, leads[0]['Phone'])) == '11987654321'
+
+
+def test_recorded_fixtures_are_replayed_by_the_fake_backend(tmp_path, use_backend):
+    recorded = '{"FirstName": null, "LastName": "Sobrenome", "Company": "Empresa", "Email": "Contato", "Phone": null, "Title": null}'
+    recorder = llm_backends.OpenRouterBackend(api_key='chave', fixtures_dir=str(tmp_path), record=True)
+    message = types.SimpleNamespace(content=recorded)
+    recorder._client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(
+        create=lambda **params: types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)]))))
+    use_backend(recorder)
+    expected = llm.get_column_mapping_from_ai(SNIPPET, SCHEMA)
+    assert len(list(tmp_path.glob('column_mapping-*.json'))) == 1
+
+    use_backend(llm_backends.FakeBackend(fixtures_dir=str(tmp_path)))
+
+    assert llm.get_column_mapping_from_ai(SNIPPET, SCHEMA) == expected
+    assert expected['FirstName'] is None
+
+
+def test_fake_latency_is_seeded_and_bounded(monkeypatch):
+    delays = []
+    monkeypatch.setattr(llm_backends.time, 'sleep', delays.append)
+    for _ in range(2):
+        backend = llm_backends.FakeBackend(latency=0.2, latency_jitter=0.1, seed=3)
+        for _ in range(3):
+            backend.complete('completion', {'messages': [{'content': 'Olá'}]})
+
+    assert delays[:3] == delays[3:]
+    assert all(0.2 <= delay <= 0.3 for delay in delays)
+    with pytest.raises(ValueError):
+        llm_backends.create_backend('outro')
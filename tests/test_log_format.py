@@ -0,0 +1,51 @@
+"""Saída NDJSON dos logs (LOG_FORMAT=json) com id de correlação e etapa."""
+
+import json
+import logging
+import threading
+import pytest
+from src.utils import log_format, log_queue
+from src.utils.log_context import correlation_scope, run_in_context, stage_scope
+
+
+@pytest.fixture
+def json_logger(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_format, 'LOG_OUTPUT_FORMAT', 'json')
+    path = tmp_path / 'ndjson.log'
+    handler = log_queue.get_queue_handler('teste_ndjson', [(str(path), logging.DEBUG)], 1024 * 1024, 1)
+    logger = logging.getLogger('teste_ndjson.pipeline')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    yield logger, path
+    logger.removeHandler(handler)
+    with log_queue._lock:
+        log_queue._restart_listener()
+
+
+def _entries(path):
+    log_queue.stop_log_listener()
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_each_record_is_one_json_object_with_context_fields(json_logger):
+    logger, path = json_logger
+
+    with correlation_scope('job-abc'), stage_scope('ai_mapping'):
+        logger.info("mapeamento com %d colunas", 12, extra={'duration_ms': 35.2})
+        worker = threading.Thread(target=run_in_context(lambda: logger.warning("na thread do pool")))
+        worker.start()
+        worker.join()
+        try:
+            raise ValueError("linha\nquebrada")
+        except ValueError:
+            logger.exception("falhou")
+    logger.info("fora do job")
+
+    first, pooled, failed, outside = _entries(path)
+    assert first['msg'] == 'mapeamento com 12 colunas'
+    assert first['level'] == 'INFO' and first['logger'] == 'teste_ndjson.pipeline'
+    assert (first['correlation_id'], first['stage'], first['duration_ms']) == ('job-abc', 'ai_mapping', 35.2)
+    assert (pooled['correlation_id'], pooled['stage']) == ('job-abc', 'ai_mapping')
+    assert 'ValueError: linha\nquebrada' in failed['exc']
+    assert 'correlation_id' not in outside and 'stage' not in outside
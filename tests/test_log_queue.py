@@ -0,0 +1,64 @@
+"""Fila de logging compartilhada: gravação em segundo plano e esvaziamento no encerramento."""
+
+import logging
+import threading
+import pytest
+from src.utils import log_queue
+
+
+@pytest.fixture
+def restart_listener():
+    yield
+    with log_queue._lock:
+        log_queue._restart_listener()
+
+
+def test_records_are_written_by_the_listener_and_flushed_on_stop(tmp_path, restart_listener):
+    path = tmp_path / 'familia.log'
+    writers = []
+
+    def preparer(record):
+        writers.append(threading.current_thread())
+        record.msg = record.msg.upper()
+
+    handler = log_queue.get_queue_handler('teste_fila', [(str(path), logging.DEBUG)], 1024 * 1024, 1,
+                                          preparer=preparer)
+    logger = logging.getLogger('teste_fila.registro')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(500):
+            logger.debug("mensagem %d de %s", i, 'teste')
+        log_queue.stop_log_listener()
+    finally:
+        logger.removeHandler(handler)
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 500
+    assert 'MENSAGEM 0 DE TESTE' in lines[0]
+    assert 'MENSAGEM 499 DE TESTE' in lines[-1]
+    # A preparação (e a gravação) roda na thread do listener, não na de quem registra
+    assert threading.current_thread() not in writers
+
+
+def test_other_families_do_not_reach_the_file(tmp_path, restart_listener):
+    path = tmp_path / 'somente_a.log'
+    handler_a = log_queue.get_queue_handler('teste_a', [(str(path), logging.INFO)], 1024 * 1024, 1)
+    handler_b = log_queue.get_queue_handler('teste_b', [(str(tmp_path / 'b.log'), logging.INFO)], 1024 * 1024, 1)
+    logger_a, logger_b = logging.getLogger('teste_a.x'), logging.getLogger('teste_b.x')
+    for logger, handler in ((logger_a, handler_a), (logger_b, handler_b)):
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+    try:
+        logger_a.info("da família a")
+        logger_b.info("da família b")
+        log_queue.stop_log_listener()
+    finally:
+        logger_a.removeHandler(handler_a)
+        logger_b.removeHandler(handler_b)
+
+    content = path.read_text(encoding='utf-8')
+    assert 'da família a' in content
+    assert 'da família b' not in content
@@ -0,0 +1,76 @@
+"""Cache dos mapeamentos de colunas da IA por layout de cabeçalho."""
+
+import os
+import time
+import pytest
+from src.utils import mapping_cache
+
+SCHEMA = {'LastName': 'Sobrenome', 'Company': 'Empresa'}
+COLUMNS = ['Nome', 'Empresa']
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'mappings'
+    monkeypatch.setattr(mapping_cache, 'MAPPING_CACHE_DIR', str(directory))
+    monkeypatch.setattr(mapping_cache, '_memory', {})
+    return directory
+
+
+class _Mapper:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'LastName': 'Nome', 'Company': 'Empresa', 'call': self.calls}
+
+
+def test_same_layout_reuses_mapping_until_refresh(cache_dir):
+    mapper = _Mapper()
+    first = mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper)
+    again = mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper)
+    assert mapper.calls == 1
+    assert again == first
+
+    refreshed = mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper, refresh=True)
+    assert mapper.calls == 2
+    assert refreshed['call'] == 2
+    # O mapeamento refeito substitui o anterior, também para outros processos
+    mapping_cache._memory.clear()
+    assert mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper)['call'] == 2
+    assert mapper.calls == 2
+
+
+def test_key_changes_with_schema_and_prompt_version(monkeypatch):
+    key = mapping_cache.layout_key(COLUMNS, SCHEMA)
+    assert mapping_cache.layout_key(COLUMNS, dict(SCHEMA, Email='Email')) != key
+    monkeypatch.setattr(mapping_cache, 'COLUMN_MAPPING_PROMPT_VERSION', mapping_cache.COLUMN_MAPPING_PROMPT_VERSION + 1)
+    assert mapping_cache.layout_key(COLUMNS, SCHEMA) != key
+
+
+def test_expired_entries_are_requested_again(cache_dir, monkeypatch):
+    mapper = _Mapper()
+    mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper)
+    monkeypatch.setattr(mapping_cache, 'MAPPING_CACHE_TTL_SECONDS', 60)
+    real_time = time.time
+    monkeypatch.setattr(mapping_cache.time, 'time', lambda: real_time() + 120)
+    mapping_cache.get_or_create_mapping(COLUMNS, SCHEMA, mapper)
+    assert mapper.calls == 2
+
+
+def test_max_entries_evicts_oldest_and_clear_removes_all(cache_dir, monkeypatch):
+    monkeypatch.setattr(mapping_cache, 'MAPPING_CACHE_MAX_ENTRIES', 2)
+    for index in range(3):
+        mapping_cache.get_or_create_mapping([f'Coluna {index}'], SCHEMA, _Mapper())
+        path = mapping_cache._cache_path(mapping_cache.layout_key([f'Coluna {index}'], SCHEMA))
+        os.utime(path, (index, index))
+    remaining = sorted(os.listdir(cache_dir))
+    assert len(remaining) == 2
+    assert f"{mapping_cache.layout_key(['Coluna 0'], SCHEMA)}.json" not in remaining
+
+    assert mapping_cache.clear_cache() == 2
+    assert os.listdir(cache_dir) == []
+    mapper = _Mapper()
+    mapping_cache.get_or_create_mapping(['Coluna 2'], SCHEMA, mapper)
+    assert mapper.calls == 1
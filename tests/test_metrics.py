@@ -0,0 +1,89 @@
+"""Métricas em modo multi-processo (METRICS_MULTIPROC_DIR): soma entre pids e limpeza."""
+
+import os
+import signal
+import subprocess
+import sys
+import pytest
+from src.utils import metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORKER = """
+import sys, time
+from src.utils import metrics
+metrics.ROWS_PROCESSED.inc(int(sys.argv[1]))
+metrics.UPLOADS_IN_FLIGHT.inc()
+print('ready', flush=True)
+if sys.argv[2] == 'hang':
+    time.sleep(60)
+"""
+
+
+@pytest.fixture
+def multiproc_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'metrics'
+    directory.mkdir()
+    monkeypatch.setattr(metrics, 'METRICS_MULTIPROC_DIR', str(directory))
+    monkeypatch.setattr(metrics, '_store', None)
+    monkeypatch.setattr(metrics, '_store_pid', None)
+    monkeypatch.setenv('METRICS_MULTIPROC_DIR', str(directory))
+    return directory
+
+
+def _worker(rows, mode='exit'):
+    return subprocess.Popen([sys.executable, '-c', _WORKER, str(rows), mode], cwd=ROOT,
+                            stdout=subprocess.PIPE, text=True)
+
+
+def _db_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.db'))
+
+
+def _value(name):
+    return metrics._collect_values().get(metrics._sample_key(name, {}), 0.0)
+
+
+def test_finished_workers_are_merged_into_archive(multiproc_dir):
+    for rows in (3, 4):
+        worker = _worker(rows)
+        worker.communicate(timeout=30)
+        assert worker.returncode == 0
+    metrics.ROWS_PROCESSED.inc(5)
+
+    assert _value('upload_rows_processed_total') == 12
+    # Gauges de processos encerrados não contam
+    assert _value('upload_jobs_in_flight') == 0
+    files = _db_files(multiproc_dir)
+    assert metrics.ARCHIVE_FILENAME in files
+    assert len(files) == 2  # archive.db e o arquivo deste processo
+
+
+def test_killed_worker_is_merged_by_child_exit_hook(multiproc_dir):
+    worker = _worker(7, mode='hang')
+    assert worker.stdout.readline().strip() == 'ready'
+    assert _value('upload_jobs_in_flight') == 1
+    worker.send_signal(signal.SIGKILL)
+    worker.wait(timeout=30)
+    worker.stdout.close()
+    assert any(name.startswith(f"{worker.pid}_") for name in _db_files(multiproc_dir))
+
+    metrics.mark_process_dead(worker.pid)
+    metrics.mark_process_dead(worker.pid)
+
+    assert not any(name.startswith(f"{worker.pid}_") for name in _db_files(multiproc_dir))
+    assert _value('upload_rows_processed_total') == 7
+    assert _value('upload_jobs_in_flight') == 0
+
+
+def test_reused_pid_starts_a_new_file(multiproc_dir):
+    stale = multiproc_dir / f"{os.getpid()}_1.db"
+    store = metrics._MmapStore(str(stale))
+    store.inc(metrics._sample_key('upload_rows_processed_total', {}), 9)
+    store.close()
+
+    metrics.ROWS_PROCESSED.inc(1)
+
+    assert metrics._get_store().items() == [(metrics._sample_key('upload_rows_processed_total', {}), 1.0)]
+    metrics.reset_multiprocess_dir()
+    assert _db_files(multiproc_dir) == []
@@ -0,0 +1,92 @@
+"""Middleware de logging das requisições: corpo limitado, cabeçalhos sensíveis omitidos."""
+
+import io
+import json
+import logging
+import pytest
+from flask import Flask, jsonify, request
+from src.utils import request_logging
+from src.utils.request_logging import init_request_logging, log_request_body
+
+
+class _RecordingLogger:
+    def __init__(self, level=logging.DEBUG):
+        self.level = level
+        self.messages = []
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def _log(self, level, message, *args, **kwargs):
+        if self.is_enabled_for(level):
+            self.messages.append(message % args)
+
+    def debug(self, message, *args, **kwargs):
+        self._log(logging.DEBUG, message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        self._log(logging.INFO, message, *args, **kwargs)
+
+    def body(self):
+        return [message for message in self.messages if message.startswith('Body: ')]
+
+
+def _client(logger):
+    app = Flask(__name__)
+
+    @app.route('/eco', methods=['POST'])
+    @log_request_body
+    def eco():
+        return jsonify(request.get_json())
+
+    @app.route('/arquivo', methods=['POST'])
+    def arquivo():
+        return jsonify({'tamanho': len(request.files['file'].read())})
+
+    init_request_logging(app, logger)
+    return app.test_client()
+
+
+def test_marked_route_logs_a_capped_body_and_still_reads_it(monkeypatch):
+    monkeypatch.setattr(request_logging, 'REQUEST_LOG_BODY_MAX_CHARS', 20)
+    logger = _RecordingLogger()
+    payload = {'texto': 'x' * 100}
+
+    response = _client(logger).post('/eco', json=payload,
+                                     headers={'Authorization': 'Bearer segredo', 'Cookie': 'session=segredo'})
+
+    assert response.get_json() == payload
+    assert logger.body() == [f"Body: {json.dumps(payload)[:20]}... (+{len(json.dumps(payload)) - 20} caracteres)"]
+    headers = next(message for message in logger.messages if message.startswith('Headers: '))
+    assert 'segredo' not in headers
+    assert any(message.startswith('Response: POST /eco -> 200 (duration_ms=') for message in logger.messages)
+
+
+def test_uploads_and_large_bodies_are_only_described(monkeypatch):
+    logger = _RecordingLogger()
+    client = _client(logger)
+
+    response = client.post('/arquivo', data={'file': (io.BytesIO(b'a' * 5000), 'leads.csv')},
+                           content_type='multipart/form-data')
+    assert response.get_json() == {'tamanho': 5000}
+
+    monkeypatch.setattr(request_logging, 'REQUEST_LOG_BODY_READ_LIMIT', 10)
+    client.post('/eco', json={'texto': 'longo demais'})
+
+    first, second = logger.body()
+    assert first.startswith('Body: <multipart/form-data, ') and first.endswith(' bytes>')
+    assert second.endswith('bytes, acima do limite de leitura>')
+
+
+def test_nothing_beyond_the_summary_is_logged_at_info():
+    logger = _RecordingLogger(level=logging.INFO)
+    _client(logger).post('/eco', json={'texto': 'segredo'})
+    assert len(logger.messages) == 2
+    assert not any('segredo' in message for message in logger.messages)
+
+
+@pytest.mark.parametrize('sent, echoed', [('pedido-123', True), ('inválido com espaço', False)])
+def test_request_id_is_accepted_only_when_well_formed(sent, echoed):
+    response = _client(_RecordingLogger()).post('/eco', json={}, headers={'X-Request-ID': sent})
+    assert (response.headers['X-Request-ID'] == sent) is echoed
+    assert response.headers['X-Request-ID']
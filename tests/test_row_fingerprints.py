@@ -0,0 +1,58 @@
+"""Importação incremental: linhas já importadas da mesma origem, sem alteração, não são reenviadas."""
+
+import io
+import pandas as pd
+import pytest
+from src.services import row_fingerprints
+
+
+@pytest.fixture
+def fingerprint_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(row_fingerprints, 'ROW_FINGERPRINT_PATH', str(tmp_path / 'row_fingerprints.sqlite3'))
+
+
+def test_fingerprints_ignore_case_spacing_and_column_order():
+    records = pd.DataFrame({'LastName': ['Silva', 'Souza'], 'Email': ['ana@exemplo.com', 'joao@exemplo.com']})
+    same = pd.DataFrame({'Email': [' ANA@exemplo.com', 'joao@exemplo.com'], 'LastName': ['silva ', 'Souza  Lima']})
+
+    hashes = row_fingerprints.fingerprints(records)
+
+    assert hashes[0] == row_fingerprints.fingerprints(same)[0]
+    assert hashes[1] != row_fingerprints.fingerprints(same)[1]
+    assert hashes.equals(row_fingerprints.fingerprints(records))
+
+
+def test_recorded_rows_are_known_only_for_their_source(fingerprint_db):
+    records = pd.DataFrame({'LastName': ['Silva', 'Souza'], 'Email': ['ana@exemplo.com', 'joao@exemplo.com']})
+    source = row_fingerprints.source_key('/tmp/Leads  Feira.xlsx')
+    assert source == 'leads feira.xlsx'
+
+    known, hashes = row_fingerprints.diff(source, records)
+    assert not known.any()
+    assert row_fingerprints.record(source, hashes.iloc[:1]) == 1
+
+    assert list(row_fingerprints.diff(source, records)[0]) == [True, False]
+    assert not row_fingerprints.diff('outra origem', records)[0].any()
+
+
+def _upload(app_client, rows):
+    csv = 'Nome,Sobrenome,Empresa,E-mail\n' + ''.join(f"{row}\n" for row in rows)
+    return app_client.post('/upload_file', data={
+        'file': (io.BytesIO(csv.encode('utf-8')), 'leads.csv'), 'environment': 'sandbox', 'lead_owner': '',
+    })
+
+
+def test_reupload_of_the_same_source_sends_only_new_or_changed_rows(app_client, fake_salesforce):
+    rows = [f"Ana,Silva{i},Empresa Teste,ana{i}@exemplo.com" for i in range(3)]
+    _upload(app_client, rows)
+    assert len(fake_salesforce.org.leads) == 3
+    jobs = len(fake_salesforce.org.jobs)
+
+    _upload(app_client, rows)
+    assert (len(fake_salesforce.org.leads), len(fake_salesforce.org.jobs)) == (3, jobs)
+
+    rows[1] = 'Ana,Silva1,Empresa Teste,ana.silva@exemplo.com'
+    _upload(app_client, rows + ['João,Souza,Empresa Teste,joao@exemplo.com'])
+    emails = sorted(lead['Email'] for lead in fake_salesforce.org.leads.values())
+    assert emails == ['ana.silva@exemplo.com', 'ana0@exemplo.com', 'ana1@exemplo.com', 'ana2@exemplo.com',
+                      'joao@exemplo.com']
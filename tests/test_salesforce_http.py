@@ -0,0 +1,81 @@
+"""Novas tentativas com backoff nas falhas transitórias do Salesforce."""
+
+import io
+import pytest
+import requests
+from src.services import salesforce_http
+
+URL = 'https://test.my.salesforce.com/services/data/v63.0/jobs/ingest/7505e000000abcdAAA'
+
+
+def _response(status, text='', headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode('utf-8')
+    response.raw = io.BytesIO(response._content)
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    """Substitui requests.request por respostas roteirizadas e registra as esperas."""
+    state = {'script': [], 'calls': [], 'sleeps': []}
+
+    def fake_request(method, url, **kwargs):
+        state['calls'].append(method)
+        outcome = state['script'].pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(salesforce_http.requests, 'request', fake_request)
+    monkeypatch.setattr(salesforce_http.time, 'sleep', state['sleeps'].append)
+    monkeypatch.setattr(salesforce_http, 'RETRY_MAX_ATTEMPTS', 4)
+    monkeypatch.setattr(salesforce_http, 'RETRY_BASE_DELAY', 0.5)
+    return state
+
+
+def test_transient_failures_back_off_and_honor_retry_after(scripted):
+    scripted['script'] = [_response(503), _response(429, headers={'Retry-After': '2'}), _response(200, '{}')]
+
+    response = salesforce_http.get(URL)
+
+    assert response.status_code == 200
+    assert len(scripted['calls']) == 3
+    backoff, retry_after = scripted['sleeps']
+    assert 0 <= backoff <= 0.5
+    assert retry_after == 2.0
+
+
+def test_post_is_retried_only_when_the_caller_allows_it(scripted):
+    scripted['script'] = [_response(503)]
+    assert salesforce_http.post(URL, json={}).status_code == 503
+    assert scripted['sleeps'] == []
+
+    scripted['script'] = [_response(503), _response(201)]
+    assert salesforce_http.post(URL, json={}, retry=True).status_code == 201
+
+    scripted['script'] = [_response(503)]
+    assert salesforce_http.put(URL, data=(chunk for chunk in [b'a'])).status_code == 503
+    assert len(scripted['sleeps']) == 1
+
+
+def test_connection_errors_raise_after_the_last_attempt(scripted):
+    scripted['script'] = [requests.exceptions.ConnectionError('recusada')] * 4
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        salesforce_http.get(URL)
+
+    assert len(scripted['calls']) == 4
+    assert len(scripted['sleeps']) == 3
+    assert all(delay <= min(salesforce_http.RETRY_MAX_DELAY, 0.5 * 2 ** i) for i, delay in enumerate(scripted['sleeps']))
+
+
+def test_daily_limit_and_long_retry_after_are_not_retried(scripted):
+    scripted['script'] = [_response(403, '[{"errorCode":"REQUEST_LIMIT_EXCEEDED","message":"TotalRequests Limit exceeded."}]')]
+    assert salesforce_http.get(URL).status_code == 403
+
+    scripted['script'] = [_response(429, headers={'Retry-After': '300'})]
+    assert salesforce_http.get(URL, deadline=60).status_code == 429
+    assert scripted['sleeps'] == []
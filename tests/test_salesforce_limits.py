@@ -0,0 +1,53 @@
+"""Limites da org (Sforce-Limit-Info, /limits) e throttle dos jobs de ingestão."""
+
+import pandas as pd
+import pytest
+from src.services import salesforce_api, salesforce_limits
+
+
+@pytest.fixture(autouse=True)
+def fresh_limits(monkeypatch):
+    monkeypatch.setattr(salesforce_limits, '_limits', {})
+    monkeypatch.setattr(salesforce_limits, '_last_sample', 0.0)
+
+
+def test_limit_info_header_sets_ingest_headroom():
+    salesforce_limits.record_limit_info('api-usage=900/1000')
+    salesforce_limits.record_limit_info('cabeçalho sem uso')
+
+    assert salesforce_limits.ingest_headroom() == (0.1, 'DailyApiRequests')
+    assert salesforce_limits.get_limits()['DailyApiRequests']['source'] == 'header'
+
+    salesforce_limits.update_from_limits({'DailyBulkApiBatches': {'Max': 100, 'Remaining': 5}})
+    assert salesforce_limits.ingest_headroom() == (0.05, 'DailyBulkApiBatches')
+
+
+def test_low_headroom_slows_the_bucket_and_the_reserve_rejects(monkeypatch):
+    bucket = salesforce_limits._TokenBucket(60, 1)
+    assert bucket.try_acquire(1.0) == 0
+    full_rate_wait = bucket.try_acquire(1.0)
+    assert bucket.try_acquire(0.5) == pytest.approx(2 * full_rate_wait, rel=0.05)
+
+    monkeypatch.setattr(salesforce_limits, '_ingest_bucket', salesforce_limits._TokenBucket(60, 1))
+    salesforce_limits.record_limit_info('api-usage=100/1000')
+    assert salesforce_limits.acquire_ingest_slot(max_wait=0) == (True, None)
+    allowed, reason = salesforce_limits.acquire_ingest_slot(max_wait=0)
+    assert not allowed and 'sem vaga' in reason
+
+    salesforce_limits.record_limit_info('api-usage=960/1000')
+    allowed, reason = salesforce_limits.acquire_ingest_slot(max_wait=0)
+    assert not allowed and 'DailyApiRequests' in reason
+
+
+def test_org_near_its_daily_limit_gets_no_new_jobs(fake_salesforce, tmp_path):
+    fake_salesforce.org.config.daily_api_requests = 1000
+    fake_salesforce.org.api_usage = 990
+    csv_path = tmp_path / 'leads.csv'
+    pd.DataFrame({'LastName': ['Silva', 'Souza'], 'Company': 'Empresa Teste',
+                  'Email': ['silva@exemplo.com', 'souza@exemplo.com']}).to_csv(csv_path, index=False)
+
+    success, _ = salesforce_api.create_leads_from_csv(str(csv_path), 'sandbox', streaming=False)
+
+    assert not success
+    assert fake_salesforce.org.jobs == {}
+    assert salesforce_limits.ingest_headroom()[0] < salesforce_limits.LIMIT_RESERVE_RATIO
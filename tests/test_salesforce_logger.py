@@ -0,0 +1,44 @@
+"""Mascaramento de dados sensíveis nos logs do Salesforce (gravados pela fila de logging)."""
+
+import time
+import uuid
+from src.utils import salesforce_logger
+
+TOKEN = '00D5e000000abcd!AQ4AQFakeAccessToken1234567890'
+
+
+def _wait_for(path, marker, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = ''
+        if marker in content:
+            return content
+        time.sleep(0.02)
+    raise AssertionError(f"{marker} não chegou a {path}")
+
+
+def test_access_token_does_not_reach_log_files():
+    logger = salesforce_logger.get_salesforce_logger('salesforce.test_masking')
+    marker = uuid.uuid4().hex
+
+    logger.info("Token obtido: access_token=%s (%s)", TOKEN, marker)
+    logger.info("Iniciando obtenção de token de acesso (%s)", marker)
+    logger.log_request('https://test.my.salesforce.com/services/data', 'POST',
+                       {'Authorization': f'Bearer {TOKEN}'}, data={'access_token': TOKEN})
+    try:
+        raise RuntimeError(f"Falha com Bearer {TOKEN}")
+    except RuntimeError:
+        logger.exception("Erro na requisição (%s-erro)", marker)
+
+    main_log = _wait_for(salesforce_logger.LOG_FILE, f"{marker}-erro")
+    request_log = _wait_for(salesforce_logger.REQUEST_LOG_FILE, f"{marker}-erro")
+
+    assert marker in main_log
+    assert 'SALESFORCE HTTP REQUEST' in request_log
+    assert TOKEN not in main_log
+    assert f"Iniciando obtenção de token de acesso ({marker})" in main_log
+    assert TOKEN not in request_log
@@ -0,0 +1,57 @@
+"""Cache em disco do describe do Lead, revalidado com If-Modified-Since."""
+
+import json
+import pytest
+from src.services import salesforce_api, salesforce_http, salesforce_metadata
+
+
+@pytest.fixture
+def describe_calls(fake_salesforce, monkeypatch):
+    """Status das respostas do describe e número de autenticações feitas para obtê-lo."""
+    monkeypatch.setattr(salesforce_metadata, '_memory', {})
+    calls = {'statuses': [], 'contexts': 0}
+    get = salesforce_http.get
+
+    def spy_get(url, **kwargs):
+        response = get(url, **kwargs)
+        if url.endswith('/describe'):
+            calls['statuses'].append(response.status_code)
+        return response
+
+    def context_factory():
+        calls['contexts'] += 1
+        return salesforce_api._bulk_api_context()
+
+    monkeypatch.setattr(salesforce_http, 'get', spy_get)
+    calls['factory'] = context_factory
+    return calls
+
+
+def test_describe_is_cached_on_disk_and_revalidated(describe_calls, tmp_path, monkeypatch):
+    metadata = salesforce_metadata.get_sobject_metadata('Lead', describe_calls['factory'])
+
+    assert describe_calls['statuses'] == [200]
+    assert salesforce_metadata.field_lengths(metadata)['Company'] == 255
+    assert 'Id' not in salesforce_metadata.field_lengths(metadata)
+    assert 'Email' in salesforce_metadata.createable_fields(metadata)
+    assert 'LastModifiedDate' not in salesforce_metadata.updateable_fields(metadata)
+    assert salesforce_metadata.restricted_picklists(metadata) == {}
+    cache_file, = (tmp_path / 'cache').glob('*_Lead.json')
+    assert json.loads(cache_file.read_text(encoding='utf-8'))['fields']['Import_Key__c']['external_id']
+
+    # Dentro do intervalo de revalidação nem a autenticação acontece, mesmo em outro processo (sem memória)
+    monkeypatch.setattr(salesforce_metadata, '_memory', {})
+    assert salesforce_metadata.get_sobject_metadata('Lead', describe_calls['factory']) == metadata
+    assert (describe_calls['contexts'], describe_calls['statuses']) == (1, [200])
+
+    monkeypatch.setattr(salesforce_metadata, 'REVALIDATE_INTERVAL', 0)
+    revalidated = salesforce_metadata.get_sobject_metadata('Lead', describe_calls['factory'])
+    assert describe_calls['statuses'] == [200, 304]
+    assert revalidated['fields'] == metadata['fields']
+
+
+def test_cached_describe_is_used_when_salesforce_is_unreachable(describe_calls, monkeypatch):
+    metadata = salesforce_metadata.get_sobject_metadata('Lead', describe_calls['factory'])
+    monkeypatch.setattr(salesforce_metadata, 'REVALIDATE_INTERVAL', 0)
+
+    assert salesforce_metadata.get_sobject_metadata('Lead', lambda: None) == metadata
@@ -0,0 +1,51 @@
+"""Snippet do arquivo enviado à IA no mapeamento de colunas."""
+
+import csv
+import io
+import pandas as pd
+from src.utils.snippet_helper import build_ai_snippet, estimate_tokens, sample_csv_rows
+
+
+def _rows(snippet):
+    return list(csv.reader(io.StringIO(snippet), delimiter=';'))
+
+
+def test_snippet_keeps_header_and_distinct_non_empty_examples():
+    df = pd.DataFrame({
+        'Nome do Contato': ['Ana', 'Ana', None, 'Bruno', 'Carla'] * 40,
+        'Observação': ['', 'nan', '', '', 'texto ' * 50] * 40,
+    })
+
+    rows = _rows(build_ai_snippet(df))
+
+    assert rows[0] == ['Nome do Contato', 'Observação']
+    names = [row[0] for row in rows[1:] if row[0]]
+    assert names == ['Ana', 'Bruno', 'Carla']
+    notes = [row[1] for row in rows[1:] if row[1]]
+    assert len(notes) == 1 and notes[0].endswith('…') and len(notes[0]) <= 60
+
+
+def test_snippet_fits_token_budget_without_cutting_the_header():
+    columns = [f"Coluna de dados número {i}" for i in range(30)]
+    df = pd.DataFrame({column: [f"valor longo {column} linha {row} " * 3 for row in range(20)] for column in columns})
+
+    snippet = build_ai_snippet(df, token_budget=400)
+    unbounded = build_ai_snippet(df, token_budget=100000)
+
+    assert estimate_tokens(snippet) <= 400
+    assert estimate_tokens(snippet) < estimate_tokens(unbounded)
+    assert _rows(snippet)[0] == columns
+    assert len(_rows(snippet)) >= 2
+
+
+def test_large_csv_is_sampled_beyond_the_first_rows(tmp_path):
+    path = tmp_path / 'leads.csv'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Nome;Cidade\n')
+        for i in range(20000):
+            f.write(f"Pessoa {i};{'Recife' if i > 10000 else 'Natal'}\n")
+
+    sampled = sample_csv_rows(str(path), ';', 'utf-8', ['Nome', 'Cidade'])
+
+    assert not sampled.empty
+    assert 'Recife' in set(sampled['Cidade'])
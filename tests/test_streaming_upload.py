@@ -0,0 +1,57 @@
+"""
+Envio em streaming (stream_leads_from_csv) com falha de conexão no upload de um
+job e com blocos sem registros, contra o Salesforce falso local.
+"""
+
+import pandas as pd
+import requests
+from src.services import salesforce_api, salesforce_http
+
+
+def _write_leads(path, count):
+    pd.DataFrame({
+        'LastName': [f"Silva{i}" for i in range(count)],
+        'Company': 'Empresa Teste',
+        'Email': [f"silva{i}@exemplo.com" for i in range(count)],
+    }).to_csv(path, index=False)
+
+
+def test_connection_error_on_upload_fails_only_that_job(fake_salesforce, tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'leads.csv')
+    _write_leads(csv_path, 300)
+    request = requests.request
+    puts = []
+
+    def reset_second_upload(method, url, **kwargs):
+        if method == 'PUT':
+            puts.append(url)
+            if len(puts) == 2:
+                next(iter(kwargs['data']), None)
+                raise requests.exceptions.ConnectionError('connection reset by peer')
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(salesforce_http.requests, 'request', reset_second_upload)
+    success, summary = salesforce_api.stream_leads_from_csv(csv_path, chunksize=50, max_upload_bytes=3000)
+
+    assert success
+    assert len(puts) > 2
+    assert len(summary['jobs']) == len(puts) - 1
+    assert 0 < summary['failed_count'] < 300
+    assert summary['success_count'] == 300 - summary['failed_count'] == len(fake_salesforce.org.leads)
+    failed_job = puts[1].split('/')[-2]
+    assert fake_salesforce.org.jobs[failed_job]['state'] == 'Aborted'
+
+
+def test_no_job_for_blocks_without_records(fake_salesforce, tmp_path):
+    csv_path = str(tmp_path / 'leads.csv')
+    _write_leads(csv_path, 100)
+    salesforce_api.stream_leads_from_csv(csv_path, chunksize=50)
+    jobs = fake_salesforce.org.stats['jobs']
+
+    # Todos os leads já estão no índice local: nenhum job só com o cabeçalho
+    success, summary = salesforce_api.stream_leads_from_csv(csv_path, chunksize=50)
+
+    assert not success
+    assert summary['jobs'] == []
+    assert summary['existing_count'] == 100
+    assert fake_salesforce.org.stats['jobs'] == jobs
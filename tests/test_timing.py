@@ -0,0 +1,54 @@
+"""Medição de tempo por etapa: spans no job atual, histogramas e etapas de um upload."""
+
+import io
+import threading
+import pytest
+from src.utils import timing
+from src.utils.log_context import get_stage, run_in_context
+
+
+def test_spans_are_recorded_in_the_current_job_including_pool_threads():
+    with timing.track_job('job-1') as timings:
+        with timing.span('leitura', rows=0) as fields:
+            assert get_stage() == 'leitura'
+            fields['rows'] = 10
+        worker = threading.Thread(target=run_in_context(lambda: timing.timed('conversao')(lambda: None)()))
+        worker.start()
+        worker.join()
+        with pytest.raises(RuntimeError):
+            with timing.span('conversao'):
+                raise RuntimeError('falha')
+    with timing.span('fora_do_job'):
+        pass
+
+    spans = timings.spans()
+    assert [span['stage'] for span in spans] == ['leitura', 'conversao', 'conversao']
+    assert spans[0]['rows'] == 10
+    assert all(span['duration_ms'] >= 0 and span['start_offset_ms'] >= 0 for span in spans)
+    assert [(total['stage'], total['count']) for total in timings.stage_totals()] == [('leitura', 1), ('conversao', 2)]
+    assert timing.current_job_timings() is None
+
+
+def test_histograms_accumulate_every_measurement():
+    before = timing.get_stage_histograms().get('etapa_de_teste', {'count': 0})['count']
+    for _ in range(3):
+        with timing.span('etapa_de_teste'):
+            pass
+    histogram = timing.get_stage_histograms()['etapa_de_teste']
+    assert histogram['count'] == before + 3
+    assert histogram['buckets']['+Inf'] == histogram['count']
+    assert histogram['buckets'][str(timing.HISTOGRAM_BUCKETS_MS[-1])] == histogram['count']
+
+
+def test_upload_job_records_pipeline_stages(app_client):
+    csv = 'Nome,Sobrenome,Empresa,E-mail\n' + ''.join(f"Ana,Silva{i},Empresa Teste,ana{i}@exemplo.com\n" for i in range(5))
+    response = app_client.post('/upload_file', data={
+        'file': (io.BytesIO(csv.encode('utf-8')), 'leads.csv'), 'environment': 'sandbox', 'lead_owner': '',
+    })
+    job = app_client.get(f"/jobs/{response.headers['X-Job-ID']}").get_json()['job']
+
+    stages = [total['stage'] for total in job['timings']['stages']]
+    for stage in ('snippet_read', 'ai_mapping', 'full_read', 'salesforce_submission'):
+        assert stage in stages
+    assert job['timings']['elapsed_ms'] >= sum(total['total_ms'] for total in job['timings']['stages']
+                                               if total['stage'] == 'salesforce_submission')
@@ -0,0 +1,18 @@
+"""Leitura do início de um CSV ainda incompleto (upload em partes)."""
+
+from src.utils.upload_reader import read_partial_csv_snippet, read_upload_full
+
+
+def test_partial_snippet_matches_full_read_when_cut_inside_utf8_character(tmp_path):
+    data = ("Razão Social;Endereço;Observação\n"
+            + "".join(f"Empresa {i};Rua São João;ótimo\n" for i in range(50))).encode('utf-8')
+    cut = data.index('ã'.encode('utf-8'), 100) + 1
+    partial_path = tmp_path / 'data.part'
+    partial_path.write_bytes(data[:cut])
+    full_path = tmp_path / 'leads.csv'
+    full_path.write_bytes(data)
+
+    snippet = read_partial_csv_snippet(str(partial_path))
+
+    assert list(snippet.columns) == list(read_upload_full(str(full_path), 'csv').columns)
+    assert list(snippet.columns) == ['Razão Social', 'Endereço', 'Observação']
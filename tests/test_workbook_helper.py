@@ -0,0 +1,62 @@
+"""Planilhas com várias abas: um mapeamento por layout e conversão das abas em paralelo."""
+
+import threading
+import pytest
+from openpyxl import Workbook
+from src.utils import mapping_cache
+from src.utils.workbook_helper import SOURCE_SHEET_COLUMN, process_workbook
+
+SCHEMA = {'LastName': 'Sobrenome', 'Company': 'Empresa'}
+
+
+@pytest.fixture(autouse=True)
+def no_mapping_cache(monkeypatch):
+    monkeypatch.setattr(mapping_cache, 'MAPPING_CACHE_DIR', '')
+
+
+def _write_workbook(path):
+    workbook = Workbook()
+    sul = workbook.active
+    sul.title = 'Sul'
+    for row in (['Nome', 'Empresa'], ['Ana', 'Acme'], ['Bruno', 'Beta']):
+        sul.append(row)
+    workbook.create_sheet('Vazia')
+    norte = workbook.create_sheet('Norte')
+    for row in (['Contato', 'Organização'], ['Carla', 'Gama']):
+        norte.append(row)
+    nordeste = workbook.create_sheet('Nordeste')
+    for row in (['Nome', 'Empresa'], ['Davi', 'Delta']):
+        nordeste.append(row)
+    workbook.save(path)
+
+
+def test_each_layout_is_mapped_once_and_sheets_keep_their_order(tmp_path):
+    path = tmp_path / 'regioes.xlsx'
+    _write_workbook(path)
+    # As duas consultas (uma por layout) só passam da barreira se rodarem ao mesmo tempo
+    barrier = threading.Barrier(2, timeout=10)
+    snippets = []
+
+    def map_columns(snippet):
+        snippets.append(snippet)
+        barrier.wait()
+        if snippet.startswith('Contato'):
+            return '{"LastName": "Contato", "Company": "Organização"}'
+        return {'LastName': 'Nome', 'Company': 'Empresa'}
+
+    df, summary = process_workbook(str(path), SCHEMA, map_columns, max_workers=4)
+
+    assert len(snippets) == 2
+    assert df['LastName'].tolist() == ['Ana', 'Bruno', 'Carla', 'Davi']
+    assert df['Company'].tolist() == ['Acme', 'Beta', 'Gama', 'Delta']
+    assert df[SOURCE_SHEET_COLUMN].tolist() == ['Sul', 'Sul', 'Norte', 'Nordeste']
+    assert [item['sheet'] for item in summary] == ['Sul', 'Vazia', 'Norte', 'Nordeste']
+    assert summary[1]['skipped'] == 'aba vazia'
+    assert summary[0]['layout'] == summary[3]['layout'] != summary[2]['layout']
+
+
+def test_empty_mapping_fails_the_workbook(tmp_path):
+    path = tmp_path / 'regioes.xlsx'
+    _write_workbook(path)
+    with pytest.raises(ValueError):
+        process_workbook(str(path), SCHEMA, lambda snippet: {}, max_workers=2)